@@ -0,0 +1,41 @@
+"""Add embedding_cache
+
+Revision ID: 3b9f1c2d7e4a
+Revises: c7bf5721733e
+Create Date: 2026-10-18 09:12:44.318021
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "3b9f1c2d7e4a"
+down_revision = "c7bf5721733e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "embedding_cache",
+        sa.Column("cache_key", sa.String(), nullable=False),
+        sa.Column("embedding", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "last_used_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("cache_key"),
+    )
+    op.create_index(
+        op.f("ix_embedding_cache_last_used_at"),
+        "embedding_cache",
+        ["last_used_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_embedding_cache_last_used_at"), table_name="embedding_cache")
+    op.drop_table("embedding_cache")
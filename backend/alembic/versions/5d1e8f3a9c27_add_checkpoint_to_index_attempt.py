@@ -0,0 +1,27 @@
+"""Add checkpoint to index_attempt
+
+Revision ID: 5d1e8f3a9c27
+Revises: 8e2a4c6b1f3d
+Create Date: 2026-10-18 16:05:27.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "5d1e8f3a9c27"
+down_revision = "8e2a4c6b1f3d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "index_attempt",
+        sa.Column("checkpoint", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("index_attempt", "checkpoint")
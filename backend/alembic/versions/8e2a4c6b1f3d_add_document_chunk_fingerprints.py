@@ -0,0 +1,29 @@
+"""Add chunk_fingerprints to document
+
+Revision ID: 8e2a4c6b1f3d
+Revises: 3b9f1c2d7e4a
+Create Date: 2026-10-18 11:40:02.551873
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "8e2a4c6b1f3d"
+down_revision = "3b9f1c2d7e4a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column(
+            "chunk_fingerprints", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document", "chunk_fingerprints")
@@ -0,0 +1,29 @@
+"""Add token_counts to chat_message
+
+Revision ID: a7c3e9d2b5f1
+Revises: 5d1e8f3a9c27
+Create Date: 2026-10-18 21:12:43.602915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "a7c3e9d2b5f1"
+down_revision = "5d1e8f3a9c27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "chat_message",
+        sa.Column(
+            "token_counts", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("chat_message", "token_counts")
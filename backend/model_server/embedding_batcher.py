@@ -0,0 +1,101 @@
+import asyncio
+from collections.abc import Callable
+from collections.abc import Hashable
+from dataclasses import dataclass
+
+from onyx.utils.logger import setup_logger
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+
+@dataclass
+class _PendingEmbedRequest:
+    texts: list[str]
+    encode_fnc: Callable[[list[str]], list[Embedding]]
+    future: asyncio.Future[list[Embedding]]
+
+
+class EmbeddingBatcher:
+    """Merges concurrent embedding requests with the same key (same model and encode
+    settings) into a single encode call. A request waits at most `window_seconds` for
+    others to join, the batch is sent early once it reaches `max_batch_size` texts.
+    Requests that are already large enough on their own are not delayed.
+
+    Must only be used from a single event loop, encoding runs in the default executor.
+    """
+
+    def __init__(self, window_seconds: float, max_batch_size: int) -> None:
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+
+        self._pending: dict[Hashable, list[_PendingEmbedRequest]] = {}
+        self._pending_text_counts: dict[Hashable, int] = {}
+        self._flush_handles: dict[Hashable, asyncio.TimerHandle] = {}
+        # keeps references to the running batches so they are not garbage collected
+        self._batch_tasks: set[asyncio.Task] = set()
+
+    async def encode(
+        self,
+        key: Hashable,
+        texts: list[str],
+        encode_fnc: Callable[[list[str]], list[Embedding]],
+    ) -> list[Embedding]:
+        loop = asyncio.get_running_loop()
+        if self.window_seconds <= 0 or len(texts) >= self.max_batch_size:
+            return await loop.run_in_executor(None, encode_fnc, texts)
+
+        future: asyncio.Future[list[Embedding]] = loop.create_future()
+        self._pending.setdefault(key, []).append(
+            _PendingEmbedRequest(texts=texts, encode_fnc=encode_fnc, future=future)
+        )
+        pending_text_count = self._pending_text_counts.get(key, 0) + len(texts)
+        self._pending_text_counts[key] = pending_text_count
+
+        if pending_text_count >= self.max_batch_size:
+            self._flush(key)
+        elif key not in self._flush_handles:
+            self._flush_handles[key] = loop.call_later(
+                self.window_seconds, self._flush, key
+            )
+
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        flush_handle = self._flush_handles.pop(key, None)
+        if flush_handle is not None:
+            flush_handle.cancel()
+
+        pending = self._pending.pop(key, [])
+        self._pending_text_counts.pop(key, None)
+        if not pending:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run_batch(pending))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    @staticmethod
+    async def _run_batch(pending: list[_PendingEmbedRequest]) -> None:
+        texts = [text for request in pending for text in request.texts]
+        logger.debug(f"Encoding {len(texts)} texts from {len(pending)} requests")
+
+        try:
+            # all requests of a batch share the key, so any of the encode functions will do
+            embeddings = await asyncio.get_running_loop().run_in_executor(
+                None, pending[0].encode_fnc, texts
+            )
+        except Exception as e:
+            for request in pending:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in pending:
+            # the caller may have gone away (e.g. client disconnect)
+            if not request.future.done():
+                request.future.set_result(
+                    embeddings[offset : offset + len(request.texts)]
+                )
+            offset += len(request.texts)
@@ -2,6 +2,7 @@ import asyncio
 import json
 import time
 from types import TracebackType
+from typing import Annotated
 from typing import cast
 from typing import Optional
 
@@ -11,7 +12,9 @@ import vertexai  # type: ignore
 import voyageai  # type: ignore
 from cohere import AsyncClient as CohereAsyncClient
 from fastapi import APIRouter
+from fastapi import Header
 from fastapi import HTTPException
+from fastapi import Response
 from google.oauth2 import service_account  # type: ignore
 from litellm import aembedding
 from litellm.exceptions import RateLimitError
@@ -27,9 +30,12 @@ from model_server.constants import DEFAULT_VERTEX_MODEL
 from model_server.constants import DEFAULT_VOYAGE_MODEL
 from model_server.constants import EmbeddingModelTextType
 from model_server.constants import EmbeddingProvider
+from model_server.embedding_batcher import EmbeddingBatcher
 from model_server.utils import simple_log_function_time
 from onyx.utils.logger import setup_logger
 from shared_configs.configs import API_BASED_EMBEDDING_TIMEOUT
+from shared_configs.configs import EMBED_BATCH_MAX_SIZE
+from shared_configs.configs import EMBED_BATCH_WINDOW_MS
 from shared_configs.configs import INDEXING_ONLY
 from shared_configs.configs import OPENAI_EMBEDDING_TIMEOUT
 from shared_configs.enums import EmbedTextType
@@ -37,6 +43,11 @@ from shared_configs.enums import RerankerProvider
 from shared_configs.model_server_models import Embedding
 from shared_configs.model_server_models import EmbedRequest
 from shared_configs.model_server_models import EmbedResponse
+from shared_configs.model_server_models import PACKED_EMBEDDINGS_CONTENT_TYPE
+from shared_configs.model_server_models import PackedEmbedResponse
+from shared_configs.model_server_models import (
+    parse_packed_embeddings_accept_header,
+)
 from shared_configs.model_server_models import RerankRequest
 from shared_configs.model_server_models import RerankResponse
 from shared_configs.utils import batch_list
@@ -53,6 +64,11 @@ _RERANK_MODEL: Optional["CrossEncoder"] = None
 _RETRY_DELAY = 10 if INDEXING_ONLY else 0.1
 _RETRY_TRIES = 10 if INDEXING_ONLY else 2
 
+_EMBEDDING_BATCHER = EmbeddingBatcher(
+    window_seconds=EMBED_BATCH_WINDOW_MS / 1000,
+    max_batch_size=EMBED_BATCH_MAX_SIZE,
+)
+
 # OpenAI only allows 2048 embeddings to be computed at once
 _OPENAI_MAX_INPUT_LEN = 2048
 # Cohere allows up to 96 embeddings in a single embedding calling
@@ -386,17 +402,23 @@ async def embed_text(
         local_model = get_embedding_model(
             model_name=model_name, max_context_length=max_context_length
         )
-        # Run CPU-bound embedding in a thread pool
-        embeddings_vectors = await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: local_model.encode(
-                prefixed_texts, normalize_embeddings=normalize_embeddings
-            ),
+
+        def _encode(texts_to_encode: list[str]) -> list[Embedding]:
+            embeddings_vectors = local_model.encode(
+                texts_to_encode, normalize_embeddings=normalize_embeddings
+            )
+            return [
+                embedding if isinstance(embedding, list) else embedding.tolist()
+                for embedding in embeddings_vectors
+            ]
+
+        # Run CPU-bound embedding in a thread pool, merged with concurrent requests
+        # for the same model when batching is enabled
+        embeddings = await _EMBEDDING_BATCHER.encode(
+            key=(model_name, max_context_length, normalize_embeddings),
+            texts=prefixed_texts,
+            encode_fnc=_encode,
         )
-        embeddings = [
-            embedding if isinstance(embedding, list) else embedding.tolist()
-            for embedding in embeddings_vectors
-        ]
 
         elapsed = time.monotonic() - start
         logger.info(
@@ -415,11 +437,22 @@ async def embed_text(
 @simple_log_function_time()
 async def local_rerank(query: str, docs: list[str], model_name: str) -> list[float]:
     cross_encoder = get_local_reranking_model(model_name)
+
+    # predict pads each of its batches to the longest pair in it, scoring the docs
+    # sorted by length keeps the batches close in length and the padding small
+    length_order = sorted(range(len(docs)), key=lambda ind: len(docs[ind]))
+
+    def _predict() -> list[float]:
+        sorted_scores = cross_encoder.predict(
+            [(query, docs[ind]) for ind in length_order]
+        ).tolist()
+        scores = [0.0] * len(docs)
+        for ind, score in zip(length_order, sorted_scores):
+            scores[ind] = score
+        return scores
+
     # Run CPU-bound reranking in a thread pool
-    return await asyncio.get_event_loop().run_in_executor(
-        None,
-        lambda: cross_encoder.predict([(query, doc) for doc in docs]).tolist(),  # type: ignore
-    )
+    return await asyncio.get_event_loop().run_in_executor(None, _predict)
 
 
 async def cohere_rerank(
@@ -454,10 +487,11 @@ async def litellm_rerank(
         ]
 
 
-@router.post("/bi-encoder-embed")
+@router.post("/bi-encoder-embed", response_model=EmbedResponse)
 async def process_embed_request(
     embed_request: EmbedRequest,
-) -> EmbedResponse:
+    accept: Annotated[str | None, Header()] = None,
+) -> EmbedResponse | Response:
     if not embed_request.texts:
         raise HTTPException(status_code=400, detail="No texts to be embedded")
 
@@ -485,7 +519,16 @@ async def process_embed_request(
             api_version=embed_request.api_version,
             prefix=prefix,
         )
-        return EmbedResponse(embeddings=embeddings)
+        wire_format = parse_packed_embeddings_accept_header(accept)
+        if wire_format is None:
+            return EmbedResponse(embeddings=embeddings)
+
+        return Response(
+            content=PackedEmbedResponse.from_embeddings(
+                embeddings, wire_format
+            ).model_dump_json(),
+            media_type=PACKED_EMBEDDINGS_CONTENT_TYPE,
+        )
     except RateLimitError as e:
         raise HTTPException(
             status_code=429,
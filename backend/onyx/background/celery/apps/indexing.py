@@ -11,6 +11,8 @@ from celery.signals import worker_ready
 from celery.signals import worker_shutdown
 
 import onyx.background.celery.apps.app_base as app_base
+from onyx.configs.app_configs import ENABLE_PIPELINED_INDEXING
+from onyx.configs.app_configs import INDEXING_MAX_CHUNKS_PER_SUB_BATCH
 from onyx.configs.constants import POSTGRES_CELERY_WORKER_INDEXING_APP_NAME
 from onyx.db.engine import SqlEngine
 from onyx.utils.logger import setup_logger
@@ -58,6 +60,14 @@ def on_celeryd_init(sender: str, conf: Any = None, **kwargs: Any) -> None:
 def on_worker_init(sender: Worker, **kwargs: Any) -> None:
     logger.info("worker_init signal received.")
 
+    # the pipelined stages pass whole batches between each other, they can't bound
+    # the embedded chunks held in memory
+    if ENABLE_PIPELINED_INDEXING and INDEXING_MAX_CHUNKS_PER_SUB_BATCH > 0:
+        raise RuntimeError(
+            "ENABLE_PIPELINED_INDEXING can't be combined with "
+            "INDEXING_MAX_CHUNKS_PER_SUB_BATCH, unset one of them."
+        )
+
     SqlEngine.set_app_name(POSTGRES_CELERY_WORKER_INDEXING_APP_NAME)
 
     # rkuo: Transient errors keep happening in the indexing watchdog threads.
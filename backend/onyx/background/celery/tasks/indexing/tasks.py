@@ -19,10 +19,15 @@ from onyx.background.celery.tasks.beat_schedule import BEAT_EXPIRES_DEFAULT
 from onyx.background.celery.tasks.indexing.utils import _should_index
 from onyx.background.celery.tasks.indexing.utils import get_unfenced_index_attempt_ids
 from onyx.background.celery.tasks.indexing.utils import IndexingCallback
+from onyx.background.celery.tasks.indexing.utils import RedisIndexingShardCoordinator
 from onyx.background.celery.tasks.indexing.utils import try_creating_indexing_task
 from onyx.background.celery.tasks.indexing.utils import validate_indexing_fences
 from onyx.background.indexing.job_client import SimpleJobClient
 from onyx.background.indexing.run_indexing import run_indexing_entrypoint
+from onyx.background.indexing.run_indexing import run_indexing_shard_entrypoint
+from onyx.background.indexing.sharding import IndexingShard
+from onyx.background.indexing.sharding import IndexingShardResult
+from onyx.configs.app_configs import INDEXING_NUM_SHARDS
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import CELERY_INDEXING_LOCK_TIMEOUT
 from onyx.configs.constants import CELERY_TASK_WAIT_FOR_FENCE_TIMEOUT
@@ -525,6 +530,22 @@ def connector_indexing_task(
             r,
         )
 
+        shard_coordinator: RedisIndexingShardCoordinator | None = None
+        if INDEXING_NUM_SHARDS > 1:
+            # this runs in a spawned process, the app is only needed to send tasks
+            from onyx.background.celery.versioned_apps.primary import (
+                app as primary_app,
+            )
+
+            shard_coordinator = RedisIndexingShardCoordinator(
+                celery_app=primary_app,
+                index_attempt_id=index_attempt_id,
+                cc_pair_id=cc_pair_id,
+                search_settings_id=search_settings_id,
+                tenant_id=tenant_id,
+                redis_connector_index=redis_connector_index,
+            )
+
         logger.info(
             f"Indexing spawned task running entrypoint: attempt={index_attempt_id} "
             f"tenant={tenant_id} "
@@ -539,6 +560,7 @@ def connector_indexing_task(
             cc_pair_id,
             is_ee,
             callback=callback,
+            shard_coordinator=shard_coordinator,
         )
 
         # get back the total number of indexed docs and return it
@@ -788,6 +810,170 @@ def connector_indexing_proxy_task(
     return
 
 
+def connector_indexing_shard_task(
+    index_attempt_id: int,
+    cc_pair_id: int,
+    search_settings_id: int,
+    shard: dict,
+    tenant_id: str | None,
+    is_ee: bool,
+) -> None:
+    """Indexes one shard of a sharded index attempt, spawned by
+    connector_indexing_shard_proxy_task. Failures are reported to the coordinating
+    attempt, which is owned by connector_indexing_task."""
+    if SENTRY_DSN:
+        sentry_sdk.init(
+            dsn=SENTRY_DSN,
+            traces_sample_rate=0.1,
+        )
+
+    indexing_shard = IndexingShard.model_validate(shard)
+
+    redis_connector = RedisConnector(tenant_id, cc_pair_id)
+    redis_connector_index = redis_connector.new_index(search_settings_id)
+    shard_coordinator = RedisIndexingShardCoordinator(
+        celery_app=None,
+        index_attempt_id=index_attempt_id,
+        cc_pair_id=cc_pair_id,
+        search_settings_id=search_settings_id,
+        tenant_id=tenant_id,
+        redis_connector_index=redis_connector_index,
+    )
+
+    r = get_redis_client(tenant_id=tenant_id)
+    lock: RedisLock = r.lock(
+        f"{redis_connector_index.generator_lock_key}_shard_{indexing_shard.shard_index}",
+        timeout=CELERY_INDEXING_LOCK_TIMEOUT,
+        thread_local=False,
+    )
+    if not lock.acquire(blocking=False):
+        logger.warning(
+            f"Indexing shard already running, exiting...: "
+            f"index_attempt={index_attempt_id} "
+            f"shard={indexing_shard.shard_index}"
+        )
+        return
+
+    try:
+        callback = IndexingCallback(
+            os.getppid(),
+            redis_connector.stop.fence_key,
+            redis_connector_index.generator_progress_key,
+            lock,
+            r,
+        )
+
+        run_indexing_shard_entrypoint(
+            index_attempt_id,
+            tenant_id,
+            cc_pair_id,
+            indexing_shard,
+            shard_coordinator,
+            is_ee,
+            callback=callback,
+        )
+    finally:
+        if lock.owned():
+            lock.release()
+
+
+@shared_task(
+    name=OnyxCeleryTask.CONNECTOR_INDEXING_SHARD_PROXY_TASK,
+    bind=True,
+    acks_late=False,
+    track_started=True,
+)
+def connector_indexing_shard_proxy_task(
+    self: Task,
+    index_attempt_id: int,
+    cc_pair_id: int,
+    search_settings_id: int,
+    shard: dict,
+    tenant_id: str | None,
+) -> None:
+    """Runs one shard of a sharded index attempt. Like connector_indexing_proxy_task
+    the work is proxied to a spawned task, this one keeps the shard's active signal
+    alive and reports the shard as failed if the spawned task dies."""
+    shard_index = IndexingShard.model_validate(shard).shard_index
+    task_logger.info(
+        f"Indexing shard watchdog - starting: attempt={index_attempt_id} "
+        f"cc_pair={cc_pair_id} "
+        f"search_settings={search_settings_id} "
+        f"shard={shard_index}"
+    )
+
+    redis_connector_index = RedisConnector(tenant_id, cc_pair_id).new_index(
+        search_settings_id
+    )
+    shard_coordinator = RedisIndexingShardCoordinator(
+        celery_app=self.app,
+        index_attempt_id=index_attempt_id,
+        cc_pair_id=cc_pair_id,
+        search_settings_id=search_settings_id,
+        tenant_id=tenant_id,
+        redis_connector_index=redis_connector_index,
+    )
+
+    # a claimed shard without an active signal is considered lost by the coordinator
+    redis_connector_index.set_shard_active(index_attempt_id, shard_index)
+    if not shard_coordinator.claim(shard_index):
+        # the coordinating attempt got to it first
+        task_logger.info(
+            f"Indexing shard watchdog - already claimed, exiting: "
+            f"attempt={index_attempt_id} "
+            f"shard={shard_index}"
+        )
+        return
+
+    client = SimpleJobClient()
+    job = client.submit(
+        connector_indexing_shard_task,
+        index_attempt_id,
+        cc_pair_id,
+        search_settings_id,
+        shard,
+        tenant_id,
+        global_version.is_ee_version(),
+        pure=False,
+    )
+
+    if not job:
+        shard_coordinator.report(
+            shard_index,
+            IndexingShardResult(finished=True, error="Spawning the shard task failed."),
+        )
+        return
+
+    while True:
+        sleep(5)
+
+        redis_connector_index.set_shard_active(index_attempt_id, shard_index)
+
+        if job.done():
+            try:
+                # the spawned task reports its own outcome, unless it crashed
+                result = shard_coordinator.get_results().get(shard_index)
+                if job.status == "error" and (result is None or not result.finished):
+                    shard_coordinator.report(
+                        shard_index,
+                        IndexingShardResult(
+                            finished=True,
+                            error=f"Spawned shard task exceptioned: {job.exception()}",
+                        ),
+                    )
+            finally:
+                job.release()
+
+            break
+
+    task_logger.info(
+        f"Indexing shard watchdog - finished: attempt={index_attempt_id} "
+        f"cc_pair={cc_pair_id} "
+        f"search_settings={search_settings_id} "
+        f"shard={shard_index}"
+    )
+
+
 @shared_task(
     name=OnyxCeleryTask.CLOUD_CHECK_FOR_INDEXING,
     trail=False,
@@ -12,6 +12,9 @@ from sqlalchemy.orm import Session
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.celery_redis import celery_find_task
 from onyx.background.celery.celery_redis import celery_get_unacked_task_ids
+from onyx.background.indexing.sharding import IndexingShard
+from onyx.background.indexing.sharding import IndexingShardCoordinator
+from onyx.background.indexing.sharding import IndexingShardResult
 from onyx.configs.app_configs import DISABLE_INDEX_UPDATE_ON_SWAP
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import DANSWER_REDIS_FUNCTION_LOCK_PREFIX
@@ -166,6 +169,76 @@ class IndexingCallback(IndexingHeartbeatInterface):
         self.redis_client.incrby(self.generator_progress_key, amount)
 
 
+class RedisIndexingShardCoordinator(IndexingShardCoordinator):
+    """Dispatches the shards of an index attempt as tasks to the indexing workers,
+    the shards report back through redis. `celery_app` is only needed to dispatch."""
+
+    def __init__(
+        self,
+        celery_app: Celery | None,
+        index_attempt_id: int,
+        cc_pair_id: int,
+        search_settings_id: int,
+        tenant_id: str | None,
+        redis_connector_index: RedisConnectorIndex,
+    ) -> None:
+        self.celery_app = celery_app
+        self.index_attempt_id = index_attempt_id
+        self.cc_pair_id = cc_pair_id
+        self.search_settings_id = search_settings_id
+        self.tenant_id = tenant_id
+        self.redis_connector_index = redis_connector_index
+
+    def dispatch(self, shard: IndexingShard) -> None:
+        if self.celery_app is None:
+            raise RuntimeError("A celery app is required to dispatch shards.")
+
+        result = self.celery_app.send_task(
+            OnyxCeleryTask.CONNECTOR_INDEXING_SHARD_PROXY_TASK,
+            kwargs=dict(
+                index_attempt_id=self.index_attempt_id,
+                cc_pair_id=self.cc_pair_id,
+                search_settings_id=self.search_settings_id,
+                shard=shard.model_dump(mode="json"),
+                tenant_id=self.tenant_id,
+            ),
+            queue=OnyxCeleryQueues.CONNECTOR_INDEXING,
+            priority=OnyxCeleryPriority.MEDIUM,
+        )
+        if not result:
+            raise RuntimeError(
+                "send_task for connector_indexing_shard_proxy_task failed."
+            )
+
+    def claim(self, shard_index: int) -> bool:
+        return self.redis_connector_index.claim_shard(
+            self.index_attempt_id, shard_index, IndexingShardResult().model_dump_json()
+        )
+
+    def report(self, shard_index: int, result: IndexingShardResult) -> None:
+        self.redis_connector_index.set_shard_result(
+            self.index_attempt_id, shard_index, result.model_dump_json()
+        )
+
+    def get_results(self) -> dict[int, IndexingShardResult]:
+        results: dict[int, IndexingShardResult] = {}
+        for shard_index, raw_result in self.redis_connector_index.get_shard_results(
+            self.index_attempt_id
+        ).items():
+            result = IndexingShardResult.model_validate_json(raw_result)
+            # shards are only reported once they are claimed, their worker keeps the
+            # active signal alive until it is done
+            if not result.finished and not self.redis_connector_index.shard_active(
+                self.index_attempt_id, shard_index
+            ):
+                result = IndexingShardResult(
+                    finished=True, error="The shard's indexing worker disappeared."
+                )
+            results[shard_index] = result
+
+        return results
+
+
 def validate_indexing_fence(
     tenant_id: str | None,
     key_bytes: bytes,
@@ -5,6 +5,7 @@ from tenacity import stop_after_delay
 from tenacity import wait_random_exponential
 
 from onyx.document_index.interfaces import DocumentIndex
+from onyx.document_index.interfaces import UpdateRequest
 from onyx.document_index.interfaces import VespaDocumentFields
 
 
@@ -60,3 +61,16 @@ class RetryDocumentIndex:
             chunk_count=chunk_count,
             fields=fields,
         )
+
+    @retry(
+        retry=retry_if_exception_type(httpx.ReadTimeout),
+        wait=wait_random_exponential(multiplier=1, max=MAX_WAIT),
+        stop=stop_after_delay(STOP_AFTER),
+    )
+    def update(
+        self,
+        update_requests: list[UpdateRequest],
+        *,
+        tenant_id: str | None,
+    ) -> None:
+        self.index.update(update_requests, tenant_id=tenant_id)
@@ -2,8 +2,11 @@ import random
 import time
 import traceback
 from collections.abc import Callable
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from datetime import timezone
+from functools import partial
 from http import HTTPStatus
 from typing import Any
 from typing import cast
@@ -21,13 +24,16 @@ from sqlalchemy.orm import Session
 from tenacity import RetryError
 
 from onyx.access.access import get_access_for_document
+from onyx.access.access import get_access_for_documents
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.celery_redis import celery_get_queue_length
 from onyx.background.celery.celery_redis import celery_get_unacked_task_ids
 from onyx.background.celery.tasks.shared.RetryDocumentIndex import RetryDocumentIndex
 from onyx.background.celery.tasks.shared.tasks import LIGHT_SOFT_TIME_LIMIT
 from onyx.background.celery.tasks.shared.tasks import LIGHT_TIME_LIMIT
+from onyx.configs.app_configs import ENABLE_VESPA_SELECTION_UPDATES
 from onyx.configs.app_configs import JOB_TIMEOUT
+from onyx.configs.app_configs import VESPA_SYNC_BATCH_CONCURRENCY
 from onyx.configs.app_configs import VESPA_SYNC_MAX_TASKS
 from onyx.configs.constants import CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryQueues
@@ -45,11 +51,14 @@ from onyx.db.connector_credential_pair import get_connector_credential_pairs
 from onyx.db.document import count_documents_by_needs_sync
 from onyx.db.document import get_document
 from onyx.db.document import get_document_ids_for_connector_credential_pair
+from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_synced
+from onyx.db.document import mark_documents_as_synced
 from onyx.db.document_set import delete_document_set
 from onyx.db.document_set import delete_document_set_cc_pair_relationship__no_commit
 from onyx.db.document_set import fetch_document_sets
 from onyx.db.document_set import fetch_document_sets_for_document
+from onyx.db.document_set import fetch_document_sets_for_documents
 from onyx.db.document_set import get_document_set_by_id
 from onyx.db.document_set import mark_document_set_as_synced
 from onyx.db.engine import get_session_with_tenant
@@ -59,6 +68,7 @@ from onyx.db.enums import SyncType
 from onyx.db.index_attempt import delete_index_attempts
 from onyx.db.index_attempt import get_index_attempt
 from onyx.db.index_attempt import mark_attempt_failed
+from onyx.db.models import Document
 from onyx.db.models import DocumentSet
 from onyx.db.models import UserGroup
 from onyx.db.sync_record import cleanup_sync_records
@@ -66,6 +76,8 @@ from onyx.db.sync_record import insert_sync_record
 from onyx.db.sync_record import update_sync_record_status
 from onyx.document_index.document_index_utils import get_both_index_names
 from onyx.document_index.factory import get_default_document_index
+from onyx.document_index.interfaces import MinimalDocumentIndexingInfo
+from onyx.document_index.interfaces import UpdateRequest
 from onyx.document_index.interfaces import VespaDocumentFields
 from onyx.redis.redis_connector import RedisConnector
 from onyx.redis.redis_connector_credential_pair import RedisConnectorCredentialPair
@@ -1129,3 +1141,175 @@ def vespa_metadata_sync_task(
         self.retry(exc=e, countdown=countdown)
 
     return True
+
+
+# a batch takes several rounds of concurrent updates, each of which may be retried
+VESPA_METADATA_SYNC_BATCH_SOFT_TIME_LIMIT = LIGHT_SOFT_TIME_LIMIT * 3
+VESPA_METADATA_SYNC_BATCH_TIME_LIMIT = VESPA_METADATA_SYNC_BATCH_SOFT_TIME_LIMIT + 15
+
+
+@shared_task(
+    name=OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+    bind=True,
+    soft_time_limit=VESPA_METADATA_SYNC_BATCH_SOFT_TIME_LIMIT,
+    time_limit=VESPA_METADATA_SYNC_BATCH_TIME_LIMIT,
+    max_retries=3,
+)
+def vespa_metadata_sync_batch_task(
+    self: Task, document_ids: list[str], tenant_id: str | None
+) -> bool:
+    """Same as vespa_metadata_sync_task for a batch of documents. The metadata of the
+    whole batch is fetched in bulk and the Vespa updates run concurrently. On failure,
+    only the documents which failed are retried."""
+    failed_document_ids: list[str] = []
+    last_exception: Exception | None = None
+    try:
+        with get_session_with_tenant(tenant_id) as db_session:
+            curr_ind_name, sec_ind_name = get_both_index_names(db_session)
+            doc_index = get_default_document_index(
+                primary_index_name=curr_ind_name, secondary_index_name=sec_ind_name
+            )
+
+            retry_index = RetryDocumentIndex(doc_index)
+
+            docs = get_documents_by_ids(db_session, document_ids)
+            if not docs:
+                return False
+            doc_ids = [doc.id for doc in docs]
+
+            doc_id_to_doc_sets = dict(
+                fetch_document_sets_for_documents(doc_ids, db_session)
+            )
+            doc_id_to_access = get_access_for_documents(
+                document_ids=doc_ids, db_session=db_session
+            )
+
+            def _get_fields(doc: Document) -> VespaDocumentFields:
+                return VespaDocumentFields(
+                    document_sets=set(doc_id_to_doc_sets.get(doc.id, [])),
+                    access=doc_id_to_access[doc.id],
+                    boost=doc.boost,
+                    hidden=doc.hidden,
+                )
+
+            def _sync_document(doc: Document) -> int:
+                # update Vespa. OK if doc doesn't exist. Raises exception otherwise.
+                return retry_index.update_single(
+                    doc.id,
+                    tenant_id=tenant_id,
+                    chunk_count=doc.chunk_count,
+                    fields=_get_fields(doc),
+                )
+
+            def _sync_documents_by_selection(group_docs: list[Document]) -> int:
+                fields = _get_fields(group_docs[0])
+                retry_index.update(
+                    [
+                        UpdateRequest(
+                            minimal_document_indexing_info=[
+                                MinimalDocumentIndexingInfo(
+                                    doc_id=doc.id, chunk_start_index=0
+                                )
+                                for doc in group_docs
+                            ],
+                            access=fields.access,
+                            document_sets=fields.document_sets,
+                            boost=fields.boost,
+                            hidden=fields.hidden,
+                        )
+                    ],
+                    tenant_id=tenant_id,
+                )
+                # selection updates don't enumerate the chunks
+                return 0
+
+            # each unit of work syncs some documents and returns the chunks affected
+            sync_units: list[tuple[list[str], Callable[[], int]]] = []
+            if ENABLE_VESPA_SELECTION_UPDATES:
+                # documents with the same metadata are updated in one request
+                fields_key_to_docs: dict[tuple, list[Document]] = {}
+                for doc in docs:
+                    fields_key = (
+                        frozenset(doc_id_to_doc_sets.get(doc.id, [])),
+                        frozenset(doc_id_to_access[doc.id].to_acl()),
+                        doc.boost,
+                        doc.hidden,
+                    )
+                    fields_key_to_docs.setdefault(fields_key, []).append(doc)
+                for group_docs in fields_key_to_docs.values():
+                    sync_units.append(
+                        (
+                            [doc.id for doc in group_docs],
+                            partial(_sync_documents_by_selection, group_docs),
+                        )
+                    )
+            else:
+                for doc in docs:
+                    sync_units.append(([doc.id], partial(_sync_document, doc)))
+
+            synced_document_ids: list[str] = []
+            chunks_affected = 0
+            with ThreadPoolExecutor(
+                max_workers=min(VESPA_SYNC_BATCH_CONCURRENCY, len(sync_units))
+            ) as executor:
+                future_to_doc_ids = {
+                    executor.submit(sync_fnc): unit_doc_ids
+                    for unit_doc_ids, sync_fnc in sync_units
+                }
+                for future in as_completed(future_to_doc_ids):
+                    unit_doc_ids = future_to_doc_ids[future]
+                    try:
+                        chunks_affected += future.result()
+                        synced_document_ids.extend(unit_doc_ids)
+                    except Exception as ex:
+                        e = ex
+                        if isinstance(ex, RetryError):
+                            # only set the inner exception if it is of type Exception
+                            e_temp = ex.last_attempt.exception()
+                            if isinstance(e_temp, Exception):
+                                e = e_temp
+
+                        if (
+                            isinstance(e, httpx.HTTPStatusError)
+                            and e.response.status_code == HTTPStatus.BAD_REQUEST
+                        ):
+                            task_logger.exception(
+                                f"Non-retryable HTTPStatusError: "
+                                f"docs={unit_doc_ids[:10]} "
+                                f"status={e.response.status_code}"
+                            )
+                            continue
+
+                        task_logger.exception(
+                            f"Unexpected exception during vespa metadata sync: "
+                            f"docs={unit_doc_ids[:10]}"
+                        )
+                        failed_document_ids.extend(unit_doc_ids)
+                        last_exception = e
+
+            # update db last. Worst case = we crash right before this and
+            # the sync might repeat again later
+            if synced_document_ids:
+                mark_documents_as_synced(synced_document_ids, db_session)
+
+            task_logger.info(
+                f"action=sync_batch docs={len(synced_document_ids)} "
+                f"failed={len(failed_document_ids)} chunks={chunks_affected}"
+            )
+    except SoftTimeLimitExceeded:
+        task_logger.info(
+            f"SoftTimeLimitExceeded exception. docs={len(document_ids)} "
+            f"first_doc={document_ids[0] if document_ids else None}"
+        )
+        return True
+
+    if last_exception is not None:
+        # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
+        countdown = 2 ** (self.request.retries + 4)
+        self.retry(
+            exc=last_exception,
+            countdown=countdown,
+            kwargs=dict(document_ids=failed_document_ids, tenant_id=tenant_id),
+        )
+
+    return True
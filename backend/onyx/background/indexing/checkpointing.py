@@ -2,10 +2,35 @@
 into a series of checkpoints to better handle intermittent failures
 / jobs being killed by cloud providers."""
 import datetime
+import hashlib
+import json
+from typing import Any
+
+from pydantic import BaseModel
 
 from onyx.configs.app_configs import EXPERIMENTAL_CHECKPOINTING_ENABLED
 from onyx.configs.constants import DocumentSource
 from onyx.connectors.cross_connector_utils.miscellaneous_utils import datetime_to_utc
+from onyx.connectors.interfaces import ConnectorCheckpoint
+
+
+class IndexAttemptCheckpoint(BaseModel):
+    """Stored on the index attempt after every indexed batch of a connector which
+    supports checkpoints, the next attempt continues from here if this one dies."""
+
+    # the (pre offset) time window the connector was running over
+    window_start: datetime.datetime
+    window_end: datetime.datetime
+    # a checkpoint is only valid for the connector config it was taken with
+    connector_config_digest: str
+    # number of batches indexed before the checkpoint, across resumed attempts
+    batch_num: int
+    connector_checkpoint: ConnectorCheckpoint
+
+
+def get_connector_config_digest(connector_specific_config: dict[str, Any]) -> str:
+    serialized = json.dumps(connector_specific_config, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
 
 
 def _2010_dt() -> datetime.datetime:
@@ -78,3 +103,32 @@ def get_time_windows_for_index_attempt(
         start_of_window = end_of_window
 
     return time_windows
+
+
+def get_time_windows_for_resumed_attempt(
+    checkpoint: IndexAttemptCheckpoint,
+    source_type: DocumentSource,
+    is_poll_connector: bool,
+) -> list[tuple[datetime.datetime, datetime.datetime]]:
+    """The checkpointed window is finished first (same range, so that the connector
+    cursor stays valid), poll connectors then continue from its end as usual."""
+    time_windows = [(checkpoint.window_start, checkpoint.window_end)]
+    if is_poll_connector:
+        time_windows.extend(
+            get_time_windows_for_index_attempt(
+                last_successful_run=checkpoint.window_end, source_type=source_type
+            )
+        )
+    return time_windows
+
+
+def get_time_window_shards(
+    start: datetime.datetime, end: datetime.datetime, num_shards: int
+) -> list[tuple[datetime.datetime, datetime.datetime]]:
+    """Splits the range into `num_shards` consecutive windows of equal length. Hardly
+    any source has documents from before 2010, so everything before that is folded
+    into the first window instead of being split up as well."""
+    split_start = max(start, min(_2010_dt(), end))
+    step = (end - split_start) / num_shards
+    boundaries = [split_start + step * ind for ind in range(1, num_shards)]
+    return list(zip([start] + boundaries, boundaries + [end]))
@@ -1,21 +1,44 @@
 import time
 import traceback
+from collections import deque
+from collections.abc import Callable
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
 
 from pydantic import BaseModel
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
+from onyx.background.indexing.checkpointing import get_connector_config_digest
+from onyx.background.indexing.checkpointing import get_time_window_shards
 from onyx.background.indexing.checkpointing import get_time_windows_for_index_attempt
+from onyx.background.indexing.checkpointing import (
+    get_time_windows_for_resumed_attempt,
+)
+from onyx.background.indexing.checkpointing import IndexAttemptCheckpoint
+from onyx.background.indexing.sharding import IndexingShard
+from onyx.background.indexing.sharding import IndexingShardCoordinator
+from onyx.background.indexing.sharding import IndexingShardResult
 from onyx.background.indexing.tracer import OnyxTracer
+from onyx.configs.app_configs import CONNECTOR_PREFETCH_BATCHES
+from onyx.configs.app_configs import ENABLE_PIPELINED_INDEXING
+from onyx.configs.app_configs import INDEXING_DB_STATUS_CHECK_INTERVAL
+from onyx.configs.app_configs import INDEXING_NUM_SHARDS
+from onyx.configs.app_configs import INDEXING_PROGRESS_FLUSH_INTERVAL
+from onyx.configs.app_configs import INDEXING_SHARD_START_TIMEOUT
+from onyx.configs.app_configs import INDEXING_SHARD_TIMEOUT
 from onyx.configs.app_configs import INDEXING_SIZE_WARNING_THRESHOLD
 from onyx.configs.app_configs import INDEXING_TRACER_INTERVAL
+from onyx.configs.app_configs import PIPELINED_INDEXING_QUEUE_SIZE
 from onyx.configs.app_configs import POLL_CONNECTOR_OFFSET
 from onyx.configs.constants import DocumentSource
 from onyx.configs.constants import MilestoneRecordType
 from onyx.connectors.connector_runner import ConnectorRunner
+from onyx.connectors.factory import identify_connector_class
 from onyx.connectors.factory import instantiate_connector
+from onyx.connectors.interfaces import ConnectorCheckpoint
+from onyx.connectors.interfaces import PollConnector
 from onyx.connectors.models import Document
 from onyx.connectors.models import IndexAttemptMetadata
 from onyx.db.connector_credential_pair import get_connector_credential_pair_from_id
@@ -23,6 +46,7 @@ from onyx.db.connector_credential_pair import get_last_successful_attempt_time
 from onyx.db.connector_credential_pair import update_connector_credential_pair
 from onyx.db.engine import get_session_with_tenant
 from onyx.db.enums import ConnectorCredentialPairStatus
+from onyx.db.index_attempt import get_checkpoint_to_resume
 from onyx.db.index_attempt import get_index_attempt
 from onyx.db.index_attempt import mark_attempt_canceled
 from onyx.db.index_attempt import mark_attempt_failed
@@ -37,7 +61,9 @@ from onyx.db.models import IndexModelStatus
 from onyx.document_index.factory import get_default_document_index
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
+from onyx.indexing.indexing_pipeline import build_default_chunker
 from onyx.indexing.indexing_pipeline import build_indexing_pipeline
+from onyx.indexing.pipelined_indexing import PipelinedIndexingPipeline
 from onyx.utils.logger import setup_logger
 from onyx.utils.logger import TaskAttemptSingleton
 from onyx.utils.telemetry import create_milestone_and_report
@@ -47,6 +73,9 @@ logger = setup_logger()
 
 INDEXING_TRACER_NUM_PRINT_ENTRIES = 5
 
+# seconds between checks of the shards while waiting for them to finish
+INDEXING_SHARD_POLL_INTERVAL = 5
+
 
 def _get_connector_runner(
     db_session: Session,
@@ -54,6 +83,7 @@ def _get_connector_runner(
     start_time: datetime,
     end_time: datetime,
     tenant_id: str | None,
+    checkpoint: ConnectorCheckpoint | None = None,
 ) -> ConnectorRunner:
     """
     NOTE: `start_time` and `end_time` are only used for poll connectors
@@ -92,10 +122,33 @@ def _get_connector_runner(
         raise e
 
     return ConnectorRunner(
-        connector=runnable_connector, time_range=(start_time, end_time)
+        connector=runnable_connector,
+        time_range=(start_time, end_time),
+        checkpoint=checkpoint,
+        prefetch_batches=CONNECTOR_PREFETCH_BATCHES,
     )
 
 
+def _get_checkpoint_to_resume(
+    db_session: Session, attempt: IndexAttempt, connector_config_digest: str
+) -> IndexAttemptCheckpoint | None:
+    previous_checkpoint = get_checkpoint_to_resume(db_session, attempt)
+    if previous_checkpoint is None:
+        return None
+
+    try:
+        checkpoint = IndexAttemptCheckpoint.model_validate(previous_checkpoint)
+    except ValidationError:
+        logger.warning("Ignoring checkpoint of the previous attempt, unable to parse")
+        return None
+
+    if checkpoint.connector_config_digest != connector_config_digest:
+        logger.info("Ignoring checkpoint of the previous attempt, the config changed")
+        return None
+
+    return checkpoint
+
+
 def strip_null_characters(doc_batch: list[Document]) -> list[Document]:
     cleaned_batch = []
     for doc in doc_batch:
@@ -135,10 +188,211 @@ def strip_null_characters(doc_batch: list[Document]) -> list[Document]:
     return cleaned_batch
 
 
+def _pop_finished_checkpoint(
+    pending_checkpoints: deque[tuple[int, IndexAttemptCheckpoint]],
+    finished_batch_count: int,
+) -> IndexAttemptCheckpoint | None:
+    """Returns the latest checkpoint for which all batches up to it are indexed."""
+    checkpoint: IndexAttemptCheckpoint | None = None
+    while pending_checkpoints and pending_checkpoints[0][0] <= finished_batch_count:
+        _, checkpoint = pending_checkpoints.popleft()
+    return checkpoint
+
+
+class IndexingProgressFlusher:
+    """Coalesces the progress updates (document counts and checkpoint) of an index
+    attempt so that Postgres is written at most every `flush_interval` seconds
+    instead of after every batch."""
+
+    def __init__(
+        self, index_attempt_id: int, tenant_id: str | None, flush_interval: float
+    ) -> None:
+        self.index_attempt_id = index_attempt_id
+        self.tenant_id = tenant_id
+        self.flush_interval = flush_interval
+
+        self._total_docs_indexed = 0
+        self._new_docs_indexed = 0
+        self._checkpoint: IndexAttemptCheckpoint | None = None
+        self._dirty = False
+        # the first update is written right away so the UI shows the attempt moving
+        self._last_flush: float | None = None
+
+    def update(
+        self,
+        total_docs_indexed: int,
+        new_docs_indexed: int,
+        checkpoint: IndexAttemptCheckpoint | None = None,
+    ) -> None:
+        self._total_docs_indexed = total_docs_indexed
+        self._new_docs_indexed = new_docs_indexed
+        if checkpoint is not None:
+            self._checkpoint = checkpoint
+        self._dirty = True
+
+        if (
+            self._last_flush is None
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._dirty:
+            return
+
+        self._write()
+        self._checkpoint = None
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def _write(self) -> None:
+        with get_session_with_tenant(self.tenant_id) as db_session:
+            update_docs_indexed(
+                db_session=db_session,
+                index_attempt_id=self.index_attempt_id,
+                total_docs_indexed=self._total_docs_indexed,
+                new_docs_indexed=self._new_docs_indexed,
+                docs_removed_from_index=0,
+                checkpoint=(
+                    self._checkpoint.model_dump(mode="json")
+                    if self._checkpoint
+                    else None
+                ),
+            )
+
+
+class ShardProgressFlusher(IndexingProgressFlusher):
+    """Reports the progress of a shard to the coordinating attempt instead of writing
+    it to the index attempt, shards don't record checkpoints."""
+
+    def __init__(
+        self,
+        index_attempt_id: int,
+        tenant_id: str | None,
+        flush_interval: float,
+        shard_index: int,
+        shard_coordinator: IndexingShardCoordinator,
+    ) -> None:
+        super().__init__(index_attempt_id, tenant_id, flush_interval)
+        self.shard_index = shard_index
+        self.shard_coordinator = shard_coordinator
+
+    def _write(self) -> None:
+        self.shard_coordinator.report(
+            self.shard_index,
+            IndexingShardResult(
+                total_docs=self._total_docs_indexed,
+                new_docs=self._new_docs_indexed,
+            ),
+        )
+
+
+def _get_shard_results(
+    shard_coordinator: IndexingShardCoordinator | None, shard_indices: list[int]
+) -> dict[int, IndexingShardResult]:
+    """Latest results of the given shards which were claimed, raises if any of them
+    failed."""
+    if shard_coordinator is None or not shard_indices:
+        return {}
+
+    results = shard_coordinator.get_results()
+    for shard_index in shard_indices:
+        result = results.get(shard_index)
+        if result is not None and result.error is not None:
+            raise RuntimeError(f"Indexing shard {shard_index} failed: {result.error}")
+
+    return {
+        shard_index: results[shard_index]
+        for shard_index in shard_indices
+        if shard_index in results
+    }
+
+
 class ConnectorStopSignal(Exception):
     """A custom exception used to signal a stop in processing."""
 
 
+def _wait_for_shards(
+    shard_coordinator: IndexingShardCoordinator,
+    shards: list[IndexingShard],
+    index_shard: Callable[[IndexingShard], None],
+    callback: IndexingHeartbeatInterface | None,
+    progress_flusher: IndexingProgressFlusher,
+    total_docs_indexed: int,
+    new_docs_indexed: int,
+    dispatched_at: float,
+) -> list[IndexingShardResult]:
+    """Blocks until all the shards finished and returns their results. Shards which
+    no other worker claimed yet are claimed and indexed here with `index_shard`, so
+    only shards running elsewhere are waited for. The progress of the attempt keeps
+    being updated with theirs in the meantime.
+
+    Raises if a shard could neither be claimed nor was started elsewhere within
+    INDEXING_SHARD_START_TIMEOUT, or if the shards are not done within
+    INDEXING_SHARD_TIMEOUT of `dispatched_at` (time.monotonic())."""
+    shard_indices = [shard.shard_index for shard in shards]
+    wait_start = time.monotonic()
+    while True:
+        if callback:
+            if callback.should_stop():
+                raise ConnectorStopSignal("Connector stop signal detected")
+            # keeps the indexing lock alive
+            callback.progress("_run_indexing", 0)
+
+        shard_results = _get_shard_results(shard_coordinator, shard_indices)
+        unclaimed_shards = [
+            shard for shard in shards if shard.shard_index not in shard_results
+        ]
+        claimed_shard = next(
+            (
+                shard
+                for shard in unclaimed_shards
+                if shard_coordinator.claim(shard.shard_index)
+            ),
+            None,
+        )
+        if claimed_shard:
+            logger.info(
+                f"Indexing shard {claimed_shard.shard_index} here, no worker started it"
+            )
+            # reports its result to the coordinator like any other shard
+            index_shard(claimed_shard)
+            continue
+
+        if not unclaimed_shards and all(
+            result.finished for result in shard_results.values()
+        ):
+            return [shard_results[shard_index] for shard_index in shard_indices]
+
+        if (
+            unclaimed_shards
+            and time.monotonic() - wait_start > INDEXING_SHARD_START_TIMEOUT
+        ):
+            raise RuntimeError(
+                f"Indexing shards were not started within "
+                f"{INDEXING_SHARD_START_TIMEOUT}s: "
+                f"{[shard.shard_index for shard in unclaimed_shards]}"
+            )
+        if time.monotonic() - dispatched_at > INDEXING_SHARD_TIMEOUT:
+            unfinished_shard_indices = [
+                shard_index
+                for shard_index, result in shard_results.items()
+                if not result.finished
+            ]
+            raise RuntimeError(
+                f"Indexing shards did not finish within {INDEXING_SHARD_TIMEOUT}s: "
+                f"{unfinished_shard_indices}"
+            )
+
+        progress_flusher.update(
+            total_docs_indexed=total_docs_indexed
+            + sum(result.total_docs for result in shard_results.values()),
+            new_docs_indexed=new_docs_indexed
+            + sum(result.new_docs for result in shard_results.values()),
+        )
+        time.sleep(INDEXING_SHARD_POLL_INTERVAL)
+
+
 class RunIndexingContext(BaseModel):
     index_name: str
     cc_pair_id: int
@@ -156,12 +410,20 @@ def _run_indexing(
     index_attempt_id: int,
     tenant_id: str | None,
     callback: IndexingHeartbeatInterface | None = None,
+    shard: IndexingShard | None = None,
+    shard_coordinator: IndexingShardCoordinator | None = None,
 ) -> None:
     """
     1. Get documents which are either new or updated from specified application
     2. Embed and index these documents into the chosen datastore (vespa)
     3. Updates Postgres to record the indexed documents + the outcome of this run
 
+    With a `shard_coordinator`, an attempt from the beginning of a poll connector is
+    split into time range shards which are dispatched to other workers, this run
+    indexes the most recent one, then the ones no worker picked up yet and waits for
+    the rest. With a `shard`, only that time range is indexed and the outcome is
+    reported to the coordinator instead.
+
     TODO: do not change index attempt statuses here ... instead, set signals in redis
     and allow the monitor function to clean them up
     """
@@ -202,6 +464,26 @@ def _run_indexing(
             search_settings_status=index_attempt_start.search_settings.status,
         )
 
+        connector_config_digest = get_connector_config_digest(
+            db_connector.connector_specific_config
+        )
+        is_poll_connector = issubclass(
+            identify_connector_class(db_connector.source, db_connector.input_type),
+            PollConnector,
+        )
+        resume_checkpoint = (
+            _get_checkpoint_to_resume(
+                db_session_temp, index_attempt_start, connector_config_digest
+            )
+            if shard is None
+            else None
+        )
+        if resume_checkpoint:
+            # carried over right away, so that it isn't lost if this attempt dies
+            # before indexing anything
+            index_attempt_start.checkpoint = resume_checkpoint.model_dump(mode="json")
+            db_session_temp.commit()
+
         last_successful_index_time = (
             ctx.earliest_index_time
             if ctx.from_beginning
@@ -224,14 +506,15 @@ def _run_indexing(
         primary_index_name=ctx.index_name, secondary_index_name=None
     )
 
+    ignore_time_skip = ctx.from_beginning or (
+        ctx.search_settings_status == IndexModelStatus.FUTURE
+    )
+
     indexing_pipeline = build_indexing_pipeline(
         attempt_id=index_attempt_id,
         embedder=embedding_model,
         document_index=document_index,
-        ignore_time_skip=(
-            ctx.from_beginning
-            or (ctx.search_settings_status == IndexModelStatus.FUTURE)
-        ),
+        ignore_time_skip=ignore_time_skip,
         db_session=db_session,
         tenant_id=tenant_id,
         callback=callback,
@@ -248,22 +531,106 @@ def _run_indexing(
         credential_id=ctx.credential_id,
     )
 
+    pipelined_indexing_pipeline: PipelinedIndexingPipeline | None = None
+    if ENABLE_PIPELINED_INDEXING:
+        pipelined_indexing_pipeline = PipelinedIndexingPipeline(
+            chunker=build_default_chunker(
+                embedder=embedding_model, db_session=db_session, callback=callback
+            ),
+            embedder=embedding_model,
+            document_index=document_index,
+            db_session=db_session,
+            index_attempt_metadata=index_attempt_md,
+            queue_size=PIPELINED_INDEXING_QUEUE_SIZE,
+            ignore_time_skip=ignore_time_skip,
+            attempt_id=index_attempt_id,
+            tenant_id=tenant_id,
+        )
+
+    # shards dispatched to other workers, merged into this attempt once finished
+    pending_shards: list[IndexingShard] = []
+    shards_dispatched_at = 0.0
+    if shard:
+        time_windows = [(shard.window_start, shard.window_end)]
+    elif resume_checkpoint:
+        logger.info(
+            f"Resuming from the checkpoint of the previous attempt: "
+            f"window_start={resume_checkpoint.window_start} "
+            f"window_end={resume_checkpoint.window_end} "
+            f"batches={resume_checkpoint.batch_num}"
+        )
+        time_windows = get_time_windows_for_resumed_attempt(
+            resume_checkpoint,
+            source_type=ctx.source,
+            is_poll_connector=is_poll_connector,
+        )
+    elif (
+        shard_coordinator is not None
+        and INDEXING_NUM_SHARDS > 1
+        and is_poll_connector
+        and last_successful_index_time == ctx.earliest_index_time
+    ):
+        shard_windows = get_time_window_shards(
+            start=datetime.fromtimestamp(last_successful_index_time, tz=timezone.utc),
+            end=datetime.now(tz=timezone.utc),
+            num_shards=INDEXING_NUM_SHARDS,
+        )
+        shards_dispatched_at = time.monotonic()
+        for shard_index, (shard_start, shard_end) in enumerate(shard_windows[:-1]):
+            pending_shard = IndexingShard(
+                shard_index=shard_index,
+                window_start=shard_start,
+                window_end=shard_end,
+            )
+            shard_coordinator.dispatch(pending_shard)
+            pending_shards.append(pending_shard)
+        logger.info(f"Split the attempt into {len(shard_windows)} shards")
+
+        # the most recent shard is indexed here, it ends at the current time as usual
+        time_windows = [shard_windows[-1]]
+    else:
+        time_windows = get_time_windows_for_index_attempt(
+            last_successful_run=datetime.fromtimestamp(
+                last_successful_index_time, tz=timezone.utc
+            ),
+            source_type=ctx.source,
+        )
+    # a checkpoint can't describe the progress of several shards
+    record_checkpoints = shard is None and not pending_shards
+
     batch_num = 0
+    # batches indexed by the attempts this one resumes from
+    previous_batch_num = resume_checkpoint.batch_num if resume_checkpoint else 0
     net_doc_change = 0
     document_count = 0
     chunk_count = 0
     run_end_dt = None
-    for ind, (window_start, window_end) in enumerate(
-        get_time_windows_for_index_attempt(
-            last_successful_run=datetime.fromtimestamp(
-                last_successful_index_time, tz=timezone.utc
-            ),
-            source_type=db_connector.source,
+    progress_flusher = (
+        ShardProgressFlusher(
+            index_attempt_id=index_attempt_id,
+            tenant_id=tenant_id,
+            flush_interval=INDEXING_PROGRESS_FLUSH_INTERVAL,
+            shard_index=shard.shard_index,
+            shard_coordinator=shard_coordinator,
         )
-    ):
+        if shard and shard_coordinator
+        else IndexingProgressFlusher(
+            index_attempt_id=index_attempt_id,
+            tenant_id=tenant_id,
+            flush_interval=INDEXING_PROGRESS_FLUSH_INTERVAL,
+        )
+    )
+    last_db_status_check: float | None = None
+    for ind, (window_start, window_end) in enumerate(time_windows):
         cc_pair_loop: ConnectorCredentialPair | None = None
         index_attempt_loop: IndexAttempt | None = None
 
+        # checkpoints of batches still being indexed by the pipelined indexing, with
+        # the number of batches which must be finished for them to apply
+        pending_checkpoints: deque[tuple[int, IndexAttemptCheckpoint]] = deque()
+        # the checkpoint refers to the window before the offset is applied
+        checkpoint_window = (window_start, window_end)
+
         try:
             window_start = max(
                 window_start - timedelta(minutes=POLL_CONNECTOR_OFFSET),
@@ -285,12 +652,17 @@ def _run_indexing(
                     start_time=window_start,
                     end_time=window_end,
                     tenant_id=tenant_id,
+                    checkpoint=(
+                        resume_checkpoint.connector_checkpoint
+                        if resume_checkpoint and ind == 0
+                        else None
+                    ),
                 )
 
             tracer_counter = 0
             if INDEXING_TRACER_INTERVAL > 0:
                 tracer.snap()
-            for doc_batch in connector_runner.run():
+            for doc_batch, connector_checkpoint in connector_runner.run():
                 # Check if connector is disabled mid run and stop if so unless it's the secondary
                 # index being built. We want to populate it even for paused connectors
                 # Often paused connectors are sources that aren't updated frequently but the
@@ -299,39 +671,54 @@ def _run_indexing(
                     if callback.should_stop():
                         raise ConnectorStopSignal("Connector stop signal detected")
 
-                # TODO: should we move this into the above callback instead?
-                with get_session_with_tenant(tenant_id) as db_session_temp:
-                    cc_pair_loop = get_connector_credential_pair_from_id(
-                        db_session_temp,
-                        ctx.cc_pair_id,
-                    )
-                    if not cc_pair_loop:
-                        raise RuntimeError(f"CC pair {ctx.cc_pair_id} not found in DB.")
-
-                    if (
-                        (
-                            cc_pair_loop.status == ConnectorCredentialPairStatus.PAUSED
-                            and ctx.search_settings_status != IndexModelStatus.FUTURE
-                        )
-                        # if it's deleting, we don't care if this is a secondary index
-                        or cc_pair_loop.status == ConnectorCredentialPairStatus.DELETING
-                    ):
-                        # let the `except` block handle this
-                        raise RuntimeError("Connector was disabled mid run")
-
-                    index_attempt_loop = get_index_attempt(
-                        db_session_temp, index_attempt_id
-                    )
-                    if not index_attempt_loop:
-                        raise RuntimeError(
-                            f"Index attempt {index_attempt_id} not found in DB."
+                # Pausing and deleting also raise the stop signal above, so without
+                # a callback the status is checked in Postgres every batch and
+                # otherwise only periodically to catch the remaining cases
+                # (e.g. the attempt being canceled by a model swap)
+                if (
+                    callback is None
+                    or last_db_status_check is None
+                    or time.monotonic() - last_db_status_check
+                    >= INDEXING_DB_STATUS_CHECK_INTERVAL
+                ):
+                    last_db_status_check = time.monotonic()
+                    with get_session_with_tenant(tenant_id) as db_session_temp:
+                        cc_pair_loop = get_connector_credential_pair_from_id(
+                            db_session_temp,
+                            ctx.cc_pair_id,
                         )
+                        if not cc_pair_loop:
+                            raise RuntimeError(
+                                f"CC pair {ctx.cc_pair_id} not found in DB."
+                            )
 
-                    if index_attempt_loop.status != IndexingStatus.IN_PROGRESS:
-                        # Likely due to user manually disabling it or model swap
-                        raise RuntimeError(
-                            f"Index Attempt was canceled, status is {index_attempt_loop.status}"
+                        if (
+                            (
+                                cc_pair_loop.status
+                                == ConnectorCredentialPairStatus.PAUSED
+                                and ctx.search_settings_status
+                                != IndexModelStatus.FUTURE
+                            )
+                            # if it's deleting, we don't care if this is a secondary index
+                            or cc_pair_loop.status
+                            == ConnectorCredentialPairStatus.DELETING
+                        ):
+                            # let the `except` block handle this
+                            raise RuntimeError("Connector was disabled mid run")
+
+                        index_attempt_loop = get_index_attempt(
+                            db_session_temp, index_attempt_id
                         )
+                        if not index_attempt_loop:
+                            raise RuntimeError(
+                                f"Index attempt {index_attempt_id} not found in DB."
+                            )
+
+                        if index_attempt_loop.status != IndexingStatus.IN_PROGRESS:
+                            # Likely due to user manually disabling it or model swap
+                            raise RuntimeError(
+                                f"Index Attempt was canceled, status is {index_attempt_loop.status}"
+                            )
 
                 batch_description = []
 
@@ -355,32 +742,67 @@ def _run_indexing(
                 index_attempt_md.batch_num = batch_num + 1  # use 1-index for this
 
                 # real work happens here!
-                index_pipeline_result = indexing_pipeline(
-                    document_batch=doc_batch_cleaned,
-                    index_attempt_metadata=index_attempt_md,
-                )
+                if pipelined_indexing_pipeline:
+                    # batches are indexed in the background, the result only covers
+                    # the batches which finished since the previous submit
+                    index_pipeline_result = pipelined_indexing_pipeline.submit(
+                        document_batch=doc_batch_cleaned,
+                        batch_num=index_attempt_md.batch_num,
+                    )
+                else:
+                    index_pipeline_result = indexing_pipeline(
+                        document_batch=doc_batch_cleaned,
+                        index_attempt_metadata=index_attempt_md,
+                    )
 
                 batch_num += 1
                 net_doc_change += index_pipeline_result.new_docs
                 chunk_count += index_pipeline_result.total_chunks
                 document_count += index_pipeline_result.total_docs
 
-                # commit transaction so that the `update` below begins
-                # with a brand new transaction. Postgres uses the start
-                # of the transactions when computing `NOW()`, so if we have
-                # a long running transaction, the `time_updated` field will
-                # be inaccurate
+                if connector_checkpoint is not None and record_checkpoints:
+                    pending_checkpoints.append(
+                        (
+                            batch_num,
+                            IndexAttemptCheckpoint(
+                                window_start=checkpoint_window[0],
+                                window_end=checkpoint_window[1],
+                                connector_config_digest=connector_config_digest,
+                                batch_num=previous_batch_num + batch_num,
+                                connector_checkpoint=connector_checkpoint,
+                            ),
+                        )
+                    )
+                checkpoint = _pop_finished_checkpoint(
+                    pending_checkpoints,
+                    finished_batch_count=(
+                        pipelined_indexing_pipeline.finished_batch_count()
+                        if pipelined_indexing_pipeline
+                        else batch_num
+                    ),
+                )
+
+                # commit transaction so that the pipeline's next batch begins with a
+                # brand new transaction. Postgres uses the start of the transactions
+                # when computing `NOW()`, so if we have a long running transaction,
+                # the `time_updated` fields will be inaccurate
                 db_session.commit()
 
-                # This new value is updated every batch, so UI can refresh per batch update
-                with get_session_with_tenant(tenant_id) as db_session_temp:
-                    update_docs_indexed(
-                        db_session=db_session_temp,
-                        index_attempt_id=index_attempt_id,
-                        total_docs_indexed=document_count,
-                        new_docs_indexed=net_doc_change,
-                        docs_removed_from_index=0,
-                    )
+                # the attempt's progress includes the shards running elsewhere, this
+                # also stops early if one of them failed
+                shard_results = _get_shard_results(
+                    shard_coordinator,
+                    [pending_shard.shard_index for pending_shard in pending_shards],
+                ).values()
+
+                # coalesced and written periodically, the UI refreshes from it
+                progress_flusher.update(
+                    total_docs_indexed=document_count
+                    + sum(result.total_docs for result in shard_results),
+                    new_docs_indexed=net_doc_change
+                    + sum(result.new_docs for result in shard_results),
+                    checkpoint=checkpoint,
+                )
 
                 if callback:
                     callback.progress("_run_indexing", len(doc_batch_cleaned))
@@ -396,8 +818,66 @@ def _run_indexing(
                     tracer.snap()
                     tracer.log_previous_diff(INDEXING_TRACER_NUM_PRINT_ENTRIES)
 
+            if pipelined_indexing_pipeline:
+                # the window is only complete once all of its batches are written
+                index_pipeline_result = pipelined_indexing_pipeline.drain()
+                net_doc_change += index_pipeline_result.new_docs
+                chunk_count += index_pipeline_result.total_chunks
+                document_count += index_pipeline_result.total_docs
+                checkpoint = _pop_finished_checkpoint(
+                    pending_checkpoints, finished_batch_count=batch_num
+                )
+                shard_results = _get_shard_results(
+                    shard_coordinator,
+                    [pending_shard.shard_index for pending_shard in pending_shards],
+                ).values()
+                progress_flusher.update(
+                    total_docs_indexed=document_count
+                    + sum(result.total_docs for result in shard_results),
+                    new_docs_indexed=net_doc_change
+                    + sum(result.new_docs for result in shard_results),
+                    checkpoint=checkpoint,
+                )
+
+            if pending_shards and shard_coordinator:
+
+                def _index_claimed_shard(claimed_shard: IndexingShard) -> None:
+                    _run_indexing(
+                        db_session,
+                        index_attempt_id,
+                        tenant_id,
+                        callback,
+                        shard=claimed_shard,
+                        shard_coordinator=shard_coordinator,
+                    )
+
+                for shard_result in _wait_for_shards(
+                    shard_coordinator,
+                    pending_shards,
+                    index_shard=_index_claimed_shard,
+                    callback=callback,
+                    progress_flusher=progress_flusher,
+                    total_docs_indexed=document_count,
+                    new_docs_indexed=net_doc_change,
+                    dispatched_at=shards_dispatched_at,
+                ):
+                    net_doc_change += shard_result.new_docs
+                    chunk_count += shard_result.total_chunks
+                    document_count += shard_result.total_docs
+                    batch_num += shard_result.num_batches
+                    index_attempt_md.num_exceptions += shard_result.num_exceptions
+                pending_shards = []
+                progress_flusher.update(
+                    total_docs_indexed=document_count,
+                    new_docs_indexed=net_doc_change,
+                )
+
+            # the window is done, its progress is recorded before moving on
+            progress_flusher.flush()
+
             run_end_dt = window_end
-            if ctx.is_primary:
+            # shards leave the connector credential pair to the coordinating attempt
+            if ctx.is_primary and shard is None:
                 with get_session_with_tenant(tenant_id) as db_session_temp:
                     update_connector_credential_pair(
                         db_session=db_session_temp,
@@ -411,6 +891,21 @@ def _run_indexing(
                 f"Connector run exceptioned after elapsed time: {time.time() - start_time} seconds"
             )
 
+            if pipelined_indexing_pipeline:
+                pipelined_indexing_pipeline.close()
+
+            # keep the progress made so far, a later attempt resumes from its checkpoint
+            try:
+                progress_flusher.flush()
+            except Exception:
+                logger.exception("Failed to record the indexing progress")
+
+            # the coordinating attempt decides what happens to the attempt
+            if shard is not None:
+                if INDEXING_TRACER_INTERVAL > 0:
+                    tracer.stop()
+                raise e
+
             if isinstance(e, ConnectorStopSignal):
                 with get_session_with_tenant(tenant_id) as db_session_temp:
                     mark_attempt_canceled(
@@ -472,6 +967,9 @@ def _run_indexing(
             # reason it will then be marked as a failure
             break
 
+    if pipelined_indexing_pipeline:
+        pipelined_indexing_pipeline.close()
+
     if INDEXING_TRACER_INTERVAL > 0:
         logger.debug(
             f"Running trace comparison between start and end of indexing. {tracer_counter} batches processed."
@@ -481,6 +979,25 @@ def _run_indexing(
         tracer.stop()
         logger.debug("Memory tracer stopped.")
 
+    if shard is not None and shard_coordinator is not None:
+        shard_coordinator.report(
+            shard.shard_index,
+            IndexingShardResult(
+                finished=True,
+                total_docs=document_count,
+                new_docs=net_doc_change,
+                total_chunks=chunk_count,
+                num_batches=batch_num,
+                num_exceptions=index_attempt_md.num_exceptions,
+            ),
+        )
+        logger.info(
+            f"Indexing shard {shard.shard_index} finished: "
+            f"docs={document_count} chunks={chunk_count} "
+            f"elapsed={time.time() - start_time:.2f}s"
+        )
+        return
+
     if (
         index_attempt_md.num_exceptions > 0
         and index_attempt_md.num_exceptions >= batch_num
@@ -545,6 +1062,7 @@ def run_indexing_entrypoint(
     connector_credential_pair_id: int,
     is_ee: bool = False,
     callback: IndexingHeartbeatInterface | None = None,
+    shard_coordinator: IndexingShardCoordinator | None = None,
 ) -> None:
     try:
         if is_ee:
@@ -577,7 +1095,13 @@ def run_indexing_entrypoint(
         )
 
         with get_session_with_tenant(tenant_id) as db_session:
-            _run_indexing(db_session, index_attempt_id, tenant_id, callback)
+            _run_indexing(
+                db_session,
+                index_attempt_id,
+                tenant_id,
+                callback,
+                shard_coordinator=shard_coordinator,
+            )
 
         logger.info(
             f"Indexing finished{tenant_str}: "
@@ -589,3 +1113,42 @@ def run_indexing_entrypoint(
         logger.exception(
             f"Indexing job with ID '{index_attempt_id}' for tenant {tenant_id} failed due to {e}"
         )
+
+
+def run_indexing_shard_entrypoint(
+    index_attempt_id: int,
+    tenant_id: str | None,
+    connector_credential_pair_id: int,
+    shard: IndexingShard,
+    shard_coordinator: IndexingShardCoordinator,
+    is_ee: bool = False,
+    callback: IndexingHeartbeatInterface | None = None,
+) -> None:
+    """Indexes one shard of an attempt which is already in progress, the outcome
+    (including failures) is reported to the coordinating attempt."""
+    try:
+        if is_ee:
+            global_version.set_ee()
+
+        TaskAttemptSingleton.set_cc_and_index_id(
+            index_attempt_id, connector_credential_pair_id
+        )
+        logger.info(
+            f"Indexing shard {shard.shard_index} starting: "
+            f"window_start={shard.window_start} window_end={shard.window_end}"
+        )
+
+        with get_session_with_tenant(tenant_id) as db_session:
+            _run_indexing(
+                db_session,
+                index_attempt_id,
+                tenant_id,
+                callback,
+                shard=shard,
+                shard_coordinator=shard_coordinator,
+            )
+    except Exception as e:
+        logger.exception(f"Indexing shard {shard.shard_index} failed due to {e}")
+        shard_coordinator.report(
+            shard.shard_index, IndexingShardResult(finished=True, error=str(e))
+        )
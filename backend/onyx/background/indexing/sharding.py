@@ -0,0 +1,51 @@
+"""Splitting a single index attempt into time range shards which are indexed in
+parallel by different indexing workers. The worker running the attempt itself
+coordinates: it dispatches the shards, indexes one of them and aggregates the
+results of the others into the attempt. Shards no worker has claimed by the time the
+coordinator is done with its own are claimed and indexed by the coordinator, so it
+never waits on a shard which needs a free worker."""
+import abc
+import datetime
+
+from pydantic import BaseModel
+
+
+class IndexingShard(BaseModel):
+    shard_index: int
+    window_start: datetime.datetime
+    window_end: datetime.datetime
+
+
+class IndexingShardResult(BaseModel):
+    """Reported by a shard while it runs (the counts so far) and once it is done."""
+
+    finished: bool = False
+    # set if the shard failed, the whole attempt fails with it
+    error: str | None = None
+    total_docs: int = 0
+    new_docs: int = 0
+    total_chunks: int = 0
+    num_batches: int = 0
+    num_exceptions: int = 0
+
+
+class IndexingShardCoordinator(abc.ABC):
+    """Defines how shards of an index attempt are dispatched and report back."""
+
+    @abc.abstractmethod
+    def dispatch(self, shard: IndexingShard) -> None:
+        """Schedules the shard to be indexed by another worker."""
+
+    @abc.abstractmethod
+    def claim(self, shard_index: int) -> bool:
+        """Marks the shard as started by the caller, who must then index it. False if
+        it was already claimed."""
+
+    @abc.abstractmethod
+    def report(self, shard_index: int, result: IndexingShardResult) -> None:
+        """Called by the worker running the shard."""
+
+    @abc.abstractmethod
+    def get_results(self) -> dict[int, IndexingShardResult]:
+        """Latest result of every shard which was claimed. Shards whose worker
+        disappeared without finishing are returned as failed."""
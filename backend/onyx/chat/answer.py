@@ -56,6 +56,8 @@ class Answer:
         # must be the same length as `docs`. If None, all docs are considered "relevant"
         message_history: list[PreviousMessage] | None = None,
         single_message_history: str | None = None,
+        # older messages of the chat were left out of `message_history` to fit the context
+        history_truncated: bool = False,
         # newly passed in files to include as part of this question
         # TODO THIS NEEDS TO BE HANDLED
         latest_query_files: list[InMemoryChatFile] | None = None,
@@ -87,6 +89,7 @@ class Answer:
         self.message_history = message_history or []
         # used for QA flow where we only want to send a single message
         self.single_message_history = single_message_history
+        self.history_truncated = history_truncated
 
         self.answer_style_config = answer_style_config
         self.prompt_config = prompt_config
@@ -259,6 +262,7 @@ class Answer:
             raw_user_query=self.question,
             raw_user_uploaded_files=self.latest_query_files or [],
             single_message_history=self.single_message_history,
+            history_truncated=self.history_truncated,
         )
         prompt_builder.update_system_prompt(
             default_build_system_message(self.prompt_config)
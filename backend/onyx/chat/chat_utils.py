@@ -17,7 +17,8 @@ from onyx.context.search.models import InferenceSection
 from onyx.context.search.models import RerankingDetails
 from onyx.context.search.models import RetrievalDetails
 from onyx.db.chat import create_chat_session
-from onyx.db.chat import get_chat_messages_by_session
+from onyx.db.chat import get_chat_message_links_by_session
+from onyx.db.chat import get_chat_messages_by_ids
 from onyx.db.llm import fetch_existing_doc_sets
 from onyx.db.llm import fetch_existing_tools
 from onyx.db.models import ChatMessage
@@ -119,7 +120,7 @@ def combine_message_thread(
             role_str = message.role.value.upper()
 
         msg_str = f"{role_str}:\n{message.message}"
-        message_token_count = len(llm_tokenizer.encode(msg_str))
+        message_token_count = llm_tokenizer.count_tokens(msg_str)
 
         if (
             max_tokens is not None
@@ -133,60 +134,127 @@ def combine_message_thread(
     return "\n\n".join(message_strs)
 
 
+def _fit_history_window(
+    history_ids: list[int], id_to_token_count: dict[int, int], max_tokens: int
+) -> list[int]:
+    """The latest history messages which fit in max_tokens, at least the most recent
+    message is kept so that callers can still tell that there is a history."""
+    total_token_count = 0
+    window_start = len(history_ids)
+    while window_start > 0:
+        total_token_count += id_to_token_count[history_ids[window_start - 1]]
+        if total_token_count > max_tokens and window_start < len(history_ids):
+            break
+        window_start -= 1
+    return history_ids[window_start:]
+
+
 def create_chat_chain(
     chat_session_id: UUID,
     db_session: Session,
     prefetch_tool_calls: bool = True,
     # Optional id at which we finish processing
     stop_at_message_id: int | None = None,
+    # Optional token budget for the history, older messages which would not fit in
+    # the LLM's context anyways are not loaded
+    max_history_tokens: int | None = None,
 ) -> tuple[ChatMessage, list[ChatMessage]]:
-    """Build the linear chain of messages without including the root message"""
-    mainline_messages: list[ChatMessage] = []
-
-    all_chat_messages = get_chat_messages_by_session(
-        chat_session_id=chat_session_id,
-        user_id=None,
-        db_session=db_session,
-        skip_permission_check=True,
-        prefetch_tool_calls=prefetch_tool_calls,
+    """Build the linear chain of messages without including the root message.
+    The chain is traced on the message ids, only the returned messages are loaded."""
+    message_links = get_chat_message_links_by_session(
+        chat_session_id=chat_session_id, db_session=db_session
     )
-    id_to_msg = {msg.id: msg for msg in all_chat_messages}
-
-    if not all_chat_messages:
+    if not message_links:
         raise RuntimeError("No messages in Chat Session")
 
-    root_message = all_chat_messages[0]
-    if root_message.parent_message is not None:
+    id_to_child_id = {
+        msg_id: latest_child_id for msg_id, _, latest_child_id, _ in message_links
+    }
+    id_to_token_count = {
+        msg_id: token_count for msg_id, _, _, token_count in message_links
+    }
+
+    root_id, root_parent_id, _, _ = message_links[0]
+    if root_parent_id is not None:
         raise RuntimeError(
             "Invalid root message, unable to fetch valid chat message sequence"
         )
 
-    current_message: ChatMessage | None = root_message
-    while current_message is not None:
-        child_msg = current_message.latest_child_message
+    mainline_ids: list[int] = []
+    current_id = root_id
+    while True:
+        child_id = id_to_child_id[current_id]
 
         # Break if at the end of the chain
         # or have reached the `final_id` of the submitted message
-        if not child_msg or (
-            stop_at_message_id and current_message.id == stop_at_message_id
-        ):
+        if not child_id or (stop_at_message_id and current_id == stop_at_message_id):
             break
-        current_message = id_to_msg.get(child_msg)
 
-        if current_message is None:
+        if child_id not in id_to_child_id:
             raise RuntimeError(
                 "Invalid message chain,"
                 "could not find next message in the same session"
             )
+        current_id = child_id
 
-        mainline_messages.append(current_message)
+        mainline_ids.append(current_id)
 
-    if not mainline_messages:
+    if not mainline_ids:
         raise RuntimeError("Could not trace chat message history")
 
+    history_ids = mainline_ids[:-1]
+    if max_history_tokens is not None:
+        history_ids = _fit_history_window(
+            history_ids, id_to_token_count, max_history_tokens
+        )
+
+    mainline_messages = get_chat_messages_by_ids(
+        chat_message_ids=history_ids + mainline_ids[-1:],
+        db_session=db_session,
+        prefetch_tool_calls=prefetch_tool_calls,
+    )
+    if len(mainline_messages) != len(history_ids) + 1:
+        raise RuntimeError("Could not load chat message history")
+
     return mainline_messages[-1], mainline_messages[:-1]
 
 
+def history_was_truncated(
+    history_msgs: list[ChatMessage], root_message_id: int
+) -> bool:
+    """Whether `create_chat_chain` left out older messages to fit `max_history_tokens`,
+    the history then doesn't start right after the root message."""
+    return bool(history_msgs) and history_msgs[0].parent_message != root_message_id
+
+
+def get_history_token_counts(
+    history_msgs: list[ChatMessage], llm_tokenizer: BaseTokenizer
+) -> list[int]:
+    """Token counts of the messages for the tokenizer. Messages which have not been
+    counted with it before are counted once and the count is stored on the message,
+    it is persisted whenever the session is committed."""
+    tokenizer_name = llm_tokenizer.name
+
+    # messages with a token_count of 0 are not passed to the LLM
+    uncounted_msgs = [
+        msg
+        for msg in history_msgs
+        if msg.token_count and tokenizer_name not in (msg.token_counts or {})
+    ]
+    if uncounted_msgs:
+        for msg, token_count in zip(
+            uncounted_msgs,
+            llm_tokenizer.count_tokens_batch([msg.message for msg in uncounted_msgs]),
+        ):
+            # assigned as a new dict so that the change is picked up
+            msg.token_counts = {**(msg.token_counts or {}), tokenizer_name: token_count}
+
+    return [
+        (msg.token_counts or {}).get(tokenizer_name, 0) if msg.token_count else 0
+        for msg in history_msgs
+    ]
+
+
 def combine_message_chain(
     messages: list[ChatMessage] | list[PreviousMessage],
     token_limit: int,
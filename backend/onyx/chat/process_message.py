@@ -9,6 +9,8 @@ from sqlalchemy.orm import Session
 from onyx.chat.answer import Answer
 from onyx.chat.chat_utils import create_chat_chain
 from onyx.chat.chat_utils import create_temporary_persona
+from onyx.chat.chat_utils import get_history_token_counts
+from onyx.chat.chat_utils import history_was_truncated
 from onyx.chat.models import AllCitations
 from onyx.chat.models import AnswerStyleConfig
 from onyx.chat.models import ChatOnyxBotResponse
@@ -27,6 +29,7 @@ from onyx.chat.models import PromptConfig
 from onyx.chat.models import QADocsResponse
 from onyx.chat.models import StreamingError
 from onyx.chat.models import StreamStopInfo
+from onyx.chat.prompt_builder.citations_prompt import compute_max_llm_input_tokens
 from onyx.configs.chat_configs import CHAT_TARGET_CHUNK_PERCENTAGE
 from onyx.configs.chat_configs import DISABLE_LLM_CHOOSE_SEARCH
 from onyx.configs.chat_configs import MAX_CHUNKS_FED_TO_CHAT
@@ -420,9 +423,8 @@ def stream_chat_message_objects(
             model_name=llm_model_name,
             provider_type=llm_provider,
         )
-        llm_tokenizer_encode_func = cast(
-            Callable[[str], list[int]], llm_tokenizer.encode
-        )
+        # only the history which can fit in the LLM's context is loaded
+        max_history_tokens = compute_max_llm_input_tokens(llm.config)
 
         search_settings = get_current_search_settings(db_session)
         document_index = get_default_document_index(
@@ -450,17 +452,20 @@ def stream_chat_message_objects(
                 stop_at_message_id=parent_id,
                 chat_session_id=chat_session_id,
                 db_session=db_session,
+                max_history_tokens=max_history_tokens,
             )
 
         elif not use_existing_user_message:
             # Create new message at the right place in the tree and update the parent's child pointer
             # Don't commit yet until we verify the chat message chain
+            message_token_count = llm_tokenizer.count_tokens(message_text)
             user_message = create_new_chat_message(
                 chat_session_id=chat_session_id,
                 parent_message=parent_message,
                 prompt_id=prompt_id,
                 message=message_text,
-                token_count=len(llm_tokenizer_encode_func(message_text)),
+                token_count=message_token_count,
+                token_counts={llm_tokenizer.name: message_token_count},
                 message_type=MessageType.USER,
                 files=None,  # Need to attach later for optimization to only load files once in parallel
                 db_session=db_session,
@@ -468,7 +473,9 @@ def stream_chat_message_objects(
             )
             # re-create linear history of messages
             final_msg, history_msgs = create_chat_chain(
-                chat_session_id=chat_session_id, db_session=db_session
+                chat_session_id=chat_session_id,
+                db_session=db_session,
+                max_history_tokens=max_history_tokens,
             )
             if final_msg.id != user_message.id:
                 db_session.rollback()
@@ -482,7 +489,9 @@ def stream_chat_message_objects(
         else:
             # re-create linear history of messages
             final_msg, history_msgs = create_chat_chain(
-                chat_session_id=chat_session_id, db_session=db_session
+                chat_session_id=chat_session_id,
+                db_session=db_session,
+                max_history_tokens=max_history_tokens,
             )
             if existing_assistant_message_id is None:
                 if final_msg.message_type != MessageType.USER:
@@ -708,8 +717,13 @@ def stream_chat_message_objects(
                 )
             ),
             message_history=[
-                PreviousMessage.from_chat_message(msg, files) for msg in history_msgs
+                PreviousMessage.from_chat_message(msg, files, token_count=token_count)
+                for msg, token_count in zip(
+                    history_msgs,
+                    get_history_token_counts(history_msgs, llm_tokenizer),
+                )
             ],
+            history_truncated=history_was_truncated(history_msgs, root_message.id),
             tools=tools,
             force_use_tool=_get_force_search_settings(new_msg_req, tools),
             single_message_history=single_message_history,
@@ -877,6 +891,7 @@ def stream_chat_message_objects(
             for tool in tool_list:
                 tool_name_to_tool_id[tool.name] = tool_id
 
+        answer_token_count = llm_tokenizer.count_tokens(answer.llm_answer)
         gen_ai_response_message = partial_response(
             message=answer.llm_answer,
             rephrased_query=(
@@ -884,7 +899,8 @@ def stream_chat_message_objects(
             ),
             reference_docs=reference_db_search_docs,
             files=ai_message_files,
-            token_count=len(llm_tokenizer_encode_func(answer.llm_answer)),
+            token_count=answer_token_count,
+            token_counts={llm_tokenizer.name: answer_token_count},
             citations=(
                 message_specific_citations.citation_map
                 if message_specific_citations
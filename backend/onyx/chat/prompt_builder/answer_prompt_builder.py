@@ -17,6 +17,7 @@ from onyx.llm.utils import check_message_tokens
 from onyx.llm.utils import message_to_prompt_and_imgs
 from onyx.natural_language_processing.utils import get_tokenizer
 from onyx.prompts.chat_prompts import CHAT_USER_CONTEXT_FREE_PROMPT
+from onyx.prompts.chat_prompts import HISTORY_TRUNCATED_NOTE
 from onyx.prompts.direct_qa_prompts import HISTORY_BLOCK
 from onyx.prompts.prompt_utils import add_date_time_to_prompt
 from onyx.prompts.prompt_utils import drop_messages_history_overflow
@@ -79,6 +80,7 @@ class AnswerPromptBuilder:
         raw_user_query: str,
         raw_user_uploaded_files: list[InMemoryChatFile],
         single_message_history: str | None = None,
+        history_truncated: bool = False,
     ) -> None:
         self.max_tokens = compute_max_llm_input_tokens(llm_config)
 
@@ -96,6 +98,19 @@ class AnswerPromptBuilder:
             self.history_token_cnts,
         ) = translate_history_to_basemessages(message_history)
 
+        # older messages were left out of the history, tell the LLM right before it
+        self.history_truncated_message_and_token_cnt: tuple[
+            SystemMessage, int
+        ] | None = None
+        if history_truncated and self.message_history:
+            history_truncated_message = SystemMessage(content=HISTORY_TRUNCATED_NOTE)
+            self.history_truncated_message_and_token_cnt = (
+                history_truncated_message,
+                check_message_tokens(
+                    history_truncated_message, self.llm_tokenizer_encode_func
+                ),
+            )
+
         self.system_message_and_token_cnt: tuple[SystemMessage, int] | None = None
         self.user_message_and_token_cnt = (
             user_message,
@@ -142,6 +157,11 @@ class AnswerPromptBuilder:
         if self.system_message_and_token_cnt:
             final_messages_with_tokens.append(self.system_message_and_token_cnt)
 
+        if self.history_truncated_message_and_token_cnt:
+            final_messages_with_tokens.append(
+                self.history_truncated_message_and_token_cnt
+            )
+
         final_messages_with_tokens.extend(
             [
                 (self.message_history[i], self.history_token_cnts[i])
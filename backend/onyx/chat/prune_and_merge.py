@@ -172,7 +172,7 @@ def _apply_pruning(
             )
         )
 
-        section_token_count = len(llm_tokenizer.encode(section_str))
+        section_token_count = llm_tokenizer.count_tokens(section_str)
         # if not using sections (specifically, using Sections where each section maps exactly to the one center chunk),
         # truncate chunks that are way too long. This can happen if the embedding model tokenizer is different
         # than the LLM tokenizer
@@ -224,8 +224,8 @@ def _apply_pruning(
             amount_to_truncate = total_tokens - token_limit
             # NOTE: need to recalculate the length here, since the previous calculation included
             # overhead from JSON-fying the doc / the metadata
-            final_doc_content_length = len(
-                llm_tokenizer.encode(sections[final_section_ind].combined_content)
+            final_doc_content_length = llm_tokenizer.count_tokens(
+                sections[final_section_ind].combined_content
             ) - (amount_to_truncate)
             # this could occur if we only have space for the title / metadata
             # not ideal, but it's the most reasonable thing to do
@@ -12,11 +12,45 @@ from onyx.utils.logger import setup_logger
 logger = setup_logger()
 
 
+# [1], [[1]], etc.
+_CITATION_PATTERN = re.compile(r"\[(\d+)\]|\[\[(\d+)\]\]")
+# [1, [, [[, [[2, etc.
+_POSSIBLE_CITATION_PATTERN = re.compile(r"(\[+\d*$)")
+_MANUAL_CITATION_PATTERN = re.compile(r"\[\[(\d+)\]\]")
+
+
 def in_code_block(llm_text: str) -> bool:
     count = llm_text.count(TRIPLE_BACKTICK)
     return count % 2 != 0
 
 
+class CodeFenceTracker:
+    """Incremental version of `in_code_block` over a growing text. Every run of
+    backticks contains len // 3 non-overlapping triple backticks, so it is enough to
+    remember the length of the run at the end of the text."""
+
+    def __init__(self) -> None:
+        self.fence_count = 0
+        self._trailing_backticks = 0
+
+    def append(self, text: str) -> None:
+        if "`" not in text:
+            if text:
+                self._trailing_backticks = 0
+            return
+
+        for char in text:
+            if char == "`":
+                self._trailing_backticks += 1
+                if self._trailing_backticks % 3 == 0:
+                    self.fence_count += 1
+            else:
+                self._trailing_backticks = 0
+
+    def in_code_block(self) -> bool:
+        return self.fence_count % 2 != 0
+
+
 class CitationProcessor:
     def __init__(
         self,
@@ -31,9 +65,14 @@ class CitationProcessor:
         self.stop_stream = stop_stream
         self.final_order_mapping = final_doc_id_to_rank_map.order_mapping
         self.display_order_mapping = display_doc_id_to_rank_map.order_mapping
-        self.llm_out = ""
+        # only the length and the code fences of the full LLM output are needed, so
+        # the output itself is not accumulated
+        self.llm_out_len = 0
+        self.code_fences = CodeFenceTracker()
         self.max_citation_num = len(context_docs)
         self.citation_order: list[int] = []  # order of citations in the LLM output
+        # final citation number -> position in citation_order (1-indexed)
+        self.citation_order_idx: dict[int, int] = {}
         self.curr_segment = ""
         self.cited_inds: set[int] = set()
         self.hold = ""
@@ -59,7 +98,8 @@ class CitationProcessor:
             self.hold = ""
 
         self.curr_segment += token
-        self.llm_out += token
+        self.llm_out_len += len(token)
+        self.code_fences.append(token)
 
         # Handle code blocks without language tags
         if "`" in self.curr_segment:
@@ -67,21 +107,17 @@ class CitationProcessor:
                 pass
             elif "```" in self.curr_segment:
                 piece_that_comes_after = self.curr_segment.split("```")[1][0]
-                if piece_that_comes_after == "\n" and in_code_block(self.llm_out):
+                if piece_that_comes_after == "\n" and self.code_fences.in_code_block():
                     self.curr_segment = self.curr_segment.replace("```", "```plaintext")
 
-        citation_pattern = r"\[(\d+)\]|\[\[(\d+)\]\]"  # [1], [[1]], etc.
-        citations_found = list(re.finditer(citation_pattern, self.curr_segment))
-        possible_citation_pattern = r"(\[+\d*$)"  # [1, [, [[, [[2, etc.
-        possible_citation_found = re.search(
-            possible_citation_pattern, self.curr_segment
-        )
+        citations_found = list(_CITATION_PATTERN.finditer(self.curr_segment))
+        possible_citation_found = _POSSIBLE_CITATION_PATTERN.search(self.curr_segment)
 
-        if len(citations_found) == 0 and len(self.llm_out) - self.past_cite_count > 5:
+        if len(citations_found) == 0 and self.llm_out_len - self.past_cite_count > 5:
             self.current_citations = []
 
         result = ""
-        if citations_found and not in_code_block(self.llm_out):
+        if citations_found and not self.code_fences.in_code_block():
             last_citation_end = 0
             length_to_add = 0
             while len(citations_found) > 0:
@@ -96,12 +132,13 @@ class CitationProcessor:
                         context_llm_doc.document_id
                     ]
 
-                    if final_citation_num not in self.citation_order:
+                    if final_citation_num not in self.citation_order_idx:
                         self.citation_order.append(final_citation_num)
+                        self.citation_order_idx[final_citation_num] = len(
+                            self.citation_order
+                        )
 
-                    citation_order_idx = (
-                        self.citation_order.index(final_citation_num) + 1
-                    )
+                    citation_order_idx = self.citation_order_idx[final_citation_num]
 
                     # get the value that was displayed to user, should always
                     # be in the display_doc_order_dict. But check anyways
@@ -129,7 +166,7 @@ class CitationProcessor:
 
                     # Handle edge case where LLM outputs citation itself
                     if self.curr_segment.startswith("[["):
-                        match = re.match(r"\[\[(\d+)\]\]", self.curr_segment)
+                        match = _MANUAL_CITATION_PATTERN.match(self.curr_segment)
                         if match:
                             try:
                                 doc_id = int(match.group(1))
@@ -151,7 +188,7 @@ class CitationProcessor:
 
                     link = context_llm_doc.link
 
-                    self.past_cite_count = len(self.llm_out)
+                    self.past_cite_count = self.llm_out_len
                     self.current_citations.append(final_citation_num)
 
                     if citation_order_idx not in self.cited_inds:
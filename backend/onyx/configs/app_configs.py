@@ -283,6 +283,10 @@ except ValueError:
 
 # The maximum number of tasks that can be queued up to sync to Vespa in a single pass
 VESPA_SYNC_MAX_TASKS = 1024
+# The number of documents synced to Vespa by a single metadata sync task
+VESPA_SYNC_BATCH_SIZE = int(os.environ.get("VESPA_SYNC_BATCH_SIZE") or 64)
+# The number of documents of a batch that are updated in Vespa concurrently
+VESPA_SYNC_BATCH_CONCURRENCY = int(os.environ.get("VESPA_SYNC_BATCH_CONCURRENCY") or 8)
 
 DB_YIELD_PER_DEFAULT = 64
 
@@ -290,6 +294,19 @@ DB_YIELD_PER_DEFAULT = 64
 # Connector Configs
 #####
 POLL_CONNECTOR_OFFSET = 30  # Minutes overlap between poll windows
+# Number of document batches a connector fetches ahead on a background thread while
+# the previous batches are being indexed. 0 runs the connector inline.
+CONNECTOR_PREFETCH_BATCHES = int(os.environ.get("CONNECTOR_PREFETCH_BATCHES") or 0)
+# Splits an index attempt from the beginning of a poll connector into this many time
+# range shards, which are indexed in parallel by the indexing workers. 1 disables.
+INDEXING_NUM_SHARDS = int(os.environ.get("INDEXING_NUM_SHARDS") or 1)
+# The attempt fails if a shard it could not claim itself has not been started by
+# another worker within this many seconds of the attempt waiting for it, or if the
+# shards are not all done within INDEXING_SHARD_TIMEOUT seconds of being dispatched
+INDEXING_SHARD_START_TIMEOUT = int(
+    os.environ.get("INDEXING_SHARD_START_TIMEOUT") or 10 * 60
+)
+INDEXING_SHARD_TIMEOUT = int(os.environ.get("INDEXING_SHARD_TIMEOUT") or 24 * 60 * 60)
 
 # View the list here:
 # https://github.com/onyx-dot-app/onyx/blob/main/backend/onyx/connectors/factory.py
@@ -473,6 +490,64 @@ INDEXING_TRACER_INTERVAL = int(os.environ.get("INDEXING_TRACER_INTERVAL") or 0)
 # exception without aborting the attempt.
 INDEXING_EXCEPTION_LIMIT = int(os.environ.get("INDEXING_EXCEPTION_LIMIT") or 0)
 
+# Runs chunking, embedding and writing to the document index as concurrent stages
+# across consecutive document batches, so the model server and Vespa are kept busy
+# at the same time. Uses more memory since several batches are in flight at once.
+ENABLE_PIPELINED_INDEXING = (
+    os.environ.get("ENABLE_PIPELINED_INDEXING", "").lower() == "true"
+)
+# Max number of batches waiting in front of each pipelined indexing stage
+PIPELINED_INDEXING_QUEUE_SIZE = int(
+    os.environ.get("PIPELINED_INDEXING_QUEUE_SIZE") or 1
+)
+
+# Max number of chunks of a document batch which are embedded and held in memory at
+# once. Larger batches are chunked one document at a time and embedded and written to
+# the document index in sub batches of at most this many chunks, so oversized documents
+# (large PDFs, spreadsheets) don't need all of their embedded chunks in memory.
+# 0 embeds and writes the whole batch at once. Not supported with
+# ENABLE_PIPELINED_INDEXING, the indexing worker refuses to start with both set.
+INDEXING_MAX_CHUNKS_PER_SUB_BATCH = int(
+    os.environ.get("INDEXING_MAX_CHUNKS_PER_SUB_BATCH") or 0
+)
+
+# Seconds between writes of the indexing progress (document counts and checkpoint) of
+# a running index attempt to Postgres. 0 writes after every batch.
+INDEXING_PROGRESS_FLUSH_INTERVAL = float(
+    os.environ.get("INDEXING_PROGRESS_FLUSH_INTERVAL") or 10
+)
+# Seconds between checks of the cc pair and index attempt status in Postgres during
+# indexing. Pausing and deleting also raise the Redis stop signal which is checked
+# every batch, this covers the rest (e.g. an attempt canceled by a model swap).
+INDEXING_DB_STATUS_CHECK_INTERVAL = float(
+    os.environ.get("INDEXING_DB_STATUS_CHECK_INTERVAL") or 60
+)
+
+# Stores the embedding of every indexed text in Postgres, keyed by a hash of the text
+# and the embedding model settings. Re-indexing unchanged content (re-syncs, pruning,
+# documents whose updated_at moved without a content change) then skips the model server
+ENABLE_EMBEDDING_CACHE = os.environ.get("ENABLE_EMBEDDING_CACHE", "").lower() == "true"
+# Least recently used entries beyond this are evicted
+EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES") or 1_000_000
+)
+# Eviction requires a scan over the cache, so it only runs after this many new entries
+EMBEDDING_CACHE_EVICTION_INTERVAL = int(
+    os.environ.get("EMBEDDING_CACHE_EVICTION_INTERVAL") or 10_000
+)
+# A cache hit only refreshes the entry's last use once it is older than this, so lookups
+# whose entries were used recently don't write to Postgres
+EMBEDDING_CACHE_TOUCH_INTERVAL_SECONDS = int(
+    os.environ.get("EMBEDDING_CACHE_TOUCH_INTERVAL_SECONDS") or 24 * 60 * 60
+)
+
+# Only writes the chunks of a re-indexed document whose content, metadata or access changed
+# since the previous indexing into the same index, based on the chunk fingerprints stored
+# with the document. Re-indexing from the beginning always writes every chunk
+ENABLE_SKIP_UNCHANGED_CHUNKS = (
+    os.environ.get("ENABLE_SKIP_UNCHANGED_CHUNKS", "").lower() == "true"
+)
+
 # Maximum file size in a document to be indexed
 MAX_DOCUMENT_CHARS = int(os.environ.get("MAX_DOCUMENT_CHARS") or 5_000_000)
 MAX_FILE_SIZE_BYTES = int(
@@ -524,6 +599,25 @@ CUSTOM_ANSWER_VALIDITY_CONDITIONS = json.loads(
 
 VESPA_REQUEST_TIMEOUT = int(os.environ.get("VESPA_REQUEST_TIMEOUT") or "15")
 
+# Feed chunk writes / deletes to Vespa through a single asyncio HTTP/2 client with
+# many operations in flight instead of one blocking request per chunk per thread.
+# Off by default, the thread pool path is kept until scripts/vespa_feed_benchmark.py
+# shows a gain against a real deployment
+ENABLE_VESPA_FEED_CLIENT = (
+    os.environ.get("ENABLE_VESPA_FEED_CLIENT", "").lower() == "true"
+)
+VESPA_FEED_MAX_IN_FLIGHT = int(os.environ.get("VESPA_FEED_MAX_IN_FLIGHT") or "128")
+# Feed the embedding tensors as hex encoded float cells instead of JSON numbers, which
+# is much cheaper to serialize for large embeddings
+ENABLE_VESPA_HEX_TENSOR_FEED = (
+    os.environ.get("ENABLE_VESPA_HEX_TENSOR_FEED", "").lower() == "true"
+)
+# Apply metadata updates (ACLs, document sets, boost, hidden) to all chunks of a batch
+# of documents with one selection based update in Vespa instead of a PUT per chunk
+ENABLE_VESPA_SELECTION_UPDATES = (
+    os.environ.get("ENABLE_VESPA_SELECTION_UPDATES", "").lower() == "true"
+)
+
 SYSTEM_RECURSION_LIMIT = int(os.environ.get("SYSTEM_RECURSION_LIMIT") or "1000")
 
 PARSE_WITH_TRAFILATURA = os.environ.get("PARSE_WITH_TRAFILATURA", "").lower() == "true"
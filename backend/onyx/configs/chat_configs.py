@@ -50,6 +50,19 @@ HYBRID_ALPHA_KEYWORD = max(
 TITLE_CONTENT_RATIO = max(
     0, min(1, float(os.environ.get("TITLE_CONTENT_RATIO") or 0.10))
 )
+# Number of query embeddings kept in memory per process, repeated queries (Slack bots,
+# starter messages) skip the model server. Set to 0 to disable
+QUERY_EMBEDDING_CACHE_SIZE = int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE") or 1024)
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = int(
+    os.environ.get("QUERY_EMBEDDING_CACHE_TTL_SECONDS") or 60 * 60
+)
+# Number of cross-encoder scores of (query, chunk) pairs kept in memory per process, so
+# follow up messages and repeated searches only rerank chunks they haven't seen before.
+# Set to 0 to disable
+RERANK_SCORE_CACHE_SIZE = int(os.environ.get("RERANK_SCORE_CACHE_SIZE") or 10000)
+RERANK_SCORE_CACHE_TTL_SECONDS = int(
+    os.environ.get("RERANK_SCORE_CACHE_TTL_SECONDS") or 60 * 60
+)
 
 # A list of languages passed to the LLM to rephase the query
 # For example "English,French,Spanish", be sure to use the "," separator
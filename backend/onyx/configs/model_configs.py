@@ -1,6 +1,8 @@
 import json
 import os
 
+from shared_configs.enums import EmbeddingWireFormat
+
 #####
 # Embedding/Reranking Model Configs
 #####
@@ -46,6 +48,19 @@ EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE") or 0) or None
 BATCH_SIZE_ENCODE_CHUNKS = EMBEDDING_BATCH_SIZE or 8
 # don't send over too many chunks at once, as sending too many could cause timeouts
 BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES = EMBEDDING_BATCH_SIZE or 512
+# Number of embedding batches sent to the model server at the same time. Mostly useful
+# when the model server forwards to a cloud embedding provider
+EMBEDDING_MAX_CONCURRENT_BATCHES = int(
+    os.environ.get("EMBEDDING_MAX_CONCURRENT_BATCHES") or 1
+)
+# Size of the keep-alive connection pool to the model server, per process
+MODEL_SERVER_MAX_CONNECTIONS = int(os.environ.get("MODEL_SERVER_MAX_CONNECTIONS") or 32)
+# Format the model server sends embeddings back in. "float32" / "bfloat16" pack them into
+# a base64 string instead of JSON lists of floats, which is much cheaper to encode and
+# decode for large embeddings. Model servers without support keep answering with JSON
+EMBEDDING_WIRE_FORMAT = EmbeddingWireFormat(
+    os.environ.get("EMBEDDING_WIRE_FORMAT") or EmbeddingWireFormat.JSON
+)
 # For score display purposes, only way is to know the expected ranges
 CROSS_ENCODER_RANGE_MAX = 1
 CROSS_ENCODER_RANGE_MIN = 0
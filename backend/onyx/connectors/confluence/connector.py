@@ -16,6 +16,8 @@ from onyx.connectors.confluence.utils import build_confluence_document_id
 from onyx.connectors.confluence.utils import datetime_from_string
 from onyx.connectors.confluence.utils import extract_text_from_confluence_html
 from onyx.connectors.confluence.utils import validate_attachment_filetype
+from onyx.connectors.interfaces import CheckpointConnector
+from onyx.connectors.interfaces import ConnectorCheckpoint
 from onyx.connectors.interfaces import GenerateDocumentsOutput
 from onyx.connectors.interfaces import GenerateSlimDocumentOutput
 from onyx.connectors.interfaces import LoadConnector
@@ -76,7 +78,9 @@ _FULL_EXTENSION_FILTER_STRING = "".join(
 )
 
 
-class ConfluenceConnector(LoadConnector, PollConnector, SlimConnector):
+class ConfluenceConnector(
+    LoadConnector, PollConnector, SlimConnector, CheckpointConnector
+):
     def __init__(
         self,
         wiki_base: str,
@@ -131,6 +135,9 @@ class ConfluenceConnector(LoadConnector, PollConnector, SlimConnector):
 
         self.timezone: timezone = timezone(offset=timedelta(hours=timezone_offset))
 
+        # last modification time of the last page which has been fully yielded
+        self._checkpoint_last_modified: float | None = None
+
     @property
     def confluence_client(self) -> OnyxConfluence:
         if self._confluence_client is None:
@@ -253,24 +260,33 @@ class ConfluenceConnector(LoadConnector, PollConnector, SlimConnector):
             metadata=doc_metadata,
         )
 
+    def get_checkpoint(self) -> ConnectorCheckpoint:
+        return {"last_modified": self._checkpoint_last_modified}
+
+    def set_checkpoint(self, checkpoint: ConnectorCheckpoint) -> None:
+        self._checkpoint_last_modified = checkpoint.get("last_modified")
+
     def _fetch_document_batches(
         self,
         start: SecondsSinceUnixEpoch | None = None,
         end: SecondsSinceUnixEpoch | None = None,
     ) -> GenerateDocumentsOutput:
         doc_batch: list[Document] = []
-        confluence_page_ids: list[str] = []
 
-        page_query = self._construct_page_query(start, end)
+        # pages are fetched oldest modification first, so a run can continue from
+        # the last page it finished. CQL times only have minute precision, the pages
+        # of that minute are fetched again
+        if self._checkpoint_last_modified:
+            start = max(start or 0, self._checkpoint_last_modified)
+        page_query = self._construct_page_query(start, end) + " order by lastmodified"
         logger.debug(f"page_query: {page_query}")
-        # Fetch pages as Documents
+        # Fetch pages as Documents, each followed by its attachments
         for page in self.confluence_client.paginated_cql_retrieval(
             cql=page_query,
             expand=",".join(_PAGE_EXPANSION_FIELDS),
             limit=self.batch_size,
         ):
             logger.debug(f"_fetch_document_batches: {page['id']}")
-            confluence_page_ids.append(page["id"])
             doc = self._convert_object_to_document(page)
             if doc is not None:
                 doc_batch.append(doc)
@@ -278,9 +294,7 @@ class ConfluenceConnector(LoadConnector, PollConnector, SlimConnector):
                 yield doc_batch
                 doc_batch = []
 
-        # Fetch attachments as Documents
-        for confluence_page_id in confluence_page_ids:
-            attachment_query = self._construct_attachment_query(confluence_page_id)
+            attachment_query = self._construct_attachment_query(page["id"])
             # TODO: maybe should add time filter as well?
             for attachment in self.confluence_client.paginated_cql_retrieval(
                 cql=attachment_query,
@@ -293,6 +307,10 @@ class ConfluenceConnector(LoadConnector, PollConnector, SlimConnector):
                     yield doc_batch
                     doc_batch = []
 
+            self._checkpoint_last_modified = datetime_from_string(
+                page["version"]["when"]
+            ).timestamp()
+
         if doc_batch:
             yield doc_batch
 
@@ -1,10 +1,18 @@
+import contextvars
+import copy
+import queue
 import sys
+import threading
+from collections.abc import Generator
+from collections.abc import Iterator
 from datetime import datetime
 
 from onyx.connectors.interfaces import BaseConnector
-from onyx.connectors.interfaces import GenerateDocumentsOutput
+from onyx.connectors.interfaces import CheckpointConnector
+from onyx.connectors.interfaces import ConnectorCheckpoint
 from onyx.connectors.interfaces import LoadConnector
 from onyx.connectors.interfaces import PollConnector
+from onyx.connectors.models import Document
 from onyx.utils.logger import setup_logger
 
 
@@ -12,6 +20,20 @@ logger = setup_logger()
 
 
 TimeRange = tuple[datetime, datetime]
+# document batch + checkpoint right after it (None if the connector can't checkpoint)
+CheckpointedDocumentsOutput = Iterator[
+    tuple[list[Document], ConnectorCheckpoint | None]
+]
+
+# how long the fetch thread waits on a full queue before checking if it should stop
+_PREFETCH_PUT_TIMEOUT = 1.0
+
+
+class _PrefetchDone:
+    """Put on the prefetch queue once the connector is exhausted or failed."""
+
+    def __init__(self, error: BaseException | None = None) -> None:
+        self.error = error
 
 
 class ConnectorRunner:
@@ -20,8 +42,21 @@ class ConnectorRunner:
         connector: BaseConnector,
         time_range: TimeRange | None = None,
         fail_loudly: bool = False,
+        checkpoint: ConnectorCheckpoint | None = None,
+        prefetch_batches: int = 0,
     ):
+        """With `prefetch_batches` > 0 the connector is run on a background thread
+        which fetches up to that many batches ahead of the consumer, so fetching from
+        the source overlaps with indexing the previous batches."""
         self.connector = connector
+        self.prefetch_batches = prefetch_batches
+
+        if checkpoint is not None:
+            if not isinstance(self.connector, CheckpointConnector):
+                raise ValueError(
+                    f"Connector does not support checkpoints. type: {type(self.connector)}"
+                )
+            self.connector.set_checkpoint(checkpoint)
 
         if isinstance(self.connector, PollConnector):
             if time_range is None:
@@ -42,10 +77,87 @@ class ConnectorRunner:
         else:
             raise ValueError(f"Invalid connector. type: {type(self.connector)}")
 
-    def run(self) -> GenerateDocumentsOutput:
-        """Adds additional exception logging to the connector."""
+    def run(self) -> CheckpointedDocumentsOutput:
+        """Adds additional exception logging to the connector. Every batch comes with
+        the checkpoint to resume from once the batch has been indexed. Exceptions of
+        the connector are raised after the batches which were fetched before them."""
+        if self.prefetch_batches <= 0:
+            yield from self._run_connector()
+            return
+
+        prefetch_queue: queue.Queue[
+            tuple[list[Document], ConnectorCheckpoint | None] | _PrefetchDone
+        ] = queue.Queue(maxsize=self.prefetch_batches)
+        stop_event = threading.Event()
+        # runs with the caller's context so that e.g. the current tenant is visible
+        fetch_thread = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(self._prefetch, prefetch_queue, stop_event),
+            name="connector-prefetch",
+            daemon=True,
+        )
+        fetch_thread.start()
+
+        try:
+            while True:
+                item = prefetch_queue.get()
+                if isinstance(item, _PrefetchDone):
+                    if item.error is not None:
+                        raise item.error
+                    return
+                yield item
+        finally:
+            # the consumer stopped early (stop signal, indexing failure), the fetch
+            # thread closes the connector once its current batch is done
+            stop_event.set()
+            while not prefetch_queue.empty():
+                prefetch_queue.get_nowait()
+
+    def _prefetch(
+        self,
+        prefetch_queue: queue.Queue[
+            tuple[list[Document], ConnectorCheckpoint | None] | _PrefetchDone
+        ],
+        stop_event: threading.Event,
+    ) -> None:
+        def _put(
+            item: tuple[list[Document], ConnectorCheckpoint | None] | _PrefetchDone,
+        ) -> bool:
+            while not stop_event.is_set():
+                try:
+                    prefetch_queue.put(item, timeout=_PREFETCH_PUT_TIMEOUT)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        batches = self._run_connector()
         try:
-            yield from self.doc_batch_generator
+            for doc_batch, checkpoint in batches:
+                # the connector keeps going while the batch waits in the queue
+                if not _put((doc_batch, copy.deepcopy(checkpoint))):
+                    return
+            _put(_PrefetchDone())
+        except BaseException as e:
+            _put(_PrefetchDone(error=e))
+        finally:
+            batches.close()
+            # closed right away instead of once the runner is garbage collected, so
+            # that the connector releases its resources (e.g. open HTTP sessions)
+            if isinstance(self.doc_batch_generator, Generator):
+                self.doc_batch_generator.close()
+
+    def _run_connector(
+        self,
+    ) -> Generator[tuple[list[Document], ConnectorCheckpoint | None], None, None]:
+        try:
+            for doc_batch in self.doc_batch_generator:
+                checkpoint = (
+                    self.connector.get_checkpoint()
+                    if isinstance(self.connector, CheckpointConnector)
+                    else None
+                )
+                yield doc_batch, checkpoint
         except Exception:
             exc_type, _, exc_traceback = sys.exc_info()
 
@@ -1,3 +1,4 @@
+from collections import deque
 from collections.abc import Callable
 from collections.abc import Iterator
 from concurrent.futures import as_completed
@@ -36,6 +37,8 @@ from onyx.connectors.google_utils.shared_constants import ONYX_SCOPE_INSTRUCTION
 from onyx.connectors.google_utils.shared_constants import SCOPE_DOC_URL
 from onyx.connectors.google_utils.shared_constants import SLIM_BATCH_SIZE
 from onyx.connectors.google_utils.shared_constants import USER_FIELDS
+from onyx.connectors.interfaces import CheckpointConnector
+from onyx.connectors.interfaces import ConnectorCheckpoint
 from onyx.connectors.interfaces import GenerateDocumentsOutput
 from onyx.connectors.interfaces import GenerateSlimDocumentOutput
 from onyx.connectors.interfaces import LoadConnector
@@ -74,16 +77,24 @@ def _convert_single_file(
 
 
 def _process_files_batch(
-    files: list[GoogleDriveFileType], convert_func: Callable, batch_size: int
+    files: list[GoogleDriveFileType],
+    convert_func: Callable,
+    batch_size: int,
+    on_files_processed: Callable[[int], None] = lambda num_files: None,
 ) -> GenerateDocumentsOutput:
+    """`on_files_processed` is called with the number of files (from the start of
+    `files`) whose documents have all been yielded."""
     doc_batch = []
     with ThreadPoolExecutor(max_workers=min(16, len(files))) as executor:
-        for doc in executor.map(convert_func, files):
+        # map keeps the order of the files
+        for ind, doc in enumerate(executor.map(convert_func, files)):
             if doc:
                 doc_batch.append(doc)
                 if len(doc_batch) >= batch_size:
+                    on_files_processed(ind + 1)
                     yield doc_batch
                     doc_batch = []
+    on_files_processed(len(files))
     if doc_batch:
         yield doc_batch
 
@@ -106,7 +117,9 @@ def _clean_requested_drive_ids(
     return valid_requested_drive_ids, filtered_folder_ids
 
 
-class GoogleDriveConnector(LoadConnector, PollConnector, SlimConnector):
+class GoogleDriveConnector(
+    LoadConnector, PollConnector, SlimConnector, CheckpointConnector
+):
     def __init__(
         self,
         include_shared_drives: bool = False,
@@ -188,6 +201,21 @@ class GoogleDriveConnector(LoadConnector, PollConnector, SlimConnector):
 
         self._retrieved_ids: set[str] = set()
 
+        # Checkpoints are per retrieval (a user's files in service account mode,
+        # a drive or folder otherwise). A retrieval is only checkpointed once all
+        # of its files have been processed, files are numbered in retrieval order.
+        self._num_files_retrieved = 0
+        self._num_files_processed = 0
+        self._completed_retrieval_ids: list[str] = []
+        self._completed_retrieval_id_set: set[str] = set()
+        # (files retrieved, number of completed retrievals, retrieved drive / folder
+        # ids) at the end of each retrieval which is not checkpointed yet
+        self._pending_retrieval_checkpoints: deque[tuple[int, int, list[str]]] = deque()
+        self._checkpoint: ConnectorCheckpoint = {
+            "completed_retrieval_ids": [],
+            "retrieved_ids": [],
+        }
+
     @property
     def primary_admin_email(self) -> str:
         if self._primary_admin_email is None:
@@ -230,6 +258,47 @@ class GoogleDriveConnector(LoadConnector, PollConnector, SlimConnector):
     def _update_traversed_parent_ids(self, folder_id: str) -> None:
         self._retrieved_ids.add(folder_id)
 
+    def get_checkpoint(self) -> ConnectorCheckpoint:
+        while (
+            self._pending_retrieval_checkpoints
+            and self._pending_retrieval_checkpoints[0][0] <= self._num_files_processed
+        ):
+            (
+                _,
+                num_completed,
+                retrieved_ids,
+            ) = self._pending_retrieval_checkpoints.popleft()
+            self._checkpoint = {
+                "completed_retrieval_ids": self._completed_retrieval_ids[
+                    :num_completed
+                ],
+                "retrieved_ids": retrieved_ids,
+            }
+        return self._checkpoint
+
+    def set_checkpoint(self, checkpoint: ConnectorCheckpoint) -> None:
+        self._checkpoint = checkpoint
+        self._completed_retrieval_ids = list(checkpoint["completed_retrieval_ids"])
+        self._completed_retrieval_id_set = set(self._completed_retrieval_ids)
+        # the drives / folders retrieved by the completed retrievals are not
+        # retrieved again by the others
+        self._retrieved_ids.update(checkpoint["retrieved_ids"])
+
+    def _is_retrieval_completed(self, retrieval_id: str) -> bool:
+        return retrieval_id in self._completed_retrieval_id_set
+
+    def _complete_retrieval(self, retrieval_id: str, target_ids: set[str]) -> None:
+        """Called once all files of the retrieval have been retrieved."""
+        self._completed_retrieval_ids.append(retrieval_id)
+        self._completed_retrieval_id_set.add(retrieval_id)
+        self._pending_retrieval_checkpoints.append(
+            (
+                self._num_files_retrieved,
+                len(self._completed_retrieval_ids),
+                sorted(self._retrieved_ids & target_ids),
+            )
+        )
+
     def _get_all_user_emails(self) -> list[str]:
         # Start with primary admin email
         user_emails = [self.primary_admin_email]
@@ -388,11 +457,16 @@ class GoogleDriveConnector(LoadConnector, PollConnector, SlimConnector):
                     end,
                 ): email
                 for email in all_org_emails
+                if not self._is_retrieval_completed(f"user:{email}")
             }
 
             # Yield results as they complete
             for future in as_completed(future_to_email):
                 yield from future.result()
+                self._complete_retrieval(
+                    f"user:{future_to_email[future]}",
+                    drive_ids_to_retrieve | folder_ids_to_retrieve,
+                )
 
         remaining_folders = (
             drive_ids_to_retrieve | folder_ids_to_retrieve
@@ -410,7 +484,9 @@ class GoogleDriveConnector(LoadConnector, PollConnector, SlimConnector):
     ) -> Iterator[GoogleDriveFileType]:
         drive_service = get_drive_service(self.creds, self.primary_admin_email)
 
-        if self.include_files_shared_with_me or self.include_my_drives:
+        if (
+            self.include_files_shared_with_me or self.include_my_drives
+        ) and not self._is_retrieval_completed("oauth"):
             logger.info(
                 f"Getting shared files/my drive files for OAuth "
                 f"with include_files_shared_with_me={self.include_files_shared_with_me}, "
@@ -427,6 +503,7 @@ class GoogleDriveConnector(LoadConnector, PollConnector, SlimConnector):
                 start=start,
                 end=end,
             )
+            self._complete_retrieval("oauth", set())
 
         all_requested = (
             self.include_files_shared_with_me
@@ -450,6 +527,8 @@ class GoogleDriveConnector(LoadConnector, PollConnector, SlimConnector):
             drive_ids_to_retrieve = all_drive_ids
 
         for drive_id in drive_ids_to_retrieve:
+            if self._is_retrieval_completed(f"drive:{drive_id}"):
+                continue
             logger.info(
                 f"Getting files in shared drive '{drive_id}' as '{self.primary_admin_email}'"
             )
@@ -461,11 +540,14 @@ class GoogleDriveConnector(LoadConnector, PollConnector, SlimConnector):
                 start=start,
                 end=end,
             )
+            self._complete_retrieval(f"drive:{drive_id}", {drive_id})
 
         # Even if no folders were requested, we still check if any drives were requested
         # that could be folders.
         remaining_folders = folder_ids_to_retrieve - self._retrieved_ids
         for folder_id in remaining_folders:
+            if self._is_retrieval_completed(f"folder:{folder_id}"):
+                continue
             logger.info(
                 f"Getting files in folder '{folder_id}' as '{self.primary_admin_email}'"
             )
@@ -477,6 +559,7 @@ class GoogleDriveConnector(LoadConnector, PollConnector, SlimConnector):
                 start=start,
                 end=end,
             )
+            self._complete_retrieval(f"folder:{folder_id}", folder_ids_to_retrieve)
 
         remaining_folders = (
             drive_ids_to_retrieve | folder_ids_to_retrieve
@@ -517,9 +600,17 @@ class GoogleDriveConnector(LoadConnector, PollConnector, SlimConnector):
 
         # Process files in larger batches
         LARGE_BATCH_SIZE = self.batch_size * 4
-        files_to_process = []
+        files_to_process: list[GoogleDriveFileType] = []
+        # retrieval order number of each file to process
+        file_nums: list[int] = []
+
+        def _on_files_processed(file_nums: list[int], num_files: int) -> None:
+            if num_files:
+                self._num_files_processed = file_nums[num_files - 1]
+
         # Gather the files into batches to be processed in parallel
         for file in self._fetch_drive_items(is_slim=False, start=start, end=end):
+            self._num_files_retrieved += 1
             if (
                 file.get("size")
                 and int(cast(str, file.get("size"))) > MAX_FILE_SIZE_BYTES
@@ -530,16 +621,24 @@ class GoogleDriveConnector(LoadConnector, PollConnector, SlimConnector):
                 continue
 
             files_to_process.append(file)
+            file_nums.append(self._num_files_retrieved)
             if len(files_to_process) >= LARGE_BATCH_SIZE:
                 yield from _process_files_batch(
-                    files_to_process, convert_func, self.batch_size
+                    files_to_process,
+                    convert_func,
+                    self.batch_size,
+                    partial(_on_files_processed, file_nums),
                 )
                 files_to_process = []
+                file_nums = []
 
         # Process any remaining files
         if files_to_process:
             yield from _process_files_batch(
-                files_to_process, convert_func, self.batch_size
+                files_to_process,
+                convert_func,
+                self.batch_size,
+                partial(_on_files_processed, file_nums),
             )
 
     def load_from_state(self) -> GenerateDocumentsOutput:
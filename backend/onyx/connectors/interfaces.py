@@ -13,6 +13,8 @@ SecondsSinceUnixEpoch = float
 
 GenerateDocumentsOutput = Iterator[list[Document]]
 GenerateSlimDocumentOutput = Iterator[list[SlimDocument]]
+# JSON serializable, the contents are up to the connector
+ConnectorCheckpoint = dict[str, Any]
 
 
 class BaseConnector(abc.ABC):
@@ -67,6 +69,21 @@ class SlimConnector(BaseConnector):
         raise NotImplementedError
 
 
+# Can resume a load / poll part way through, e.g. after the indexing worker died
+class CheckpointConnector(BaseConnector):
+    @abc.abstractmethod
+    def get_checkpoint(self) -> ConnectorCheckpoint:
+        """State to resume from right after the most recently yielded batch. Must be
+        cheap, it is read after every batch."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set_checkpoint(self, checkpoint: ConnectorCheckpoint) -> None:
+        """Called before `load_from_state` / `poll_source` (with the same time range
+        as the checkpointed run), documents up to the checkpoint may be skipped."""
+        raise NotImplementedError
+
+
 class OAuthConnector(BaseConnector):
     class AdditionalOauthKwargs(BaseModel):
         # if overridden, all fields should be str type
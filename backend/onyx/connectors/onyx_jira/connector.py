@@ -12,6 +12,8 @@ from onyx.configs.app_configs import JIRA_CONNECTOR_LABELS_TO_SKIP
 from onyx.configs.app_configs import JIRA_CONNECTOR_MAX_TICKET_SIZE
 from onyx.configs.constants import DocumentSource
 from onyx.connectors.cross_connector_utils.miscellaneous_utils import time_str_to_utc
+from onyx.connectors.interfaces import CheckpointConnector
+from onyx.connectors.interfaces import ConnectorCheckpoint
 from onyx.connectors.interfaces import GenerateDocumentsOutput
 from onyx.connectors.interfaces import GenerateSlimDocumentOutput
 from onyx.connectors.interfaces import LoadConnector
@@ -152,7 +154,12 @@ def fetch_jira_issues_batch(
         )
 
 
-class JiraConnector(LoadConnector, PollConnector, SlimConnector):
+def _get_issue_key_from_document_id(document_id: str) -> str:
+    # see `fetch_jira_issues_batch`, the id is the link to the issue
+    return document_id.rsplit("/browse/", 1)[-1]
+
+
+class JiraConnector(LoadConnector, PollConnector, SlimConnector, CheckpointConnector):
     def __init__(
         self,
         jira_project_url: str,
@@ -169,6 +176,8 @@ class JiraConnector(LoadConnector, PollConnector, SlimConnector):
         self._comment_email_blacklist = comment_email_blacklist or []
 
         self.labels_to_skip = set(labels_to_skip)
+        # last issue which has been yielded, issues are fetched in key order
+        self._last_issue_key: str | None = None
 
     @property
     def comment_email_blacklist(self) -> tuple:
@@ -192,10 +201,20 @@ class JiraConnector(LoadConnector, PollConnector, SlimConnector):
         )
         return None
 
-    def load_from_state(self) -> GenerateDocumentsOutput:
-        jql = f"project = {self.quoted_jira_project}"
+    def get_checkpoint(self) -> ConnectorCheckpoint:
+        return {"last_issue_key": self._last_issue_key}
+
+    def set_checkpoint(self, checkpoint: ConnectorCheckpoint) -> None:
+        self._last_issue_key = checkpoint.get("last_issue_key")
+
+    def _fetch_document_batches(self, jql: str) -> GenerateDocumentsOutput:
+        # issues are fetched in key order so that a run can continue after the
+        # last issue it indexed
+        if self._last_issue_key:
+            jql += f' AND issuekey > "{self._last_issue_key}"'
+        jql += " ORDER BY key ASC"
 
-        document_batch = []
+        document_batch: list[Document] = []
         for doc in fetch_jira_issues_batch(
             jira_client=self.jira_client,
             jql=jql,
@@ -205,11 +224,20 @@ class JiraConnector(LoadConnector, PollConnector, SlimConnector):
         ):
             document_batch.append(doc)
             if len(document_batch) >= self.batch_size:
+                self._last_issue_key = _get_issue_key_from_document_id(doc.id)
                 yield document_batch
                 document_batch = []
 
+        if document_batch:
+            self._last_issue_key = _get_issue_key_from_document_id(
+                document_batch[-1].id
+            )
         yield document_batch
 
+    def load_from_state(self) -> GenerateDocumentsOutput:
+        jql = f"project = {self.quoted_jira_project}"
+        return self._fetch_document_batches(jql)
+
     def poll_source(
         self, start: SecondsSinceUnixEpoch, end: SecondsSinceUnixEpoch
     ) -> GenerateDocumentsOutput:
@@ -225,21 +253,7 @@ class JiraConnector(LoadConnector, PollConnector, SlimConnector):
             f"updated >= '{start_date_str}' AND "
             f"updated <= '{end_date_str}'"
         )
-
-        document_batch = []
-        for doc in fetch_jira_issues_batch(
-            jira_client=self.jira_client,
-            jql=jql,
-            batch_size=_JIRA_FULL_PAGE_SIZE,
-            comment_email_blacklist=self.comment_email_blacklist,
-            labels_to_skip=self.labels_to_skip,
-        ):
-            document_batch.append(doc)
-            if len(document_batch) >= self.batch_size:
-                yield document_batch
-                document_batch = []
-
-        yield document_batch
+        return self._fetch_document_batches(jql)
 
     def retrieve_all_slim_documents(
         self,
@@ -6,12 +6,15 @@ from datetime import timezone
 from typing import Any
 from typing import cast
 
+from pydantic import BaseModel
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 
 from onyx.configs.app_configs import ENABLE_EXPENSIVE_EXPERT_CALLS
 from onyx.configs.app_configs import INDEX_BATCH_SIZE
 from onyx.configs.constants import DocumentSource
+from onyx.connectors.interfaces import CheckpointConnector
+from onyx.connectors.interfaces import ConnectorCheckpoint
 from onyx.connectors.interfaces import GenerateDocumentsOutput
 from onyx.connectors.interfaces import GenerateSlimDocumentOutput
 from onyx.connectors.interfaces import PollConnector
@@ -39,6 +42,15 @@ MessageType = dict[str, Any]
 ThreadType = list[MessageType]
 
 
+class SlackCheckpoint(BaseModel):
+    # channels whose documents have all been yielded
+    completed_channel_ids: list[str] = []
+    # channel history is fetched newest first, this is the ts of the oldest message
+    # of the current channel which has been yielded
+    current_channel_id: str | None = None
+    current_channel_latest: str | None = None
+
+
 def _collect_paginated_channels(
     client: WebClient,
     exclude_archived: bool,
@@ -267,8 +279,12 @@ def _get_all_docs(
     oldest: str | None = None,
     latest: str | None = None,
     msg_filter_func: Callable[[MessageType], bool] = default_msg_filter,
+    checkpoint: SlackCheckpoint | None = None,
 ) -> Generator[Document, None, None]:
-    """Get all documents in the workspace, channel by channel"""
+    """Get all documents in the workspace, channel by channel. If a checkpoint is
+    given, the run continues from it and it is kept up to date as documents are
+    yielded."""
+    checkpoint = checkpoint or SlackCheckpoint()
     slack_cleaner = SlackTextCleaner(client=client)
 
     # Cache to prevent refetching via API since users
@@ -279,10 +295,24 @@ def _get_all_docs(
         all_channels, channels, channel_name_regex_enabled
     )
 
+    completed_channel_ids = set(checkpoint.completed_channel_ids)
     for channel in filtered_channels:
+        if channel["id"] in completed_channel_ids:
+            continue
+
+        channel_latest = latest
+        if (
+            checkpoint.current_channel_id == channel["id"]
+            and checkpoint.current_channel_latest
+        ):
+            channel_latest = checkpoint.current_channel_latest
+        else:
+            checkpoint.current_channel_id = channel["id"]
+            checkpoint.current_channel_latest = None
+
         channel_docs = 0
         channel_message_batches = get_channel_messages(
-            client=client, channel=channel, oldest=oldest, latest=latest
+            client=client, channel=channel, oldest=oldest, latest=channel_latest
         )
 
         seen_thread_ts: set[str] = set()
@@ -307,6 +337,7 @@ def _get_all_docs(
 
                 if filtered_thread:
                     channel_docs += 1
+                    checkpoint.current_channel_latest = message["ts"]
                     yield thread_to_doc(
                         channel=channel,
                         thread=filtered_thread,
@@ -315,6 +346,9 @@ def _get_all_docs(
                         user_cache=user_cache,
                     )
 
+        checkpoint.completed_channel_ids.append(channel["id"])
+        checkpoint.current_channel_id = None
+        checkpoint.current_channel_latest = None
         logger.info(
             f"Pulled {channel_docs} documents from slack channel {channel['name']}"
         )
@@ -367,7 +401,7 @@ def _get_all_doc_ids(
         yield channel_metadata_list
 
 
-class SlackPollConnector(PollConnector, SlimConnector):
+class SlackPollConnector(PollConnector, SlimConnector, CheckpointConnector):
     def __init__(
         self,
         channels: list[str] | None = None,
@@ -380,12 +414,19 @@ class SlackPollConnector(PollConnector, SlimConnector):
         self.channel_regex_enabled = channel_regex_enabled
         self.batch_size = batch_size
         self.client: WebClient | None = None
+        self._checkpoint = SlackCheckpoint()
 
     def load_credentials(self, credentials: dict[str, Any]) -> dict[str, Any] | None:
         bot_token = credentials["slack_bot_token"]
         self.client = WebClient(token=bot_token)
         return None
 
+    def get_checkpoint(self) -> ConnectorCheckpoint:
+        return self._checkpoint.model_dump()
+
+    def set_checkpoint(self, checkpoint: ConnectorCheckpoint) -> None:
+        self._checkpoint = SlackCheckpoint.model_validate(checkpoint)
+
     def retrieve_all_slim_documents(
         self,
         start: SecondsSinceUnixEpoch | None = None,
@@ -416,6 +457,7 @@ class SlackPollConnector(PollConnector, SlimConnector):
             # retention
             oldest=str(start) if start else None,
             latest=str(end),
+            checkpoint=self._checkpoint,
         ):
             documents.append(document)
             if len(documents) >= self.batch_size:
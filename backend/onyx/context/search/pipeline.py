@@ -25,6 +25,7 @@ from onyx.context.search.postprocessing.postprocessing import cleanup_chunks
 from onyx.context.search.postprocessing.postprocessing import search_postprocessing
 from onyx.context.search.preprocessing.preprocessing import retrieval_preprocessing
 from onyx.context.search.retrieval.search_runner import retrieve_chunks
+from onyx.context.search.retrieval.search_runner import RetrievedChunkCache
 from onyx.context.search.utils import inference_section_from_chunks
 from onyx.context.search.utils import relevant_sections_to_indices
 from onyx.db.models import User
@@ -79,6 +80,8 @@ class SearchPipeline:
 
         # Initial document index retrieval chunks
         self._retrieved_chunks: list[InferenceChunk] | None = None
+        # Surrounding chunks fetched along with the initial retrieval, if any
+        self._retrieved_chunk_cache = RetrievedChunkCache()
         # Another call made to the document index to get surrounding sections
         self._retrieved_sections: list[InferenceSection] | None = None
         # Reranking and LLM section selection can be run together
@@ -146,6 +149,7 @@ class SearchPipeline:
             document_index=self.document_index,
             db_session=self.db_session,
             retrieval_metrics_callback=self.retrieval_metrics_callback,
+            chunk_cache=self._retrieved_chunk_cache,
         )
 
         return cast(list[InferenceChunk], self._retrieved_chunks)
@@ -259,15 +263,25 @@ class SearchPipeline:
             # Don't need to fetch chunks within range for merging if chunk_above / below are 0.
             if above == below == 0:
                 inference_chunks.extend(chunk_range.chunks)
+                continue
 
-            else:
-                chunk_requests.append(
-                    VespaChunkRequest(
-                        document_id=chunk_range.chunks[0].document_id,
-                        min_chunk_ind=chunk_range.start,
-                        max_chunk_ind=chunk_range.end,
-                    )
+            # The surroundings may have been fetched with the initial retrieval already
+            cached_chunks = self._retrieved_chunk_cache.get_chunk_range(
+                document_id=chunk_range.chunks[0].document_id,
+                start=chunk_range.start,
+                end=chunk_range.end,
+            )
+            if cached_chunks is not None:
+                inference_chunks.extend(cached_chunks)
+                continue
+
+            chunk_requests.append(
+                VespaChunkRequest(
+                    document_id=chunk_range.chunks[0].document_id,
+                    min_chunk_ind=chunk_range.start,
+                    max_chunk_ind=chunk_range.end,
                 )
+            )
 
         if chunk_requests:
             inference_chunks.extend(
@@ -21,6 +21,7 @@ from onyx.document_index.document_index_utils import (
     translate_boost_count_to_multiplier,
 )
 from onyx.llm.interfaces import LLM
+from onyx.natural_language_processing.rerank_score_cache import rerank_passages
 from onyx.natural_language_processing.search_nlp_models import RerankingModel
 from onyx.secondary_llm_flows.chunk_usefulness import llm_batch_eval_sections
 from onyx.utils.logger import setup_logger
@@ -107,7 +108,12 @@ def semantic_reranking(
         f"{chunk.semantic_identifier or chunk.title or ''}\n{chunk.content}"
         for chunk in chunks_to_rerank
     ]
-    sim_scores_floats = cross_encoder.predict(query=query.query, passages=passages)
+    sim_scores_floats = rerank_passages(
+        cross_encoder,
+        query=query.query,
+        chunk_ids=[chunk.unique_id for chunk in chunks_to_rerank],
+        passages=passages,
+    )
 
     # Old logic to handle multiple cross-encoders preserved but not used
     sim_scores = [numpy.array(sim_scores_floats)]
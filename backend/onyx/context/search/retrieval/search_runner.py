@@ -1,4 +1,5 @@
 import string
+import threading
 from collections.abc import Callable
 
 import nltk  # type:ignore
@@ -23,6 +24,7 @@ from onyx.document_index.interfaces import VespaChunkRequest
 from onyx.document_index.vespa.shared_utils.utils import (
     replace_invalid_doc_id_characters,
 )
+from onyx.natural_language_processing.query_embedding_cache import embed_query
 from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
 from onyx.secondary_llm_flows.query_expansion import multilingual_query_expansion
 from onyx.utils.logger import setup_logger
@@ -30,7 +32,6 @@ from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
 from onyx.utils.timing import log_function_time
 from shared_configs.configs import MODEL_SERVER_HOST
 from shared_configs.configs import MODEL_SERVER_PORT
-from shared_configs.enums import EmbedTextType
 
 
 logger = setup_logger()
@@ -85,6 +86,55 @@ def remove_stop_words_and_punctuation(keywords: list[str]) -> list[str]:
         return keywords
 
 
+class RetrievedChunkCache:
+    """Chunks already fetched from the document index during retrieval, so that the
+    section expansion afterwards does not have to fetch them again. Only chunk ranges
+    which were fetched in full are served, a chunk missing from a fetched range is
+    past the end of its document."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._chunks: dict[tuple[str, int], InferenceChunk] = {}
+        self._fetched_ranges: dict[str, list[tuple[int, int]]] = {}
+
+    def add_fetched_chunks(
+        self,
+        chunk_requests: list[VespaChunkRequest],
+        chunks: list[InferenceChunk],
+    ) -> None:
+        with self._lock:
+            for chunk in chunks:
+                self._chunks[(chunk.document_id, chunk.chunk_id)] = chunk
+            for request in chunk_requests:
+                if request.max_chunk_ind is None:
+                    continue
+                self._fetched_ranges.setdefault(request.document_id, []).append(
+                    (request.min_chunk_ind or 0, request.max_chunk_ind)
+                )
+
+    def get_chunk_range(
+        self, document_id: str, start: int, end: int
+    ) -> list[InferenceChunk] | None:
+        """Returns the chunks of the document in [start, end] (inclusive) if they
+        were all fetched already, otherwise None."""
+        with self._lock:
+            next_uncovered = start
+            for range_start, range_end in sorted(
+                self._fetched_ranges.get(document_id, [])
+            ):
+                if range_start > next_uncovered:
+                    break
+                next_uncovered = max(next_uncovered, range_end + 1)
+            if next_uncovered <= end:
+                return None
+
+            return [
+                self._chunks[(document_id, chunk_id)]
+                for chunk_id in range(start, end + 1)
+                if (document_id, chunk_id) in self._chunks
+            ]
+
+
 def combine_retrieval_results(
     chunk_sets: list[list[InferenceChunk]],
 ) -> list[InferenceChunk]:
@@ -109,17 +159,43 @@ def combine_retrieval_results(
     return sorted_chunks
 
 
+def _context_chunk_requests(
+    query: SearchQuery, top_chunks: list[InferenceChunkUncleaned]
+) -> list[VespaChunkRequest]:
+    """Chunk ranges the section expansion will need around the top chunks (for large
+    chunks, around the chunks they reference)."""
+    chunk_requests: list[VespaChunkRequest] = []
+    for chunk in top_chunks:
+        first_chunk_id, last_chunk_id = (
+            (chunk.large_chunk_reference_ids[0], chunk.large_chunk_reference_ids[-1])
+            if chunk.large_chunk_reference_ids
+            else (chunk.chunk_id, chunk.chunk_id)
+        )
+        chunk_requests.append(
+            VespaChunkRequest(
+                document_id=replace_invalid_doc_id_characters(chunk.document_id),
+                min_chunk_ind=max(0, first_chunk_id - query.chunks_above),
+                max_chunk_ind=last_chunk_id + query.chunks_below,
+            )
+        )
+    return chunk_requests
+
+
 @log_function_time(print_only=True)
 def doc_index_retrieval(
     query: SearchQuery,
     document_index: DocumentIndex,
     db_session: Session,
+    chunk_cache: RetrievedChunkCache | None = None,
 ) -> list[InferenceChunk]:
     """
     This function performs the search to retrieve the chunks,
     extracts chunks from the large chunks, persists the scores
     from the large chunks to the referenced chunks,
     dedupes the chunks, and cleans the chunks.
+
+    If a `chunk_cache` is given, the chunks above/below the results are fetched in the
+    same request as the ones referenced by the large chunks and stored in the cache.
     """
     search_settings = get_current_search_settings(db_session)
 
@@ -130,7 +206,7 @@ def doc_index_retrieval(
         server_port=MODEL_SERVER_PORT,
     )
 
-    query_embedding = model.encode([query.query], text_type=EmbedTextType.QUERY)[0]
+    query_embedding = embed_query(model, query.query)
 
     top_chunks = document_index.hybrid_retrieval(
         query=query.query,
@@ -169,45 +245,54 @@ def doc_index_retrieval(
     if not retrieval_requests:
         return cleanup_chunks(normal_chunks)
 
-    # Retrieve and return the referenced normal chunks from the large chunks
-    retrieved_inference_chunks = document_index.id_based_retrieval(
-        chunk_requests=retrieval_requests,
-        filters=query.filters,
-        batch_retrieval=True,
+    # A round trip to the document index is needed anyway, so also fetch the context
+    # around all of the results which would otherwise be fetched separately later
+    if chunk_cache is not None and not query.full_doc:
+        retrieval_requests = _context_chunk_requests(query, top_chunks)
+
+    # Retrieve the referenced normal chunks from the large chunks
+    # (the request mutates the list so it gets a copy)
+    retrieved_chunks = cleanup_chunks(
+        document_index.id_based_retrieval(
+            chunk_requests=list(retrieval_requests),
+            filters=query.filters,
+            batch_retrieval=True,
+        )
     )
+    if chunk_cache is not None:
+        chunk_cache.add_fetched_chunks(retrieval_requests, retrieved_chunks)
 
     # Apply the scores from the large chunks to the chunks referenced
-    # by each large chunk
-    for chunk in retrieved_inference_chunks:
-        if (chunk.document_id, chunk.chunk_id) in referenced_chunk_scores:
-            chunk.score = referenced_chunk_scores[(chunk.document_id, chunk.chunk_id)]
-            referenced_chunk_scores.pop((chunk.document_id, chunk.chunk_id))
-        else:
-            logger.error(
-                f"Chunk {chunk.document_id} {chunk.chunk_id} not found in referenced chunk scores"
-            )
+    # by each large chunk, the rest were only fetched as context
+    referenced_chunks: list[InferenceChunk] = []
+    for retrieved_chunk in retrieved_chunks:
+        key = (retrieved_chunk.document_id, retrieved_chunk.chunk_id)
+        if key in referenced_chunk_scores:
+            retrieved_chunk.score = referenced_chunk_scores.pop(key)
+            referenced_chunks.append(retrieved_chunk)
 
     # Log any chunks that were not found in the retrieved chunks
     for reference in referenced_chunk_scores.keys():
         logger.error(f"Chunk {reference} not found in retrieved chunks")
 
-    unique_chunks: dict[tuple[str, int], InferenceChunkUncleaned] = {
-        (chunk.document_id, chunk.chunk_id): chunk for chunk in normal_chunks
+    unique_chunks: dict[tuple[str, int], InferenceChunk] = {
+        (normal_chunk.document_id, normal_chunk.chunk_id): normal_chunk
+        for normal_chunk in cleanup_chunks(normal_chunks)
     }
 
     # persist the highest score of each deduped chunk
-    for chunk in retrieved_inference_chunks:
-        key = (chunk.document_id, chunk.chunk_id)
+    for referenced_chunk in referenced_chunks:
+        key = (referenced_chunk.document_id, referenced_chunk.chunk_id)
         # For duplicates, keep the highest score
-        if key not in unique_chunks or (chunk.score or 0) > (
+        if key not in unique_chunks or (referenced_chunk.score or 0) > (
             unique_chunks[key].score or 0
         ):
-            unique_chunks[key] = chunk
+            unique_chunks[key] = referenced_chunk
 
     # Deduplicate the chunks
     deduped_chunks = list(unique_chunks.values())
     deduped_chunks.sort(key=lambda chunk: chunk.score or 0, reverse=True)
-    return cleanup_chunks(deduped_chunks)
+    return deduped_chunks
 
 
 def _simplify_text(text: str) -> str:
@@ -222,6 +307,7 @@ def retrieve_chunks(
     db_session: Session,
     retrieval_metrics_callback: Callable[[RetrievalMetricsContainer], None]
     | None = None,
+    chunk_cache: RetrievedChunkCache | None = None,
 ) -> list[InferenceChunk]:
     """Returns a list of the best chunks from an initial keyword/semantic/ hybrid search."""
 
@@ -229,7 +315,10 @@ def retrieve_chunks(
     # Don't do query expansion on complex queries, rephrasings likely would not work well
     if not multilingual_expansion or "\n" in query.query or "\r" in query.query:
         top_chunks = doc_index_retrieval(
-            query=query, document_index=document_index, db_session=db_session
+            query=query,
+            document_index=document_index,
+            db_session=db_session,
+            chunk_cache=chunk_cache,
         )
     else:
         simplified_queries = set()
@@ -253,7 +342,7 @@ def retrieve_chunks(
             run_queries.append(
                 (
                     doc_index_retrieval,
-                    (q_copy, document_index, db_session),
+                    (q_copy, document_index, db_session, chunk_cache),
                 )
             )
         parallel_search_results = run_functions_tuples_in_parallel(run_queries)
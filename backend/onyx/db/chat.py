@@ -515,6 +515,43 @@ def get_chat_messages_by_session(
     return list(result)
 
 
+def get_chat_message_links_by_session(
+    chat_session_id: UUID,
+    db_session: Session,
+) -> list[tuple[int, int | None, int | None, int]]:
+    """(id, parent_message, latest_child_message, token_count) of every message in
+    the session, enough to trace the message chain without loading the messages."""
+    stmt = (
+        select(
+            ChatMessage.id,
+            ChatMessage.parent_message,
+            ChatMessage.latest_child_message,
+            ChatMessage.token_count,
+        )
+        .where(ChatMessage.chat_session_id == chat_session_id)
+        .order_by(nullsfirst(ChatMessage.parent_message))
+    )
+    return [tuple(row) for row in db_session.execute(stmt).all()]
+
+
+def get_chat_messages_by_ids(
+    chat_message_ids: list[int],
+    db_session: Session,
+    prefetch_tool_calls: bool = False,
+) -> list[ChatMessage]:
+    """Messages in the order of the given ids."""
+    stmt = select(ChatMessage).where(ChatMessage.id.in_(chat_message_ids))
+
+    if prefetch_tool_calls:
+        stmt = stmt.options(joinedload(ChatMessage.tool_call))
+        result = db_session.scalars(stmt).unique().all()
+    else:
+        result = db_session.scalars(stmt).all()
+
+    id_to_msg = {msg.id: msg for msg in result}
+    return [id_to_msg[msg_id] for msg_id in chat_message_ids if msg_id in id_to_msg]
+
+
 def get_or_create_root_message(
     chat_session_id: UUID,
     db_session: Session,
@@ -597,6 +634,8 @@ def create_new_chat_message(
     commit: bool = True,
     reserved_message_id: int | None = None,
     overridden_model: str | None = None,
+    # token_count keyed by the name of the tokenizer it was counted with
+    token_counts: dict[str, int] | None = None,
 ) -> ChatMessage:
     if reserved_message_id is not None:
         # Edit existing message
@@ -610,6 +649,7 @@ def create_new_chat_message(
         existing_message.rephrased_query = rephrased_query
         existing_message.prompt_id = prompt_id
         existing_message.token_count = token_count
+        existing_message.token_counts = token_counts
         existing_message.message_type = message_type
         existing_message.citations = citations
         existing_message.files = files
@@ -629,6 +669,7 @@ def create_new_chat_message(
             rephrased_query=rephrased_query,
             prompt_id=prompt_id,
             token_count=token_count,
+            token_counts=token_counts,
             message_type=message_type,
             citations=citations,
             files=files,
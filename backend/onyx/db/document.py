@@ -459,6 +459,18 @@ def update_docs_chunk_count__no_commit(
         doc.chunk_count = doc_id_to_chunk_count[doc.id]
 
 
+def update_docs_chunk_fingerprints__no_commit(
+    document_ids: list[str],
+    doc_id_to_chunk_fingerprints: dict[str, dict[str, str]],
+    db_session: Session,
+) -> None:
+    documents_to_update = (
+        db_session.query(DbDocument).filter(DbDocument.id.in_(document_ids)).all()
+    )
+    for doc in documents_to_update:
+        doc.chunk_fingerprints = doc_id_to_chunk_fingerprints.get(doc.id, {})
+
+
 def mark_document_as_modified(
     document_id: str,
     db_session: Session,
@@ -484,6 +496,16 @@ def mark_document_as_synced(document_id: str, db_session: Session) -> None:
     db_session.commit()
 
 
+def mark_documents_as_synced(document_ids: list[str], db_session: Session) -> None:
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(last_synced=datetime.now(timezone.utc))
+    )
+    db_session.execute(stmt)
+    db_session.commit()
+
+
 def delete_document_by_connector_credential_pair__no_commit(
     db_session: Session,
     document_id: str,
@@ -732,6 +754,23 @@ def fetch_chunk_counts_for_documents(
     return [(doc_id, chunk_counts.get(doc_id, 0)) for doc_id in document_ids]
 
 
+def fetch_chunk_fingerprints_for_documents(
+    document_ids: list[str],
+    db_session: Session,
+) -> dict[str, dict[str, str]]:
+    """
+    Return a dict of document_id to the fingerprints of its chunks as last indexed.
+    Documents without stored fingerprints are not included.
+    """
+    stmt = select(DbDocument.id, DbDocument.chunk_fingerprints).where(
+        DbDocument.id.in_(document_ids), DbDocument.chunk_fingerprints.is_not(None)
+    )
+
+    return {
+        str(row.id): row.chunk_fingerprints for row in db_session.execute(stmt).all()
+    }
+
+
 def fetch_chunk_count_for_document(
     document_id: str,
     db_session: Session,
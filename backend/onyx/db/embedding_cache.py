@@ -0,0 +1,87 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from sqlalchemy import delete
+from sqlalchemy import func
+from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from onyx.configs.app_configs import EMBEDDING_CACHE_TOUCH_INTERVAL_SECONDS
+from onyx.db.models import EmbeddingCacheEntry
+
+
+def fetch_cached_embeddings(
+    db_session: Session,
+    cache_keys: list[str],
+    touch_interval_seconds: int = EMBEDDING_CACHE_TOUCH_INTERVAL_SECONDS,
+) -> dict[str, bytes]:
+    """Returns the raw embeddings for the keys that are cached. Entries last marked as
+    used more than `touch_interval_seconds` ago are marked as used again, the rest are
+    left alone so most lookups don't write."""
+    if not cache_keys:
+        return {}
+
+    rows = db_session.execute(
+        select(
+            EmbeddingCacheEntry.cache_key,
+            EmbeddingCacheEntry.embedding,
+            EmbeddingCacheEntry.last_used_at,
+        ).where(EmbeddingCacheEntry.cache_key.in_(cache_keys))
+    ).all()
+    cached = {cache_key: embedding for cache_key, embedding, _ in rows}
+
+    touch_cutoff = datetime.now(timezone.utc) - timedelta(
+        seconds=touch_interval_seconds
+    )
+    stale_keys = [
+        cache_key for cache_key, _, last_used_at in rows if last_used_at < touch_cutoff
+    ]
+    if stale_keys:
+        db_session.execute(
+            update(EmbeddingCacheEntry)
+            .where(EmbeddingCacheEntry.cache_key.in_(stale_keys))
+            .values(last_used_at=func.now())
+        )
+        db_session.commit()
+
+    return cached
+
+
+def upsert_cached_embeddings(
+    db_session: Session, cache_key_to_embedding: dict[str, bytes]
+) -> None:
+    if not cache_key_to_embedding:
+        return
+
+    insert_stmt = insert(EmbeddingCacheEntry).values(
+        [
+            {"cache_key": cache_key, "embedding": embedding}
+            for cache_key, embedding in cache_key_to_embedding.items()
+        ]
+    )
+    db_session.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=["cache_key"],
+            set_={
+                "embedding": insert_stmt.excluded.embedding,
+                "last_used_at": func.now(),
+            },
+        )
+    )
+    db_session.commit()
+
+
+def evict_embedding_cache_entries(db_session: Session, max_entries: int) -> None:
+    """Deletes the least recently used entries so that at most `max_entries` remain."""
+    stale_keys = (
+        select(EmbeddingCacheEntry.cache_key)
+        .order_by(EmbeddingCacheEntry.last_used_at.desc())
+        .offset(max_entries)
+    )
+    db_session.execute(
+        delete(EmbeddingCacheEntry).where(EmbeddingCacheEntry.cache_key.in_(stale_keys))
+    )
+    db_session.commit()
@@ -17,6 +17,7 @@ import asyncpg  # type: ignore
 import boto3
 from fastapi import HTTPException
 from fastapi import Request
+from pydantic import BaseModel
 from sqlalchemy import event
 from sqlalchemy import text
 from sqlalchemy.engine import create_engine
@@ -26,6 +27,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import Session
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import Pool
+from sqlalchemy.pool import QueuePool
 
 from onyx.configs.app_configs import AWS_REGION_NAME
 from onyx.configs.app_configs import LOG_POSTGRES_CONN_COUNTS
@@ -183,6 +186,116 @@ def is_valid_schema_name(name: str) -> bool:
     return SCHEMA_NAME_REGEX.match(name) is not None
 
 
+# key in the connection record info of the search_path set on the pooled connection
+_SEARCH_PATH_INFO_KEY = "onyx_search_path"
+
+
+class PostgresPoolMetrics(BaseModel):
+    pool_size: int
+    checked_out: int
+    # connections opened beyond the pool size which are currently in use
+    overflow: int
+    checkouts: int
+    # SET search_path statements issued, only needed when the tenant of a pooled
+    # connection changes
+    search_path_sets: int
+
+
+class _PoolCounters:
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.search_path_sets = 0
+
+
+_pool_counters = _PoolCounters()
+
+
+def _execute_outside_transaction(dbapi_connection: Any, statement: str) -> None:
+    """SET run inside a transaction is reverted if the transaction is rolled back,
+    which the pool does when a connection is returned. Same approach as the
+    psycopg2 dialect's pre ping."""
+    before_autocommit = dbapi_connection.autocommit
+    if not before_autocommit:
+        dbapi_connection.autocommit = True
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(statement)
+    finally:
+        cursor.close()
+        if not before_autocommit and not dbapi_connection.closed:
+            dbapi_connection.autocommit = before_autocommit
+
+
+def _on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+    connection_record.info.pop(_SEARCH_PATH_INFO_KEY, None)
+    if POSTGRES_IDLE_SESSIONS_TIMEOUT:
+        _execute_outside_transaction(
+            dbapi_connection,
+            f"SET SESSION idle_in_transaction_session_timeout = {POSTGRES_IDLE_SESSIONS_TIMEOUT}",
+        )
+
+
+def _set_search_path_on_checkout(
+    dbapi_connection: Any, connection_record: Any, connection_proxy: Any
+) -> None:
+    """Points the connection at the schema of the current tenant. Pooled connections
+    remember their search_path so the SET is only issued when the tenant changes."""
+    _pool_counters.checkouts += 1
+
+    tenant_id = CURRENT_TENANT_ID_CONTEXTVAR.get()
+    if not tenant_id or not is_valid_schema_name(tenant_id):
+        tenant_id = POSTGRES_DEFAULT_SCHEMA
+
+    if connection_record.info.get(_SEARCH_PATH_INFO_KEY) == tenant_id:
+        return
+
+    _execute_outside_transaction(dbapi_connection, f'SET search_path = "{tenant_id}"')
+    connection_record.info[_SEARCH_PATH_INFO_KEY] = tenant_id
+    _pool_counters.search_path_sets += 1
+
+
+def _forget_search_path_on_change(  # type: ignore
+    conn, cursor, statement, parameters, context, executemany
+):
+    # a search_path set by a query may be rolled back or stay around, either way
+    # the remembered one can no longer be trusted
+    if "search_path" in statement:
+        conn.info.pop(_SEARCH_PATH_INFO_KEY, None)
+
+
+def _build_pool_metrics(pool: Pool) -> PostgresPoolMetrics:
+    pool_size = checked_out = overflow = 0
+    if isinstance(pool, QueuePool):
+        pool_size = pool.size()
+        checked_out = pool.checkedout()
+        # negative while the pool has not been filled up yet
+        overflow = max(pool.overflow(), 0)
+
+    return PostgresPoolMetrics(
+        pool_size=pool_size,
+        checked_out=checked_out,
+        overflow=overflow,
+        checkouts=_pool_counters.checkouts,
+        search_path_sets=_pool_counters.search_path_sets,
+    )
+
+
+def _log_pool_metrics(
+    dbapi_connection: Any, connection_record: Any, connection_proxy: Any
+) -> None:
+    # registered after the search_path listener, so this checkout is already counted
+    metrics = _build_pool_metrics(connection_proxy._pool)
+    logger.debug(f"Sync engine pool metrics: {metrics.model_dump_json()}")
+
+
+def _register_engine_listeners(engine: Engine) -> None:
+    event.listen(engine, "connect", _on_connect)
+    event.listen(engine, "checkout", _set_search_path_on_checkout)
+    event.listen(engine, "before_cursor_execute", _forget_search_path_on_change)
+    if LOG_POSTGRES_CONN_COUNTS:
+        event.listen(engine, "checkout", _log_pool_metrics)
+
+
 class SqlEngine:
     _engine: Engine | None = None
     _lock: threading.Lock = threading.Lock()
@@ -205,6 +318,8 @@ class SqlEngine:
         if USE_IAM_AUTH:
             event.listen(engine, "do_connect", provide_iam_token)
 
+        _register_engine_listeners(engine)
+
         return engine
 
     @classmethod
@@ -422,6 +537,9 @@ def get_session_with_tenant(
     2. Preserves the tenant ID across the session.
     3. Reverts to the previous tenant ID after the session is closed.
     4. Uses the default schema if no tenant ID is provided.
+
+    The schema is set by the engine's checkout listener from the tenant context var,
+    pooled connections already on the tenant's schema are used without any SET.
     """
     engine = get_sqlalchemy_engine()
     previous_tenant_id = CURRENT_TENANT_ID_CONTEXTVAR.get() or POSTGRES_DEFAULT_SCHEMA
@@ -429,50 +547,19 @@ def get_session_with_tenant(
     if tenant_id is None:
         tenant_id = POSTGRES_DEFAULT_SCHEMA
 
-    CURRENT_TENANT_ID_CONTEXTVAR.set(tenant_id)
-    event.listen(engine, "checkout", set_search_path_on_checkout)
-
     if not is_valid_schema_name(tenant_id):
         raise HTTPException(status_code=400, detail="Invalid tenant ID")
 
+    CURRENT_TENANT_ID_CONTEXTVAR.set(tenant_id)
+
     try:
         with engine.connect() as connection:
-            dbapi_connection = connection.connection
-            cursor = dbapi_connection.cursor()
-            try:
-                cursor.execute(f'SET search_path = "{tenant_id}"')
-                if POSTGRES_IDLE_SESSIONS_TIMEOUT:
-                    cursor.execute(
-                        text(
-                            f"SET SESSION idle_in_transaction_session_timeout = {POSTGRES_IDLE_SESSIONS_TIMEOUT}"
-                        )
-                    )
-            finally:
-                cursor.close()
-
             with Session(bind=connection, expire_on_commit=False) as session:
-                try:
-                    yield session
-                finally:
-                    if MULTI_TENANT:
-                        cursor = dbapi_connection.cursor()
-                        try:
-                            cursor.execute('SET search_path TO "$user", public')
-                        finally:
-                            cursor.close()
+                yield session
     finally:
         CURRENT_TENANT_ID_CONTEXTVAR.set(previous_tenant_id)
 
 
-def set_search_path_on_checkout(
-    dbapi_conn: Any, connection_record: Any, connection_proxy: Any
-) -> None:
-    tenant_id = CURRENT_TENANT_ID_CONTEXTVAR.get()
-    if tenant_id and is_valid_schema_name(tenant_id):
-        with dbapi_conn.cursor() as cursor:
-            cursor.execute(f'SET search_path TO "{tenant_id}"')
-
-
 def get_session_generator_with_tenant() -> Generator[Session, None, None]:
     tenant_id = CURRENT_TENANT_ID_CONTEXTVAR.get()
     with get_session_with_tenant(tenant_id) as session:
@@ -486,11 +573,11 @@ def get_session() -> Generator[Session, None, None]:
 
     engine = get_sqlalchemy_engine()
 
+    if MULTI_TENANT and not is_valid_schema_name(tenant_id):
+        raise HTTPException(status_code=400, detail="Invalid tenant ID")
+
+    # the search_path is set on checkout from the tenant context var
     with Session(engine, expire_on_commit=False) as session:
-        if MULTI_TENANT:
-            if not is_valid_schema_name(tenant_id):
-                raise HTTPException(status_code=400, detail="Invalid tenant ID")
-            session.execute(text(f'SET search_path = "{tenant_id}"'))
         yield session
 
 
@@ -2,6 +2,7 @@ from collections.abc import Sequence
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
+from typing import Any
 
 from sqlalchemy import and_
 from sqlalchemy import delete
@@ -269,6 +270,7 @@ def update_docs_indexed(
     total_docs_indexed: int,
     new_docs_indexed: int,
     docs_removed_from_index: int,
+    checkpoint: dict[str, Any] | None = None,
 ) -> None:
     try:
         attempt = db_session.execute(
@@ -280,6 +282,8 @@ def update_docs_indexed(
         attempt.total_docs_indexed = total_docs_indexed
         attempt.new_docs_indexed = new_docs_indexed
         attempt.docs_removed_from_index = docs_removed_from_index
+        if checkpoint is not None:
+            attempt.checkpoint = checkpoint
         db_session.commit()
     except Exception:
         db_session.rollback()
@@ -287,6 +291,38 @@ def update_docs_indexed(
         raise
 
 
+def get_checkpoint_to_resume(
+    db_session: Session, index_attempt: IndexAttempt
+) -> dict[str, Any] | None:
+    """Returns the checkpoint of the previous attempt for the same CC Pair and search
+    settings if that attempt didn't finish. Only the directly preceding attempt is
+    considered, anything that ran successfully since then already covers it."""
+    previous_attempt = db_session.scalars(
+        select(IndexAttempt)
+        .where(
+            IndexAttempt.connector_credential_pair_id
+            == index_attempt.connector_credential_pair_id,
+            IndexAttempt.search_settings_id == index_attempt.search_settings_id,
+            IndexAttempt.id != index_attempt.id,
+            IndexAttempt.time_created <= index_attempt.time_created,
+        )
+        .order_by(desc(IndexAttempt.time_created), desc(IndexAttempt.id))
+        .limit(1)
+    ).first()
+
+    if (
+        previous_attempt is None
+        or previous_attempt.checkpoint is None
+        or previous_attempt.status
+        not in (IndexingStatus.FAILED, IndexingStatus.CANCELED)
+        # e.g. a re-index from the beginning must not pick up an earlier poll
+        or previous_attempt.from_beginning != index_attempt.from_beginning
+    ):
+        return None
+
+    return previous_attempt.checkpoint
+
+
 def get_last_attempt(
     connector_id: int,
     credential_id: int,
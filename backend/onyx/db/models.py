@@ -504,6 +504,11 @@ class Document(Base):
     # Number of chunks in the document (in Vespa)
     # Only null for documents indexed prior to this change
     chunk_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Fingerprint of every chunk as last written to the document index, keyed by chunk
+    # (see onyx/indexing/chunk_fingerprints.py). Deferred since it grows with the document
+    chunk_fingerprints: Mapped[dict[str, str] | None] = mapped_column(
+        postgresql.JSONB(), nullable=True, deferred=True
+    )
 
     # last time any vespa relevant row metadata or the doc changed.
     # does not include last_synced
@@ -779,6 +784,11 @@ class IndexAttempt(Base):
     error_msg: Mapped[str | None] = mapped_column(Text, default=None)
     # only filled if status = "failed" AND an unhandled exception caused the failure
     full_exception_trace: Mapped[str | None] = mapped_column(Text, default=None)
+    # progress of the run which a later attempt can resume from if this one dies
+    # part way (see onyx/background/indexing/checkpointing.py)
+    checkpoint: Mapped[dict[str, Any] | None] = mapped_column(
+        postgresql.JSONB(), nullable=True, default=None
+    )
     # Nullable because in the past, we didn't allow swapping out embedding models live
     search_settings_id: Mapped[int] = mapped_column(
         ForeignKey("search_settings.id", ondelete="SET NULL"),
@@ -1141,6 +1151,11 @@ class ChatMessage(Base):
     # If prompt is None, then token_count is 0 as this message won't be passed into
     # the LLM's context (not included in the history of messages)
     token_count: Mapped[int] = mapped_column(Integer)
+    # token count of the message for every tokenizer it has been counted with, keyed
+    # by tokenizer name, so the history doesn't need to be re-tokenized for other LLMs
+    token_counts: Mapped[dict[str, int] | None] = mapped_column(
+        postgresql.JSONB(), nullable=True
+    )
     message_type: Mapped[MessageType] = mapped_column(
         Enum(MessageType, native_enum=False)
     )
@@ -1699,6 +1714,22 @@ class TaskQueueState(Base):
     )
 
 
+class EmbeddingCacheEntry(Base):
+    """Embedding of a previously indexed text. The key is a hash of the text together
+    with everything else that determines its embedding (model, normalization, prefix).
+    """
+
+    __tablename__ = "embedding_cache"
+
+    cache_key: Mapped[str] = mapped_column(String, primary_key=True)
+    # float32, little endian
+    embedding: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    # used to evict the least recently used entries
+    last_used_at: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
+
+
 class KVStore(Base):
     __tablename__ = "key_value_store"
 
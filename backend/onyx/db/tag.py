@@ -3,6 +3,8 @@ from sqlalchemy import delete
 from sqlalchemy import func
 from sqlalchemy import or_
 from sqlalchemy import select
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from onyx.configs.constants import DocumentSource
@@ -108,6 +110,69 @@ def create_or_add_document_tag_list(
     return all_tags
 
 
+def upsert_document_tags__no_commit(
+    document_id_to_metadata: dict[str, dict[str, str | list[str]]],
+    source: DocumentSource,
+    db_session: Session,
+) -> None:
+    """Bulk version of `create_or_add_document_tag(_list)` for a batch of documents
+    of the same source, issues a fixed number of statements regardless of the
+    number of documents and tags. Existing tags of the documents are kept.
+
+    NOTE: this function is Postgres specific. Not all DBs support the ON CONFLICT clause.
+    The documents must already exist."""
+    document_tag_pairs: set[tuple[str, str, str]] = set()
+    for document_id, metadata in document_id_to_metadata.items():
+        for tag_key, tag_values in metadata.items():
+            if isinstance(tag_values, str):
+                tag_values = [tag_values]
+            for tag_value in tag_values:
+                if check_tag_validity(tag_key, tag_value):
+                    document_tag_pairs.add((document_id, tag_key, tag_value))
+
+    if not document_tag_pairs:
+        return
+
+    # sorted so that concurrent indexing workers take the row locks in the same order
+    tag_pairs = sorted(
+        {(tag_key, tag_value) for _, tag_key, tag_value in document_tag_pairs}
+    )
+    db_session.execute(
+        insert(Tag)
+        .values(
+            [
+                {"tag_key": tag_key, "tag_value": tag_value, "source": source}
+                for tag_key, tag_value in tag_pairs
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=[Tag.tag_key, Tag.tag_value, Tag.source])
+    )
+
+    tag_pair_to_id = {
+        (tag_key, tag_value): tag_id
+        for tag_id, tag_key, tag_value in db_session.execute(
+            select(Tag.id, Tag.tag_key, Tag.tag_value).where(
+                tuple_(Tag.tag_key, Tag.tag_value).in_(tag_pairs),
+                Tag.source == source,
+            )
+        )
+    }
+
+    db_session.execute(
+        insert(Document__Tag)
+        .values(
+            [
+                {
+                    "document_id": document_id,
+                    "tag_id": tag_pair_to_id[(tag_key, tag_value)],
+                }
+                for document_id, tag_key, tag_value in sorted(document_tag_pairs)
+            ]
+        )
+        .on_conflict_do_nothing()
+    )
+
+
 def find_tags(
     tag_key_prefix: str | None,
     tag_value_prefix: str | None,
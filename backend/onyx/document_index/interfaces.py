@@ -1,5 +1,6 @@
 import abc
 from dataclasses import dataclass
+from dataclasses import field
 from datetime import datetime
 from typing import Any
 
@@ -42,9 +43,23 @@ class IndexBatchParams:
     """
 
     doc_id_to_previous_chunk_cnt: dict[str, int | None]
+    # Total chunk count of the documents whose old chunks are cleaned up by this call.
+    # When the chunks of a document are split across calls, only the first one has it
     doc_id_to_new_chunk_cnt: dict[str, int]
     tenant_id: str | None
     large_chunks_enabled: bool
+    # Chunks whose fingerprint matches the one from the previous indexing are already
+    # in the index and do not have to be written again. Empty to write every chunk
+    doc_id_to_previous_chunk_fingerprints: dict[str, dict[str, str]] = field(
+        default_factory=dict
+    )
+    doc_id_to_new_chunk_fingerprints: dict[str, dict[str, str]] = field(
+        default_factory=dict
+    )
+    # doc_updated_at as of the previous indexing, fingerprints do not cover it
+    doc_id_to_previous_updated_at: dict[str, datetime | None] = field(
+        default_factory=dict
+    )
 
 
 @dataclass
@@ -190,9 +205,10 @@ class Indexable(abc.ABC):
         last run. Therefore, upserting the first 0 through n chunks may leave some old chunks that
         have not been written over.
 
-        NOTE: The chunks of a document are never separated into separate index() calls. So there is
-        no worry of receiving the first 0 through n chunks in one index call and the next n through
-        m chunks of a docu in the next index call.
+        NOTE: The chunks of an oversized document may be separated into consecutive index() calls.
+        Old chunks of a document must only be cleared in the call whose `doc_id_to_new_chunk_cnt`
+        contains the document, which is the first one and holds the total new chunk count. The
+        chunks written by the other calls must not clear anything.
 
         NOTE: Due to some asymmetry between the primary and secondary indexing logic, this function
         only needs to index chunks into the PRIMARY index. Do not update the secondary index here,
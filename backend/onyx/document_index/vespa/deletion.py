@@ -4,6 +4,9 @@ from uuid import UUID
 import httpx
 from retry import retry
 
+from onyx.configs.app_configs import ENABLE_VESPA_FEED_CLIENT
+from onyx.document_index.vespa.feed import feed_vespa_operations_or_raise
+from onyx.document_index.vespa.feed import VespaFeedOperation
 from onyx.document_index.vespa_constants import DOCUMENT_ID_ENDPOINT
 from onyx.document_index.vespa_constants import NUM_THREADS
 from onyx.utils.logger import setup_logger
@@ -39,6 +42,20 @@ def delete_vespa_chunks(
     http_client: httpx.Client,
     executor: concurrent.futures.ThreadPoolExecutor | None = None,
 ) -> None:
+    if ENABLE_VESPA_FEED_CLIENT:
+        # streams all deletes over one async client, http_client / executor are not needed
+        feed_vespa_operations_or_raise(
+            [
+                VespaFeedOperation.build(
+                    method="DELETE",
+                    url=f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{doc_chunk_id}",
+                    operation_id=str(doc_chunk_id),
+                )
+                for doc_chunk_id in doc_chunk_ids
+            ]
+        )
+        return
+
     external_executor = True
 
     if not executor:
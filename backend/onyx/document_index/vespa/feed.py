@@ -0,0 +1,258 @@
+"""High throughput feeding of document operations into Vespa.
+
+Instead of one blocking request per chunk spread across a thread pool, all operations
+of a call are streamed through asyncio HTTP/2 clients over persistent connections with
+a bound on the number of requests in flight. Request
+bodies are serialized exactly once, retries reuse the encoded bytes.
+
+The clients live on one event loop per process, run by a background thread, so that
+connections are reused across calls and callers may themselves be inside an event loop.
+"""
+import asyncio
+import json
+import math
+import os
+import threading
+from collections.abc import Coroutine
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any
+
+import httpx
+
+from onyx.configs.app_configs import VESPA_FEED_MAX_IN_FLIGHT
+from onyx.document_index.vespa.shared_utils.utils import get_vespa_async_http_client
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# Vespa uses 429 / 503 to signal that the feed should be throttled, 504 when the
+# operation timed out server side. All three are safe to retry.
+_RETRYABLE_STATUS_CODES = {
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+}
+_MAX_ATTEMPTS = 5
+_INITIAL_BACKOFF_SECONDS = 0.5
+
+# httpcore scans the whole connection pool for every request, which gets expensive with
+# many connections in a single pool. Operations are therefore spread across several
+# clients with small pools instead.
+_CONNECTIONS_PER_CLIENT = 8
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+@dataclass(frozen=True)
+class VespaFeedOperation:
+    method: str  # "POST" (put), "PUT" (update) or "DELETE"
+    url: str
+    # pre-serialized request body
+    body: bytes | None = None
+    # used in logs / errors to identify the operation
+    operation_id: str = ""
+
+    @classmethod
+    def build(
+        cls,
+        method: str,
+        url: str,
+        body: dict[str, Any] | None = None,
+        operation_id: str = "",
+    ) -> "VespaFeedOperation":
+        return cls(
+            method=method,
+            url=url,
+            body=(
+                json.dumps(body, separators=(",", ":")).encode("utf-8")
+                if body is not None
+                else None
+            ),
+            operation_id=operation_id,
+        )
+
+
+@dataclass(frozen=True)
+class VespaFeedResult:
+    operation: VespaFeedOperation
+    status_code: int | None
+    error: str | None = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class VespaFeedError(RuntimeError):
+    def __init__(self, failed_results: list[VespaFeedResult]) -> None:
+        self.failed_results = failed_results
+        failure_details = "; ".join(
+            f"{result.operation.method} {result.operation.operation_id}: "
+            f"status={result.status_code} error={result.error}"
+            for result in failed_results[:10]
+        )
+        super().__init__(
+            f"{len(failed_results)} Vespa feed operations failed: {failure_details}"
+        )
+
+
+async def _run_operation(
+    operation: VespaFeedOperation,
+    http_client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+) -> VespaFeedResult:
+    backoff = _INITIAL_BACKOFF_SECONDS
+    status_code: int | None = None
+    error: str | None = None
+
+    for attempt in range(1, _MAX_ATTEMPTS + 1):
+        async with semaphore:
+            try:
+                response = await http_client.request(
+                    operation.method,
+                    operation.url,
+                    content=operation.body,
+                    headers=_JSON_HEADERS if operation.body is not None else None,
+                )
+                status_code = response.status_code
+                if response.is_success:
+                    return VespaFeedResult(operation=operation, status_code=status_code)
+
+                error = response.text
+                if status_code not in _RETRYABLE_STATUS_CODES:
+                    break
+            except httpx.TransportError as e:
+                status_code = None
+                error = f"{type(e).__name__}: {e}"
+
+        if attempt < _MAX_ATTEMPTS:
+            # back off outside of the semaphore so other operations can proceed
+            await asyncio.sleep(backoff)
+            backoff *= 2
+
+    if status_code == HTTPStatus.INSUFFICIENT_STORAGE:
+        logger.error(
+            "NOTE: HTTP Status 507 Insufficient Storage usually means "
+            "you need to allocate more memory or disk space to the "
+            "Vespa/index container."
+        )
+    return VespaFeedResult(operation=operation, status_code=status_code, error=error)
+
+
+class _VespaFeedLoop:
+    """Event loop on a daemon thread which owns the async HTTP clients. Clients are
+    created on first use for a given `max_in_flight` and kept open until `close`."""
+
+    def __init__(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="vespa-feed", daemon=True
+        )
+        self._thread.start()
+        # only accessed from the loop thread
+        self._http_clients: dict[int, list[httpx.AsyncClient]] = {}
+
+    def run(
+        self, coro: Coroutine[Any, Any, list[VespaFeedResult]]
+    ) -> list[VespaFeedResult]:
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _get_http_clients(self, max_in_flight: int) -> list[httpx.AsyncClient]:
+        if max_in_flight not in self._http_clients:
+            num_clients = max(1, math.ceil(max_in_flight / _CONNECTIONS_PER_CLIENT))
+            self._http_clients[max_in_flight] = [
+                get_vespa_async_http_client(
+                    max_connections=math.ceil(max_in_flight / num_clients)
+                )
+                for _ in range(num_clients)
+            ]
+        return self._http_clients[max_in_flight]
+
+    async def feed(
+        self, operations: list[VespaFeedOperation], max_in_flight: int
+    ) -> list[VespaFeedResult]:
+        semaphore = asyncio.Semaphore(max_in_flight)
+        http_clients = self._get_http_clients(max_in_flight)
+        return await asyncio.gather(
+            *(
+                _run_operation(
+                    operation, http_clients[ind % len(http_clients)], semaphore
+                )
+                for ind, operation in enumerate(operations)
+            )
+        )
+
+    async def _close_http_clients(self) -> None:
+        for http_clients in self._http_clients.values():
+            for http_client in http_clients:
+                await http_client.aclose()
+        self._http_clients.clear()
+
+    def close(self) -> None:
+        asyncio.run_coroutine_threadsafe(
+            self._close_http_clients(), self._loop
+        ).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+_feed_loop: _VespaFeedLoop | None = None
+_feed_loop_pid: int | None = None
+_feed_loop_lock = threading.Lock()
+
+
+def _get_feed_loop() -> _VespaFeedLoop:
+    """Recreated after a fork, the loop thread does not survive it and the clients'
+    sockets must not be shared between processes."""
+    global _feed_loop, _feed_loop_pid
+
+    with _feed_loop_lock:
+        if _feed_loop is None or _feed_loop_pid != os.getpid():
+            _feed_loop = _VespaFeedLoop()
+            _feed_loop_pid = os.getpid()
+        return _feed_loop
+
+
+def close_vespa_feed_loop() -> None:
+    global _feed_loop, _feed_loop_pid
+
+    with _feed_loop_lock:
+        if _feed_loop is not None and _feed_loop_pid == os.getpid():
+            _feed_loop.close()
+        _feed_loop = None
+        _feed_loop_pid = None
+
+
+def feed_vespa_operations(
+    operations: list[VespaFeedOperation],
+    max_in_flight: int = VESPA_FEED_MAX_IN_FLIGHT,
+) -> list[VespaFeedResult]:
+    """Runs all operations with at most `max_in_flight` outstanding requests.
+    Returns one result per operation (in order), never raises for failed operations.
+    Blocks the calling thread, also when it is running an event loop."""
+    if not operations:
+        return []
+
+    feed_loop = _get_feed_loop()
+    return feed_loop.run(feed_loop.feed(operations, max_in_flight))
+
+
+def feed_vespa_operations_or_raise(
+    operations: list[VespaFeedOperation],
+    max_in_flight: int = VESPA_FEED_MAX_IN_FLIGHT,
+) -> None:
+    results = feed_vespa_operations(operations, max_in_flight)
+    failed_results = [result for result in results if not result.success]
+    if failed_results:
+        for result in failed_results:
+            logger.error(
+                f"Vespa feed operation failed: "
+                f"method={result.operation.method} "
+                f"id={result.operation.operation_id} "
+                f"status={result.status_code} "
+                f"error={result.error}"
+            )
+        raise VespaFeedError(failed_results)
@@ -18,6 +18,9 @@ from uuid import UUID
 import httpx  # type: ignore
 import requests  # type: ignore
 
+from onyx.configs.app_configs import ENABLE_VESPA_FEED_CLIENT
+from onyx.configs.app_configs import ENABLE_VESPA_SELECTION_UPDATES
+from onyx.configs.app_configs import VESPA_REQUEST_TIMEOUT
 from onyx.configs.chat_configs import DOC_TIME_DECAY
 from onyx.configs.chat_configs import NUM_RETURNED_HITS
 from onyx.configs.chat_configs import TITLE_CONTENT_RATIO
@@ -25,8 +28,8 @@ from onyx.configs.chat_configs import VESPA_SEARCHER_THREADS
 from onyx.configs.constants import KV_REINDEX_KEY
 from onyx.context.search.models import IndexFilters
 from onyx.context.search.models import InferenceChunkUncleaned
-from onyx.db.engine import get_session_with_tenant
 from onyx.document_index.document_index_utils import get_document_chunk_ids
+from onyx.document_index.document_index_utils import get_uuid_from_chunk
 from onyx.document_index.interfaces import DocumentIndex
 from onyx.document_index.interfaces import DocumentInsertionRecord
 from onyx.document_index.interfaces import EnrichedDocumentIndexingInfo
@@ -44,8 +47,9 @@ from onyx.document_index.vespa.deletion import delete_vespa_chunks
 from onyx.document_index.vespa.indexing_utils import batch_index_vespa_chunks
 from onyx.document_index.vespa.indexing_utils import check_for_final_chunk_existence
 from onyx.document_index.vespa.indexing_utils import clean_chunk_id_copy
-from onyx.document_index.vespa.indexing_utils import (
-    get_multipass_config,
+from onyx.document_index.vespa.indexing_utils import get_multipass_config_for_index
+from onyx.document_index.vespa.shared_utils.utils import (
+    get_shared_vespa_http_client,
 )
 from onyx.document_index.vespa.shared_utils.utils import get_vespa_http_client
 from onyx.document_index.vespa.shared_utils.utils import (
@@ -57,13 +61,16 @@ from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
 from onyx.document_index.vespa_constants import ACCESS_CONTROL_LIST
 from onyx.document_index.vespa_constants import BATCH_SIZE
 from onyx.document_index.vespa_constants import BOOST
+from onyx.document_index.vespa_constants import CONTENT_CLUSTER_NAME
 from onyx.document_index.vespa_constants import CONTENT_SUMMARY
 from onyx.document_index.vespa_constants import DANSWER_CHUNK_REPLACEMENT_PAT
 from onyx.document_index.vespa_constants import DATE_REPLACEMENT
+from onyx.document_index.vespa_constants import DOC_UPDATED_AT
 from onyx.document_index.vespa_constants import DOCUMENT_ID_ENDPOINT
 from onyx.document_index.vespa_constants import DOCUMENT_REPLACEMENT_PAT
 from onyx.document_index.vespa_constants import DOCUMENT_SETS
 from onyx.document_index.vespa_constants import HIDDEN
+from onyx.document_index.vespa_constants import MAX_DOCUMENTS_PER_SELECTION_UPDATE
 from onyx.document_index.vespa_constants import NUM_THREADS
 from onyx.document_index.vespa_constants import SEARCH_THREAD_NUMBER_PAT
 from onyx.document_index.vespa_constants import TENANT_ID_PAT
@@ -72,6 +79,7 @@ from onyx.document_index.vespa_constants import VESPA_APPLICATION_ENDPOINT
 from onyx.document_index.vespa_constants import VESPA_DIM_REPLACEMENT_PAT
 from onyx.document_index.vespa_constants import VESPA_TIMEOUT
 from onyx.document_index.vespa_constants import YQL_BASE
+from onyx.indexing.chunk_fingerprints import get_chunk_fingerprint_key
 from onyx.indexing.models import DocMetadataAwareIndexChunk
 from onyx.key_value_store.factory import get_kv_store
 from onyx.utils.batching import batch_generator
@@ -127,6 +135,46 @@ def add_ngrams_to_schema(schema_content: str) -> str:
     return schema_content
 
 
+def _build_update_request(fields: VespaDocumentFields) -> dict[str, dict]:
+    update_dict: dict[str, dict] = {"fields": {}}
+
+    if fields.boost is not None:
+        update_dict["fields"][BOOST] = {"assign": fields.boost}
+
+    if fields.document_sets is not None:
+        # WeightedSet<string> needs a map { item: weight, ... }
+        update_dict["fields"][DOCUMENT_SETS] = {
+            "assign": {document_set: 1 for document_set in fields.document_sets}
+        }
+
+    if fields.access is not None:
+        # Similar to above
+        update_dict["fields"][ACCESS_CONTROL_LIST] = {
+            "assign": {acl_entry: 1 for acl_entry in fields.access.to_acl()}
+        }
+
+    if fields.hidden is not None:
+        update_dict["fields"][HIDDEN] = {"assign": fields.hidden}
+
+    return update_dict
+
+
+def _build_document_selection(
+    index_name: str, document_ids: list[str], tenant_id: str | None
+) -> str:
+    """Document selection matching all chunks of the given documents."""
+    # ' is already replaced in document ids (replace_invalid_doc_id_characters), only
+    # backslashes need escaping in the string literals
+    document_id_conditions = " or ".join(
+        "{}.document_id=='{}'".format(index_name, document_id.replace("\\", "\\\\"))
+        for document_id in document_ids
+    )
+    selection = f"({document_id_conditions})"
+    if MULTI_TENANT and tenant_id:
+        selection += f" and {index_name}.tenant_id=='{tenant_id}'"
+    return selection
+
+
 class VespaIndex(DocumentIndex):
     def __init__(
         self,
@@ -313,9 +361,9 @@ class VespaIndex(DocumentIndex):
         index_batch_params: IndexBatchParams,
     ) -> set[DocumentInsertionRecord]:
         """Receive a list of chunks from a batch of documents and index the chunks into Vespa along
-        with updating the associated permissions. Assumes that a document will not be split into
-        multiple chunk batches calling this function multiple times, otherwise only the last set of
-        chunks will be kept"""
+        with updating the associated permissions. Stale chunks are only deleted for the documents
+        in `doc_id_to_new_chunk_cnt`, the chunks of a document split over multiple calls are
+        written by the later calls without deleting anything"""
 
         doc_id_to_previous_chunk_cnt = index_batch_params.doc_id_to_previous_chunk_cnt
         doc_id_to_new_chunk_cnt = index_batch_params.doc_id_to_new_chunk_cnt
@@ -325,6 +373,18 @@ class VespaIndex(DocumentIndex):
         # IMPORTANT: This must be done one index at a time, do not use secondary index here
         cleaned_chunks = [clean_chunk_id_copy(chunk) for chunk in chunks]
 
+        chunks_to_write, refresh_requests = self._split_unchanged_chunks(
+            chunks=chunks,
+            cleaned_chunks=cleaned_chunks,
+            index_batch_params=index_batch_params,
+        )
+        if len(chunks_to_write) != len(cleaned_chunks):
+            logger.info(
+                f"Skipping {len(cleaned_chunks) - len(chunks_to_write)} unchanged chunks "
+                f"out of {len(cleaned_chunks)}, refreshing the update time of "
+                f"{len(refresh_requests)} of them"
+            )
+
         existing_docs: set[str] = set()
 
         # NOTE: using `httpx` here since `requests` doesn't support HTTP2. This is beneficial for
@@ -362,8 +422,16 @@ class VespaIndex(DocumentIndex):
                 large_chunks_enabled=large_chunks_enabled,
             )
 
+            # The feed client bounds the requests in flight itself, so there is no
+            # need to split the work into batches of BATCH_SIZE
+            batch_size = (
+                max(len(chunks_to_delete), len(chunks_to_write), 1)
+                if ENABLE_VESPA_FEED_CLIENT
+                else BATCH_SIZE
+            )
+
             # Delete old Vespa documents
-            for doc_chunk_ids_batch in batch_generator(chunks_to_delete, BATCH_SIZE):
+            for doc_chunk_ids_batch in batch_generator(chunks_to_delete, batch_size):
                 delete_vespa_chunks(
                     doc_chunk_ids=doc_chunk_ids_batch,
                     index_name=self.index_name,
@@ -371,7 +439,7 @@ class VespaIndex(DocumentIndex):
                     executor=executor,
                 )
 
-            for chunk_batch in batch_generator(cleaned_chunks, BATCH_SIZE):
+            for chunk_batch in batch_generator(chunks_to_write, batch_size):
                 batch_index_vespa_chunks(
                     chunks=chunk_batch,
                     index_name=self.index_name,
@@ -380,6 +448,9 @@ class VespaIndex(DocumentIndex):
                     executor=executor,
                 )
 
+        if refresh_requests:
+            self._apply_updates_batched(refresh_requests)
+
         all_doc_ids = {chunk.source_document.id for chunk in cleaned_chunks}
 
         return {
@@ -390,6 +461,62 @@ class VespaIndex(DocumentIndex):
             for doc_id in all_doc_ids
         }
 
+    def _split_unchanged_chunks(
+        self,
+        chunks: list[DocMetadataAwareIndexChunk],
+        cleaned_chunks: list[DocMetadataAwareIndexChunk],
+        index_batch_params: IndexBatchParams,
+    ) -> tuple[list[DocMetadataAwareIndexChunk], list[_VespaUpdateRequest]]:
+        """Returns the (cleaned) chunks which have to be written and the partial updates
+        refreshing `doc_updated_at` of unchanged chunks whose document has a new update
+        time. Other unchanged chunks are left alone."""
+        chunks_to_write: list[DocMetadataAwareIndexChunk] = []
+        refresh_requests: list[_VespaUpdateRequest] = []
+
+        for chunk, cleaned_chunk in zip(chunks, cleaned_chunks):
+            doc_id = chunk.source_document.id
+            key = get_chunk_fingerprint_key(chunk)
+            previous_fingerprint = (
+                index_batch_params.doc_id_to_previous_chunk_fingerprints.get(
+                    doc_id, {}
+                ).get(key)
+            )
+            if (
+                previous_fingerprint is None
+                or previous_fingerprint
+                != index_batch_params.doc_id_to_new_chunk_fingerprints.get(
+                    doc_id, {}
+                ).get(key)
+            ):
+                chunks_to_write.append(cleaned_chunk)
+                continue
+
+            doc_updated_at = chunk.source_document.doc_updated_at
+            if doc_updated_at == index_batch_params.doc_id_to_previous_updated_at.get(
+                doc_id
+            ):
+                continue
+
+            # a partial update can't clear the field, fall back to writing the chunk
+            if doc_updated_at is None:
+                chunks_to_write.append(cleaned_chunk)
+                continue
+
+            refresh_requests.append(
+                _VespaUpdateRequest(
+                    document_id=cleaned_chunk.source_document.id,
+                    url=f"{DOCUMENT_ID_ENDPOINT.format(index_name=self.index_name)}/"
+                    f"{get_uuid_from_chunk(cleaned_chunk)}",
+                    update_request={
+                        "fields": {
+                            DOC_UPDATED_AT: {"assign": int(doc_updated_at.timestamp())}
+                        }
+                    },
+                )
+            )
+
+        return chunks_to_write, refresh_requests
+
     @staticmethod
     def _apply_updates_batched(
         updates: list[_VespaUpdateRequest],
@@ -446,6 +573,27 @@ class VespaIndex(DocumentIndex):
 
         update_start = time.monotonic()
 
+        if ENABLE_VESPA_SELECTION_UPDATES:
+            for update_request in update_requests:
+                self._update_documents_by_selection(
+                    document_ids=[
+                        doc_info.doc_id
+                        for doc_info in update_request.minimal_document_indexing_info
+                    ],
+                    fields=VespaDocumentFields(
+                        access=update_request.access,
+                        document_sets=update_request.document_sets,
+                        boost=update_request.boost,
+                        hidden=update_request.hidden,
+                    ),
+                    tenant_id=tenant_id,
+                )
+            logger.debug(
+                "Finished updating Vespa documents by selection in %.2f seconds",
+                time.monotonic() - update_start,
+            )
+            return
+
         processed_updates_requests: list[_VespaUpdateRequest] = []
         all_doc_chunk_ids: dict[str, list[UUID]] = {}
 
@@ -523,49 +671,91 @@ class VespaIndex(DocumentIndex):
         index_name: str,
         fields: VespaDocumentFields,
         doc_id: str,
+        http_client: httpx.Client | None = None,
     ) -> None:
         """
         Update a single "chunk" (document) in Vespa using its chunk ID.
+        Uses the shared pooled client unless a client is given.
         """
 
-        update_dict: dict[str, dict] = {"fields": {}}
-
-        if fields.boost is not None:
-            update_dict["fields"][BOOST] = {"assign": fields.boost}
-
-        if fields.document_sets is not None:
-            # WeightedSet<string> needs a map { item: weight, ... }
-            update_dict["fields"][DOCUMENT_SETS] = {
-                "assign": {document_set: 1 for document_set in fields.document_sets}
-            }
+        update_dict = _build_update_request(fields)
+        if not update_dict["fields"]:
+            logger.error("Update request received but nothing to update.")
+            return
 
-        if fields.access is not None:
-            # Similar to above
-            update_dict["fields"][ACCESS_CONTROL_LIST] = {
-                "assign": {acl_entry: 1 for acl_entry in fields.access.to_acl()}
-            }
+        vespa_url = f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{doc_chunk_id}?create=true"
 
-        if fields.hidden is not None:
-            update_dict["fields"][HIDDEN] = {"assign": fields.hidden}
+        http_client = http_client or get_shared_vespa_http_client()
+        try:
+            resp = http_client.put(
+                vespa_url,
+                headers={"Content-Type": "application/json"},
+                json=update_dict,
+            )
+            resp.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            error_message = f"Failed to update doc chunk {doc_chunk_id} (doc_id={doc_id}). Details: {e.response.text}"
+            logger.error(error_message)
+            raise
 
+    def _update_documents_by_selection(
+        self,
+        document_ids: list[str],
+        fields: VespaDocumentFields,
+        tenant_id: str | None,
+    ) -> int:
+        """Assigns the fields to all chunks of the documents with selection based
+        updates, Vespa visits the matching chunks server side so the chunk ids don't
+        need to be known. Returns the number of chunks updated."""
+        update_dict = _build_update_request(fields)
         if not update_dict["fields"]:
             logger.error("Update request received but nothing to update.")
-            return
+            return 0
 
-        vespa_url = f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{doc_chunk_id}?create=true"
+        index_names = [self.index_name]
+        if self.secondary_index_name:
+            index_names.append(self.secondary_index_name)
 
-        with get_vespa_http_client(http2=False) as http_client:
-            try:
-                resp = http_client.put(
-                    vespa_url,
-                    headers={"Content-Type": "application/json"},
-                    json=update_dict,
-                )
-                resp.raise_for_status()
-            except httpx.HTTPStatusError as e:
-                error_message = f"Failed to update doc chunk {doc_chunk_id} (doc_id={doc_id}). Details: {e.response.text}"
-                logger.error(error_message)
-                raise
+        http_client = get_shared_vespa_http_client()
+        chunks_updated = 0
+        for index_name in index_names:
+            for document_id_batch in batch_generator(
+                [replace_invalid_doc_id_characters(doc_id) for doc_id in document_ids],
+                MAX_DOCUMENTS_PER_SELECTION_UPDATE,
+            ):
+                params: dict[str, str] = {
+                    "selection": _build_document_selection(
+                        index_name, document_id_batch, tenant_id
+                    ),
+                    "cluster": CONTENT_CLUSTER_NAME,
+                    # return well before the client times out, the visit is resumed
+                    # with the continuation token
+                    "timeChunk": f"{max(VESPA_REQUEST_TIMEOUT // 2, 1)}s",
+                }
+                while True:
+                    try:
+                        resp = http_client.put(
+                            DOCUMENT_ID_ENDPOINT.format(index_name=index_name),
+                            params=params,
+                            headers={"Content-Type": "application/json"},
+                            json=update_dict,
+                        )
+                        resp.raise_for_status()
+                    except httpx.HTTPStatusError as e:
+                        logger.error(
+                            f"Failed to update {len(document_id_batch)} documents "
+                            f"by selection. Details: {e.response.text}"
+                        )
+                        raise
+
+                    response_data = resp.json()
+                    chunks_updated += response_data.get("documentCount", 0)
+                    continuation = response_data.get("continuation")
+                    if not continuation:
+                        break
+                    params = {**params, "continuation": continuation}
+
+        return chunks_updated
 
     def update_single(
         self,
@@ -586,37 +776,48 @@ class VespaIndex(DocumentIndex):
         if self.secondary_index_name:
             index_names.append(self.secondary_index_name)
 
-        with get_vespa_http_client(http2=False) as http_client:
-            for index_name in index_names:
-                with get_session_with_tenant(tenant_id=tenant_id) as db_session:
-                    multipass_config = get_multipass_config(
-                        db_session=db_session,
-                        primary_index=index_name == self.index_name,
-                    )
-                    large_chunks_enabled = multipass_config.enable_large_chunks
-                enriched_doc_infos = VespaIndex.enrich_basic_chunk_info(
+        http_client = get_shared_vespa_http_client()
+        for index_name in index_names:
+            large_chunks_enabled = get_multipass_config_for_index(
+                index_name=index_name,
+                primary_index=index_name == self.index_name,
+                tenant_id=tenant_id,
+            ).enable_large_chunks
+            enriched_doc_infos = VespaIndex.enrich_basic_chunk_info(
+                index_name=index_name,
+                http_client=http_client,
+                document_id=doc_id,
+                previous_chunk_count=chunk_count,
+                new_chunk_count=0,
+            )
+
+            doc_chunk_ids = get_document_chunk_ids(
+                enriched_document_info_list=[enriched_doc_infos],
+                tenant_id=tenant_id,
+                large_chunks_enabled=large_chunks_enabled,
+            )
+
+            doc_chunk_count += len(doc_chunk_ids)
+
+            def _update_chunk(doc_chunk_id: UUID) -> None:
+                self.update_single_chunk(
+                    doc_chunk_id=doc_chunk_id,
                     index_name=index_name,
+                    fields=fields,
+                    doc_id=doc_id,
                     http_client=http_client,
-                    document_id=doc_id,
-                    previous_chunk_count=chunk_count,
-                    new_chunk_count=0,
                 )
 
-                doc_chunk_ids = get_document_chunk_ids(
-                    enriched_document_info_list=[enriched_doc_infos],
-                    tenant_id=tenant_id,
-                    large_chunks_enabled=large_chunks_enabled,
-                )
-
-                doc_chunk_count += len(doc_chunk_ids)
-
+            if len(doc_chunk_ids) <= 1:
                 for doc_chunk_id in doc_chunk_ids:
-                    self.update_single_chunk(
-                        doc_chunk_id=doc_chunk_id,
-                        index_name=index_name,
-                        fields=fields,
-                        doc_id=doc_id,
-                    )
+                    _update_chunk(doc_chunk_id)
+                continue
+
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(NUM_THREADS, len(doc_chunk_ids))
+            ) as executor:
+                # consume the results so that any failure is raised
+                list(executor.map(_update_chunk, doc_chunk_ids))
 
         return doc_chunk_count
 
@@ -637,18 +838,14 @@ class VespaIndex(DocumentIndex):
         if self.secondary_index_name:
             index_names.append(self.secondary_index_name)
 
-        with get_vespa_http_client(
-            http2=False
-        ) as http_client, concurrent.futures.ThreadPoolExecutor(
-            max_workers=NUM_THREADS
-        ) as executor:
+        http_client = get_shared_vespa_http_client()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
             for index_name in index_names:
-                with get_session_with_tenant(tenant_id=tenant_id) as db_session:
-                    multipass_config = get_multipass_config(
-                        db_session=db_session,
-                        primary_index=index_name == self.index_name,
-                    )
-                    large_chunks_enabled = multipass_config.enable_large_chunks
+                large_chunks_enabled = get_multipass_config_for_index(
+                    index_name=index_name,
+                    primary_index=index_name == self.index_name,
+                    tenant_id=tenant_id,
+                ).enable_large_chunks
 
                 enriched_doc_infos = VespaIndex.enrich_basic_chunk_info(
                     index_name=index_name,
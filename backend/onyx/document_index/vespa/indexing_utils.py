@@ -1,24 +1,32 @@
 import concurrent.futures
 import json
+import threading
 import uuid
 from datetime import datetime
 from datetime import timezone
 from http import HTTPStatus
+from typing import Any
 
 import httpx
+import numpy as np
 from retry import retry
 from sqlalchemy.orm import Session
 
 from onyx.configs.app_configs import ENABLE_MULTIPASS_INDEXING
+from onyx.configs.app_configs import ENABLE_VESPA_FEED_CLIENT
+from onyx.configs.app_configs import ENABLE_VESPA_HEX_TENSOR_FEED
 from onyx.connectors.cross_connector_utils.miscellaneous_utils import (
     get_experts_stores_representations,
 )
+from onyx.db.engine import get_session_with_tenant
 from onyx.db.models import SearchSettings
 from onyx.db.search_settings import get_current_search_settings
 from onyx.db.search_settings import get_secondary_search_settings
 from onyx.document_index.document_index_utils import get_uuid_from_chunk
 from onyx.document_index.document_index_utils import get_uuid_from_chunk_info_old
 from onyx.document_index.interfaces import MinimalDocumentIndexingInfo
+from onyx.document_index.vespa.feed import feed_vespa_operations_or_raise
+from onyx.document_index.vespa.feed import VespaFeedOperation
 from onyx.document_index.vespa.shared_utils.utils import remove_invalid_unicode_chars
 from onyx.document_index.vespa.shared_utils.utils import (
     replace_invalid_doc_id_characters,
@@ -53,6 +61,7 @@ from onyx.indexing.models import DocMetadataAwareIndexChunk
 from onyx.indexing.models import EmbeddingProvider
 from onyx.indexing.models import MultipassConfig
 from onyx.utils.logger import setup_logger
+from shared_configs.model_server_models import Embedding
 
 logger = setup_logger()
 
@@ -123,22 +132,19 @@ def get_existing_documents_from_chunks(
     return document_ids
 
 
-@retry(tries=5, delay=1, backoff=2)
-def _index_vespa_chunk(
-    chunk: DocMetadataAwareIndexChunk,
-    index_name: str,
-    http_client: httpx.Client,
-    multitenant: bool,
-) -> None:
-    json_header = {
-        "Content-Type": "application/json",
-    }
+def _hex_tensor_cells(embedding: Embedding) -> str:
+    """Dense tensor cells in the hex form of the Vespa document JSON format, the big
+    endian bits of every float cell."""
+    return np.asarray(embedding, dtype=">f4").tobytes().hex()
+
+
+def _build_vespa_chunk_fields(
+    chunk: DocMetadataAwareIndexChunk, multitenant: bool
+) -> dict[str, Any]:
     document = chunk.source_document
 
     # No minichunk documents in vespa, minichunk vectors are stored in the chunk itself
 
-    vespa_chunk_id = str(get_uuid_from_chunk(chunk))
-
     embeddings = chunk.embeddings
 
     embeddings_name_vector_map = {"full_chunk": embeddings.full_embedding}
@@ -147,6 +153,20 @@ def _index_vespa_chunk(
         for ind, m_c_embed in enumerate(embeddings.mini_chunk_embeddings):
             embeddings_name_vector_map[f"mini_chunk_{ind}"] = m_c_embed
 
+    embeddings_tensor: dict[str, Any] = embeddings_name_vector_map
+    title_embedding_tensor: Any = chunk.title_embedding
+    if ENABLE_VESPA_HEX_TENSOR_FEED:
+        embeddings_tensor = {
+            "blocks": {
+                name: _hex_tensor_cells(vector)
+                for name, vector in embeddings_name_vector_map.items()
+            }
+        }
+        if chunk.title_embedding is not None:
+            title_embedding_tensor = {
+                "values": _hex_tensor_cells(chunk.title_embedding)
+            }
+
     title = document.get_title_for_document_index()
 
     vespa_document_fields = {
@@ -173,8 +193,8 @@ def _index_vespa_chunk(
         # Save as a list for efficient extraction as an Attribute
         METADATA_LIST: chunk.source_document.get_metadata_str_attributes(),
         METADATA_SUFFIX: chunk.metadata_suffix_keyword,
-        EMBEDDINGS: embeddings_name_vector_map,
-        TITLE_EMBEDDING: chunk.title_embedding,
+        EMBEDDINGS: embeddings_tensor,
+        TITLE_EMBEDDING: title_embedding_tensor,
         DOC_UPDATED_AT: _vespa_get_updated_at_attribute(document.doc_updated_at),
         PRIMARY_OWNERS: get_experts_stores_representations(document.primary_owners),
         SECONDARY_OWNERS: get_experts_stores_representations(document.secondary_owners),
@@ -191,6 +211,23 @@ def _index_vespa_chunk(
         if chunk.tenant_id:
             vespa_document_fields[TENANT_ID] = chunk.tenant_id
 
+    return vespa_document_fields
+
+
+@retry(tries=5, delay=1, backoff=2)
+def _index_vespa_chunk(
+    chunk: DocMetadataAwareIndexChunk,
+    index_name: str,
+    http_client: httpx.Client,
+    multitenant: bool,
+) -> None:
+    json_header = {
+        "Content-Type": "application/json",
+    }
+    document = chunk.source_document
+    vespa_chunk_id = str(get_uuid_from_chunk(chunk))
+    vespa_document_fields = _build_vespa_chunk_fields(chunk, multitenant)
+
     vespa_url = f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{vespa_chunk_id}"
     logger.debug(f'Indexing to URL "{vespa_url}"')
     res = http_client.post(
@@ -220,6 +257,21 @@ def batch_index_vespa_chunks(
     multitenant: bool,
     executor: concurrent.futures.ThreadPoolExecutor | None = None,
 ) -> None:
+    if ENABLE_VESPA_FEED_CLIENT:
+        # streams all chunks over one async client, http_client / executor are not needed
+        feed_vespa_operations_or_raise(
+            [
+                VespaFeedOperation.build(
+                    method="POST",
+                    url=f"{DOCUMENT_ID_ENDPOINT.format(index_name=index_name)}/{get_uuid_from_chunk(chunk)}",
+                    body={"fields": _build_vespa_chunk_fields(chunk, multitenant)},
+                    operation_id=f"{chunk.source_document.id}:{chunk.chunk_id}",
+                )
+                for chunk in chunks
+            ]
+        )
+        return
+
     external_executor = True
 
     if not executor:
@@ -245,13 +297,14 @@ def batch_index_vespa_chunks(
 def clean_chunk_id_copy(
     chunk: DocMetadataAwareIndexChunk,
 ) -> DocMetadataAwareIndexChunk:
-    clean_chunk = chunk.copy(
+    clean_id = replace_invalid_doc_id_characters(chunk.source_document.id)
+    # most ids are already valid, no need to copy those chunks
+    if clean_id == chunk.source_document.id:
+        return chunk
+
+    clean_chunk = chunk.model_copy(
         update={
-            "source_document": chunk.source_document.copy(
-                update={
-                    "id": replace_invalid_doc_id_characters(chunk.source_document.id)
-                }
-            )
+            "source_document": chunk.source_document.model_copy(update={"id": clean_id})
         }
     )
     return clean_chunk
@@ -299,6 +352,16 @@ def can_use_large_chunks(multipass: bool, search_settings: SearchSettings) -> bo
     )
 
 
+def _build_multipass_config(search_settings: SearchSettings | None) -> MultipassConfig:
+    multipass = should_use_multipass(search_settings)
+    if not search_settings:
+        return MultipassConfig(multipass_indexing=False, enable_large_chunks=False)
+    enable_large_chunks = can_use_large_chunks(multipass, search_settings)
+    return MultipassConfig(
+        multipass_indexing=multipass, enable_large_chunks=enable_large_chunks
+    )
+
+
 def get_multipass_config(
     db_session: Session, primary_index: bool = True
 ) -> MultipassConfig:
@@ -311,10 +374,41 @@ def get_multipass_config(
         if primary_index
         else get_secondary_search_settings(db_session)
     )
-    multipass = should_use_multipass(search_settings)
-    if not search_settings:
-        return MultipassConfig(multipass_indexing=False, enable_large_chunks=False)
-    enable_large_chunks = can_use_large_chunks(multipass, search_settings)
-    return MultipassConfig(
-        multipass_indexing=multipass, enable_large_chunks=enable_large_chunks
-    )
+    return _build_multipass_config(search_settings)
+
+
+_MULTIPASS_CONFIG_CACHE_MAX_ENTRIES = 4096
+_multipass_config_cache: dict[tuple[str | None, str], MultipassConfig] = {}
+_multipass_config_cache_lock = threading.Lock()
+
+
+def get_multipass_config_for_index(
+    index_name: str, primary_index: bool, tenant_id: str | None
+) -> MultipassConfig:
+    """
+    Cached `get_multipass_config` for the search settings of the given index. The fields
+    the config depends on can't be changed on existing search settings, so it is fixed
+    for each index name (i.e. each search settings version).
+    """
+    cache_key = (tenant_id, index_name)
+    with _multipass_config_cache_lock:
+        cached_config = _multipass_config_cache.get(cache_key)
+    if cached_config is not None:
+        return cached_config
+
+    with get_session_with_tenant(tenant_id=tenant_id) as db_session:
+        search_settings = (
+            get_current_search_settings(db_session)
+            if primary_index
+            else get_secondary_search_settings(db_session)
+        )
+        multipass_config = _build_multipass_config(search_settings)
+        settings_index_name = search_settings.index_name if search_settings else None
+
+    # the settings may have been swapped since the caller got the index name
+    if settings_index_name == index_name:
+        with _multipass_config_cache_lock:
+            if len(_multipass_config_cache) >= _MULTIPASS_CONFIG_CACHE_MAX_ENTRIES:
+                _multipass_config_cache.clear()
+            _multipass_config_cache[cache_key] = multipass_config
+    return multipass_config
@@ -1,4 +1,6 @@
+import os
 import re
+import threading
 from typing import cast
 
 import httpx
@@ -7,6 +9,7 @@ from onyx.configs.app_configs import MANAGED_VESPA
 from onyx.configs.app_configs import VESPA_CLOUD_CERT_PATH
 from onyx.configs.app_configs import VESPA_CLOUD_KEY_PATH
 from onyx.configs.app_configs import VESPA_REQUEST_TIMEOUT
+from onyx.document_index.vespa_constants import NUM_THREADS
 
 # NOTE: This does not seem to be used in reality despite the Vespa Docs pointing to this code
 # See here for reference: https://docs.vespa.ai/en/documents.html
@@ -69,3 +72,56 @@ def get_vespa_http_client(no_timeout: bool = False, http2: bool = True) -> httpx
         timeout=None if no_timeout else VESPA_REQUEST_TIMEOUT,
         http2=http2,
     )
+
+
+_shared_http_client: httpx.Client | None = None
+_shared_http_client_pid: int | None = None
+_shared_http_client_lock = threading.Lock()
+
+
+def get_shared_vespa_http_client() -> httpx.Client:
+    """
+    Process wide client with a keep-alive connection pool, for the many small requests
+    of document updates and deletes. Recreated after a fork so that processes never
+    share sockets. Must not be closed by the caller.
+    """
+    global _shared_http_client, _shared_http_client_pid
+
+    with _shared_http_client_lock:
+        if _shared_http_client is None or _shared_http_client_pid != os.getpid():
+            _shared_http_client = httpx.Client(
+                cert=cast(
+                    tuple[str, str], (VESPA_CLOUD_CERT_PATH, VESPA_CLOUD_KEY_PATH)
+                )
+                if MANAGED_VESPA
+                else None,
+                verify=False if not MANAGED_VESPA else True,
+                timeout=VESPA_REQUEST_TIMEOUT,
+                http2=False,
+                # concurrent callers beyond the kept alive connections get a new one
+                limits=httpx.Limits(
+                    max_connections=None, max_keepalive_connections=NUM_THREADS
+                ),
+            )
+            _shared_http_client_pid = os.getpid()
+        return _shared_http_client
+
+
+def get_vespa_async_http_client(
+    no_timeout: bool = False, http2: bool = True, max_connections: int | None = None
+) -> httpx.AsyncClient:
+    """
+    Async counterpart of `get_vespa_http_client`, used for high volume feeding.
+    """
+
+    return httpx.AsyncClient(
+        cert=cast(tuple[str, str], (VESPA_CLOUD_CERT_PATH, VESPA_CLOUD_KEY_PATH))
+        if MANAGED_VESPA
+        else None,
+        verify=False if not MANAGED_VESPA else True,
+        timeout=None if no_timeout else VESPA_REQUEST_TIMEOUT,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections
+        ),
+    )
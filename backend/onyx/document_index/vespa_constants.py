@@ -34,6 +34,10 @@ VESPA_APP_CONTAINER_URL = VESPA_CLOUD_URL or f"http://{VESPA_HOST}:{VESPA_PORT}"
 DOCUMENT_ID_ENDPOINT = (
     f"{VESPA_APP_CONTAINER_URL}/document/v1/default/{{index_name}}/docid"
 )
+# content cluster id in vespa/app_config/services.xml, needed for selection updates
+CONTENT_CLUSTER_NAME = "danswer_index"
+# documents per selection update, every selection update visits the whole corpus
+MAX_DOCUMENTS_PER_SELECTION_UPDATE = 512
 
 # the default document id endpoint is http://localhost:8080/document/v1/default/danswer_chunk/docid
 
@@ -0,0 +1,70 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Any
+
+from onyx.connectors.models import Document
+from onyx.indexing.models import DocAwareChunk
+from onyx.indexing.models import DocMetadataAwareIndexChunk
+
+# The sections are represented by the chunk contents, `doc_updated_at` is left out so
+# that a document which was touched without any content change keeps its fingerprints
+# (the document index refreshes the timestamp separately)
+_DOCUMENT_FIELDS_EXCLUDED = {"sections", "doc_updated_at"}
+_CHUNK_FIELDS_EXCLUDED = {"source_document", "embeddings", "title_embedding"}
+
+
+def _json_default(value: Any) -> Any:
+    # sets (ACL, document sets) must hash the same regardless of iteration order
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _digest(value: Any) -> str:
+    serialized = json.dumps(value, sort_keys=True, default=_json_default)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:32]
+
+
+def _document_digest(document: Document) -> str:
+    return _digest(document.model_dump(exclude=_DOCUMENT_FIELDS_EXCLUDED))
+
+
+def get_chunk_fingerprint_key(chunk: DocAwareChunk) -> str:
+    """Identifies a chunk within its document, large chunks share chunk ids with
+    the regular chunks so they get their own namespace."""
+    if chunk.large_chunk_id is not None:
+        return f"large_{chunk.large_chunk_id}"
+    return str(chunk.chunk_id)
+
+
+def build_chunk_fingerprints(
+    chunks: list[DocMetadataAwareIndexChunk], index_name: str
+) -> dict[str, dict[str, str]]:
+    """Returns document id -> chunk key -> fingerprint of everything that is written
+    to the document index for the chunk. The embeddings themselves are not hashed,
+    they are determined by the chunk text and the index (i.e. the embedding model)."""
+    doc_id_to_digest: dict[str, str] = {}
+    doc_id_to_fingerprints: dict[str, dict[str, str]] = {}
+
+    for chunk in chunks:
+        document = chunk.source_document
+        if document.id not in doc_id_to_digest:
+            doc_id_to_digest[document.id] = _document_digest(document)
+
+        doc_id_to_fingerprints.setdefault(document.id, {})[
+            get_chunk_fingerprint_key(chunk)
+        ] = _digest(
+            {
+                "index_name": index_name,
+                "document": doc_id_to_digest[document.id],
+                "chunk": chunk.model_dump(exclude=_CHUNK_FIELDS_EXCLUDED),
+                "embedding_dim": len(chunk.embeddings.full_embedding),
+                "mini_chunk_embeddings": len(chunk.embeddings.mini_chunk_embeddings),
+                "title_embedding": chunk.title_embedding is not None,
+            }
+        )
+
+    return doc_id_to_fingerprints
@@ -1,3 +1,6 @@
+import re
+from functools import lru_cache
+
 from onyx.configs.app_configs import BLURB_SIZE
 from onyx.configs.app_configs import LARGE_CHUNK_RATIO
 from onyx.configs.app_configs import MINI_CHUNK_SIZE
@@ -27,6 +30,15 @@ CHUNK_OVERLAP = 0
 # could be another 128 tokens leaving 256 for the actual contents
 MAX_METADATA_PERCENTAGE = 0.25
 CHUNK_MIN_CONTENT = 256
+# The sentence splitters (blurb, chunk, mini-chunk) repeatedly tokenize the same texts,
+# this is the number of recently tokenized texts kept around per Chunker
+TOKENIZE_CACHE_SIZE = 256
+# Tokenizers can merge tokens across the separator between two sections (e.g. BPE
+# whitespace runs), the last / first two words around it are re-tokenized to get the
+# exact count of the joined text. Looked for within this many characters
+JOIN_CONTEXT_CHARS = 256
+_JOIN_CONTEXT_LEFT = re.compile(r"(?<!\S)\S+\s+\S+\s*\Z")
+_JOIN_CONTEXT_RIGHT = re.compile(r"\A\s*\S+\s+\S+")
 
 
 logger = setup_logger()
@@ -138,21 +150,28 @@ class Chunker:
         self.tokenizer = tokenizer
         self.callback = callback
 
+        # The splitters only look at the number of tokens and tokenize the same text
+        # several times (the splitter itself checks the size twice, the blurb and
+        # mini-chunk splitters both see the full chunk text), so share a cache. The
+        # token ids are enough for that, no need to decode them into token strings
+        self._encode = lru_cache(maxsize=TOKENIZE_CACHE_SIZE)(tokenizer.encode)
+        self._section_separator_token_count = self._count_tokens(SECTION_SEPARATOR)
+
         self.blurb_splitter = SentenceSplitter(
-            tokenizer=tokenizer.tokenize,
+            tokenizer=self._encode,
             chunk_size=blurb_size,
             chunk_overlap=0,
         )
 
         self.chunk_splitter = SentenceSplitter(
-            tokenizer=tokenizer.tokenize,
+            tokenizer=self._encode,
             chunk_size=chunk_token_limit,
             chunk_overlap=chunk_overlap,
         )
 
         self.mini_chunk_splitter = (
             SentenceSplitter(
-                tokenizer=tokenizer.tokenize,
+                tokenizer=self._encode,
                 chunk_size=mini_chunk_size,
                 chunk_overlap=0,
             )
@@ -160,20 +179,59 @@ class Chunker:
             else None
         )
 
+    def _count_tokens(self, text: str) -> int:
+        return len(self._encode(text))
+
+    def _count_joined_tokens(
+        self, left: str, left_token_count: int, right: str, right_token_count: int
+    ) -> int:
+        """Token count of left + SECTION_SEPARATOR + right, same as tokenizing the
+        joined text. Only the words next to the separator are re-tokenized, tokens
+        further away are not affected by the join."""
+        left_match = _JOIN_CONTEXT_LEFT.search(left[-JOIN_CONTEXT_CHARS:])
+        left_context, left_context_token_count = (
+            (left_match.group(), None) if left_match else (left, left_token_count)
+        )
+        right_match = _JOIN_CONTEXT_RIGHT.match(right[:JOIN_CONTEXT_CHARS])
+        right_context, right_context_token_count = (
+            (right_match.group(), None) if right_match else (right, right_token_count)
+        )
+
+        if left_context_token_count is None:
+            left_context_token_count = self.tokenizer.count_tokens(left_context)
+        if right_context_token_count is None:
+            right_context_token_count = self.tokenizer.count_tokens(right_context)
+
+        join_delta = (
+            self.tokenizer.count_tokens(
+                left_context + SECTION_SEPARATOR + right_context
+            )
+            - left_context_token_count
+            - self._section_separator_token_count
+            - right_context_token_count
+        )
+        return (
+            left_token_count
+            + self._section_separator_token_count
+            + right_token_count
+            + join_delta
+        )
+
     def _split_oversized_chunk(self, text: str, content_token_limit: int) -> list[str]:
         """
         Splits the text into smaller chunks based on token count to ensure
         no chunk exceeds the content_token_limit.
         """
-        tokens = self.tokenizer.tokenize(text)
+        tokens, offsets = self.tokenizer.encode_with_offsets(text)
         chunks = []
         start = 0
         total_tokens = len(tokens)
         while start < total_tokens:
             end = min(start + content_token_limit, total_tokens)
-            token_chunk = tokens[start:end]
-            # Join the tokens to reconstruct the text
-            chunk_text = " ".join(token_chunk)
+            # Cut the original text at the token boundaries
+            chunk_text = text[
+                offsets[start] : offsets[end] if end < total_tokens else len(text)
+            ]
             chunks.append(chunk_text)
             start = end
         return chunks
@@ -203,6 +261,12 @@ class Chunker:
         chunks: list[DocAwareChunk] = []
         link_offsets: dict[int, str] = {}
         chunk_text = ""
+        # Running totals for chunk_text so that it never has to be re-tokenized / re-cleaned
+        # as sections are appended. The cleaned length is additive since the cleanup
+        # drops the whitespace of SECTION_SEPARATOR, the token count is corrected at
+        # every join by _count_joined_tokens.
+        current_token_count = 0
+        current_offset = 0
 
         def _create_chunk(
             text: str,
@@ -223,8 +287,13 @@ class Chunker:
                 large_chunk_id=None,
             )
 
-        for section_idx, section in enumerate(document.sections):
-            section_text = clean_text(section.text)
+        section_texts = [clean_text(section.text) for section in document.sections]
+        # counted in one go, tokenizers with a native batch API parallelize it
+        section_token_counts = self.tokenizer.count_tokens_batch(section_texts)
+
+        for section_idx, (section, section_text, section_token_count) in enumerate(
+            zip(document.sections, section_texts, section_token_counts)
+        ):
             section_link_text = section.link or ""
             # If there is no useful content, not even the title, just drop it
             if not section_text and (not document.title or section_idx > 0):
@@ -238,8 +307,6 @@ class Chunker:
                 )
                 continue
 
-            section_token_count = len(self.tokenizer.tokenize(section_text))
-
             # Large sections are considered self-contained/unique
             # Therefore, they start a new chunk and are not concatenated
             # at the end by other sections
@@ -248,6 +315,8 @@ class Chunker:
                     chunks.append(_create_chunk(chunk_text, link_offsets))
                     link_offsets = {}
                     chunk_text = ""
+                    current_token_count = 0
+                    current_offset = 0
 
                 split_texts = self.chunk_splitter.split_text(section_text)
 
@@ -256,7 +325,7 @@ class Chunker:
                         STRICT_CHUNK_TOKEN_LIMIT
                         and
                         # Tokenizer only runs if STRICT_CHUNK_TOKEN_LIMIT is true
-                        len(self.tokenizer.tokenize(split_text)) > content_token_limit
+                        self._count_tokens(split_text) > content_token_limit
                     ):
                         # If STRICT_CHUNK_TOKEN_LIMIT is true, manually check
                         # the token count of each split text to ensure it is
@@ -283,22 +352,32 @@ class Chunker:
 
                 continue
 
-            current_token_count = len(self.tokenizer.tokenize(chunk_text))
-            current_offset = len(shared_precompare_cleanup(chunk_text))
+            section_offset = len(shared_precompare_cleanup(section_text))
             # In the case where the whole section is shorter than a chunk, either add
             # to chunk or start a new one
             next_section_tokens = (
-                len(self.tokenizer.tokenize(SECTION_SEPARATOR)) + section_token_count
+                self._section_separator_token_count + section_token_count
             )
             if next_section_tokens + current_token_count <= content_token_limit:
                 if chunk_text:
-                    chunk_text += SECTION_SEPARATOR
-                chunk_text += section_text
+                    current_token_count = self._count_joined_tokens(
+                        chunk_text,
+                        current_token_count,
+                        section_text,
+                        section_token_count,
+                    )
+                    chunk_text += SECTION_SEPARATOR + section_text
+                else:
+                    chunk_text = section_text
+                    current_token_count = section_token_count
                 link_offsets[current_offset] = section_link_text
+                current_offset += section_offset
             else:
                 chunks.append(_create_chunk(chunk_text, link_offsets))
                 link_offsets = {0: section_link_text}
                 chunk_text = section_text
+                current_token_count = section_token_count
+                current_offset = section_offset
 
         # Once we hit the end, if we're still in the process of building a chunk, add what we have.
         # If there is only whitespace left then don't include it. If there are no chunks at all
@@ -321,7 +400,7 @@ class Chunker:
 
         title = self._extract_blurb(document.get_title_for_document_index() or "")
         title_prefix = title + RETURN_SEPARATOR if title else ""
-        title_tokens = len(self.tokenizer.tokenize(title_prefix))
+        title_tokens = self._count_tokens(title_prefix)
 
         metadata_suffix_semantic = ""
         metadata_suffix_keyword = ""
@@ -333,7 +412,7 @@ class Chunker:
             ) = _get_metadata_suffix_for_document_index(
                 document.metadata, include_separator=True
             )
-            metadata_tokens = len(self.tokenizer.tokenize(metadata_suffix_semantic))
+            metadata_tokens = self._count_tokens(metadata_suffix_semantic)
 
         if metadata_tokens >= self.chunk_token_limit * MAX_METADATA_PERCENTAGE:
             # Note: we can keep the keyword suffix even if the semantic suffix is too long to fit in the model
@@ -1,12 +1,17 @@
 from abc import ABC
 from abc import abstractmethod
+from collections.abc import Callable
 
+from onyx.configs.app_configs import ENABLE_EMBEDDING_CACHE
+from onyx.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
 from onyx.db.models import SearchSettings
+from onyx.indexing.embedding_cache import EmbeddingCache
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.models import ChunkEmbedding
 from onyx.indexing.models import DocAwareChunk
 from onyx.indexing.models import IndexChunk
 from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from onyx.natural_language_processing.utils import tokenizer_trim_content
 from onyx.utils.logger import setup_logger
 from onyx.utils.timing import log_function_time
 from shared_configs.configs import INDEXING_MODEL_SERVER_HOST
@@ -63,6 +68,33 @@ class IndexingEmbedder(ABC):
             callback=callback,
         )
 
+        self.embedding_cache = (
+            EmbeddingCache(
+                model_name=model_name,
+                provider_type=provider_type,
+                normalize=normalize,
+                query_prefix=query_prefix,
+                passage_prefix=passage_prefix,
+            )
+            if ENABLE_EMBEDDING_CACHE
+            else None
+        )
+
+    def _encode_with_cache(
+        self,
+        texts: list[str],
+        text_type: EmbedTextType,
+        encode_fnc: Callable[[list[str]], list[Embedding]],
+    ) -> list[Embedding]:
+        """Only sends the texts which are not in the embedding cache (if enabled)
+        through `encode_fnc`"""
+        if self.embedding_cache is None:
+            return encode_fnc(texts)
+
+        return self.embedding_cache.get_or_embed(
+            texts=texts, text_type=text_type, encode_fnc=encode_fnc
+        )
+
     @abstractmethod
     def embed_chunks(
         self,
@@ -131,12 +163,6 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
                     raise RuntimeError("Large chunk contains mini chunks")
                 flat_chunk_texts.extend(chunk.mini_chunk_texts)
 
-        embeddings = self.embedding_model.encode(
-            texts=flat_chunk_texts,
-            text_type=EmbedTextType.PASSAGE,
-            large_chunks_present=large_chunks_present,
-        )
-
         chunk_titles = {
             chunk.source_document.get_title_for_document_index() for chunk in chunks
         }
@@ -146,18 +172,38 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         # which is ok, it just won't contribute at all to the scoring.
         chunk_titles_list = [title for title in chunk_titles if title]
 
+        # Titles are embedded in the same call as the chunks so that all texts can be
+        # batched by length. With large chunks present the whole call allows longer texts,
+        # so the titles are trimmed here to the length they would be embedded with alone
+        title_texts = (
+            [
+                tokenizer_trim_content(
+                    content=title,
+                    desired_length=DOC_EMBEDDING_CONTEXT_SIZE,
+                    tokenizer=self.embedding_model.tokenizer,
+                )
+                for title in chunk_titles_list
+            ]
+            if large_chunks_present
+            else chunk_titles_list
+        )
+
+        all_embeddings = self._encode_with_cache(
+            flat_chunk_texts + title_texts,
+            text_type=EmbedTextType.PASSAGE,
+            encode_fnc=lambda texts: self.embedding_model.encode(
+                texts=texts,
+                text_type=EmbedTextType.PASSAGE,
+                large_chunks_present=large_chunks_present,
+                sort_by_length=True,
+            ),
+        )
+        embeddings = all_embeddings[: len(flat_chunk_texts)]
+
         # Cache the Title embeddings to only have to do it once
-        title_embed_dict: dict[str, Embedding] = {}
-        if chunk_titles_list:
-            title_embeddings = self.embedding_model.encode(
-                chunk_titles_list, text_type=EmbedTextType.PASSAGE
-            )
-            title_embed_dict.update(
-                {
-                    title: vector
-                    for title, vector in zip(chunk_titles_list, title_embeddings)
-                }
-            )
+        title_embed_dict: dict[str, Embedding] = dict(
+            zip(chunk_titles_list, all_embeddings[len(flat_chunk_texts) :])
+        )
 
         # Mapping embeddings to chunks
         embedded_chunks: list[IndexChunk] = []
@@ -186,8 +232,9 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
                     )[0]
                     title_embed_dict[title] = title_embedding
 
+            # shallow, a dump would copy the whole source document into every chunk
             new_embedded_chunk = IndexChunk(
-                **chunk.model_dump(),
+                **dict(chunk),
                 embeddings=ChunkEmbedding(
                     full_embedding=chunk_embeddings[0],
                     mini_chunk_embeddings=chunk_embeddings[1:],
@@ -0,0 +1,134 @@
+import hashlib
+from collections.abc import Callable
+
+import numpy as np
+
+from onyx.configs.app_configs import EMBEDDING_CACHE_EVICTION_INTERVAL
+from onyx.configs.app_configs import EMBEDDING_CACHE_MAX_ENTRIES
+from onyx.db.embedding_cache import evict_embedding_cache_entries
+from onyx.db.embedding_cache import fetch_cached_embeddings
+from onyx.db.embedding_cache import upsert_cached_embeddings
+from onyx.db.engine import get_session_with_default_tenant
+from onyx.utils.logger import setup_logger
+from shared_configs.enums import EmbeddingProvider
+from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+
+def _serialize_embedding(embedding: Embedding) -> bytes:
+    return np.asarray(embedding, dtype="<f4").tobytes()
+
+
+def _deserialize_embedding(raw: bytes) -> Embedding:
+    return np.frombuffer(raw, dtype="<f4").tolist()
+
+
+class EmbeddingCache:
+    """Persistent (Postgres) cache of passage embeddings, checked before any text is sent
+    to the model server. Entries are keyed by everything that influences the resulting
+    vector so a change of model, normalization or prefix never returns a stale embedding.
+
+    The cache is best effort, if it cannot be reached the texts are simply embedded."""
+
+    def __init__(
+        self,
+        model_name: str,
+        provider_type: EmbeddingProvider | None,
+        normalize: bool,
+        query_prefix: str | None,
+        passage_prefix: str | None,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+        eviction_interval: int = EMBEDDING_CACHE_EVICTION_INTERVAL,
+    ) -> None:
+        self.model_name = model_name
+        self.provider_type = provider_type
+        self.normalize = normalize
+        self.query_prefix = query_prefix
+        self.passage_prefix = passage_prefix
+        self.max_entries = max_entries
+        self.eviction_interval = eviction_interval
+
+        self.hits = 0
+        self.misses = 0
+        self._entries_since_eviction = 0
+
+    def build_cache_key(self, text: str, text_type: EmbedTextType) -> str:
+        prefix = (
+            self.query_prefix
+            if text_type == EmbedTextType.QUERY
+            else self.passage_prefix
+        )
+        key_parts = [
+            self.provider_type.value if self.provider_type else "",
+            self.model_name,
+            str(self.normalize),
+            text_type.value,
+            prefix or "",
+            hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        ]
+        return hashlib.sha256("\x1f".join(key_parts).encode("utf-8")).hexdigest()
+
+    def get_or_embed(
+        self,
+        texts: list[str],
+        text_type: EmbedTextType,
+        encode_fnc: Callable[[list[str]], list[Embedding]],
+    ) -> list[Embedding]:
+        """Returns the embeddings for `texts` in order, only the texts which are not
+        cached are passed to `encode_fnc`."""
+        cache_keys = [self.build_cache_key(text, text_type) for text in texts]
+
+        cached: dict[str, bytes] = {}
+        try:
+            with get_session_with_default_tenant() as db_session:
+                cached = fetch_cached_embeddings(db_session, list(set(cache_keys)))
+        except Exception:
+            logger.exception("Failed to read from the embedding cache")
+
+        embeddings: list[Embedding | None] = [
+            _deserialize_embedding(cached[cache_key]) if cache_key in cached else None
+            for cache_key in cache_keys
+        ]
+
+        # identical texts in the same batch only need to be embedded once
+        missing_key_to_text: dict[str, str] = {}
+        for text, cache_key, embedding in zip(texts, cache_keys, embeddings):
+            if embedding is None:
+                missing_key_to_text.setdefault(cache_key, text)
+
+        self.hits += len(texts) - len(missing_key_to_text)
+        self.misses += len(missing_key_to_text)
+        logger.debug(
+            f"Embedding cache: texts={len(texts)} to_embed={len(missing_key_to_text)}"
+        )
+
+        if missing_key_to_text:
+            new_embeddings = encode_fnc(list(missing_key_to_text.values()))
+            key_to_new_embedding = dict(zip(missing_key_to_text.keys(), new_embeddings))
+            embeddings = [
+                embedding if embedding is not None else key_to_new_embedding[cache_key]
+                for cache_key, embedding in zip(cache_keys, embeddings)
+            ]
+            self._store(key_to_new_embedding)
+
+        return [embedding for embedding in embeddings if embedding is not None]
+
+    def _store(self, key_to_embedding: dict[str, Embedding]) -> None:
+        try:
+            with get_session_with_default_tenant() as db_session:
+                upsert_cached_embeddings(
+                    db_session,
+                    {
+                        cache_key: _serialize_embedding(embedding)
+                        for cache_key, embedding in key_to_embedding.items()
+                    },
+                )
+
+                self._entries_since_eviction += len(key_to_embedding)
+                if self._entries_since_eviction >= self.eviction_interval:
+                    evict_embedding_cache_entries(db_session, self.max_entries)
+                    self._entries_since_eviction = 0
+        except Exception:
+            logger.exception("Failed to write to the embedding cache")
@@ -1,5 +1,7 @@
 import traceback
 from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
 from functools import partial
 from http import HTTPStatus
 from typing import Protocol
@@ -11,19 +13,24 @@ from sqlalchemy.orm import Session
 
 from onyx.access.access import get_access_for_documents
 from onyx.access.models import DocumentAccess
+from onyx.configs.app_configs import ENABLE_SKIP_UNCHANGED_CHUNKS
 from onyx.configs.app_configs import INDEXING_EXCEPTION_LIMIT
+from onyx.configs.app_configs import INDEXING_MAX_CHUNKS_PER_SUB_BATCH
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.configs.constants import DEFAULT_BOOST
+from onyx.configs.constants import DocumentSource
 from onyx.connectors.cross_connector_utils.miscellaneous_utils import (
     get_experts_stores_representations,
 )
 from onyx.connectors.models import Document
 from onyx.connectors.models import IndexAttemptMetadata
 from onyx.db.document import fetch_chunk_counts_for_documents
+from onyx.db.document import fetch_chunk_fingerprints_for_documents
 from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_indexed_for_cc_pair__no_commit
 from onyx.db.document import prepare_to_modify_documents
 from onyx.db.document import update_docs_chunk_count__no_commit
+from onyx.db.document import update_docs_chunk_fingerprints__no_commit
 from onyx.db.document import update_docs_last_modified__no_commit
 from onyx.db.document import update_docs_updated_at__no_commit
 from onyx.db.document import upsert_document_by_connector_credential_pair
@@ -31,19 +38,20 @@ from onyx.db.document import upsert_documents
 from onyx.db.document_set import fetch_document_sets_for_documents
 from onyx.db.index_attempt import create_index_attempt_error
 from onyx.db.models import Document as DBDocument
-from onyx.db.tag import create_or_add_document_tag
-from onyx.db.tag import create_or_add_document_tag_list
+from onyx.db.tag import upsert_document_tags__no_commit
 from onyx.document_index.interfaces import DocumentIndex
 from onyx.document_index.interfaces import DocumentMetadata
 from onyx.document_index.interfaces import IndexBatchParams
 from onyx.document_index.vespa.indexing_utils import (
     get_multipass_config,
 )
+from onyx.indexing.chunk_fingerprints import build_chunk_fingerprints
 from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import IndexingEmbedder
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.models import DocAwareChunk
 from onyx.indexing.models import DocMetadataAwareIndexChunk
+from onyx.indexing.models import IndexChunk
 from onyx.utils.logger import setup_logger
 from onyx.utils.timing import log_function_time
 
@@ -101,26 +109,21 @@ def _upsert_documents_in_db(
 
     upsert_documents(db_session, document_metadata_list)
 
-    # Insert document content metadata
+    # Insert document content metadata, one round of statements per source
+    source_to_doc_metadata: dict[
+        DocumentSource, dict[str, dict[str, str | list[str]]]
+    ] = {}
     for doc in documents:
-        for k, v in doc.metadata.items():
-            if isinstance(v, list):
-                create_or_add_document_tag_list(
-                    tag_key=k,
-                    tag_values=v,
-                    source=doc.source,
-                    document_id=doc.id,
-                    db_session=db_session,
-                )
-                continue
+        if doc.metadata:
+            source_to_doc_metadata.setdefault(doc.source, {})[doc.id] = doc.metadata
 
-            create_or_add_document_tag(
-                tag_key=k,
-                tag_value=v,
-                source=doc.source,
-                document_id=doc.id,
-                db_session=db_session,
-            )
+    for source, document_id_to_metadata in source_to_doc_metadata.items():
+        upsert_document_tags__no_commit(
+            document_id_to_metadata=document_id_to_metadata,
+            source=source,
+            db_session=db_session,
+        )
+    db_session.commit()
 
 
 def get_doc_ids_to_update(
@@ -148,6 +151,56 @@ def get_doc_ids_to_update(
     return updatable_docs
 
 
+def handle_indexing_batch_exception(
+    e: Exception,
+    *,
+    attempt_id: int | None,
+    batch_num: int | None,
+    document_batch: list[Document],
+    index_attempt_metadata: IndexAttemptMetadata,
+    db_session: Session,
+) -> None:
+    """Records a failed batch against the index attempt. Re-raises if the attempt
+    is not allowed to continue (no exception limit configured or limit exceeded)."""
+    if isinstance(e, httpx.HTTPStatusError):
+        if e.response.status_code == HTTPStatus.INSUFFICIENT_STORAGE:
+            logger.error(
+                "NOTE: HTTP Status 507 Insufficient Storage indicates "
+                "you need to allocate more memory or disk space to the "
+                "Vespa/index container."
+            )
+
+    if INDEXING_EXCEPTION_LIMIT == 0:
+        raise e
+
+    trace = traceback.format_exc()
+    create_index_attempt_error(
+        attempt_id,
+        batch=batch_num,
+        docs=document_batch,
+        exception_msg=str(e),
+        exception_traceback=trace,
+        db_session=db_session,
+    )
+    logger.exception(f"Indexing batch {batch_num} failed. msg='{e}' trace='{trace}'")
+
+    index_attempt_metadata.num_exceptions += 1
+    if index_attempt_metadata.num_exceptions == INDEXING_EXCEPTION_LIMIT:
+        logger.warning(
+            f"Maximum number of exceptions for this index attempt "
+            f"({INDEXING_EXCEPTION_LIMIT}) has been reached. "
+            f"The next exception will abort the indexing attempt."
+        )
+    elif index_attempt_metadata.num_exceptions > INDEXING_EXCEPTION_LIMIT:
+        logger.warning(
+            f"Maximum number of exceptions for this index attempt "
+            f"({INDEXING_EXCEPTION_LIMIT}) has been exceeded."
+        )
+        raise RuntimeError(
+            f"Maximum exception limit of {INDEXING_EXCEPTION_LIMIT} exceeded."
+        )
+
+
 def index_doc_batch_with_handler(
     *,
     chunker: Chunker,
@@ -175,47 +228,14 @@ def index_doc_batch_with_handler(
             tenant_id=tenant_id,
         )
     except Exception as e:
-        if isinstance(e, httpx.HTTPStatusError):
-            if e.response.status_code == HTTPStatus.INSUFFICIENT_STORAGE:
-                logger.error(
-                    "NOTE: HTTP Status 507 Insufficient Storage indicates "
-                    "you need to allocate more memory or disk space to the "
-                    "Vespa/index container."
-                )
-
-        if INDEXING_EXCEPTION_LIMIT == 0:
-            raise
-
-        trace = traceback.format_exc()
-        create_index_attempt_error(
-            attempt_id,
-            batch=index_attempt_metadata.batch_num,
-            docs=document_batch,
-            exception_msg=str(e),
-            exception_traceback=trace,
+        handle_indexing_batch_exception(
+            e,
+            attempt_id=attempt_id,
+            batch_num=index_attempt_metadata.batch_num,
+            document_batch=document_batch,
+            index_attempt_metadata=index_attempt_metadata,
             db_session=db_session,
         )
-        logger.exception(
-            f"Indexing batch {index_attempt_metadata.batch_num} failed. msg='{e}' trace='{trace}'"
-        )
-
-        index_attempt_metadata.num_exceptions += 1
-        if index_attempt_metadata.num_exceptions == INDEXING_EXCEPTION_LIMIT:
-            logger.warning(
-                f"Maximum number of exceptions for this index attempt "
-                f"({INDEXING_EXCEPTION_LIMIT}) has been reached. "
-                f"The next exception will abort the indexing attempt."
-            )
-        elif index_attempt_metadata.num_exceptions > INDEXING_EXCEPTION_LIMIT:
-            logger.warning(
-                f"Maximum number of exceptions for this index attempt "
-                f"({INDEXING_EXCEPTION_LIMIT}) has been exceeded."
-            )
-            raise RuntimeError(
-                f"Maximum exception limit of {INDEXING_EXCEPTION_LIMIT} exceeded."
-            )
-        else:
-            pass
 
     return index_pipeline_result
 
@@ -349,14 +369,6 @@ def index_doc_batch(
     Returns a tuple where the first element is the number of new docs and the
     second element is the number of chunks."""
 
-    no_access = DocumentAccess.build(
-        user_emails=[],
-        user_groups=[],
-        external_user_emails=[],
-        external_user_group_ids=[],
-        is_public=False,
-    )
-
     logger.debug("Filtering Documents")
     filtered_documents = filter_fnc(document_batch)
 
@@ -380,118 +392,308 @@ def index_doc_batch(
             new_docs=0, total_docs=len(filtered_documents), total_chunks=0
         )
 
+    if INDEXING_MAX_CHUNKS_PER_SUB_BATCH > 0:
+        logger.debug("Starting chunking and embedding in sub batches")
+        return _index_doc_batch_write_sub_batches(
+            ctx=ctx,
+            embedded_sub_batches=_embed_chunk_sub_batches(
+                documents=ctx.updatable_docs,
+                chunker=chunker,
+                embedder=embedder,
+                max_chunks=INDEXING_MAX_CHUNKS_PER_SUB_BATCH,
+            ),
+            filtered_documents=filtered_documents,
+            document_index=document_index,
+            index_attempt_metadata=index_attempt_metadata,
+            db_session=db_session,
+            large_chunks_enabled=chunker.enable_large_chunks,
+            ignore_time_skip=ignore_time_skip,
+            tenant_id=tenant_id,
+        )
+
     logger.debug("Starting chunking")
     chunks: list[DocAwareChunk] = chunker.chunk(ctx.updatable_docs)
 
     logger.debug("Starting embedding")
     chunks_with_embeddings = embedder.embed_chunks(chunks) if chunks else []
 
+    return index_doc_batch_write(
+        ctx=ctx,
+        chunks_with_embeddings=chunks_with_embeddings,
+        filtered_documents=filtered_documents,
+        document_index=document_index,
+        index_attempt_metadata=index_attempt_metadata,
+        db_session=db_session,
+        large_chunks_enabled=chunker.enable_large_chunks,
+        ignore_time_skip=ignore_time_skip,
+        tenant_id=tenant_id,
+    )
+
+
+def _embed_chunk_sub_batches(
+    *,
+    documents: list[Document],
+    chunker: Chunker,
+    embedder: IndexingEmbedder,
+    max_chunks: int,
+) -> Iterator[tuple[list[IndexChunk], dict[str, int]]]:
+    """Chunks the documents one at a time and embeds the chunks in sub batches of at
+    most `max_chunks` chunks. Each sub batch comes with the total chunk count of the
+    documents whose first chunk is part of it. A document is chunked completely before
+    any of its chunks are embedded, so the count is always known up front."""
+    pending_chunks: list[DocAwareChunk] = []
+    pending_chunk_counts: dict[str, int] = {}
+
+    for document in documents:
+        document_chunks = chunker.chunk([document])
+        pending_chunk_counts[document.id] = len(document_chunks)
+        pending_chunks.extend(document_chunks)
+        del document_chunks
+
+        while len(pending_chunks) >= max_chunks:
+            sub_batch = pending_chunks[:max_chunks]
+            del pending_chunks[:max_chunks]
+            yield embedder.embed_chunks(sub_batch), pending_chunk_counts
+            pending_chunk_counts = {}
+
+    if pending_chunks or pending_chunk_counts:
+        yield (
+            embedder.embed_chunks(pending_chunks) if pending_chunks else []
+        ), pending_chunk_counts
+
+
+def index_doc_batch_write(
+    *,
+    ctx: DocumentBatchPrepareContext,
+    chunks_with_embeddings: list[IndexChunk],
+    filtered_documents: list[Document],
+    document_index: DocumentIndex,
+    index_attempt_metadata: IndexAttemptMetadata,
+    db_session: Session,
+    large_chunks_enabled: bool,
+    ignore_time_skip: bool = False,
+    tenant_id: str | None = None,
+) -> IndexingPipelineResult:
+    """Writes already embedded chunks of a prepared batch into the document index
+    and records the outcome in Postgres. All documents of the batch are locked for
+    the duration of the write so the index and Postgres stay consistent per document.
+    With `ignore_time_skip` unchanged chunks are written as well."""
+    doc_id_to_new_chunk_cnt = dict.fromkeys([doc.id for doc in ctx.updatable_docs], 0)
+    for chunk in chunks_with_embeddings:
+        doc_id_to_new_chunk_cnt[chunk.source_document.id] = (
+            doc_id_to_new_chunk_cnt.get(chunk.source_document.id, 0) + 1
+        )
+
+    return _index_doc_batch_write_sub_batches(
+        ctx=ctx,
+        embedded_sub_batches=[(chunks_with_embeddings, doc_id_to_new_chunk_cnt)],
+        filtered_documents=filtered_documents,
+        document_index=document_index,
+        index_attempt_metadata=index_attempt_metadata,
+        db_session=db_session,
+        large_chunks_enabled=large_chunks_enabled,
+        ignore_time_skip=ignore_time_skip,
+        tenant_id=tenant_id,
+    )
+
+
+def _index_doc_batch_write_sub_batches(
+    *,
+    ctx: DocumentBatchPrepareContext,
+    embedded_sub_batches: Iterable[tuple[list[IndexChunk], dict[str, int]]],
+    filtered_documents: list[Document],
+    document_index: DocumentIndex,
+    index_attempt_metadata: IndexAttemptMetadata,
+    db_session: Session,
+    large_chunks_enabled: bool,
+    ignore_time_skip: bool = False,
+    tenant_id: str | None = None,
+) -> IndexingPipelineResult:
+    """Writes the embedded chunks to the document index one sub batch at a time,
+    see `index_doc_batch_write`. Every sub batch comes with the total chunk count of
+    the documents which start in it, only that write cleans up their old chunks.
+    Sub batches which are embedded lazily are embedded before their documents are
+    locked, the locks are only held while a sub batch is written. The documents are
+    updated in Postgres with the sub batch which writes their last chunk."""
+    no_access = DocumentAccess.build(
+        user_emails=[],
+        user_groups=[],
+        external_user_emails=[],
+        external_user_group_ids=[],
+        is_public=False,
+    )
+
     updatable_ids = [doc.id for doc in ctx.updatable_docs]
+    id_to_updatable_doc = {doc.id: doc for doc in ctx.updatable_docs}
+    doc_id_to_previous_updated_at = {
+        doc_id: db_doc.doc_updated_at for doc_id, db_doc in ctx.id_to_db_doc_map.items()
+    }
 
-    # Acquires a lock on the documents so that no other process can modify them
-    # NOTE: don't need to acquire till here, since this is when the actual race condition
-    # with Vespa can occur.
-    with prepare_to_modify_documents(db_session=db_session, document_ids=updatable_ids):
-        doc_id_to_access_info = get_access_for_documents(
-            document_ids=updatable_ids, db_session=db_session
+    doc_id_to_new_chunk_cnt: dict[str, int] = {}
+    doc_id_to_written_chunk_cnt: dict[str, int] = {}
+    # always stored, even when skipping is disabled, so that they never go stale
+    doc_id_to_new_chunk_fingerprints: dict[str, dict[str, str]] = {}
+    doc_id_to_already_existed: dict[str, bool] = {}
+    total_chunks = 0
+
+    for chunks_with_embeddings, sub_batch_chunk_cnt in embedded_sub_batches:
+        doc_id_to_new_chunk_cnt.update(sub_batch_chunk_cnt)
+        sub_batch_doc_ids = list(
+            dict.fromkeys(
+                [
+                    *sub_batch_chunk_cnt,
+                    *(chunk.source_document.id for chunk in chunks_with_embeddings),
+                ]
+            )
         )
-        doc_id_to_document_set = {
-            document_id: document_sets
-            for document_id, document_sets in fetch_document_sets_for_documents(
-                document_ids=updatable_ids, db_session=db_session
+
+        # Acquires a lock on the documents so that no other process can modify them
+        # NOTE: don't need to acquire till here, since this is when the actual race condition
+        # with Vespa can occur.
+        with prepare_to_modify_documents(
+            db_session=db_session, document_ids=sub_batch_doc_ids
+        ):
+            doc_id_to_access_info = get_access_for_documents(
+                document_ids=sub_batch_doc_ids, db_session=db_session
+            )
+            doc_id_to_document_set = {
+                document_id: document_sets
+                for document_id, document_sets in fetch_document_sets_for_documents(
+                    document_ids=sub_batch_doc_ids, db_session=db_session
+                )
+            }
+
+            # a document split across sub batches only has its chunk count and
+            # fingerprints replaced once its last chunk is written
+            doc_id_to_previous_chunk_cnt: dict[str, int | None] = {
+                document_id: chunk_count
+                for document_id, chunk_count in fetch_chunk_counts_for_documents(
+                    document_ids=sub_batch_doc_ids,
+                    db_session=db_session,
+                )
+            }
+            doc_id_to_previous_chunk_fingerprints = (
+                fetch_chunk_fingerprints_for_documents(
+                    document_ids=sub_batch_doc_ids, db_session=db_session
+                )
+                if ENABLE_SKIP_UNCHANGED_CHUNKS and not ignore_time_skip
+                else {}
             )
-        }
 
-        doc_id_to_previous_chunk_cnt: dict[str, int | None] = {
-            document_id: chunk_count
-            for document_id, chunk_count in fetch_chunk_counts_for_documents(
-                document_ids=updatable_ids,
-                db_session=db_session,
+            # we're concerned about race conditions where multiple simultaneous indexings might result
+            # in one set of metadata overwriting another one in vespa.
+            # we still write data here for the immediate and most likely correct sync, but
+            # to resolve this, an update of the last modified field at the end of this loop
+            # always triggers a final metadata sync via the celery queue
+            access_aware_chunks = [
+                DocMetadataAwareIndexChunk.from_index_chunk(
+                    index_chunk=chunk,
+                    access=doc_id_to_access_info.get(
+                        chunk.source_document.id, no_access
+                    ),
+                    document_sets=set(
+                        doc_id_to_document_set.get(chunk.source_document.id, [])
+                    ),
+                    boost=(
+                        ctx.id_to_db_doc_map[chunk.source_document.id].boost
+                        if chunk.source_document.id in ctx.id_to_db_doc_map
+                        else DEFAULT_BOOST
+                    ),
+                    tenant_id=tenant_id,
+                )
+                for chunk in chunks_with_embeddings
+            ]
+            # only the access aware copies are needed from here on
+            del chunks_with_embeddings
+
+            sub_batch_chunk_fingerprints = build_chunk_fingerprints(
+                access_aware_chunks, index_name=document_index.index_name
             )
-        }
+            for document_id, chunk_fingerprints in sub_batch_chunk_fingerprints.items():
+                doc_id_to_new_chunk_fingerprints.setdefault(document_id, {}).update(
+                    chunk_fingerprints
+                )
 
-        doc_id_to_new_chunk_cnt: dict[str, int] = {
-            document_id: len(
-                [
-                    chunk
-                    for chunk in chunks_with_embeddings
-                    if chunk.source_document.id == document_id
-                ]
+            logger.debug(
+                "Indexing the following chunks: "
+                f"{[chunk.to_short_descriptor() for chunk in access_aware_chunks]}"
             )
-            for document_id in updatable_ids
-        }
-
-        # we're concerned about race conditions where multiple simultaneous indexings might result
-        # in one set of metadata overwriting another one in vespa.
-        # we still write data here for the immediate and most likely correct sync, but
-        # to resolve this, an update of the last modified field at the end of this loop
-        # always triggers a final metadata sync via the celery queue
-        access_aware_chunks = [
-            DocMetadataAwareIndexChunk.from_index_chunk(
-                index_chunk=chunk,
-                access=doc_id_to_access_info.get(chunk.source_document.id, no_access),
-                document_sets=set(
-                    doc_id_to_document_set.get(chunk.source_document.id, [])
+            # A document is either fully represented by the chunks in this set or it
+            # is split across consecutive sub batches, in which case only the first
+            # one carries its chunk count and cleans up its old chunks
+            insertion_records = document_index.index(
+                chunks=access_aware_chunks,
+                index_batch_params=IndexBatchParams(
+                    doc_id_to_previous_chunk_cnt=doc_id_to_previous_chunk_cnt,
+                    doc_id_to_new_chunk_cnt=sub_batch_chunk_cnt,
+                    tenant_id=tenant_id,
+                    large_chunks_enabled=large_chunks_enabled,
+                    doc_id_to_previous_chunk_fingerprints=doc_id_to_previous_chunk_fingerprints,
+                    doc_id_to_new_chunk_fingerprints=sub_batch_chunk_fingerprints,
+                    doc_id_to_previous_updated_at=doc_id_to_previous_updated_at,
                 ),
-                boost=(
-                    ctx.id_to_db_doc_map[chunk.source_document.id].boost
-                    if chunk.source_document.id in ctx.id_to_db_doc_map
-                    else DEFAULT_BOOST
-                ),
-                tenant_id=tenant_id,
             )
-            for chunk in chunks_with_embeddings
-        ]
+            total_chunks += len(access_aware_chunks)
+            for chunk in access_aware_chunks:
+                doc_id_to_written_chunk_cnt[chunk.source_document.id] = (
+                    doc_id_to_written_chunk_cnt.get(chunk.source_document.id, 0) + 1
+                )
+            del access_aware_chunks
 
-        logger.debug(
-            "Indexing the following chunks: "
-            f"{[chunk.to_short_descriptor() for chunk in access_aware_chunks]}"
-        )
-        # A document will not be spread across different batches, so all the
-        # documents with chunks in this set, are fully represented by the chunks
-        # in this set
-        insertion_records = document_index.index(
-            chunks=access_aware_chunks,
-            index_batch_params=IndexBatchParams(
-                doc_id_to_previous_chunk_cnt=doc_id_to_previous_chunk_cnt,
-                doc_id_to_new_chunk_cnt=doc_id_to_new_chunk_cnt,
-                tenant_id=tenant_id,
-                large_chunks_enabled=chunker.enable_large_chunks,
-            ),
-        )
+            # only the write which cleaned up the old chunks knows whether the
+            # document existed before
+            for record in insertion_records:
+                doc_id_to_already_existed.setdefault(
+                    record.document_id, record.already_existed
+                )
 
-        successful_doc_ids = {record.document_id for record in insertion_records}
-        if successful_doc_ids != set(updatable_ids):
-            raise RuntimeError(
-                f"Some documents were not successfully indexed. "
-                f"Updatable IDs: {updatable_ids}, "
-                f"Successful IDs: {successful_doc_ids}"
-            )
+            finished_docs = [
+                id_to_updatable_doc[doc_id]
+                for doc_id in sub_batch_doc_ids
+                if doc_id in id_to_updatable_doc
+                and doc_id_to_written_chunk_cnt.get(doc_id, 0)
+                == doc_id_to_new_chunk_cnt.get(doc_id)
+            ]
+            finished_doc_ids = [doc.id for doc in finished_docs]
 
-        last_modified_ids = []
-        ids_to_new_updated_at = {}
-        for doc in ctx.updatable_docs:
-            last_modified_ids.append(doc.id)
             # doc_updated_at is the source's idea (on the other end of the connector)
             # of when the doc was last modified
-            if doc.doc_updated_at is None:
-                continue
-            ids_to_new_updated_at[doc.id] = doc.doc_updated_at
+            update_docs_updated_at__no_commit(
+                ids_to_new_updated_at={
+                    doc.id: doc.doc_updated_at
+                    for doc in finished_docs
+                    if doc.doc_updated_at is not None
+                },
+                db_session=db_session,
+            )
 
-        update_docs_updated_at__no_commit(
-            ids_to_new_updated_at=ids_to_new_updated_at, db_session=db_session
-        )
+            update_docs_last_modified__no_commit(
+                document_ids=finished_doc_ids, db_session=db_session
+            )
 
-        update_docs_last_modified__no_commit(
-            document_ids=last_modified_ids, db_session=db_session
-        )
+            update_docs_chunk_count__no_commit(
+                document_ids=finished_doc_ids,
+                doc_id_to_chunk_count=doc_id_to_new_chunk_cnt,
+                db_session=db_session,
+            )
 
-        update_docs_chunk_count__no_commit(
-            document_ids=updatable_ids,
-            doc_id_to_chunk_count=doc_id_to_new_chunk_cnt,
-            db_session=db_session,
+            update_docs_chunk_fingerprints__no_commit(
+                document_ids=finished_doc_ids,
+                doc_id_to_chunk_fingerprints=doc_id_to_new_chunk_fingerprints,
+                db_session=db_session,
+            )
+
+            db_session.commit()
+
+    successful_doc_ids = set(doc_id_to_already_existed)
+    if successful_doc_ids != set(updatable_ids):
+        raise RuntimeError(
+            f"Some documents were not successfully indexed. "
+            f"Updatable IDs: {updatable_ids}, "
+            f"Successful IDs: {successful_doc_ids}"
         )
 
+    with prepare_to_modify_documents(db_session=db_session, document_ids=updatable_ids):
         # these documents can now be counted as part of the CC Pairs
         # document count, so we need to mark them as indexed
         # NOTE: even documents we skipped since they were already up
@@ -507,14 +709,37 @@ def index_doc_batch(
         db_session.commit()
 
     result = IndexingPipelineResult(
-        new_docs=len([r for r in insertion_records if r.already_existed is False]),
+        new_docs=len(
+            [
+                already_existed
+                for already_existed in doc_id_to_already_existed.values()
+                if already_existed is False
+            ]
+        ),
         total_docs=len(filtered_documents),
-        total_chunks=len(access_aware_chunks),
+        total_chunks=total_chunks,
     )
 
     return result
 
 
+def build_default_chunker(
+    *,
+    embedder: IndexingEmbedder,
+    db_session: Session,
+    callback: IndexingHeartbeatInterface | None = None,
+) -> Chunker:
+    multipass_config = get_multipass_config(db_session, primary_index=True)
+
+    return Chunker(
+        tokenizer=embedder.embedding_model.tokenizer,
+        enable_multipass=multipass_config.multipass_indexing,
+        enable_large_chunks=multipass_config.enable_large_chunks,
+        # after every doc, update status in case there are a bunch of really long docs
+        callback=callback,
+    )
+
+
 def build_indexing_pipeline(
     *,
     embedder: IndexingEmbedder,
@@ -527,14 +752,8 @@ def build_indexing_pipeline(
     callback: IndexingHeartbeatInterface | None = None,
 ) -> IndexingPipelineProtocol:
     """Builds a pipeline which takes in a list (batch) of docs and indexes them."""
-    multipass_config = get_multipass_config(db_session, primary_index=True)
-
-    chunker = chunker or Chunker(
-        tokenizer=embedder.embedding_model.tokenizer,
-        enable_multipass=multipass_config.multipass_indexing,
-        enable_large_chunks=multipass_config.enable_large_chunks,
-        # after every doc, update status in case there are a bunch of really long docs
-        callback=callback,
+    chunker = chunker or build_default_chunker(
+        embedder=embedder, db_session=db_session, callback=callback
     )
 
     return partial(
@@ -93,9 +93,10 @@ class DocMetadataAwareIndexChunk(IndexChunk):
         boost: int,
         tenant_id: str | None,
     ) -> "DocMetadataAwareIndexChunk":
-        index_chunk_data = index_chunk.model_dump()
+        # shallow, the source document and embeddings are shared with the index chunk
+        # instead of being copied for every chunk
         return cls(
-            **index_chunk_data,
+            **dict(index_chunk),
             access=access,
             document_sets=document_sets,
             boost=boost,
@@ -0,0 +1,331 @@
+import contextvars
+import queue
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from dataclasses import field
+
+from sqlalchemy.orm import Session
+
+from onyx.connectors.models import Document
+from onyx.connectors.models import IndexAttemptMetadata
+from onyx.db.document import mark_document_as_indexed_for_cc_pair__no_commit
+from onyx.db.engine import get_session_with_tenant
+from onyx.document_index.interfaces import DocumentIndex
+from onyx.indexing.chunker import Chunker
+from onyx.indexing.embedder import IndexingEmbedder
+from onyx.indexing.indexing_pipeline import DocumentBatchPrepareContext
+from onyx.indexing.indexing_pipeline import filter_documents
+from onyx.indexing.indexing_pipeline import handle_indexing_batch_exception
+from onyx.indexing.indexing_pipeline import index_doc_batch_prepare
+from onyx.indexing.indexing_pipeline import index_doc_batch_write
+from onyx.indexing.indexing_pipeline import IndexingPipelineResult
+from onyx.indexing.models import DocAwareChunk
+from onyx.indexing.models import IndexChunk
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+@dataclass
+class _InFlightBatch:
+    # position in submission order
+    seq: int
+    batch_num: int | None
+    document_batch: list[Document]
+    filtered_documents: list[Document]
+    ctx: DocumentBatchPrepareContext
+    chunks: list[DocAwareChunk] = field(default_factory=list)
+    chunks_with_embeddings: list[IndexChunk] = field(default_factory=list)
+
+
+def _combine_results(results: list[IndexingPipelineResult]) -> IndexingPipelineResult:
+    return IndexingPipelineResult(
+        new_docs=sum(result.new_docs for result in results),
+        total_docs=sum(result.total_docs for result in results),
+        total_chunks=sum(result.total_chunks for result in results),
+    )
+
+
+class PipelinedIndexingPipeline:
+    """Streaming variant of `index_doc_batch`. Chunking, embedding and writing to the
+    document index run on their own threads connected by bounded queues, so while one
+    batch is being written to the index the next one is already being embedded.
+
+    The Postgres prepare step runs on the caller's thread/session and is committed
+    before the batch is handed off, the write step (lock + index + bookkeeping) is
+    identical to the non-pipelined path but runs on its own session. Batches are
+    written in the order they were submitted.
+
+    Results are returned asynchronously: `submit` returns the combined result of all
+    batches that finished since the previous call and `drain` blocks until every
+    submitted batch has finished. A batch failure is handled exactly like in
+    `index_doc_batch_with_handler`, if it is fatal the exception is re-raised from
+    the next `submit` / `drain` call."""
+
+    def __init__(
+        self,
+        *,
+        chunker: Chunker,
+        embedder: IndexingEmbedder,
+        document_index: DocumentIndex,
+        db_session: Session,
+        index_attempt_metadata: IndexAttemptMetadata,
+        queue_size: int,
+        ignore_time_skip: bool = False,
+        attempt_id: int | None = None,
+        tenant_id: str | None = None,
+        filter_fnc: Callable[[list[Document]], list[Document]] = filter_documents,
+    ) -> None:
+        self.chunker = chunker
+        self.embedder = embedder
+        self.document_index = document_index
+        self.db_session = db_session
+        self.index_attempt_metadata = index_attempt_metadata
+        self.ignore_time_skip = ignore_time_skip
+        self.attempt_id = attempt_id
+        self.tenant_id = tenant_id
+        self.filter_fnc = filter_fnc
+
+        self._chunk_queue: queue.Queue[_InFlightBatch | None] = queue.Queue(
+            maxsize=queue_size
+        )
+        self._embed_queue: queue.Queue[_InFlightBatch | None] = queue.Queue(
+            maxsize=queue_size
+        )
+        self._write_queue: queue.Queue[_InFlightBatch | None] = queue.Queue(
+            maxsize=queue_size
+        )
+
+        # guards everything below
+        self._cond = threading.Condition()
+        self._num_submitted = 0
+        self._in_flight_seqs: set[int] = set()
+        self._finished_results: list[IndexingPipelineResult] = []
+        self._fatal_error: Exception | None = None
+        self._closed = False
+
+        # stages run with the caller's context so that e.g. the current tenant
+        # is visible to anything that opens its own DB session
+        self._threads = [
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(self._run_stage, in_queue, out_queue, work),
+                name=f"indexing-pipeline-{name}",
+                daemon=True,
+            )
+            for name, in_queue, out_queue, work in [
+                ("chunk", self._chunk_queue, self._embed_queue, self._chunk),
+                ("embed", self._embed_queue, self._write_queue, self._embed),
+                ("write", self._write_queue, None, self._write),
+            ]
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(
+        self, document_batch: list[Document], batch_num: int | None
+    ) -> IndexingPipelineResult:
+        """Prepares the batch in Postgres and queues it for chunking. Blocks if the
+        pipeline is full."""
+        self._raise_if_failed()
+
+        with self._cond:
+            seq = self._num_submitted
+            self._num_submitted += 1
+
+        try:
+            filtered_documents = self.filter_fnc(document_batch)
+            ctx = index_doc_batch_prepare(
+                documents=filtered_documents,
+                index_attempt_metadata=self.index_attempt_metadata,
+                ignore_time_skip=self.ignore_time_skip,
+                db_session=self.db_session,
+            )
+        except Exception as e:
+            with self._cond:
+                handle_indexing_batch_exception(
+                    e,
+                    attempt_id=self.attempt_id,
+                    batch_num=batch_num,
+                    document_batch=document_batch,
+                    index_attempt_metadata=self.index_attempt_metadata,
+                    db_session=self.db_session,
+                )
+                self._finished_results.append(
+                    IndexingPipelineResult(
+                        new_docs=0, total_docs=len(document_batch), total_chunks=0
+                    )
+                )
+            return self._pop_finished_results()
+
+        if not ctx:
+            # same as index_doc_batch, nothing to index but the docs still count
+            # towards the CC Pair
+            mark_document_as_indexed_for_cc_pair__no_commit(
+                connector_id=self.index_attempt_metadata.connector_id,
+                credential_id=self.index_attempt_metadata.credential_id,
+                document_ids=[doc.id for doc in filtered_documents],
+                db_session=self.db_session,
+            )
+            self.db_session.commit()
+            with self._cond:
+                self._finished_results.append(
+                    IndexingPipelineResult(
+                        new_docs=0, total_docs=len(filtered_documents), total_chunks=0
+                    )
+                )
+            return self._pop_finished_results()
+
+        # the write stage locks these rows from a different session, so the
+        # upserts must be visible (and not hold row locks) before handing off
+        self.db_session.commit()
+
+        with self._cond:
+            self._in_flight_seqs.add(seq)
+        self._chunk_queue.put(
+            _InFlightBatch(
+                seq=seq,
+                batch_num=batch_num,
+                document_batch=document_batch,
+                filtered_documents=filtered_documents,
+                ctx=ctx,
+            )
+        )
+        return self._pop_finished_results()
+
+    def drain(self) -> IndexingPipelineResult:
+        """Waits for all submitted batches to finish."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: not self._in_flight_seqs or self._fatal_error is not None
+            )
+        self._raise_if_failed()
+        return self._pop_finished_results()
+
+    def finished_batch_count(self) -> int:
+        """Number of batches, counted from the first one submitted, which have all
+        finished (written or failed). Batches can finish out of order when one fails
+        in an early stage, so this is what is safe to checkpoint."""
+        with self._cond:
+            if self._in_flight_seqs:
+                return min(self._in_flight_seqs)
+            return self._num_submitted
+
+    def close(self) -> None:
+        """Stops the stage threads. Batches which have not been written yet are
+        dropped, their documents will be picked up again by the next attempt."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+
+        self._chunk_queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _pop_finished_results(self) -> IndexingPipelineResult:
+        with self._cond:
+            results = self._finished_results
+            self._finished_results = []
+        return _combine_results(results)
+
+    def _raise_if_failed(self) -> None:
+        with self._cond:
+            if self._fatal_error is not None:
+                raise self._fatal_error
+
+    def _should_skip(self) -> bool:
+        with self._cond:
+            return self._closed or self._fatal_error is not None
+
+    def _run_stage(
+        self,
+        in_queue: "queue.Queue[_InFlightBatch | None]",
+        out_queue: "queue.Queue[_InFlightBatch | None] | None",
+        work: Callable[[_InFlightBatch], IndexingPipelineResult | None],
+    ) -> None:
+        while True:
+            batch = in_queue.get()
+            if batch is None:
+                if out_queue is not None:
+                    out_queue.put(None)
+                return
+
+            if self._should_skip():
+                self._finish_batch(batch, None)
+                continue
+
+            try:
+                result = work(batch)
+            except Exception as e:
+                self._handle_failure(batch, e)
+                continue
+
+            if out_queue is not None:
+                out_queue.put(batch)
+            else:
+                self._finish_batch(batch, result)
+
+    def _chunk(self, batch: _InFlightBatch) -> None:
+        logger.debug(f"Starting chunking: batch={batch.batch_num}")
+        batch.chunks = self.chunker.chunk(batch.ctx.updatable_docs)
+
+    def _embed(self, batch: _InFlightBatch) -> None:
+        logger.debug(f"Starting embedding: batch={batch.batch_num}")
+        batch.chunks_with_embeddings = (
+            self.embedder.embed_chunks(batch.chunks) if batch.chunks else []
+        )
+        # no need to hold on to the un-embedded chunks any longer
+        batch.chunks = []
+
+    def _write(self, batch: _InFlightBatch) -> IndexingPipelineResult:
+        logger.debug(f"Starting index write: batch={batch.batch_num}")
+        with get_session_with_tenant(self.tenant_id) as db_session:
+            return index_doc_batch_write(
+                ctx=batch.ctx,
+                chunks_with_embeddings=batch.chunks_with_embeddings,
+                filtered_documents=batch.filtered_documents,
+                document_index=self.document_index,
+                index_attempt_metadata=self.index_attempt_metadata,
+                db_session=db_session,
+                large_chunks_enabled=self.chunker.enable_large_chunks,
+                ignore_time_skip=self.ignore_time_skip,
+                tenant_id=self.tenant_id,
+            )
+
+    def _handle_failure(self, batch: _InFlightBatch, e: Exception) -> None:
+        # stages may fail concurrently, hold the lock so that the exception count
+        # on the shared metadata is updated atomically
+        with self._cond:
+            try:
+                with get_session_with_tenant(self.tenant_id) as db_session:
+                    handle_indexing_batch_exception(
+                        e,
+                        attempt_id=self.attempt_id,
+                        batch_num=batch.batch_num,
+                        document_batch=batch.document_batch,
+                        index_attempt_metadata=self.index_attempt_metadata,
+                        db_session=db_session,
+                    )
+            except Exception as fatal:
+                if self._fatal_error is None:
+                    self._fatal_error = fatal
+
+            # same as the non-pipelined path, a failed batch still counts its docs
+            self._finished_results.append(
+                IndexingPipelineResult(
+                    new_docs=0, total_docs=len(batch.document_batch), total_chunks=0
+                )
+            )
+            self._in_flight_seqs.discard(batch.seq)
+            self._cond.notify_all()
+
+    def _finish_batch(
+        self, batch: _InFlightBatch, result: IndexingPipelineResult | None
+    ) -> None:
+        with self._cond:
+            if result is not None:
+                self._finished_results.append(result)
+            self._in_flight_seqs.discard(batch.seq)
+            self._cond.notify_all()
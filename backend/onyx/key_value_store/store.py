@@ -5,7 +5,6 @@ from typing import cast
 
 from fastapi import HTTPException
 from redis.client import Redis
-from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from onyx.db.engine import get_sqlalchemy_engine
@@ -50,8 +49,7 @@ class PgRedisKVStore(KeyValueStore):
                     )
                 if not is_valid_schema_name(tenant_id):
                     raise HTTPException(status_code=400, detail="Invalid tenant ID")
-                # Set the search_path to the tenant's schema
-                session.execute(text(f'SET search_path = "{tenant_id}"'))
+                # the search_path is set to the tenant's schema on checkout
             yield session
 
     def store(self, key: str, val: JSON_ro, encrypt: bool = False) -> None:
@@ -259,7 +259,6 @@ class DefaultMultiLLM(LLM):
         #     max_output_tokens
         #     if max_output_tokens is not None
         #     else get_llm_max_output_tokens(
-        #         model_map=litellm.model_cost,
         #         model_name=model_name,
         #         model_provider=model_provider,
         #     )
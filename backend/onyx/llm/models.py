@@ -26,14 +26,20 @@ class PreviousMessage(BaseModel):
 
     @classmethod
     def from_chat_message(
-        cls, chat_message: "ChatMessage", available_files: list[InMemoryChatFile]
+        cls,
+        chat_message: "ChatMessage",
+        available_files: list[InMemoryChatFile],
+        # token count for the tokenizer of the LLM the history is used with
+        token_count: int | None = None,
     ) -> "PreviousMessage":
         message_file_ids = (
             [file["id"] for file in chat_message.files] if chat_message.files else []
         )
         return cls(
             message=chat_message.message,
-            token_count=chat_message.token_count,
+            token_count=(
+                token_count if token_count is not None else chat_message.token_count
+            ),
             message_type=chat_message.message_type,
             files=[
                 file
@@ -1,7 +1,11 @@
 import copy
 import json
+import threading
 from collections.abc import Callable
 from collections.abc import Iterator
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Any
 from typing import cast
 
@@ -27,6 +31,8 @@ from litellm.exceptions import PermissionDeniedError  # type: ignore
 from litellm.exceptions import RateLimitError  # type: ignore
 from litellm.exceptions import Timeout  # type: ignore
 from litellm.exceptions import UnprocessableEntityError  # type: ignore
+from pydantic import BaseModel
+from pydantic import ConfigDict
 
 from onyx.configs.app_configs import LITELLM_CUSTOM_ERROR_MESSAGE_MAPPINGS
 from onyx.configs.constants import MessageType
@@ -374,6 +380,57 @@ def get_model_map() -> dict:
     return starting_map
 
 
+class ModelCapabilities(BaseModel):
+    """Token limits of the LLM, precomputed from its litellm model map entry."""
+
+    model_config = ConfigDict(frozen=True)
+
+    # None if litellm doesn't know
+    max_input_tokens: int | None = None
+    max_output_tokens: int | None = None
+
+
+def _build_model_capabilities(model_obj: dict) -> ModelCapabilities:
+    max_tokens = model_obj.get("max_tokens")
+
+    max_input_tokens = model_obj.get("max_input_tokens", max_tokens)
+
+    max_output_tokens = model_obj.get("max_output_tokens")
+    if max_output_tokens is None and max_tokens is not None:
+        # Fallback to a fraction of max_tokens if max_output_tokens is not specified
+        max_output_tokens = int(max_tokens * 0.1)
+
+    return ModelCapabilities(
+        max_input_tokens=max_input_tokens,
+        max_output_tokens=max_output_tokens,
+    )
+
+
+_model_capabilities_map: Mapping[str, ModelCapabilities] | None = None
+_model_capabilities_map_lock = threading.Lock()
+
+
+def get_model_capabilities_map() -> Mapping[str, ModelCapabilities]:
+    """Read only capabilities of every model in the litellm model map, built once
+    per process instead of copying the model map on every lookup. The model map is
+    static for the lifetime of the process, LLM provider changes don't affect it."""
+    global _model_capabilities_map
+
+    capabilities_map = _model_capabilities_map
+    if capabilities_map is None:
+        with _model_capabilities_map_lock:
+            if _model_capabilities_map is None:
+                _model_capabilities_map = MappingProxyType(
+                    {
+                        model_name: _build_model_capabilities(model_obj)
+                        for model_name, model_obj in get_model_map().items()
+                        if isinstance(model_obj, dict)
+                    }
+                )
+            capabilities_map = _model_capabilities_map
+    return capabilities_map
+
+
 def _strip_extra_provider_from_model_name(model_name: str) -> str:
     return model_name.split("/")[1] if "/" in model_name else model_name
 
@@ -382,31 +439,54 @@ def _strip_colon_from_model_name(model_name: str) -> str:
     return ":".join(model_name.split(":")[:-1]) if ":" in model_name else model_name
 
 
-def _find_model_obj(
-    model_map: dict, provider: str, model_names: list[str | None]
-) -> dict | None:
+def _find_model_capabilities(
+    capabilities_map: Mapping[str, ModelCapabilities],
+    provider: str,
+    model_names: list[str | None],
+) -> ModelCapabilities | None:
     # Filter out None values and deduplicate model names
     filtered_model_names = [name for name in model_names if name]
 
     # First try all model names with provider prefix
     for model_name in filtered_model_names:
-        model_obj = model_map.get(f"{provider}/{model_name}")
-        if model_obj:
-            logger.debug(f"Using model object for {provider}/{model_name}")
-            return model_obj
+        capabilities = capabilities_map.get(f"{provider}/{model_name}")
+        if capabilities:
+            logger.debug(f"Using model capabilities for {provider}/{model_name}")
+            return capabilities
 
     # Then try all model names without provider prefix
     for model_name in filtered_model_names:
-        model_obj = model_map.get(model_name)
-        if model_obj:
-            logger.debug(f"Using model object for {model_name}")
-            return model_obj
+        capabilities = capabilities_map.get(model_name)
+        if capabilities:
+            logger.debug(f"Using model capabilities for {model_name}")
+            return capabilities
 
     return None
 
 
+@lru_cache(maxsize=1024)
+def get_model_capabilities(
+    model_name: str, model_provider: str
+) -> ModelCapabilities | None:
+    extra_provider_stripped_model_name = _strip_extra_provider_from_model_name(
+        model_name
+    )
+    return _find_model_capabilities(
+        get_model_capabilities_map(),
+        model_provider,
+        [
+            model_name,
+            # Remove leading extra provider. Usually for cases where user has a
+            # customer model proxy which appends another prefix
+            extra_provider_stripped_model_name,
+            # remove :XXXX from the end, if present. Needed for ollama.
+            _strip_colon_from_model_name(model_name),
+            _strip_colon_from_model_name(extra_provider_stripped_model_name),
+        ],
+    )
+
+
 def get_llm_max_tokens(
-    model_map: dict,
     model_name: str,
     model_provider: str,
 ) -> int:
@@ -417,41 +497,18 @@ def get_llm_max_tokens(
         return GEN_AI_MAX_TOKENS
 
     try:
-        extra_provider_stripped_model_name = _strip_extra_provider_from_model_name(
-            model_name
-        )
-        model_obj = _find_model_obj(
-            model_map,
-            model_provider,
-            [
-                model_name,
-                # Remove leading extra provider. Usually for cases where user has a
-                # customer model proxy which appends another prefix
-                extra_provider_stripped_model_name,
-                # remove :XXXX from the end, if present. Needed for ollama.
-                _strip_colon_from_model_name(model_name),
-                _strip_colon_from_model_name(extra_provider_stripped_model_name),
-            ],
-        )
-        if not model_obj:
+        capabilities = get_model_capabilities(model_name, model_provider)
+        if not capabilities:
             raise RuntimeError(
                 f"No litellm entry found for {model_provider}/{model_name}"
             )
 
-        if "max_input_tokens" in model_obj:
-            max_tokens = model_obj["max_input_tokens"]
-            logger.info(
-                f"Max tokens for {model_name}: {max_tokens} (from max_input_tokens)"
-            )
-            return max_tokens
-
-        if "max_tokens" in model_obj:
-            max_tokens = model_obj["max_tokens"]
-            logger.info(f"Max tokens for {model_name}: {max_tokens} (from max_tokens)")
-            return max_tokens
+        if capabilities.max_input_tokens is None:
+            logger.error(f"No max tokens found for LLM: {model_name}")
+            raise RuntimeError("No max tokens found for LLM")
 
-        logger.error(f"No max tokens found for LLM: {model_name}")
-        raise RuntimeError("No max tokens found for LLM")
+        logger.info(f"Max tokens for {model_name}: {capabilities.max_input_tokens}")
+        return capabilities.max_input_tokens
     except Exception:
         logger.exception(
             f"Failed to get max tokens for LLM with name {model_name}. Defaulting to {GEN_AI_MODEL_FALLBACK_MAX_TOKENS}."
@@ -460,34 +517,25 @@ def get_llm_max_tokens(
 
 
 def get_llm_max_output_tokens(
-    model_map: dict,
     model_name: str,
     model_provider: str,
 ) -> int:
     """Best effort attempt to get the max output tokens for the LLM"""
     try:
-        model_obj = model_map.get(f"{model_provider}/{model_name}")
-        if not model_obj:
-            model_obj = model_map[model_name]
-            logger.debug(f"Using model object for {model_name}")
-        else:
-            logger.debug(f"Using model object for {model_provider}/{model_name}")
-
-        if "max_output_tokens" in model_obj:
-            max_output_tokens = model_obj["max_output_tokens"]
-            logger.info(f"Max output tokens for {model_name}: {max_output_tokens}")
-            return max_output_tokens
-
-        # Fallback to a fraction of max_tokens if max_output_tokens is not specified
-        if "max_tokens" in model_obj:
-            max_output_tokens = int(model_obj["max_tokens"] * 0.1)
-            logger.info(
-                f"Fallback max output tokens for {model_name}: {max_output_tokens} (10% of max_tokens)"
+        capabilities = get_model_capabilities(model_name, model_provider)
+        if not capabilities:
+            raise RuntimeError(
+                f"No litellm entry found for {model_provider}/{model_name}"
             )
-            return max_output_tokens
 
-        logger.error(f"No max output tokens found for LLM: {model_name}")
-        raise RuntimeError("No max output tokens found for LLM")
+        if capabilities.max_output_tokens is None:
+            logger.error(f"No max output tokens found for LLM: {model_name}")
+            raise RuntimeError("No max output tokens found for LLM")
+
+        logger.info(
+            f"Max output tokens for {model_name}: {capabilities.max_output_tokens}"
+        )
+        return capabilities.max_output_tokens
     except Exception:
         default_output_tokens = int(GEN_AI_MODEL_FALLBACK_MAX_TOKENS)
         logger.exception(
@@ -507,14 +555,10 @@ def get_max_input_tokens(
     # and there is no other interface to get what we want. This should be okay though, since the
     # `model_cost` dict is a named public interface:
     # https://litellm.vercel.app/docs/completion/token_usage#7-model_cost
-    # model_map is  litellm.model_cost
-    litellm_model_map = get_model_map()
-
     input_toks = (
         get_llm_max_tokens(
             model_name=model_name,
             model_provider=model_provider,
-            model_map=litellm_model_map,
         )
         - output_tokens
     )
@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from dataclasses import field
+from typing import cast
+
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_SIZE
+from onyx.configs.chat_configs import QUERY_EMBEDDING_CACHE_TTL_SECONDS
+from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import CURRENT_TENANT_ID_CONTEXTVAR
+from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+
+QueryEmbeddingCacheKey = tuple[str | None, ...]
+
+
+@dataclass
+class _CacheEntry:
+    embedding: Embedding
+    expires_at: float
+
+
+@dataclass
+class _InFlightQuery:
+    done: threading.Event = field(default_factory=threading.Event)
+    embedding: Embedding | None = None
+    error: Exception | None = None
+
+
+def build_query_embedding_cache_key(
+    model: EmbeddingModel, query: str
+) -> QueryEmbeddingCacheKey:
+    # the tenant is part of the key so that queries are never shared across tenants
+    return (
+        CURRENT_TENANT_ID_CONTEXTVAR.get(),
+        model.provider_type.value if model.provider_type else None,
+        model.api_url,
+        model.deployment_name,
+        model.model_name,
+        str(model.normalize),
+        model.query_prefix,
+        query,
+    )
+
+
+class QueryEmbeddingCache:
+    """Process wide LRU cache of query embeddings with a TTL. Concurrent lookups of the
+    same missing query wait for the one model server call in flight instead of issuing
+    their own."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[QueryEmbeddingCacheKey, _CacheEntry] = OrderedDict()
+        self._in_flight: dict[QueryEmbeddingCacheKey, _InFlightQuery] = {}
+
+        self.hits = 0
+        self.misses = 0
+        # misses which were served by another caller's model server call
+        self.coalesced = 0
+
+    def get_or_embed(
+        self,
+        key: QueryEmbeddingCacheKey,
+        embed_fnc: Callable[[], Embedding],
+    ) -> Embedding:
+        if self.max_entries <= 0:
+            return embed_fnc()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.embedding
+                del self._entries[key]
+
+            in_flight = self._in_flight.get(key)
+            is_leader = in_flight is None
+            if in_flight is None:
+                in_flight = _InFlightQuery()
+                self._in_flight[key] = in_flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not is_leader:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return cast(Embedding, in_flight.embedding)
+
+        try:
+            embedding = embed_fnc()
+            in_flight.embedding = embedding
+            with self._lock:
+                self._entries[key] = _CacheEntry(
+                    embedding=embedding,
+                    expires_at=time.monotonic() + self.ttl_seconds,
+                )
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return embedding
+        except Exception as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.done.set()
+
+
+_query_embedding_cache = QueryEmbeddingCache(
+    max_entries=QUERY_EMBEDDING_CACHE_SIZE,
+    ttl_seconds=QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+)
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    return _query_embedding_cache
+
+
+def embed_query(model: EmbeddingModel, query: str) -> Embedding:
+    """Embeds a search query, served from the process wide cache when possible."""
+    cache = get_query_embedding_cache()
+    embedding = cache.get_or_embed(
+        build_query_embedding_cache_key(model, query),
+        lambda: model.encode([query], text_type=EmbedTextType.QUERY)[0],
+    )
+    logger.debug(
+        f"Query embedding cache: hits={cache.hits} misses={cache.misses} "
+        f"coalesced={cache.coalesced}"
+    )
+    return embedding
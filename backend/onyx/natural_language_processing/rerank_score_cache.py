@@ -0,0 +1,140 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from onyx.configs.chat_configs import RERANK_SCORE_CACHE_SIZE
+from onyx.configs.chat_configs import RERANK_SCORE_CACHE_TTL_SECONDS
+from onyx.natural_language_processing.search_nlp_models import RerankingModel
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import CURRENT_TENANT_ID_CONTEXTVAR
+
+logger = setup_logger()
+
+
+RerankScoreCacheKey = tuple[str | None, ...]
+
+
+@dataclass
+class _CacheEntry:
+    score: float
+    expires_at: float
+
+
+def _hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def build_rerank_score_cache_keys(
+    model: RerankingModel, query: str, chunk_ids: list[str], passages: list[str]
+) -> list[RerankScoreCacheKey]:
+    # the tenant is part of the key so that scores are never shared across tenants,
+    # the passage hash makes re-indexed chunks with new content miss the cache
+    query_hash = _hash_text(query)
+    model_key = (
+        CURRENT_TENANT_ID_CONTEXTVAR.get(),
+        model.provider_type.value if model.provider_type else None,
+        model.api_url,
+        model.model_name,
+        query_hash,
+    )
+    return [
+        (*model_key, chunk_id, _hash_text(passage))
+        for chunk_id, passage in zip(chunk_ids, passages)
+    ]
+
+
+class RerankScoreCache:
+    """Process wide LRU cache of cross-encoder scores with a TTL. The raw scores are
+    cached, boosts and normalization are applied on top of them for every search."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[RerankScoreCacheKey, _CacheEntry] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(
+        self, keys: list[RerankScoreCacheKey]
+    ) -> dict[RerankScoreCacheKey, float]:
+        if self.max_entries <= 0:
+            return {}
+
+        now = time.monotonic()
+        found: dict[RerankScoreCacheKey, float] = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry.expires_at <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = entry.score
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, key_to_score: dict[RerankScoreCacheKey, float]) -> None:
+        if self.max_entries <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, score in key_to_score.items():
+                self._entries[key] = _CacheEntry(score=score, expires_at=expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_rerank_score_cache = RerankScoreCache(
+    max_entries=RERANK_SCORE_CACHE_SIZE,
+    ttl_seconds=RERANK_SCORE_CACHE_TTL_SECONDS,
+)
+
+
+def get_rerank_score_cache() -> RerankScoreCache:
+    return _rerank_score_cache
+
+
+def rerank_passages(
+    model: RerankingModel, query: str, chunk_ids: list[str], passages: list[str]
+) -> list[float]:
+    """Cross-encoder scores of the passages for the query, only the passages without
+    a cached score are sent to the model, in a single request."""
+    cache = get_rerank_score_cache()
+    keys = build_rerank_score_cache_keys(model, query, chunk_ids, passages)
+    cached_scores = cache.get_many(keys)
+    scores = [cached_scores.get(key) for key in keys]
+
+    missing_indices = [ind for ind, score in enumerate(scores) if score is None]
+    if missing_indices:
+        missing_scores = model.predict(
+            query=query, passages=[passages[ind] for ind in missing_indices]
+        )
+        if len(missing_scores) != len(missing_indices):
+            raise RuntimeError(
+                f"Reranking returned {len(missing_scores)} scores "
+                f"for {len(missing_indices)} passages"
+            )
+
+        new_scores: dict[RerankScoreCacheKey, float] = {}
+        for ind, score in zip(missing_indices, missing_scores):
+            scores[ind] = score
+            new_scores[keys[ind]] = score
+        cache.put_many(new_scores)
+
+    logger.debug(
+        f"Rerank score cache: hits={cache.hits} misses={cache.misses}, "
+        f"scored {len(missing_indices)} of {len(passages)} passages"
+    )
+
+    return [score for score in scores if score is not None]
@@ -1,6 +1,10 @@
+import os
 import threading
 import time
+from collections import deque
 from collections.abc import Callable
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from typing import Any
 
@@ -9,6 +13,7 @@ from httpx import HTTPError
 from requests import JSONDecodeError
 from requests import RequestException
 from requests import Response
+from requests.adapters import HTTPAdapter
 from retry import retry
 
 from onyx.configs.app_configs import LARGE_CHUNK_RATIO
@@ -18,6 +23,9 @@ from onyx.configs.model_configs import (
     BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES,
 )
 from onyx.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
+from onyx.configs.model_configs import EMBEDDING_MAX_CONCURRENT_BATCHES
+from onyx.configs.model_configs import EMBEDDING_WIRE_FORMAT
+from onyx.configs.model_configs import MODEL_SERVER_MAX_CONNECTIONS
 from onyx.db.models import SearchSettings
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.natural_language_processing.exceptions import (
@@ -29,8 +37,10 @@ from onyx.utils.logger import setup_logger
 from shared_configs.configs import MODEL_SERVER_HOST
 from shared_configs.configs import MODEL_SERVER_PORT
 from shared_configs.enums import EmbeddingProvider
+from shared_configs.enums import EmbeddingWireFormat
 from shared_configs.enums import EmbedTextType
 from shared_configs.enums import RerankerProvider
+from shared_configs.model_server_models import build_packed_embeddings_accept_header
 from shared_configs.model_server_models import ConnectorClassificationRequest
 from shared_configs.model_server_models import ConnectorClassificationResponse
 from shared_configs.model_server_models import Embedding
@@ -38,6 +48,8 @@ from shared_configs.model_server_models import EmbedRequest
 from shared_configs.model_server_models import EmbedResponse
 from shared_configs.model_server_models import IntentRequest
 from shared_configs.model_server_models import IntentResponse
+from shared_configs.model_server_models import PACKED_EMBEDDINGS_CONTENT_TYPE
+from shared_configs.model_server_models import PackedEmbedResponse
 from shared_configs.model_server_models import RerankRequest
 from shared_configs.model_server_models import RerankResponse
 from shared_configs.utils import batch_list
@@ -70,6 +82,30 @@ def build_model_server_url(
     return f"http://{model_server_url}"
 
 
+_model_server_session: requests.Session | None = None
+_model_server_session_pid: int | None = None
+_model_server_session_lock = threading.Lock()
+
+
+def get_model_server_session() -> requests.Session:
+    """Process wide session with a keep-alive connection pool for model server calls.
+    Recreated after a fork so that processes never share sockets."""
+    global _model_server_session, _model_server_session_pid
+
+    with _model_server_session_lock:
+        if _model_server_session is None or _model_server_session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=MODEL_SERVER_MAX_CONNECTIONS,
+                pool_maxsize=MODEL_SERVER_MAX_CONNECTIONS,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _model_server_session = session
+            _model_server_session_pid = os.getpid()
+        return _model_server_session
+
+
 class EmbeddingModel:
     def __init__(
         self,
@@ -86,6 +122,8 @@ class EmbeddingModel:
         callback: IndexingHeartbeatInterface | None = None,
         api_version: str | None = None,
         deployment_name: str | None = None,
+        max_concurrent_batches: int = EMBEDDING_MAX_CONCURRENT_BATCHES,
+        wire_format: EmbeddingWireFormat = EMBEDDING_WIRE_FORMAT,
     ) -> None:
         self.api_key = api_key
         self.provider_type = provider_type
@@ -101,14 +139,22 @@ class EmbeddingModel:
             model_name=model_name, provider_type=provider_type
         )
         self.callback = callback
+        self.max_concurrent_batches = max_concurrent_batches
+        self.wire_format = wire_format
 
         model_server_url = build_model_server_url(server_host, server_port)
         self.embed_server_endpoint = f"{model_server_url}/encoder/bi-encoder-embed"
 
     def _make_model_server_request(self, embed_request: EmbedRequest) -> EmbedResponse:
         def _make_request() -> Response:
-            response = requests.post(
-                self.embed_server_endpoint, json=embed_request.model_dump()
+            response = get_model_server_session().post(
+                self.embed_server_endpoint,
+                json=embed_request.model_dump(),
+                headers=(
+                    {"Accept": build_packed_embeddings_accept_header(self.wire_format)}
+                    if self.wire_format != EmbeddingWireFormat.JSON
+                    else None
+                ),
             )
             # signify that this is a rate limit error
             if response.status_code == 429:
@@ -136,6 +182,10 @@ class EmbeddingModel:
 
         try:
             response = final_make_request_func()
+            if response.headers.get("Content-Type", "").startswith(
+                PACKED_EMBEDDINGS_CONTENT_TYPE
+            ):
+                return PackedEmbedResponse(**response.json()).to_embed_response()
             return EmbedResponse(**response.json())
         except requests.HTTPError as e:
             if not response:
@@ -149,6 +199,27 @@ class EmbeddingModel:
         except requests.RequestException as e:
             raise HTTPError(f"Request failed: {str(e)}") from e
 
+    def _build_embed_request(
+        self,
+        texts: list[str],
+        text_type: EmbedTextType,
+        max_seq_length: int,
+    ) -> EmbedRequest:
+        return EmbedRequest(
+            model_name=self.model_name,
+            texts=texts,
+            api_version=self.api_version,
+            deployment_name=self.deployment_name,
+            max_context_length=max_seq_length,
+            normalize_embeddings=self.normalize,
+            api_key=self.api_key,
+            provider_type=self.provider_type,
+            text_type=text_type,
+            manual_query_prefix=self.query_prefix,
+            manual_passage_prefix=self.passage_prefix,
+            api_url=self.api_url,
+        )
+
     def _batch_encode_texts(
         self,
         texts: list[str],
@@ -162,6 +233,13 @@ class EmbeddingModel:
             f"Encoding {len(texts)} texts in {len(text_batches)} batches for local model"
         )
 
+        if self.max_concurrent_batches > 1 and len(text_batches) > 1:
+            return self._batch_encode_texts_concurrently(
+                text_batches=text_batches,
+                text_type=text_type,
+                max_seq_length=max_seq_length,
+            )
+
         embeddings: list[Embedding] = []
         for idx, text_batch in enumerate(text_batches, start=1):
             if self.callback:
@@ -169,19 +247,8 @@ class EmbeddingModel:
                     raise RuntimeError("_batch_encode_texts detected stop signal")
 
             logger.debug(f"Encoding batch {idx} of {len(text_batches)}")
-            embed_request = EmbedRequest(
-                model_name=self.model_name,
-                texts=text_batch,
-                api_version=self.api_version,
-                deployment_name=self.deployment_name,
-                max_context_length=max_seq_length,
-                normalize_embeddings=self.normalize,
-                api_key=self.api_key,
-                provider_type=self.provider_type,
-                text_type=text_type,
-                manual_query_prefix=self.query_prefix,
-                manual_passage_prefix=self.passage_prefix,
-                api_url=self.api_url,
+            embed_request = self._build_embed_request(
+                texts=text_batch, text_type=text_type, max_seq_length=max_seq_length
             )
 
             response = self._make_model_server_request(embed_request)
@@ -191,6 +258,47 @@ class EmbeddingModel:
                 self.callback.progress("_batch_encode_texts", 1)
         return embeddings
 
+    def _batch_encode_texts_concurrently(
+        self,
+        text_batches: list[list[str]],
+        text_type: EmbedTextType,
+        max_seq_length: int,
+    ) -> list[Embedding]:
+        """Keeps up to `max_concurrent_batches` requests in flight. Results are collected
+        in order and the callback is only used from the calling thread."""
+        embeddings: list[Embedding] = []
+        in_flight: deque[Future[EmbedResponse]] = deque()
+
+        def _collect_oldest() -> None:
+            embeddings.extend(in_flight.popleft().result().embeddings)
+            if self.callback:
+                self.callback.progress("_batch_encode_texts", 1)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_batches) as executor:
+            for idx, text_batch in enumerate(text_batches, start=1):
+                if self.callback:
+                    if self.callback.should_stop():
+                        raise RuntimeError("_batch_encode_texts detected stop signal")
+
+                logger.debug(f"Encoding batch {idx} of {len(text_batches)}")
+                in_flight.append(
+                    executor.submit(
+                        self._make_model_server_request,
+                        self._build_embed_request(
+                            texts=text_batch,
+                            text_type=text_type,
+                            max_seq_length=max_seq_length,
+                        ),
+                    )
+                )
+                if len(in_flight) >= self.max_concurrent_batches:
+                    _collect_oldest()
+
+            while in_flight:
+                _collect_oldest()
+
+        return embeddings
+
     def encode(
         self,
         texts: list[str],
@@ -199,7 +307,11 @@ class EmbeddingModel:
         local_embedding_batch_size: int = BATCH_SIZE_ENCODE_CHUNKS,
         api_embedding_batch_size: int = BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES,
         max_seq_length: int = DOC_EMBEDDING_CONTEXT_SIZE,
+        sort_by_length: bool = False,
     ) -> list[Embedding]:
+        """With `sort_by_length`, texts of similar token length are sent in the same batch
+        so that local models don't pad short texts up to the longest one in the batch.
+        The embeddings are always returned in the order of `texts`."""
         if not texts or not all(texts):
             raise ValueError(f"Empty or missing text for embedding: {texts}")
 
@@ -225,13 +337,29 @@ class EmbeddingModel:
             else local_embedding_batch_size
         )
 
-        return self._batch_encode_texts(
-            texts=texts,
+        # cloud providers don't pad, no need to tokenize everything for them
+        if not sort_by_length or self.provider_type or len(texts) <= batch_size:
+            return self._batch_encode_texts(
+                texts=texts,
+                text_type=text_type,
+                batch_size=batch_size,
+                max_seq_length=max_seq_length,
+            )
+
+        token_counts = self.tokenizer.count_tokens_batch(texts)
+        length_order = sorted(range(len(texts)), key=lambda ind: token_counts[ind])
+        sorted_embeddings = self._batch_encode_texts(
+            texts=[texts[ind] for ind in length_order],
             text_type=text_type,
             batch_size=batch_size,
             max_seq_length=max_seq_length,
         )
 
+        embeddings: list[Embedding] = [[] for _ in texts]
+        for sorted_ind, original_ind in enumerate(length_order):
+            embeddings[original_ind] = sorted_embeddings[sorted_ind]
+        return embeddings
+
     @classmethod
     def from_db_model(
         cls,
@@ -283,7 +411,7 @@ class RerankingModel:
             api_url=self.api_url,
         )
 
-        response = requests.post(
+        response = get_model_server_session().post(
             self.rerank_server_endpoint, json=rerank_request.model_dump()
         )
         response.raise_for_status()
@@ -316,7 +444,7 @@ class QueryAnalysisModel:
             semantic_percent_threshold=self.semantic_percent_threshold,
         )
 
-        response = requests.post(
+        response = get_model_server_session().post(
             self.intent_server_endpoint, json=intent_request.model_dump()
         )
         response.raise_for_status()
@@ -346,7 +474,7 @@ class ConnectorClassificationModel:
             available_connectors=available_connectors,
             query=query,
         )
-        response = requests.post(
+        response = get_model_server_session().post(
             self.connector_classification_endpoint,
             json=connector_classification_request.dict(),
         )
@@ -19,6 +19,12 @@ os.environ["TRANSFORMERS_NO_ADVISORY_WARNINGS"] = "1"
 
 
 class BaseTokenizer(ABC):
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Identifies the vocabulary, token counts from tokenizers with the same
+        name are interchangeable."""
+
     @abstractmethod
     def encode(self, string: str) -> list[int]:
         pass
@@ -31,6 +37,20 @@ class BaseTokenizer(ABC):
     def decode(self, tokens: list[int]) -> str:
         pass
 
+    @abstractmethod
+    def encode_with_offsets(self, string: str) -> tuple[list[int], list[int]]:
+        """Returns the tokens along with the index of the character in the string
+        each token starts at."""
+
+    def encode_batch(self, strings: list[str]) -> list[list[int]]:
+        return [self.encode(string) for string in strings]
+
+    def count_tokens(self, string: str) -> int:
+        return len(self.encode(string))
+
+    def count_tokens_batch(self, strings: list[str]) -> list[int]:
+        return [len(tokens) for tokens in self.encode_batch(strings)]
+
 
 class TiktokenTokenizer(BaseTokenizer):
     _instances: dict[str, "TiktokenTokenizer"] = {}
@@ -46,6 +66,10 @@ class TiktokenTokenizer(BaseTokenizer):
 
             self.encoder = tiktoken.encoding_for_model(model_name)
 
+    @property
+    def name(self) -> str:
+        return f"tiktoken/{self.encoder.name}"
+
     def encode(self, string: str) -> list[int]:
         # this ignores special tokens that the model is trained on, see encode_ordinary for details
         return self.encoder.encode_ordinary(string)
@@ -64,13 +88,30 @@ class TiktokenTokenizer(BaseTokenizer):
     def decode(self, tokens: list[int]) -> str:
         return self.encoder.decode(tokens)
 
+    def encode_with_offsets(self, string: str) -> tuple[list[int], list[int]]:
+        tokens = self.encode(string)
+        _, offsets = self.encoder.decode_with_offsets(tokens)
+        return tokens, offsets
+
+    def encode_batch(self, strings: list[str]) -> list[list[int]]:
+        # tiktoken encodes batches on a thread pool outside of the GIL, not worth
+        # starting one for a single string
+        if len(strings) < 2:
+            return [self.encode(string) for string in strings]
+        return self.encoder.encode_ordinary_batch(strings)
+
 
 class HuggingFaceTokenizer(BaseTokenizer):
     def __init__(self, model_name: str):
         from tokenizers import Tokenizer  # type: ignore
 
+        self.model_name = model_name
         self.encoder = Tokenizer.from_pretrained(model_name)
 
+    @property
+    def name(self) -> str:
+        return f"huggingface/{self.model_name}"
+
     def encode(self, string: str) -> list[int]:
         # this returns no special tokens
         return self.encoder.encode(string, add_special_tokens=False).ids
@@ -81,6 +122,16 @@ class HuggingFaceTokenizer(BaseTokenizer):
     def decode(self, tokens: list[int]) -> str:
         return self.encoder.decode(tokens)
 
+    def encode_with_offsets(self, string: str) -> tuple[list[int], list[int]]:
+        encoding = self.encoder.encode(string, add_special_tokens=False)
+        return encoding.ids, [start for start, _ in encoding.offsets]
+
+    def encode_batch(self, strings: list[str]) -> list[list[int]]:
+        return [
+            encoding.ids
+            for encoding in self.encoder.encode_batch(strings, add_special_tokens=False)
+        ]
+
 
 _TOKENIZER_CACHE: dict[tuple[EmbeddingProvider | None, str | None], BaseTokenizer] = {}
 
@@ -170,8 +221,11 @@ def tokenizer_trim_chunks(
     max_chunk_toks: int = DOC_EMBEDDING_CONTEXT_SIZE,
 ) -> list[InferenceChunk]:
     new_chunks = copy(chunks)
-    for ind, chunk in enumerate(new_chunks):
-        new_content = tokenizer_trim_content(chunk.content, max_chunk_toks, tokenizer)
+    chunk_tokens = tokenizer.encode_batch([chunk.content for chunk in chunks])
+    for ind, (chunk, tokens) in enumerate(zip(new_chunks, chunk_tokens)):
+        if len(tokens) <= max_chunk_toks:
+            continue
+        new_content = tokenizer.decode(tokens[:max_chunk_toks])
         if len(new_content) != len(chunk.content):
             new_chunk = copy(chunk)
             new_chunk.content = new_content
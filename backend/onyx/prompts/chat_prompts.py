@@ -16,6 +16,13 @@ Remember to provide inline citations in the format [1], [2], [3], etc.
 
 ADDITIONAL_INFO = "\n\nAdditional Information:\n\t- {datetime_info}."
 
+# Placed before the chat history when its older messages were left out to fit the
+# LLM's context
+HISTORY_TRUNCATED_NOTE = """
+Earlier messages of this conversation were omitted because they do not fit in the \
+context. Only the most recent messages are shown below.
+""".strip()
+
 
 CHAT_USER_PROMPT = f"""
 Refer to the following context documents when responding to me.{{optional_ignore_statement}}
@@ -3,11 +3,13 @@ from typing import cast
 from uuid import uuid4
 
 from celery import Celery
+from celery.result import AsyncResult
 from redis import Redis
 from redis.lock import Lock as RedisLock
 from sqlalchemy.orm import Session
 
 from onyx.configs.app_configs import DB_YIELD_PER_DEFAULT
+from onyx.configs.app_configs import VESPA_SYNC_BATCH_SIZE
 from onyx.configs.constants import CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryPriority
 from onyx.configs.constants import OnyxCeleryQueues
@@ -95,6 +97,7 @@ class RedisConnectorCredentialPair(RedisObjectHelper):
         )
 
         num_docs = 0
+        batch_document_ids: list[str] = []
 
         for doc in db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT):
             doc = cast(Document, doc)
@@ -120,31 +123,54 @@ class RedisConnectorCredentialPair(RedisObjectHelper):
             #     continue
             # redis_client.set(redis_syncing_key, custom_task_id, ex=SYNC_EXPIRATION)
 
-            # celery's default task id format is "dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            # the key for the result is "celery-task-meta-dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            # we prefix the task id so it's easier to keep track of who created the task
-            # aka "documentset_1_6dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            custom_task_id = f"{self.task_id_prefix}_{uuid4()}"
-
-            # add to the tracking taskset in redis BEFORE creating the celery task.
-            # note that for the moment we are using a single taskset key, not differentiated by cc_pair id
-            redis_client.sadd(
-                RedisConnectorCredentialPair.get_taskset_key(), custom_task_id
-            )
+            batch_document_ids.append(doc.id)
+            self.skip_docs.add(doc.id)
+            if len(batch_document_ids) < VESPA_SYNC_BATCH_SIZE:
+                continue
 
-            # Priority on sync's triggered by new indexing should be medium
-            result = celery_app.send_task(
-                OnyxCeleryTask.VESPA_METADATA_SYNC_TASK,
-                kwargs=dict(document_id=doc.id, tenant_id=tenant_id),
-                queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
-                task_id=custom_task_id,
-                priority=OnyxCeleryPriority.MEDIUM,
+            async_results.append(
+                self._send_sync_batch_task(
+                    celery_app, redis_client, batch_document_ids, tenant_id
+                )
             )
-
-            async_results.append(result)
-            self.skip_docs.add(doc.id)
+            batch_document_ids = []
 
             if len(async_results) >= max_tasks:
                 break
 
+        if batch_document_ids:
+            async_results.append(
+                self._send_sync_batch_task(
+                    celery_app, redis_client, batch_document_ids, tenant_id
+                )
+            )
+
         return len(async_results), num_docs
+
+    def _send_sync_batch_task(
+        self,
+        celery_app: Celery,
+        redis_client: Redis,
+        document_ids: list[str],
+        tenant_id: str | None,
+    ) -> AsyncResult:
+        # celery's default task id format is "dd32ded3-00aa-4884-8b21-42f8332e7fac"
+        # the key for the result is "celery-task-meta-dd32ded3-00aa-4884-8b21-42f8332e7fac"
+        # we prefix the task id so it's easier to keep track of who created the task
+        # aka "connectorsync_1_6dd32ded3-00aa-4884-8b21-42f8332e7fac"
+        custom_task_id = f"{self.task_id_prefix}_{uuid4()}"
+
+        # add to the tracking taskset in redis BEFORE creating the celery task.
+        # note that for the moment we are using a single taskset key, not differentiated by cc_pair id
+        redis_client.sadd(
+            RedisConnectorCredentialPair.get_taskset_key(), custom_task_id
+        )
+
+        # Priority on sync's triggered by new indexing should be medium
+        return celery_app.send_task(
+            OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+            kwargs=dict(document_ids=document_ids, tenant_id=tenant_id),
+            queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
+            task_id=custom_task_id,
+            priority=OnyxCeleryPriority.MEDIUM,
+        )
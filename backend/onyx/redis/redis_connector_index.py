@@ -35,6 +35,14 @@ class RedisConnectorIndex:
     # it's difficult to prevent
     ACTIVE_PREFIX = PREFIX + "_active"
 
+    # results of the shards of a sharded index attempt, keyed by shard index
+    SHARD_RESULTS_PREFIX = PREFIX + "_shard_results"  # connectorindexing_shard_results
+    # used to signal the worker running a shard is still alive
+    SHARD_ACTIVE_PREFIX = PREFIX + "_shard_active"  # connectorindexing_shard_active
+    # refreshed on every shard report, only matters if the attempt is abandoned
+    SHARD_RESULTS_TTL = 24 * 60 * 60
+    SHARD_ACTIVE_TTL = 5 * 60
+
     def __init__(
         self,
         tenant_id: str | None,
@@ -59,6 +67,10 @@ class RedisConnectorIndex:
         )
         self.terminate_key = f"{self.TERMINATE_PREFIX}_{id}/{search_settings_id}"
         self.active_key = f"{self.ACTIVE_PREFIX}_{id}/{search_settings_id}"
+        self.shard_results_key = (
+            f"{self.SHARD_RESULTS_PREFIX}_{id}/{search_settings_id}"
+        )
+        self.shard_active_key = f"{self.SHARD_ACTIVE_PREFIX}_{id}/{search_settings_id}"
 
     @classmethod
     def fence_key_with_ids(cls, cc_pair_id: int, search_settings_id: int) -> str:
@@ -126,6 +138,45 @@ class RedisConnectorIndex:
 
         return False
 
+    def set_shard_result(
+        self, index_attempt_id: int, shard_index: int, result: str
+    ) -> None:
+        key = f"{self.shard_results_key}_{index_attempt_id}"
+        self.redis.hset(key, str(shard_index), result)
+        self.redis.expire(key, self.SHARD_RESULTS_TTL)
+
+    def claim_shard(self, index_attempt_id: int, shard_index: int, result: str) -> bool:
+        """Sets the first result of the shard, False if it already has one."""
+        key = f"{self.shard_results_key}_{index_attempt_id}"
+        claimed = bool(self.redis.hsetnx(key, str(shard_index), result))
+        self.redis.expire(key, self.SHARD_RESULTS_TTL)
+        return claimed
+
+    def get_shard_results(self, index_attempt_id: int) -> dict[int, str]:
+        raw_results = cast(
+            dict[bytes, bytes],
+            self.redis.hgetall(f"{self.shard_results_key}_{index_attempt_id}"),
+        )
+        return {
+            int(shard_index): result.decode("utf-8")
+            for shard_index, result in raw_results.items()
+        }
+
+    def set_shard_active(self, index_attempt_id: int, shard_index: int) -> None:
+        self.redis.set(
+            f"{self.shard_active_key}_{index_attempt_id}/{shard_index}",
+            0,
+            ex=self.SHARD_ACTIVE_TTL,
+        )
+
+    def shard_active(self, index_attempt_id: int, shard_index: int) -> bool:
+        if self.redis.exists(
+            f"{self.shard_active_key}_{index_attempt_id}/{shard_index}"
+        ):
+            return True
+
+        return False
+
     def generator_locked(self) -> bool:
         if self.redis.exists(self.generator_lock_key):
             return True
@@ -186,3 +237,9 @@ class RedisConnectorIndex:
 
         for key in r.scan_iter(RedisConnectorIndex.FENCE_PREFIX + "*"):
             r.delete(key)
+
+        for key in r.scan_iter(RedisConnectorIndex.SHARD_RESULTS_PREFIX + "*"):
+            r.delete(key)
+
+        for key in r.scan_iter(RedisConnectorIndex.SHARD_ACTIVE_PREFIX + "*"):
+            r.delete(key)
@@ -4,11 +4,13 @@ from uuid import uuid4
 
 import redis
 from celery import Celery
+from celery.result import AsyncResult
 from redis import Redis
 from redis.lock import Lock as RedisLock
 from sqlalchemy.orm import Session
 
 from onyx.configs.app_configs import DB_YIELD_PER_DEFAULT
+from onyx.configs.app_configs import VESPA_SYNC_BATCH_SIZE
 from onyx.configs.constants import CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryPriority
 from onyx.configs.constants import OnyxCeleryQueues
@@ -64,6 +66,7 @@ class RedisDocumentSet(RedisObjectHelper):
         last_lock_time = time.monotonic()
 
         async_results = []
+        batch_document_ids: list[str] = []
         stmt = construct_document_select_by_docset(int(self._id), current_only=False)
         for doc in db_session.scalars(stmt).yield_per(DB_YIELD_PER_DEFAULT):
             doc = cast(Document, doc)
@@ -74,27 +77,50 @@ class RedisDocumentSet(RedisObjectHelper):
                 lock.reacquire()
                 last_lock_time = current_time
 
-            # celery's default task id format is "dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            # the key for the result is "celery-task-meta-dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            # we prefix the task id so it's easier to keep track of who created the task
-            # aka "documentset_1_6dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            custom_task_id = f"{self.task_id_prefix}_{uuid4()}"
-
-            # add to the set BEFORE creating the task.
-            redis_client.sadd(self.taskset_key, custom_task_id)
-
-            result = celery_app.send_task(
-                OnyxCeleryTask.VESPA_METADATA_SYNC_TASK,
-                kwargs=dict(document_id=doc.id, tenant_id=tenant_id),
-                queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
-                task_id=custom_task_id,
-                priority=OnyxCeleryPriority.LOW,
+            batch_document_ids.append(doc.id)
+            if len(batch_document_ids) < VESPA_SYNC_BATCH_SIZE:
+                continue
+
+            async_results.append(
+                self._send_sync_batch_task(
+                    celery_app, redis_client, batch_document_ids, tenant_id
+                )
             )
+            batch_document_ids = []
 
-            async_results.append(result)
+        if batch_document_ids:
+            async_results.append(
+                self._send_sync_batch_task(
+                    celery_app, redis_client, batch_document_ids, tenant_id
+                )
+            )
 
         return len(async_results), len(async_results)
 
+    def _send_sync_batch_task(
+        self,
+        celery_app: Celery,
+        redis_client: Redis,
+        document_ids: list[str],
+        tenant_id: str | None,
+    ) -> AsyncResult:
+        # celery's default task id format is "dd32ded3-00aa-4884-8b21-42f8332e7fac"
+        # the key for the result is "celery-task-meta-dd32ded3-00aa-4884-8b21-42f8332e7fac"
+        # we prefix the task id so it's easier to keep track of who created the task
+        # aka "documentset_1_6dd32ded3-00aa-4884-8b21-42f8332e7fac"
+        custom_task_id = f"{self.task_id_prefix}_{uuid4()}"
+
+        # add to the set BEFORE creating the task.
+        redis_client.sadd(self.taskset_key, custom_task_id)
+
+        return celery_app.send_task(
+            OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+            kwargs=dict(document_ids=document_ids, tenant_id=tenant_id),
+            queue=OnyxCeleryQueues.VESPA_METADATA_SYNC,
+            task_id=custom_task_id,
+            priority=OnyxCeleryPriority.LOW,
+        )
+
     def reset(self) -> None:
         self.redis.delete(self.taskset_key)
         self.redis.delete(self.fence_key)
@@ -29,13 +29,11 @@ class ToolCallSummary(BaseModel__v1):
 def tool_call_tokens(
     tool_call_summary: ToolCallSummary, llm_tokenizer: BaseTokenizer
 ) -> int:
-    request_tokens = len(
-        llm_tokenizer.encode(
-            json.dumps(tool_call_summary.tool_call_request.tool_calls[0]["args"])
-        )
+    request_tokens = llm_tokenizer.count_tokens(
+        json.dumps(tool_call_summary.tool_call_request.tool_calls[0]["args"])
     )
-    result_tokens = len(
-        llm_tokenizer.encode(json.dumps(tool_call_summary.tool_call_result.content))
+    result_tokens = llm_tokenizer.count_tokens(
+        json.dumps(tool_call_summary.tool_call_result.content)
     )
 
     return request_tokens + result_tokens
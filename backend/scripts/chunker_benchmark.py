@@ -0,0 +1,71 @@
+"""
+Microbenchmark for the indexing Chunker on synthetic documents with many small sections,
+the case where chunking used to be quadratic in the number of sections.
+
+Usage (from the backend directory):
+
+python scripts/chunker_benchmark.py --num-sections 10000 --num-docs 3
+"""
+import argparse
+import random
+import time
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import Section
+from onyx.indexing.chunker import Chunker
+from onyx.natural_language_processing.utils import get_tokenizer
+
+_WORDS = (
+    "the quick brown fox jumps over lazy dog while onyx indexes "
+    "confluence pages google drive files and slack threads for search"
+).split()
+
+
+def _build_document(doc_num: int, num_sections: int) -> Document:
+    sections = []
+    for section_num in range(num_sections):
+        num_words = random.randint(3, 40)
+        text = " ".join(random.choice(_WORDS) for _ in range(num_words)) + "."
+        sections.append(Section(text=text, link=f"link-{doc_num}-{section_num}"))
+
+    return Document(
+        id=f"benchmark-doc-{doc_num}",
+        source=DocumentSource.WEB,
+        semantic_identifier=f"Benchmark Document {doc_num}",
+        metadata={"tags": ["benchmark"]},
+        sections=sections,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Chunker microbenchmark")
+    parser.add_argument("--num-sections", type=int, default=10_000)
+    parser.add_argument("--num-docs", type=int, default=3)
+    parser.add_argument("--multipass", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    documents = [
+        _build_document(doc_num, args.num_sections) for doc_num in range(args.num_docs)
+    ]
+
+    chunker = Chunker(
+        tokenizer=get_tokenizer(model_name=None, provider_type=None),
+        enable_multipass=args.multipass,
+    )
+
+    start = time.monotonic()
+    chunks = chunker.chunk(documents)
+    elapsed = time.monotonic() - start
+
+    print(
+        f"docs={args.num_docs} sections_per_doc={args.num_sections} "
+        f"chunks={len(chunks)} elapsed={elapsed:.2f}s "
+        f"sections_per_second={args.num_docs * args.num_sections / elapsed:.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Throughput benchmark for the streaming CitationProcessor on long synthetic answers
+with citations and code blocks, the case where processing used to be quadratic in the
+length of the answer.
+
+Usage (from the backend directory):
+
+python scripts/citation_processing_benchmark.py --num-tokens 20000 --num-answers 5
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+
+from onyx.chat.models import LlmDoc
+from onyx.chat.stream_processing.citation_processing import CitationProcessor
+from onyx.chat.stream_processing.utils import DocumentIdOrderMapping
+from onyx.configs.constants import DocumentSource
+
+_WORDS = (
+    " the quick brown fox jumps over lazy dog while onyx answers questions"
+    " about confluence pages google drive files and slack threads"
+).split(" ")[1:]
+
+
+def _build_docs(num_docs: int) -> list[LlmDoc]:
+    return [
+        LlmDoc(
+            document_id=f"doc_{doc_num}",
+            content="Document content",
+            blurb=f"Document #{doc_num}",
+            semantic_identifier=f"Doc {doc_num}",
+            source_type=DocumentSource.WEB,
+            metadata={},
+            updated_at=datetime.now(),
+            link=f"https://{doc_num}.com",
+            source_links=None,
+            match_highlights=[],
+        )
+        for doc_num in range(num_docs)
+    ]
+
+
+def _build_answer_tokens(num_tokens: int, num_docs: int) -> list[str]:
+    """Tokens the way an LLM streams them, citations are split across tokens and
+    every so often there is a code block."""
+    tokens: list[str] = []
+    while len(tokens) < num_tokens:
+        roll = random.random()
+        if roll < 0.05:
+            tokens.extend([" [", str(random.randint(1, num_docs)), "]"])
+        elif roll < 0.06:
+            tokens.extend([" [[", str(random.randint(1, num_docs)), "]]"])
+        elif roll < 0.065:
+            tokens.extend(["\n", "```", "python", "\n"])
+            tokens.extend(
+                random.choice(["x = [1]", " + ", "y", "\n"]) for _ in range(40)
+            )
+            tokens.extend(["```", "\n"])
+        else:
+            tokens.append(" " + random.choice(_WORDS))
+    return tokens
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CitationProcessor benchmark")
+    parser.add_argument("--num-tokens", type=int, default=20_000)
+    parser.add_argument("--num-answers", type=int, default=5)
+    parser.add_argument("--num-docs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    docs = _build_docs(args.num_docs)
+    doc_id_to_rank_map = DocumentIdOrderMapping(
+        order_mapping={doc.document_id: rank for rank, doc in enumerate(docs, 1)}
+    )
+    answers = [
+        _build_answer_tokens(args.num_tokens, args.num_docs)
+        for _ in range(args.num_answers)
+    ]
+
+    total_tokens = 0
+    num_pieces = 0
+    start = time.monotonic()
+    for tokens in answers:
+        processor = CitationProcessor(
+            context_docs=docs,
+            final_doc_id_to_rank_map=doc_id_to_rank_map,
+            display_doc_id_to_rank_map=doc_id_to_rank_map,
+            stop_stream=None,
+        )
+        for token in [*tokens, None]:
+            num_pieces += sum(1 for _ in processor.process_token(token))
+        total_tokens += len(tokens)
+    elapsed = time.monotonic() - start
+
+    print(
+        f"answers={args.num_answers} tokens_per_answer~{args.num_tokens} "
+        f"pieces={num_pieces} elapsed={elapsed:.2f}s "
+        f"tokens_per_second={total_tokens / elapsed:.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Load benchmark for local query embedding in the model server. Keeps `--concurrency`
+single query embedding requests in flight against `embed_text` (in process, with the
+same thread pool offloading as the endpoint) and reports the throughput and latency
+percentiles for every batching window given.
+
+Usage (from the backend directory):
+
+python scripts/model_server_embed_benchmark.py --model-name intfloat/e5-base-v2 \
+    --concurrency 32 --num-requests 2000 --window-ms 0 2 5
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from model_server import encoders
+from model_server.embedding_batcher import EmbeddingBatcher
+from shared_configs.configs import EMBED_BATCH_MAX_SIZE
+from shared_configs.enums import EmbedTextType
+
+_WORDS = (
+    "how do I reset my password for the vpn onboarding guide expense policy "
+    "quarterly planning document deployment runbook oncall rotation holiday"
+).split()
+
+
+def _random_query() -> str:
+    return " ".join(random.choices(_WORDS, k=random.randint(4, 16)))
+
+
+async def _run(
+    model_name: str,
+    concurrency: int,
+    num_requests: int,
+    window_ms: float,
+    report: bool = True,
+) -> None:
+    encoders._EMBEDDING_BATCHER = EmbeddingBatcher(
+        window_seconds=window_ms / 1000, max_batch_size=EMBED_BATCH_MAX_SIZE
+    )
+    latencies: list[float] = []
+    remaining = num_requests
+
+    async def _worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.monotonic()
+            await encoders.embed_text(
+                texts=[_random_query()],
+                text_type=EmbedTextType.QUERY,
+                model_name=model_name,
+                deployment_name=None,
+                max_context_length=512,
+                normalize_embeddings=True,
+                api_key=None,
+                provider_type=None,
+                prefix="query: ",
+                api_url=None,
+                api_version=None,
+            )
+            latencies.append(time.monotonic() - start)
+
+    start = time.monotonic()
+    await asyncio.gather(*(_worker() for _ in range(concurrency)))
+    elapsed = time.monotonic() - start
+    if not report:
+        return
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"window={window_ms}ms: {num_requests / elapsed:.0f} req/s "
+        f"p50={quantiles[49] * 1000:.1f}ms p95={quantiles[94] * 1000:.1f}ms "
+        f"p99={quantiles[98] * 1000:.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Model server embedding benchmark")
+    parser.add_argument("--model-name", default="intfloat/e5-base-v2")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--num-requests", type=int, default=2000)
+    parser.add_argument("--window-ms", type=float, nargs="+", default=[0, 5])
+    args = parser.parse_args()
+
+    # load the model and warm up outside of the measurements
+    asyncio.run(_run(args.model_name, 1, 10, 0, report=False))
+
+    for window_ms in args.window_ms:
+        asyncio.run(
+            _run(args.model_name, args.concurrency, args.num_requests, window_ms)
+        )
+
+
+if __name__ == "__main__":
+    main()
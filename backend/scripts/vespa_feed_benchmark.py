@@ -0,0 +1,160 @@
+"""
+Compares the thread pool based Vespa write path (one blocking POST per chunk) with the
+async feed client (onyx/document_index/vespa/feed.py) against a local stub of the Vespa
+/document/v1 API which adds a fixed latency to every request. Besides the throughput,
+the CPU time spent in the client process is reported, which is what the indexing
+workers pay regardless of where the bottleneck is.
+
+Usage (from the backend directory):
+
+python scripts/vespa_feed_benchmark.py --num-chunks 5000 --latency-ms 20 --num-calls 10
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import math
+import multiprocessing
+import random
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi import Request
+
+from onyx.document_index.vespa.feed import feed_vespa_operations
+from onyx.document_index.vespa.feed import VespaFeedOperation
+from onyx.document_index.vespa_constants import NUM_THREADS
+
+_STUB_PORT = 18081
+_STUB_URL = f"http://127.0.0.1:{_STUB_PORT}/document/v1/default/benchmark/docid"
+
+
+def _build_stub_app(latency_seconds: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.api_route(
+        "/document/v1/default/benchmark/docid/{doc_id}", methods=["POST", "DELETE"]
+    )
+    async def _document(doc_id: str, request: Request) -> dict:
+        await request.body()
+        await asyncio.sleep(latency_seconds)
+        return {"id": f"id:default:benchmark::{doc_id}"}
+
+    return app
+
+
+def _run_stub_server(latency_seconds: float) -> None:
+    uvicorn.run(
+        _build_stub_app(latency_seconds),
+        host="127.0.0.1",
+        port=_STUB_PORT,
+        log_level="warning",
+    )
+
+
+def _start_stub_server(latency_seconds: float) -> multiprocessing.Process:
+    # separate process so that the stub does not compete with the client for the GIL
+    server = multiprocessing.Process(
+        target=_run_stub_server, args=(latency_seconds,), daemon=True
+    )
+    server.start()
+    while True:
+        try:
+            httpx.get(f"http://127.0.0.1:{_STUB_PORT}/docs")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+
+
+def _build_bodies(num_chunks: int, embedding_dim: int) -> list[dict]:
+    return [
+        {
+            "fields": {
+                "document_id": f"doc-{i // 10}",
+                "chunk_id": i % 10,
+                "content": "benchmark content " * 50,
+                "embeddings": {
+                    "full_chunk": [random.uniform(-1, 1) for _ in range(embedding_dim)]
+                },
+            }
+        }
+        for i in range(num_chunks)
+    ]
+
+
+def _run_thread_pool(bodies: list[dict]) -> tuple[float, float]:
+    start = time.monotonic()
+    start_cpu = time.process_time()
+    with (
+        concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor,
+        httpx.Client(http2=True) as http_client,
+    ):
+        futures = [
+            executor.submit(http_client.post, f"{_STUB_URL}/chunk-{i}", json=body)
+            for i, body in enumerate(bodies)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            future.result().raise_for_status()
+    return time.monotonic() - start, time.process_time() - start_cpu
+
+
+def _run_feed(
+    bodies: list[dict], max_in_flight: int, num_calls: int
+) -> tuple[float, float]:
+    start = time.monotonic()
+    start_cpu = time.process_time()
+    operations = [
+        VespaFeedOperation.build(
+            method="POST",
+            url=f"{_STUB_URL}/chunk-{i}",
+            body=body,
+            operation_id=str(i),
+        )
+        for i, body in enumerate(bodies)
+    ]
+    # indexing feeds one call per document batch, connections are kept across calls
+    call_size = math.ceil(len(operations) / num_calls)
+    for call_start in range(0, len(operations), call_size):
+        results = feed_vespa_operations(
+            operations[call_start : call_start + call_size],
+            max_in_flight=max_in_flight,
+        )
+        failed = [result for result in results if not result.success]
+        if failed:
+            raise RuntimeError(f"{len(failed)} operations failed, first: {failed[0]}")
+    return time.monotonic() - start, time.process_time() - start_cpu
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Vespa feed benchmark")
+    parser.add_argument("--num-chunks", type=int, default=5000)
+    parser.add_argument("--embedding-dim", type=int, default=768)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--max-in-flight", type=int, default=128)
+    parser.add_argument("--num-calls", type=int, default=10)
+    args = parser.parse_args()
+
+    server = _start_stub_server(args.latency_ms / 1000)
+    try:
+        bodies = _build_bodies(args.num_chunks, args.embedding_dim)
+
+        thread_pool_elapsed, thread_pool_cpu = _run_thread_pool(bodies)
+        print(
+            f"thread pool ({NUM_THREADS} threads): {thread_pool_elapsed:.2f}s "
+            f"{args.num_chunks / thread_pool_elapsed:.0f} chunks/s "
+            f"{thread_pool_cpu / args.num_chunks * 1000:.2f}ms CPU/chunk"
+        )
+
+        feed_elapsed, feed_cpu = _run_feed(bodies, args.max_in_flight, args.num_calls)
+        print(
+            f"feed client ({args.max_in_flight} in flight, {args.num_calls} calls): "
+            f"{feed_elapsed:.2f}s {args.num_chunks / feed_elapsed:.0f} chunks/s "
+            f"{feed_cpu / args.num_chunks * 1000:.2f}ms CPU/chunk"
+        )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
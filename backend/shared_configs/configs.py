@@ -54,6 +54,13 @@ MIN_THREADS_ML_MODELS = int(os.environ.get("MIN_THREADS_ML_MODELS") or 1)
 # or intent classification
 INDEXING_ONLY = os.environ.get("INDEXING_ONLY", "").lower() == "true"
 
+# Concurrent requests for the same local embedding model are merged into a single forward
+# pass if they arrive within this window. 0 disables the batching
+EMBED_BATCH_WINDOW_MS = float(os.environ.get("EMBED_BATCH_WINDOW_MS") or 0)
+# Merged batches are sent as soon as they reach this many texts, requests at least this
+# large are never delayed
+EMBED_BATCH_MAX_SIZE = int(os.environ.get("EMBED_BATCH_MAX_SIZE") or 64)
+
 # The process needs to have this for the log file to write to
 # otherwise, it will not create additional log files
 LOG_FILE_NAME = os.environ.get("LOG_FILE_NAME") or "onyx"
@@ -18,3 +18,12 @@ class RerankerProvider(str, Enum):
 class EmbedTextType(str, Enum):
     QUERY = "query"
     PASSAGE = "passage"
+
+
+class EmbeddingWireFormat(str, Enum):
+    # plain JSON lists of floats
+    JSON = "json"
+    # base64 encoded little endian floats
+    FLOAT32 = "float32"
+    # upper half of the float32 bits, half the size at ~3 significant digits
+    BFLOAT16 = "bfloat16"
@@ -1,6 +1,10 @@
+import base64
+
+import numpy as np
 from pydantic import BaseModel
 
 from shared_configs.enums import EmbeddingProvider
+from shared_configs.enums import EmbeddingWireFormat
 from shared_configs.enums import EmbedTextType
 from shared_configs.enums import RerankerProvider
 
@@ -38,6 +42,74 @@ class EmbedResponse(BaseModel):
     embeddings: list[Embedding]
 
 
+# Content type of a PackedEmbedResponse. Requested through the Accept header of the embed
+# request, with the wire format as the `format` parameter
+PACKED_EMBEDDINGS_CONTENT_TYPE = "application/vnd.onyx.packed-embeddings+json"
+
+
+def build_packed_embeddings_accept_header(wire_format: EmbeddingWireFormat) -> str:
+    # plain JSON stays acceptable for model servers which can't pack the embeddings
+    return f"{PACKED_EMBEDDINGS_CONTENT_TYPE}; format={wire_format.value}, application/json"
+
+
+def parse_packed_embeddings_accept_header(
+    accept: str | None,
+) -> EmbeddingWireFormat | None:
+    """Returns the requested packed wire format, None if plain JSON is expected."""
+    for media_range in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        if media_type != PACKED_EMBEDDINGS_CONTENT_TYPE:
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "format":
+                try:
+                    return EmbeddingWireFormat(value.strip().strip('"'))
+                except ValueError:
+                    return None
+    return None
+
+
+class PackedEmbedResponse(BaseModel):
+    """EmbedResponse with all embeddings concatenated into one base64 encoded string of
+    little endian float32 or bfloat16 values."""
+
+    embeddings: str
+    dim: int
+    wire_format: EmbeddingWireFormat
+
+    @classmethod
+    def from_embeddings(
+        cls, embeddings: list[Embedding], wire_format: EmbeddingWireFormat
+    ) -> "PackedEmbedResponse":
+        values = np.asarray(embeddings, dtype="<f4")
+        if wire_format == EmbeddingWireFormat.BFLOAT16:
+            bits = values.view("<u4").astype(np.uint64)
+            # round to the nearest bfloat16, ties to even
+            packed = ((bits + 0x7FFF + ((bits >> 16) & 1)) >> 16).astype("<u2")
+        elif wire_format == EmbeddingWireFormat.FLOAT32:
+            packed = values
+        else:
+            raise ValueError(f"Embeddings can't be packed as {wire_format}")
+
+        return cls(
+            embeddings=base64.b64encode(packed.tobytes()).decode("ascii"),
+            dim=values.shape[1] if values.ndim == 2 else 0,
+            wire_format=wire_format,
+        )
+
+    def to_embed_response(self) -> EmbedResponse:
+        raw = base64.b64decode(self.embeddings)
+        if not raw:
+            return EmbedResponse(embeddings=[])
+
+        if self.wire_format == EmbeddingWireFormat.BFLOAT16:
+            values = (np.frombuffer(raw, dtype="<u2").astype("<u4") << 16).view("<f4")
+        else:
+            values = np.frombuffer(raw, dtype="<f4")
+        return EmbedResponse(embeddings=values.reshape(-1, self.dim).tolist())
+
+
 class RerankRequest(BaseModel):
     query: str
     documents: list[str]
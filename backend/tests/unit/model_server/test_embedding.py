@@ -8,6 +8,7 @@ from unittest.mock import MagicMock
 from unittest.mock import patch
 
 import pytest
+from fastapi import Response
 from httpx import AsyncClient
 from litellm.exceptions import RateLimitError
 
@@ -16,8 +17,13 @@ from model_server.encoders import embed_text
 from model_server.encoders import local_rerank
 from model_server.encoders import process_embed_request
 from shared_configs.enums import EmbeddingProvider
+from shared_configs.enums import EmbeddingWireFormat
 from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import build_packed_embeddings_accept_header
 from shared_configs.model_server_models import EmbedRequest
+from shared_configs.model_server_models import EmbedResponse
+from shared_configs.model_server_models import PACKED_EMBEDDINGS_CONTENT_TYPE
+from shared_configs.model_server_models import PackedEmbedResponse
 
 
 @pytest.fixture
@@ -137,6 +143,32 @@ async def test_local_rerank() -> None:
         mock_model.predict.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_local_rerank_scores_docs_sorted_by_length() -> None:
+    with patch("model_server.encoders.get_local_reranking_model") as mock_get_model:
+        mock_model = MagicMock()
+        mock_model.predict.side_effect = lambda pairs: MagicMock(
+            tolist=lambda: [float(len(doc)) for _, doc in pairs]
+        )
+        mock_get_model.return_value = mock_model
+
+        result = await local_rerank(
+            query="test query",
+            docs=["long document", "doc", "medium doc"],
+            model_name="fake-rerank-model",
+        )
+
+        # one predict call over the length sorted pairs, scores in the docs' order
+        mock_model.predict.assert_called_once_with(
+            [
+                ("test query", "doc"),
+                ("test query", "medium doc"),
+                ("test query", "long document"),
+            ]
+        )
+        assert result == [13.0, 3.0, 10.0]
+
+
 @pytest.mark.asyncio
 async def test_rate_limit_handling() -> None:
     with patch("model_server.encoders.CloudEmbedding.embed") as mock_embed:
@@ -196,3 +228,44 @@ async def test_concurrent_embeddings() -> None:
         # However, the developer may still introduce unnecessary blocking above the mock and this test will
         # still pass as long as it's less than (7 - 5) / 5 seconds
         assert end_time - start_time < 7
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "wire_format,tolerance",
+    [(EmbeddingWireFormat.FLOAT32, 1e-7), (EmbeddingWireFormat.BFLOAT16, 1e-2)],
+)
+async def test_embed_request_with_packed_embeddings(
+    sample_embeddings: List[List[float]],
+    wire_format: EmbeddingWireFormat,
+    tolerance: float,
+) -> None:
+    embed_request = EmbedRequest(
+        texts=["test1", "test2"],
+        model_name="fake-model",
+        max_context_length=512,
+        normalize_embeddings=True,
+        text_type=EmbedTextType.PASSAGE,
+    )
+
+    with patch(
+        "model_server.encoders.embed_text", AsyncMock(return_value=sample_embeddings)
+    ):
+        response = await process_embed_request(
+            embed_request, accept=build_packed_embeddings_accept_header(wire_format)
+        )
+        json_response = await process_embed_request(embed_request)
+
+    assert isinstance(response, Response)
+    assert response.media_type == PACKED_EMBEDDINGS_CONTENT_TYPE
+    embeddings = (
+        PackedEmbedResponse.model_validate_json(response.body)
+        .to_embed_response()
+        .embeddings
+    )
+    assert len(embeddings) == len(sample_embeddings)
+    for embedding, expected in zip(embeddings, sample_embeddings):
+        assert embedding == pytest.approx(expected, rel=tolerance)
+    # without asking for it, the embeddings are sent as JSON lists
+    assert isinstance(json_response, EmbedResponse)
+    assert json_response.embeddings == sample_embeddings
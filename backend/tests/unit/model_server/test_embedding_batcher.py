@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from model_server.embedding_batcher import EmbeddingBatcher
+from shared_configs.model_server_models import Embedding
+
+
+@pytest.mark.asyncio
+async def test_embedding_batcher_merges_concurrent_requests() -> None:
+    batcher = EmbeddingBatcher(window_seconds=0.05, max_batch_size=100)
+    encode_calls: list[list[str]] = []
+
+    def _encode(texts: list[str]) -> list[Embedding]:
+        encode_calls.append(texts)
+        return [[float(len(text))] for text in texts]
+
+    results = await asyncio.gather(
+        batcher.encode("model", ["a"], _encode),
+        batcher.encode("model", ["bb", "ccc"], _encode),
+        batcher.encode("other-model", ["dddd"], _encode),
+    )
+
+    assert results == [[[1.0]], [[2.0], [3.0]], [[4.0]]]
+    assert sorted(encode_calls) == [["a", "bb", "ccc"], ["dddd"]]
+
+
+@pytest.mark.asyncio
+async def test_embedding_batcher_flushes_full_batches_and_propagates_errors() -> None:
+    batcher = EmbeddingBatcher(window_seconds=60, max_batch_size=2)
+
+    def _fail(texts: list[str]) -> list[Embedding]:
+        raise RuntimeError("model failure")
+
+    # the second request fills the batch, so nobody waits for the window
+    results = await asyncio.wait_for(
+        asyncio.gather(
+            batcher.encode("model", ["a"], _fail),
+            batcher.encode("model", ["b"], _fail),
+            return_exceptions=True,
+        ),
+        timeout=5,
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
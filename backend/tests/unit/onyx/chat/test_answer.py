@@ -4,6 +4,7 @@ from unittest.mock import MagicMock
 from unittest.mock import Mock
 
 import pytest
+from langchain_core.messages import AIMessage
 from langchain_core.messages import AIMessageChunk
 from langchain_core.messages import BaseMessage
 from langchain_core.messages import HumanMessage
@@ -19,7 +20,10 @@ from onyx.chat.models import OnyxAnswerPiece
 from onyx.chat.models import PromptConfig
 from onyx.chat.models import StreamStopInfo
 from onyx.chat.models import StreamStopReason
+from onyx.configs.constants import MessageType
 from onyx.llm.interfaces import LLM
+from onyx.llm.models import PreviousMessage
+from onyx.prompts.chat_prompts import HISTORY_TRUNCATED_NOTE
 from onyx.tools.force import ForceUseTool
 from onyx.tools.models import ToolCallFinalResult
 from onyx.tools.models import ToolCallKickoff
@@ -75,6 +79,54 @@ def test_basic_answer(answer_instance: Answer) -> None:
     )
 
 
+@pytest.mark.parametrize("history_truncated", [False, True])
+def test_answer_marks_truncated_history(
+    mock_llm: LLM,
+    answer_style_config: AnswerStyleConfig,
+    prompt_config: PromptConfig,
+    history_truncated: bool,
+) -> None:
+    answer_instance = Answer(
+        question=QUERY,
+        answer_style_config=answer_style_config,
+        llm=mock_llm,
+        prompt_config=prompt_config,
+        force_use_tool=ForceUseTool(force_use=False, tool_name="", args=None),
+        message_history=[
+            PreviousMessage(
+                message=message,
+                token_count=2,
+                message_type=message_type,
+                files=[],
+                tool_call=None,
+            )
+            for message, message_type in [
+                ("Older question", MessageType.USER),
+                ("Older answer", MessageType.ASSISTANT),
+            ]
+        ],
+        history_truncated=history_truncated,
+    )
+    mock_llm = cast(Mock, answer_instance.llm)
+    mock_llm.stream.return_value = [AIMessageChunk(content="Answer")]
+
+    list(answer_instance.processed_streamed_output)
+
+    history_truncated_message = [SystemMessage(content=HISTORY_TRUNCATED_NOTE)]
+    mock_llm.stream.assert_called_once_with(
+        prompt=[SystemMessage(content="System prompt")]
+        + (history_truncated_message if history_truncated else [])
+        + [
+            HumanMessage(content="Older question"),
+            AIMessage(content="Older answer"),
+            HumanMessage(content="Task prompt\n\nQUERY:\nTest question"),
+        ],
+        tools=None,
+        tool_choice=None,
+        structured_response_format=None,
+    )
+
+
 @pytest.mark.parametrize(
     "force_use_tool, expected_tool_args",
     [
@@ -0,0 +1,133 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+
+from onyx.chat import chat_utils
+from onyx.chat.chat_utils import _fit_history_window
+from onyx.chat.chat_utils import create_chat_chain
+from onyx.chat.chat_utils import get_history_token_counts
+from onyx.chat.chat_utils import history_was_truncated
+from onyx.db.models import ChatMessage
+
+
+def _build_links(
+    token_counts: list[int],
+) -> list[tuple[int, int | None, int | None, int]]:
+    """Root message with id 0 followed by a chain of messages with ids 1..n"""
+    num_messages = len(token_counts)
+    return [
+        (
+            msg_id,
+            msg_id - 1 if msg_id else None,
+            msg_id + 1 if msg_id < num_messages else None,
+            token_counts[msg_id - 1] if msg_id else 0,
+        )
+        for msg_id in range(num_messages + 1)
+    ]
+
+
+@pytest.mark.parametrize(
+    "max_history_tokens,expected_history_ids",
+    [
+        (None, [1, 2, 3, 4, 5]),
+        (250, [4, 5]),
+        (350, [3, 4, 5]),
+        # the most recent message is kept even if it doesn't fit
+        (10, [5]),
+    ],
+)
+def test_create_chat_chain_only_loads_history_window(
+    max_history_tokens: int | None, expected_history_ids: list[int]
+) -> None:
+    links = _build_links([100, 100, 100, 100, 100, 100])
+    loaded_ids: list[int] = []
+
+    def _get_messages_by_ids(chat_message_ids: list[int], **kwargs: object) -> list:
+        loaded_ids.extend(chat_message_ids)
+        return [ChatMessage(id=msg_id) for msg_id in chat_message_ids]
+
+    with patch.object(
+        chat_utils, "get_chat_message_links_by_session", return_value=links
+    ), patch.object(
+        chat_utils, "get_chat_messages_by_ids", side_effect=_get_messages_by_ids
+    ):
+        final_msg, history_msgs = create_chat_chain(
+            chat_session_id=uuid4(),
+            db_session=MagicMock(),
+            max_history_tokens=max_history_tokens,
+        )
+
+    assert final_msg.id == 6
+    assert [msg.id for msg in history_msgs] == expected_history_ids
+    assert loaded_ids == expected_history_ids + [6]
+
+
+@pytest.mark.parametrize(
+    "max_tokens,expected_history_ids",
+    [
+        # exactly the budget, nothing is cut
+        (600, [1, 2, 3, 4]),
+        # one token short, the oldest message doesn't fit anymore
+        (599, [2, 3, 4]),
+        (500, [2, 3, 4]),
+    ],
+)
+def test_fit_history_window_at_token_budget(
+    max_tokens: int, expected_history_ids: list[int]
+) -> None:
+    id_to_token_count = {1: 100, 2: 200, 3: 100, 4: 200}
+    assert (
+        _fit_history_window([1, 2, 3, 4], id_to_token_count, max_tokens)
+        == expected_history_ids
+    )
+
+
+@pytest.mark.parametrize(
+    "max_history_tokens,expected_truncated",
+    [(None, False), (500, False), (499, True)],
+)
+def test_truncated_history_is_detected_at_token_budget(
+    max_history_tokens: int | None, expected_truncated: bool
+) -> None:
+    links = _build_links([100, 100, 100, 100, 100, 100])
+
+    def _get_messages_by_ids(chat_message_ids: list[int], **kwargs: object) -> list:
+        return [
+            ChatMessage(id=msg_id, parent_message=msg_id - 1)
+            for msg_id in chat_message_ids
+        ]
+
+    with patch.object(
+        chat_utils, "get_chat_message_links_by_session", return_value=links
+    ), patch.object(
+        chat_utils, "get_chat_messages_by_ids", side_effect=_get_messages_by_ids
+    ):
+        _, history_msgs = create_chat_chain(
+            chat_session_id=uuid4(),
+            db_session=MagicMock(),
+            max_history_tokens=max_history_tokens,
+        )
+
+    assert history_was_truncated(history_msgs, root_message_id=0) is expected_truncated
+
+
+def test_history_token_counts_are_counted_once_per_tokenizer() -> None:
+    history_msgs = [
+        ChatMessage(message="a b c", token_count=3, token_counts={"other": 4}),
+        ChatMessage(message="", token_count=0, token_counts=None),
+        ChatMessage(message="a b", token_count=2, token_counts={"test": 7}),
+    ]
+    tokenizer = MagicMock()
+    tokenizer.name = "test"
+    tokenizer.count_tokens_batch.side_effect = lambda strings: [
+        len(string.split()) for string in strings
+    ]
+
+    assert get_history_token_counts(history_msgs, tokenizer) == [3, 0, 7]
+    assert history_msgs[0].token_counts == {"other": 4, "test": 3}
+
+    # stored on the messages, nothing left to count
+    assert get_history_token_counts(history_msgs, tokenizer) == [3, 0, 7]
+    tokenizer.count_tokens_batch.assert_called_once_with(["a b c"])
@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import Section
+from onyx.connectors.onyx_jira.connector import JiraConnector
+
+
+def _create_doc(issue_key: str) -> Document:
+    link = f"https://jira.example.com/browse/{issue_key}"
+    return Document(
+        id=link,
+        sections=[Section(link=link, text=issue_key)],
+        source=DocumentSource.JIRA,
+        semantic_identifier=issue_key,
+        metadata={},
+    )
+
+
+def _build_connector() -> JiraConnector:
+    connector = JiraConnector(
+        "https://jira.example.com/projects/TEST", batch_size=2, labels_to_skip=[]
+    )
+    connector._jira_client = MagicMock()
+    return connector
+
+
+def test_jira_checkpoint_follows_yielded_issues() -> None:
+    connector = _build_connector()
+    with patch(
+        "onyx.connectors.onyx_jira.connector.fetch_jira_issues_batch",
+        return_value=iter([_create_doc(f"TEST-{i}") for i in range(1, 4)]),
+    ) as fetch_mock:
+        checkpoints = []
+        for _ in connector.load_from_state():
+            checkpoints.append(connector.get_checkpoint())
+
+    assert fetch_mock.call_args.kwargs["jql"] == 'project = "TEST" ORDER BY key ASC'
+    assert checkpoints == [
+        {"last_issue_key": "TEST-2"},
+        {"last_issue_key": "TEST-3"},
+    ]
+
+
+def test_jira_resumes_after_checkpointed_issue() -> None:
+    connector = _build_connector()
+    connector.set_checkpoint({"last_issue_key": "TEST-2"})
+    with patch(
+        "onyx.connectors.onyx_jira.connector.fetch_jira_issues_batch",
+        return_value=iter([_create_doc("TEST-3")]),
+    ) as fetch_mock:
+        batches = list(connector.poll_source(0, 3600))
+
+    assert fetch_mock.call_args.kwargs["jql"] == (
+        "project = \"TEST\" AND updated >= '1970-01-01 00:00' AND "
+        "updated <= '1970-01-01 01:00' AND issuekey > \"TEST-2\" ORDER BY key ASC"
+    )
+    assert [doc.id for batch in batches for doc in batch] == [
+        "https://jira.example.com/browse/TEST-3"
+    ]
@@ -0,0 +1,84 @@
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import Section
+from onyx.connectors.slack.connector import SlackPollConnector
+
+# channel id -> messages, newest first like the history API returns them
+_CHANNEL_MESSAGES = {
+    "C1": [{"ts": "13"}, {"ts": "12"}, {"ts": "11"}],
+    "C2": [{"ts": "22"}, {"ts": "21"}],
+}
+
+
+def _get_channel_messages(
+    client: Any, channel: dict[str, Any], oldest: str | None, latest: str | None
+) -> Generator[list[dict[str, Any]], None, None]:
+    yield [
+        message
+        for message in _CHANNEL_MESSAGES[channel["id"]]
+        if latest is None or float(message["ts"]) < float(latest)
+    ]
+
+
+def _thread_to_doc(channel: dict[str, Any], thread: list, **kwargs: Any) -> Document:
+    doc_id = f"{channel['id']}__{thread[0]['ts']}"
+    return Document(
+        id=doc_id,
+        sections=[Section(link=None, text=doc_id)],
+        source=DocumentSource.SLACK,
+        semantic_identifier=doc_id,
+        metadata={},
+    )
+
+
+@pytest.fixture
+def patched_slack() -> Generator[None, None, None]:
+    with patch(
+        "onyx.connectors.slack.connector.get_channels",
+        return_value=[{"id": "C1", "name": "one"}, {"id": "C2", "name": "two"}],
+    ), patch(
+        "onyx.connectors.slack.connector.get_channel_messages",
+        side_effect=_get_channel_messages,
+    ), patch(
+        "onyx.connectors.slack.connector.thread_to_doc", side_effect=_thread_to_doc
+    ), patch(
+        "onyx.connectors.slack.connector.SlackTextCleaner"
+    ):
+        yield
+
+
+def _build_connector() -> SlackPollConnector:
+    connector = SlackPollConnector(batch_size=2)
+    connector.client = MagicMock()
+    return connector
+
+
+def test_slack_resumes_from_checkpoint(patched_slack: None) -> None:
+    connector = _build_connector()
+    doc_batches = connector.poll_source(0, 100)
+    first_batch = next(doc_batches)
+    checkpoint = connector.get_checkpoint()
+    second_batch = next(doc_batches)
+
+    assert [doc.id for doc in first_batch] == ["C1__13", "C1__12"]
+    assert checkpoint == {
+        "completed_channel_ids": [],
+        "current_channel_id": "C1",
+        "current_channel_latest": "12",
+    }
+    # the channel is only completed once the generator moves on from it
+    assert [doc.id for doc in second_batch] == ["C1__11", "C2__22"]
+    assert connector.get_checkpoint()["completed_channel_ids"] == ["C1"]
+
+    resumed_connector = _build_connector()
+    resumed_connector.set_checkpoint(checkpoint)
+    assert [
+        doc.id for batch in resumed_connector.poll_source(0, 100) for doc in batch
+    ] == ["C1__11", "C2__22", "C2__21"]
@@ -0,0 +1,89 @@
+import threading
+from typing import Any
+
+import pytest
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.connector_runner import ConnectorRunner
+from onyx.connectors.interfaces import CheckpointConnector
+from onyx.connectors.interfaces import ConnectorCheckpoint
+from onyx.connectors.interfaces import GenerateDocumentsOutput
+from onyx.connectors.interfaces import LoadConnector
+from onyx.connectors.models import Document
+from onyx.connectors.models import Section
+
+
+def _build_doc(doc_id: str) -> Document:
+    return Document(
+        id=doc_id,
+        source=DocumentSource.WEB,
+        semantic_identifier=doc_id,
+        metadata={},
+        sections=[Section(text=doc_id, link=None)],
+    )
+
+
+class _FakeConnector(LoadConnector, CheckpointConnector):
+    def __init__(self, num_batches: int, fail_after: int | None = None) -> None:
+        self.num_batches = num_batches
+        self.fail_after = fail_after
+        self.closed = threading.Event()
+        # the same dict is mutated while fetching, like a connector tracking a cursor
+        self._checkpoint: dict[str, Any] = {"last_batch": None}
+
+    def load_credentials(self, credentials: dict[str, Any]) -> dict[str, Any] | None:
+        return None
+
+    def get_checkpoint(self) -> ConnectorCheckpoint:
+        return self._checkpoint
+
+    def set_checkpoint(self, checkpoint: ConnectorCheckpoint) -> None:
+        self._checkpoint = checkpoint
+
+    def load_from_state(self) -> GenerateDocumentsOutput:
+        try:
+            for batch_ind in range(self.num_batches):
+                if batch_ind == self.fail_after:
+                    raise ValueError("source unavailable")
+                self._checkpoint["last_batch"] = batch_ind
+                yield [_build_doc(f"doc_{batch_ind}")]
+        finally:
+            self.closed.set()
+
+
+@pytest.mark.parametrize("prefetch_batches", [0, 2])
+def test_runner_yields_batches_with_their_checkpoints(prefetch_batches: int) -> None:
+    runner = ConnectorRunner(_FakeConnector(5), prefetch_batches=prefetch_batches)
+
+    assert [
+        (doc_batch[0].id, checkpoint and checkpoint["last_batch"])
+        for doc_batch, checkpoint in runner.run()
+    ] == [(f"doc_{batch_ind}", batch_ind) for batch_ind in range(5)]
+
+
+@pytest.mark.parametrize("prefetch_batches", [0, 2])
+def test_runner_raises_connector_error_after_fetched_batches(
+    prefetch_batches: int,
+) -> None:
+    runner = ConnectorRunner(
+        _FakeConnector(5, fail_after=3), prefetch_batches=prefetch_batches
+    )
+
+    doc_ids: list[str] = []
+    with pytest.raises(ValueError, match="source unavailable"):
+        for doc_batch, _ in runner.run():
+            doc_ids.append(doc_batch[0].id)
+
+    assert doc_ids == ["doc_0", "doc_1", "doc_2"]
+
+
+def test_prefetching_stops_when_consumer_stops() -> None:
+    connector = _FakeConnector(1000)
+    runner = ConnectorRunner(connector, prefetch_batches=1)
+
+    batches = runner.run()
+    next(batches)
+    # what happens when the indexing loop exits on a stop signal
+    del batches
+
+    assert connector.closed.wait(timeout=10)
@@ -0,0 +1,106 @@
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.enums import LLMEvaluationType
+from onyx.context.search.enums import SearchType
+from onyx.context.search.models import IndexFilters
+from onyx.context.search.models import InferenceChunkUncleaned
+from onyx.context.search.models import SearchQuery
+from onyx.context.search.retrieval.search_runner import doc_index_retrieval
+from onyx.context.search.retrieval.search_runner import RetrievedChunkCache
+from onyx.document_index.interfaces import VespaChunkRequest
+
+
+def _build_chunk(
+    document_id: str,
+    chunk_id: int,
+    score: float | None = None,
+    large_chunk_reference_ids: list[int] | None = None,
+) -> InferenceChunkUncleaned:
+    return InferenceChunkUncleaned(
+        chunk_id=chunk_id,
+        document_id=document_id,
+        semantic_identifier=document_id,
+        title=None,
+        blurb=f"{document_id}_{chunk_id}",
+        content=f"{document_id}_{chunk_id}",
+        source_links={0: "fake_link"},
+        section_continuation=False,
+        source_type=DocumentSource.WEB,
+        boost=0,
+        recency_bias=1.0,
+        score=score,
+        hidden=False,
+        metadata={},
+        match_highlights=[],
+        updated_at=None,
+        metadata_suffix=None,
+        large_chunk_reference_ids=large_chunk_reference_ids or [],
+    )
+
+
+def _fake_id_based_retrieval(
+    chunk_requests: list[VespaChunkRequest], **kwargs: object
+) -> list[InferenceChunkUncleaned]:
+    # every document has 10 chunks
+    return [
+        _build_chunk(request.document_id, chunk_id)
+        for request in chunk_requests
+        for chunk_id in range(
+            request.min_chunk_ind or 0, min(request.max_chunk_ind or 9, 9) + 1
+        )
+    ]
+
+
+def test_doc_index_retrieval_fetches_context_with_large_chunks() -> None:
+    query = SearchQuery(
+        query="test",
+        processed_keywords=["test"],
+        search_type=SearchType.SEMANTIC,
+        evaluation_type=LLMEvaluationType.SKIP,
+        filters=IndexFilters(access_control_list=None),
+        chunks_above=1,
+        chunks_below=1,
+        rerank_settings=None,
+        hybrid_alpha=0.5,
+        recency_bias_multiplier=1.0,
+        max_llm_filter_sections=0,
+    )
+    document_index = Mock()
+    document_index.hybrid_retrieval.return_value = [
+        _build_chunk("doc1", 0, score=0.9, large_chunk_reference_ids=[4, 5]),
+        _build_chunk("doc2", 9, score=0.5),
+    ]
+    document_index.id_based_retrieval.side_effect = _fake_id_based_retrieval
+
+    chunk_cache = RetrievedChunkCache()
+    with patch(
+        "onyx.context.search.retrieval.search_runner.get_current_search_settings"
+    ), patch("onyx.context.search.retrieval.search_runner.EmbeddingModel"), patch(
+        "onyx.context.search.retrieval.search_runner.embed_query"
+    ):
+        chunks = doc_index_retrieval(
+            query=query,
+            document_index=document_index,
+            db_session=Mock(),
+            chunk_cache=chunk_cache,
+        )
+
+    # only the referenced chunks are results, the context is kept for later
+    assert [(chunk.document_id, chunk.chunk_id, chunk.score) for chunk in chunks] == [
+        ("doc1", 4, 0.9),
+        ("doc1", 5, 0.9),
+        ("doc2", 9, 0.5),
+    ]
+    assert document_index.id_based_retrieval.call_count == 1
+
+    cached_chunks = chunk_cache.get_chunk_range("doc1", 3, 6)
+    assert cached_chunks is not None
+    assert [chunk.chunk_id for chunk in cached_chunks] == [3, 4, 5, 6]
+    # past the end of the document
+    cached_chunks = chunk_cache.get_chunk_range("doc2", 8, 10)
+    assert cached_chunks is not None
+    assert [chunk.chunk_id for chunk in cached_chunks] == [8, 9]
+    # never fetched
+    assert chunk_cache.get_chunk_range("doc1", 2, 4) is None
@@ -0,0 +1,91 @@
+from typing import Any
+from unittest.mock import MagicMock
+
+from sqlalchemy.pool import QueuePool
+
+from onyx.db.engine import _build_pool_metrics
+from onyx.db.engine import _forget_search_path_on_change
+from onyx.db.engine import _set_search_path_on_checkout
+from shared_configs.contextvars import CURRENT_TENANT_ID_CONTEXTVAR
+
+
+class _FakeDbapiConnection:
+    def __init__(self) -> None:
+        self.autocommit = False
+        self.closed = False
+        # (statement, autocommit at the time of execution)
+        self.executed: list[tuple[str, bool]] = []
+
+    def cursor(self) -> Any:
+        cursor = MagicMock()
+        cursor.execute.side_effect = lambda statement: self.executed.append(
+            (statement, self.autocommit)
+        )
+        return cursor
+
+
+def _checkout(
+    dbapi_connection: _FakeDbapiConnection, record: Any, tenant_id: str
+) -> None:
+    token = CURRENT_TENANT_ID_CONTEXTVAR.set(tenant_id)
+    try:
+        _set_search_path_on_checkout(dbapi_connection, record, None)
+    finally:
+        CURRENT_TENANT_ID_CONTEXTVAR.reset(token)
+
+
+def test_search_path_is_only_set_when_the_tenant_changes() -> None:
+    dbapi_connection = _FakeDbapiConnection()
+    record = MagicMock(info={})
+
+    _checkout(dbapi_connection, record, "tenant_a")
+    _checkout(dbapi_connection, record, "tenant_a")
+    _checkout(dbapi_connection, record, "tenant_b")
+
+    # outside of a transaction so that the pool's rollback on return doesn't undo it
+    assert dbapi_connection.executed == [
+        ('SET search_path = "tenant_a"', True),
+        ('SET search_path = "tenant_b"', True),
+    ]
+    assert dbapi_connection.autocommit is False
+
+
+def test_search_path_is_set_again_after_a_query_changed_it() -> None:
+    dbapi_connection = _FakeDbapiConnection()
+    record = MagicMock(info={})
+
+    _checkout(dbapi_connection, record, "tenant_a")
+    _forget_search_path_on_change(
+        MagicMock(info=record.info),
+        None,
+        'SET search_path = "tenant_b"',
+        None,
+        None,
+        False,
+    )
+    _checkout(dbapi_connection, record, "tenant_a")
+
+    assert [statement for statement, _ in dbapi_connection.executed] == [
+        'SET search_path = "tenant_a"',
+        'SET search_path = "tenant_a"',
+    ]
+
+
+def test_pool_metrics_count_search_path_sets() -> None:
+    pool = QueuePool(MagicMock, pool_size=2, max_overflow=1)
+    before = _build_pool_metrics(pool)
+
+    dbapi_connection = _FakeDbapiConnection()
+    record = MagicMock(info={})
+    _checkout(dbapi_connection, record, "tenant_a")
+    _checkout(dbapi_connection, record, "tenant_a")
+    connection = pool.connect()
+
+    after = _build_pool_metrics(pool)
+    assert after.pool_size == 2
+    assert after.checked_out == 1
+    assert after.overflow == 0
+    assert after.checkouts - before.checkouts == 2
+    assert after.search_path_sets - before.search_path_sets == 1
+
+    connection.close()
@@ -0,0 +1,40 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from unittest.mock import MagicMock
+
+from onyx.db.embedding_cache import fetch_cached_embeddings
+
+
+def _fetch(last_used_ago: list[timedelta]) -> MagicMock:
+    now = datetime.now(timezone.utc)
+    db_session = MagicMock()
+    db_session.execute.return_value.all.return_value = [
+        (f"key_{i}", b"embedding", now - ago) for i, ago in enumerate(last_used_ago)
+    ]
+
+    cached = fetch_cached_embeddings(
+        db_session,
+        [f"key_{i}" for i in range(len(last_used_ago))],
+        touch_interval_seconds=60 * 60,
+    )
+
+    assert cached == {f"key_{i}": b"embedding" for i in range(len(last_used_ago))}
+    return db_session
+
+
+def test_recently_used_hits_are_not_written() -> None:
+    db_session = _fetch([timedelta(minutes=1), timedelta(minutes=59)])
+
+    # only the select
+    assert db_session.execute.call_count == 1
+    db_session.commit.assert_not_called()
+
+
+def test_stale_hits_are_marked_as_used() -> None:
+    db_session = _fetch([timedelta(minutes=1), timedelta(hours=2)])
+
+    assert db_session.execute.call_count == 2
+    update_stmt = db_session.execute.call_args_list[1].args[0]
+    assert update_stmt.whereclause.right.value == ["key_1"]
+    db_session.commit.assert_called_once()
@@ -0,0 +1,116 @@
+from datetime import datetime
+from datetime import timezone
+
+from onyx.access.models import DocumentAccess
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import Section
+from onyx.document_index.interfaces import IndexBatchParams
+from onyx.document_index.vespa.index import VespaIndex
+from onyx.indexing.chunk_fingerprints import build_chunk_fingerprints
+from onyx.indexing.models import ChunkEmbedding
+from onyx.indexing.models import DocMetadataAwareIndexChunk
+
+
+def _build_chunk(
+    chunk_id: int,
+    content: str,
+    doc_updated_at: datetime | None = None,
+    user_emails: list[str | None] | None = None,
+) -> DocMetadataAwareIndexChunk:
+    return DocMetadataAwareIndexChunk(
+        chunk_id=chunk_id,
+        blurb=content,
+        content=content,
+        source_links={0: "link1"},
+        section_continuation=False,
+        source_document=Document(
+            id="test_doc",
+            source=DocumentSource.WEB,
+            semantic_identifier="Test Document",
+            metadata={"tags": ["tag1", "tag2"]},
+            doc_updated_at=doc_updated_at,
+            sections=[Section(text=content, link="link1")],
+        ),
+        title_prefix="Title: ",
+        metadata_suffix_semantic="",
+        metadata_suffix_keyword="",
+        mini_chunk_texts=None,
+        large_chunk_id=None,
+        embeddings=ChunkEmbedding(full_embedding=[1.0, 2.0], mini_chunk_embeddings=[]),
+        title_embedding=None,
+        access=DocumentAccess.build(
+            user_emails=user_emails or ["a@test.com", "b@test.com"],
+            user_groups=[],
+            external_user_emails=[],
+            external_user_group_ids=[],
+            is_public=False,
+        ),
+        document_sets={"set1", "set2"},
+        boost=0,
+    )
+
+
+def _fingerprint(chunk: DocMetadataAwareIndexChunk, index_name: str = "idx") -> str:
+    return build_chunk_fingerprints([chunk], index_name=index_name)["test_doc"]["0"]
+
+
+def test_chunk_fingerprint_tracks_indexed_fields() -> None:
+    fingerprint = _fingerprint(_build_chunk(0, "some text"))
+
+    assert fingerprint == _fingerprint(_build_chunk(0, "some text"))
+    # ACL order does not matter
+    assert fingerprint == _fingerprint(
+        _build_chunk(0, "some text", user_emails=["b@test.com", "a@test.com"])
+    )
+    # the update time is refreshed separately
+    assert fingerprint == _fingerprint(
+        _build_chunk(0, "some text", doc_updated_at=datetime.now(timezone.utc))
+    )
+
+    assert fingerprint != _fingerprint(_build_chunk(0, "other text"))
+    assert fingerprint != _fingerprint(
+        _build_chunk(0, "some text", user_emails=["a@test.com"])
+    )
+    assert fingerprint != _fingerprint(_build_chunk(0, "some text"), "other_idx")
+
+
+def test_vespa_index_skips_unchanged_chunks() -> None:
+    previous_updated_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    previous_chunks = [
+        _build_chunk(0, "first", previous_updated_at),
+        _build_chunk(1, "second", previous_updated_at),
+    ]
+
+    new_updated_at = datetime(2024, 2, 1, tzinfo=timezone.utc)
+    new_chunks = [
+        _build_chunk(0, "first", new_updated_at),
+        _build_chunk(1, "second edited", new_updated_at),
+        _build_chunk(2, "third", new_updated_at),
+    ]
+
+    chunks_to_write, refresh_requests = VespaIndex(
+        index_name="idx", secondary_index_name=None
+    )._split_unchanged_chunks(
+        chunks=new_chunks,
+        cleaned_chunks=new_chunks,
+        index_batch_params=IndexBatchParams(
+            doc_id_to_previous_chunk_cnt={"test_doc": 2},
+            doc_id_to_new_chunk_cnt={"test_doc": 3},
+            tenant_id=None,
+            large_chunks_enabled=False,
+            doc_id_to_previous_chunk_fingerprints=build_chunk_fingerprints(
+                previous_chunks, index_name="idx"
+            ),
+            doc_id_to_new_chunk_fingerprints=build_chunk_fingerprints(
+                new_chunks, index_name="idx"
+            ),
+            doc_id_to_previous_updated_at={"test_doc": previous_updated_at},
+        ),
+    )
+
+    assert [chunk.chunk_id for chunk in chunks_to_write] == [1, 2]
+    assert len(refresh_requests) == 1
+    assert refresh_requests[0].update_request == {
+        "fields": {"doc_updated_at": {"assign": int(new_updated_at.timestamp())}}
+    }
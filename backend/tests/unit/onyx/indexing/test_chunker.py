@@ -1,10 +1,21 @@
+import random
+
 import pytest
+from tokenizers import decoders  # type: ignore
+from tokenizers import models
+from tokenizers import pre_tokenizers
+from tokenizers import Regex
+from tokenizers import Tokenizer
+from tokenizers import trainers
 
 from onyx.configs.constants import DocumentSource
+from onyx.configs.constants import SECTION_SEPARATOR
 from onyx.connectors.models import Document
 from onyx.connectors.models import Section
 from onyx.indexing.chunker import Chunker
 from onyx.indexing.embedder import DefaultIndexingEmbedder
+from onyx.natural_language_processing.utils import HuggingFaceTokenizer
+from onyx.utils.text_processing import shared_precompare_cleanup
 from tests.unit.onyx.indexing.conftest import MockHeartbeat
 
 
@@ -81,3 +92,115 @@ def test_chunker_heartbeat(
 
     assert mock_heartbeat.call_count == 1
     assert len(chunks) > 0
+
+
+# pre-tokenization pattern of tiktoken's cl100k_base, merges whitespace runs and
+# trailing newlines of punctuation with the text around them
+_CL100K_PATTERN = (
+    r"(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}|"
+    r" ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"
+)
+_WORDS = "the quick brown fox jumps over 2024 12345 a. b, c: (x) foo-bar".split()
+_WHITESPACES = [" ", "  ", "\n", "\n\n", "\t", " \n", "\n ", "   \n\n"]
+
+
+def _build_section_text(rng: random.Random) -> str:
+    text = rng.choice(["", " ", "\n", "\t", "  "])
+    for _ in range(rng.randint(1, 12)):
+        text += rng.choice(_WORDS) + rng.choice(_WHITESPACES)
+    return text + rng.choice(_WORDS) + rng.choice(["", "\n", " ", "\n\n", " .\n"])
+
+
+class _ByteLevelBPETokenizer(HuggingFaceTokenizer):
+    def __init__(self) -> None:
+        tokenizer = Tokenizer(models.BPE())
+        tokenizer.pre_tokenizer = pre_tokenizers.Sequence(
+            [
+                pre_tokenizers.Split(Regex(_CL100K_PATTERN), behavior="isolated"),
+                pre_tokenizers.ByteLevel(add_prefix_space=False, use_regex=False),
+            ]
+        )
+        tokenizer.decoder = decoders.ByteLevel()
+        rng = random.Random(0)
+        tokenizer.train_from_iterator(
+            [_build_section_text(rng) for _ in range(2000)],
+            trainers.BpeTrainer(
+                vocab_size=600,
+                initial_alphabet=pre_tokenizers.ByteLevel.alphabet(),
+                show_progress=False,
+            ),
+        )
+        self.model_name = "test-byte-level-bpe"
+        self.encoder = tokenizer
+
+
+def _retokenizing_chunk_boundaries(
+    tokenizer: HuggingFaceTokenizer,
+    section_texts: list[str],
+    links: list[str],
+    content_token_limit: int,
+) -> list[tuple[str, dict[int, str]]]:
+    """How the Chunker used to combine small sections, re-tokenizing the chunk text
+    for every section"""
+    chunks: list[tuple[str, dict[int, str]]] = []
+    chunk_text = ""
+    link_offsets: dict[int, str] = {}
+    for section_text, link in zip(section_texts, links):
+        current_token_count = len(tokenizer.tokenize(chunk_text))
+        current_offset = len(shared_precompare_cleanup(chunk_text))
+        next_section_tokens = len(tokenizer.tokenize(SECTION_SEPARATOR)) + len(
+            tokenizer.tokenize(section_text)
+        )
+        if next_section_tokens + current_token_count <= content_token_limit:
+            if chunk_text:
+                chunk_text += SECTION_SEPARATOR
+            chunk_text += section_text
+            link_offsets[current_offset] = link
+        else:
+            chunks.append((chunk_text, link_offsets))
+            link_offsets = {0: link}
+            chunk_text = section_text
+    if chunk_text.strip() or not chunks:
+        chunks.append((chunk_text, link_offsets))
+    return chunks
+
+
+def test_running_token_counts_match_retokenizing_chunk_text() -> None:
+    tokenizer = _ByteLevelBPETokenizer()
+    chunker = Chunker(tokenizer=tokenizer)
+    content_token_limit = 60
+
+    rng = random.Random(42)
+    for _ in range(200):
+        section_texts = [_build_section_text(rng) for _ in range(rng.randint(1, 30))]
+        # only the combining of sections smaller than a chunk is compared
+        section_texts = [
+            text
+            for text in section_texts
+            if len(tokenizer.encode(text)) <= content_token_limit
+        ]
+        links = [f"link{ind}" for ind in range(len(section_texts))]
+        document = Document(
+            id="test_doc",
+            source=DocumentSource.WEB,
+            semantic_identifier="Test Document",
+            metadata={},
+            sections=[
+                Section(text=text, link=link)
+                for text, link in zip(section_texts, links)
+            ],
+        )
+
+        chunks = chunker._chunk_document(
+            document,
+            title_prefix="",
+            metadata_suffix_semantic="",
+            metadata_suffix_keyword="",
+            content_token_limit=content_token_limit,
+        )
+
+        assert [
+            (chunk.content, chunk.source_links) for chunk in chunks
+        ] == _retokenizing_chunk_boundaries(
+            tokenizer, section_texts, links, content_token_limit
+        )
@@ -32,9 +32,9 @@ def test_default_indexing_embedder_embed_chunks(mock_embedding_model: Mock) -> N
     )
 
     # Mock the encode method of the embedding model
-    mock_embedding_model.return_value.encode.side_effect = [
-        [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]],  # Main chunk embeddings
-        [[7.0, 8.0, 9.0]],  # Title embedding
+    mock_embedding_model.return_value.encode.return_value = [
+        [1.0, 2.0, 3.0],  # Main chunk embedding
+        [7.0, 8.0, 9.0],  # Title embedding
     ]
 
     # Create test input
@@ -77,15 +77,13 @@ def test_default_indexing_embedder_embed_chunks(mock_embedding_model: Mock) -> N
         mini_chunk_embeddings=[],
     )
     assert result[0].title_embedding == [7.0, 8.0, 9.0]
+    # the source document is shared with the chunk, not copied
+    assert result[0].source_document is source_doc
 
-    # Verify the embedding model was called correctly
-    mock_embedding_model.return_value.encode.assert_any_call(
-        texts=["Title: Test chunk"],
+    # Chunks and titles are embedded together
+    mock_embedding_model.return_value.encode.assert_called_once_with(
+        texts=["Title: Test chunk", "Test Document"],
         text_type=EmbedTextType.PASSAGE,
         large_chunks_present=False,
-    )
-    # title only embedding call
-    mock_embedding_model.return_value.encode.assert_any_call(
-        ["Test Document"],
-        text_type=EmbedTextType.PASSAGE,
+        sort_by_length=True,
     )
@@ -0,0 +1,77 @@
+from collections.abc import Generator
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.indexing.embedding_cache import EmbeddingCache
+from shared_configs.enums import EmbedTextType
+
+
+@contextmanager
+def _fake_session() -> Generator[MagicMock, None, None]:
+    yield MagicMock()
+
+
+@pytest.fixture
+def cache_store() -> Generator[dict[str, bytes], None, None]:
+    store: dict[str, bytes] = {}
+
+    def _fetch(db_session: MagicMock, cache_keys: list[str]) -> dict[str, bytes]:
+        return {key: store[key] for key in cache_keys if key in store}
+
+    def _upsert(db_session: MagicMock, key_to_embedding: dict[str, bytes]) -> None:
+        store.update(key_to_embedding)
+
+    with patch(
+        "onyx.indexing.embedding_cache.get_session_with_default_tenant", _fake_session
+    ), patch(
+        "onyx.indexing.embedding_cache.fetch_cached_embeddings", side_effect=_fetch
+    ), patch(
+        "onyx.indexing.embedding_cache.upsert_cached_embeddings", side_effect=_upsert
+    ), patch(
+        "onyx.indexing.embedding_cache.evict_embedding_cache_entries"
+    ):
+        yield store
+
+
+def _build_cache(model_name: str = "test-model") -> EmbeddingCache:
+    return EmbeddingCache(
+        model_name=model_name,
+        provider_type=None,
+        normalize=True,
+        query_prefix=None,
+        passage_prefix="passage: ",
+    )
+
+
+def test_embedding_cache_only_embeds_missing_texts(
+    cache_store: dict[str, bytes]
+) -> None:
+    cache = _build_cache()
+    encode = Mock(side_effect=lambda texts: [[float(len(t)), 0.5] for t in texts])
+
+    first = cache.get_or_embed(["a", "bb", "a"], EmbedTextType.PASSAGE, encode)
+    assert first == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5]]
+    # duplicates within a batch are only embedded once
+    encode.assert_called_once_with(["a", "bb"])
+
+    encode.reset_mock()
+    second = cache.get_or_embed(["bb", "ccc", "a"], EmbedTextType.PASSAGE, encode)
+    assert second == [[2.0, 0.5], [3.0, 0.5], [1.0, 0.5]]
+    encode.assert_called_once_with(["ccc"])
+    assert len(cache_store) == 3
+
+
+def test_embedding_cache_key_depends_on_model_settings() -> None:
+    cache = _build_cache()
+    key = cache.build_cache_key("some text", EmbedTextType.PASSAGE)
+
+    assert key == _build_cache().build_cache_key("some text", EmbedTextType.PASSAGE)
+    assert key != cache.build_cache_key("some text", EmbedTextType.QUERY)
+    assert key != cache.build_cache_key("other text", EmbedTextType.PASSAGE)
+    assert key != _build_cache("other-model").build_cache_key(
+        "some text", EmbedTextType.PASSAGE
+    )
@@ -1,9 +1,18 @@
+import contextlib
+from collections.abc import Iterator
 from typing import List
+from unittest.mock import MagicMock
+from unittest.mock import Mock
+
+import pytest
 
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.connectors.models import Document
 from onyx.connectors.models import DocumentSource
 from onyx.connectors.models import Section
+from onyx.document_index.interfaces import DocumentInsertionRecord
+from onyx.indexing.indexing_pipeline import _embed_chunk_sub_batches
+from onyx.indexing.indexing_pipeline import _index_doc_batch_write_sub_batches
 from onyx.indexing.indexing_pipeline import filter_documents
 
 
@@ -118,3 +127,124 @@ def test_filter_documents_multiple_documents() -> None:
 def test_filter_documents_empty_batch() -> None:
     result = filter_documents([])
     assert len(result) == 0
+
+
+def test_embed_chunk_sub_batches_bounds_chunks_per_sub_batch() -> None:
+    doc_chunk_counts = {"small": 1, "large": 7, "empty": 0, "last": 2}
+    chunker = Mock()
+    chunker.chunk.side_effect = lambda docs: [
+        (docs[0].id, ind) for ind in range(doc_chunk_counts[docs[0].id])
+    ]
+    embedder = Mock()
+    embedder.embed_chunks.side_effect = lambda chunks: list(chunks)
+
+    sub_batches = list(
+        _embed_chunk_sub_batches(
+            documents=[create_test_document(doc_id) for doc_id in doc_chunk_counts],
+            chunker=chunker,
+            embedder=embedder,
+            max_chunks=3,
+        )
+    )
+
+    assert [len(chunks) for chunks, _ in sub_batches] == [3, 3, 3, 1]
+    # the chunk count of a document comes with the sub batch of its first chunk
+    assert [chunk_counts for _, chunk_counts in sub_batches] == [
+        {"small": 1, "large": 7},
+        {},
+        {"empty": 0, "last": 2},
+        {},
+    ]
+    assert [chunk for chunks, _ in sub_batches for chunk in chunks][7:9] == [
+        ("large", 6),
+        ("last", 0),
+    ]
+
+
+def test_write_sub_batches_embeds_before_locking(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    events: list[tuple] = []
+
+    @contextlib.contextmanager
+    def _lock_documents(db_session: object, document_ids: list[str]) -> Iterator[None]:
+        events.append(("lock", document_ids))
+        yield
+        events.append(("unlock",))
+
+    module = "onyx.indexing.indexing_pipeline"
+    monkeypatch.setattr(f"{module}.prepare_to_modify_documents", _lock_documents)
+    monkeypatch.setattr(f"{module}.get_access_for_documents", lambda **kwargs: {})
+    monkeypatch.setattr(
+        f"{module}.fetch_document_sets_for_documents", lambda **kwargs: []
+    )
+    monkeypatch.setattr(
+        f"{module}.fetch_chunk_counts_for_documents", lambda **kwargs: []
+    )
+    monkeypatch.setattr(
+        f"{module}.fetch_chunk_fingerprints_for_documents", lambda **kwargs: {}
+    )
+    monkeypatch.setattr(f"{module}.build_chunk_fingerprints", lambda *a, **kw: {})
+    monkeypatch.setattr(
+        f"{module}.DocMetadataAwareIndexChunk.from_index_chunk",
+        lambda index_chunk, **kwargs: index_chunk,
+    )
+    monkeypatch.setattr(
+        f"{module}.update_docs_chunk_count__no_commit",
+        lambda document_ids, **kwargs: events.append(("chunk_count", document_ids)),
+    )
+    for update_fn in [
+        "update_docs_updated_at__no_commit",
+        "update_docs_last_modified__no_commit",
+        "update_docs_chunk_fingerprints__no_commit",
+        "mark_document_as_indexed_for_cc_pair__no_commit",
+    ]:
+        monkeypatch.setattr(f"{module}.{update_fn}", lambda **kwargs: None)
+
+    def _chunk(doc_id: str) -> Mock:
+        chunk = Mock()
+        chunk.source_document.id = doc_id
+        return chunk
+
+    def _embedded_sub_batches() -> Iterator[tuple[list, dict[str, int]]]:
+        # "large" is split across both sub batches
+        events.append(("embed", 0))
+        yield [_chunk("small"), _chunk("large")], {"small": 1, "large": 3}
+        events.append(("embed", 1))
+        yield [_chunk("large"), _chunk("large")], {}
+
+    document_index = MagicMock()
+    document_index.index.side_effect = lambda chunks, index_batch_params: {
+        DocumentInsertionRecord(
+            document_id=chunk.source_document.id, already_existed=False
+        )
+        for chunk in chunks
+    }
+    documents = [create_test_document("small"), create_test_document("large")]
+
+    result = _index_doc_batch_write_sub_batches(
+        ctx=MagicMock(updatable_docs=documents, id_to_db_doc_map={}),
+        embedded_sub_batches=_embedded_sub_batches(),
+        filtered_documents=documents,
+        document_index=document_index,
+        index_attempt_metadata=MagicMock(),
+        db_session=MagicMock(),
+        large_chunks_enabled=False,
+    )
+
+    assert result.total_chunks == 4
+    assert result.new_docs == 2
+    # every sub batch is embedded before its documents are locked, a document's
+    # chunk count is only updated with its last chunk
+    assert events == [
+        ("embed", 0),
+        ("lock", ["small", "large"]),
+        ("chunk_count", ["small"]),
+        ("unlock",),
+        ("embed", 1),
+        ("lock", ["large"]),
+        ("chunk_count", ["large"]),
+        ("unlock",),
+        ("lock", ["small", "large"]),
+        ("unlock",),
+    ]
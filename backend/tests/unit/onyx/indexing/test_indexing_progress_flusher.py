@@ -0,0 +1,78 @@
+from contextlib import contextmanager
+from datetime import datetime
+from datetime import timezone
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from onyx.background.indexing import run_indexing
+from onyx.background.indexing.checkpointing import IndexAttemptCheckpoint
+from onyx.background.indexing.run_indexing import IndexingProgressFlusher
+
+
+@pytest.fixture
+def update_docs_indexed(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    @contextmanager
+    def _get_session_with_tenant(tenant_id: str | None) -> Any:
+        yield MagicMock()
+
+    mock = MagicMock()
+    monkeypatch.setattr(
+        run_indexing, "get_session_with_tenant", _get_session_with_tenant
+    )
+    monkeypatch.setattr(run_indexing, "update_docs_indexed", mock)
+    return mock
+
+
+def _checkpoint(batch_num: int) -> IndexAttemptCheckpoint:
+    return IndexAttemptCheckpoint(
+        window_start=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        window_end=datetime(2024, 2, 1, tzinfo=timezone.utc),
+        connector_config_digest="digest",
+        batch_num=batch_num,
+        connector_checkpoint={"cursor": batch_num},
+    )
+
+
+def test_progress_is_coalesced_until_flushed(update_docs_indexed: MagicMock) -> None:
+    flusher = IndexingProgressFlusher(
+        index_attempt_id=1, tenant_id=None, flush_interval=3600
+    )
+
+    # the first update is written right away
+    flusher.update(total_docs_indexed=10, new_docs_indexed=5)
+    assert update_docs_indexed.call_count == 1
+
+    flusher.update(
+        total_docs_indexed=20, new_docs_indexed=10, checkpoint=_checkpoint(2)
+    )
+    flusher.update(total_docs_indexed=30, new_docs_indexed=15)
+    assert update_docs_indexed.call_count == 1
+
+    # the latest counts are written together with the latest checkpoint
+    flusher.flush()
+    assert update_docs_indexed.call_count == 2
+    kwargs = update_docs_indexed.call_args.kwargs
+    assert kwargs["total_docs_indexed"] == 30
+    assert kwargs["new_docs_indexed"] == 15
+    assert kwargs["checkpoint"]["connector_checkpoint"] == {"cursor": 2}
+
+    # nothing new to write
+    flusher.flush()
+    assert update_docs_indexed.call_count == 2
+
+
+def test_progress_is_written_every_batch_without_interval(
+    update_docs_indexed: MagicMock,
+) -> None:
+    flusher = IndexingProgressFlusher(
+        index_attempt_id=1, tenant_id=None, flush_interval=0
+    )
+
+    for batch_num in range(1, 4):
+        flusher.update(total_docs_indexed=batch_num * 10, new_docs_indexed=0)
+
+    assert update_docs_indexed.call_count == 3
+    # a flush without a new checkpoint keeps the stored one
+    assert update_docs_indexed.call_args.kwargs["checkpoint"] is None
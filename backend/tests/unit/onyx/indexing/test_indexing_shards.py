@@ -0,0 +1,188 @@
+import time
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from onyx.background.indexing.checkpointing import get_time_window_shards
+from onyx.background.indexing.run_indexing import _wait_for_shards
+from onyx.background.indexing.sharding import IndexingShard
+from onyx.background.indexing.sharding import IndexingShardCoordinator
+from onyx.background.indexing.sharding import IndexingShardResult
+
+
+def _build_shards(num_shards: int) -> list[IndexingShard]:
+    return [
+        IndexingShard(
+            shard_index=shard_index,
+            window_start=datetime(2000 + shard_index, 1, 1, tzinfo=timezone.utc),
+            window_end=datetime(2001 + shard_index, 1, 1, tzinfo=timezone.utc),
+        )
+        for shard_index in range(num_shards)
+    ]
+
+
+def _index_shard_not_expected(shard: IndexingShard) -> None:
+    raise AssertionError(f"shard {shard.shard_index} should not be indexed here")
+
+
+class _FakeShardCoordinator(IndexingShardCoordinator):
+    def __init__(self) -> None:
+        self.results: dict[int, IndexingShardResult] = {}
+
+    def dispatch(self, shard: IndexingShard) -> None:
+        pass
+
+    def claim(self, shard_index: int) -> bool:
+        if shard_index in self.results:
+            return False
+        self.results[shard_index] = IndexingShardResult()
+        return True
+
+    def report(self, shard_index: int, result: IndexingShardResult) -> None:
+        self.results[shard_index] = result
+
+    def get_results(self) -> dict[int, IndexingShardResult]:
+        return dict(self.results)
+
+
+def test_time_window_shards_cover_the_whole_range() -> None:
+    start = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    end = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    shards = get_time_window_shards(start, end, num_shards=4)
+
+    assert len(shards) == 4
+    assert shards[0][0] == start
+    assert shards[-1][1] == end
+    for (_, previous_end), (next_start, _) in zip(shards, shards[1:]):
+        assert previous_end == next_start
+    # everything before 2010 is part of the first shard, the rest is split evenly
+    assert shards[1][0] == datetime(2013, 7, 2, 6, tzinfo=timezone.utc)
+    assert shards[3][1] - shards[3][0] == shards[1][1] - shards[1][0]
+
+
+def test_wait_for_shards_aggregates_results(monkeypatch: pytest.MonkeyPatch) -> None:
+    shard_coordinator = _FakeShardCoordinator()
+    shard_coordinator.report(0, IndexingShardResult(total_docs=5))
+    shard_coordinator.report(1, IndexingShardResult(finished=True, total_docs=7))
+
+    def _finish_shard(seconds: float) -> None:
+        shard_coordinator.report(0, IndexingShardResult(finished=True, total_docs=10))
+
+    monkeypatch.setattr("time.sleep", _finish_shard)
+    progress_flusher = MagicMock()
+
+    results = _wait_for_shards(
+        shard_coordinator,
+        _build_shards(2),
+        index_shard=_index_shard_not_expected,
+        callback=None,
+        progress_flusher=progress_flusher,
+        total_docs_indexed=3,
+        new_docs_indexed=0,
+        dispatched_at=time.monotonic(),
+    )
+
+    assert [result.total_docs for result in results] == [10, 7]
+    # the progress while waiting includes the shards
+    assert progress_flusher.update.call_args.kwargs["total_docs_indexed"] == 15
+
+
+def test_wait_for_shards_raises_on_failed_shard() -> None:
+    shard_coordinator = _FakeShardCoordinator()
+    shard_coordinator.report(
+        0, IndexingShardResult(finished=True, error="source unavailable")
+    )
+
+    with pytest.raises(RuntimeError, match="source unavailable"):
+        _wait_for_shards(
+            shard_coordinator,
+            _build_shards(1),
+            index_shard=_index_shard_not_expected,
+            callback=None,
+            progress_flusher=MagicMock(),
+            total_docs_indexed=0,
+            new_docs_indexed=0,
+            dispatched_at=time.monotonic(),
+        )
+
+
+def test_wait_for_shards_indexes_unclaimed_shards_itself(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    shard_coordinator = _FakeShardCoordinator()
+    # shard 1 runs elsewhere, shard 0 was never picked up by a worker
+    shard_coordinator.report(1, IndexingShardResult(total_docs=2))
+    indexed_here: list[int] = []
+
+    def _index_shard(shard: IndexingShard) -> None:
+        indexed_here.append(shard.shard_index)
+        shard_coordinator.report(
+            shard.shard_index, IndexingShardResult(finished=True, total_docs=4)
+        )
+
+    def _finish_shard(seconds: float) -> None:
+        shard_coordinator.report(1, IndexingShardResult(finished=True, total_docs=7))
+
+    monkeypatch.setattr("time.sleep", _finish_shard)
+
+    results = _wait_for_shards(
+        shard_coordinator,
+        _build_shards(2),
+        index_shard=_index_shard,
+        callback=None,
+        progress_flusher=MagicMock(),
+        total_docs_indexed=0,
+        new_docs_indexed=0,
+        dispatched_at=time.monotonic(),
+    )
+
+    assert indexed_here == [0]
+    assert [result.total_docs for result in results] == [4, 7]
+
+
+def test_wait_for_shards_times_out(monkeypatch: pytest.MonkeyPatch) -> None:
+    shard_coordinator = _FakeShardCoordinator()
+    shard_coordinator.report(0, IndexingShardResult(total_docs=5))
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    monkeypatch.setattr(
+        "onyx.background.indexing.run_indexing.INDEXING_SHARD_TIMEOUT", 60
+    )
+
+    with pytest.raises(RuntimeError, match="did not finish"):
+        _wait_for_shards(
+            shard_coordinator,
+            _build_shards(1),
+            index_shard=_index_shard_not_expected,
+            callback=None,
+            progress_flusher=MagicMock(),
+            total_docs_indexed=0,
+            new_docs_indexed=0,
+            dispatched_at=time.monotonic() - 61,
+        )
+
+
+def test_wait_for_shards_fails_on_shard_which_never_starts(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    shard_coordinator = _FakeShardCoordinator()
+    # claimed by another worker whose result never shows up
+    monkeypatch.setattr(shard_coordinator, "claim", lambda shard_index: False)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    monkeypatch.setattr(
+        "onyx.background.indexing.run_indexing.INDEXING_SHARD_START_TIMEOUT", -1
+    )
+
+    with pytest.raises(RuntimeError, match="not started"):
+        _wait_for_shards(
+            shard_coordinator,
+            _build_shards(1),
+            index_shard=_index_shard_not_expected,
+            callback=None,
+            progress_flusher=MagicMock(),
+            total_docs_indexed=0,
+            new_docs_indexed=0,
+            dispatched_at=time.monotonic(),
+        )
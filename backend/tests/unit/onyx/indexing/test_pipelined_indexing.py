@@ -0,0 +1,151 @@
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import IndexAttemptMetadata
+from onyx.connectors.models import Section
+from onyx.indexing.indexing_pipeline import DocumentBatchPrepareContext
+from onyx.indexing.indexing_pipeline import IndexingPipelineResult
+from onyx.indexing.pipelined_indexing import PipelinedIndexingPipeline
+
+
+def _create_doc(doc_id: str) -> Document:
+    return Document(
+        id=doc_id,
+        source=DocumentSource.FILE,
+        semantic_identifier=doc_id,
+        sections=[Section(text=f"content of {doc_id}", link=None)],
+        metadata={},
+    )
+
+
+@contextmanager
+def _fake_session(tenant_id: str | None) -> Generator[MagicMock, None, None]:
+    yield MagicMock()
+
+
+@pytest.fixture
+def patched_pipeline() -> Generator[dict[str, Mock], None, None]:
+    def _prepare(documents: list[Document], **kwargs: Any) -> Any:
+        return DocumentBatchPrepareContext(
+            updatable_docs=documents, id_to_db_doc_map={}
+        )
+
+    def _write(
+        ctx: DocumentBatchPrepareContext, chunks_with_embeddings: list, **kwargs: Any
+    ) -> IndexingPipelineResult:
+        return IndexingPipelineResult(
+            new_docs=len(ctx.updatable_docs),
+            total_docs=len(ctx.updatable_docs),
+            total_chunks=len(chunks_with_embeddings),
+        )
+
+    with patch(
+        "onyx.indexing.pipelined_indexing.index_doc_batch_prepare",
+        side_effect=_prepare,
+    ) as prepare_mock, patch(
+        "onyx.indexing.pipelined_indexing.index_doc_batch_write", side_effect=_write
+    ) as write_mock, patch(
+        "onyx.indexing.pipelined_indexing.get_session_with_tenant", _fake_session
+    ):
+        yield {"prepare": prepare_mock, "write": write_mock}
+
+
+def _build_pipeline(embedder: Mock) -> PipelinedIndexingPipeline:
+    chunker = Mock()
+    chunker.enable_large_chunks = False
+    chunker.chunk.side_effect = lambda docs: [f"chunk-{doc.id}" for doc in docs]
+    return PipelinedIndexingPipeline(
+        chunker=chunker,
+        embedder=embedder,
+        document_index=Mock(),
+        db_session=MagicMock(),
+        index_attempt_metadata=IndexAttemptMetadata(connector_id=1, credential_id=1),
+        queue_size=1,
+    )
+
+
+def test_pipelined_indexing_processes_all_batches(
+    patched_pipeline: dict[str, Mock]
+) -> None:
+    embedder = Mock()
+    embedder.embed_chunks.side_effect = lambda chunks: chunks
+    pipeline = _build_pipeline(embedder)
+
+    total_docs = 0
+    for batch_num in range(5):
+        result = pipeline.submit(
+            [_create_doc(f"doc-{batch_num}-{i}") for i in range(3)],
+            batch_num=batch_num,
+        )
+        total_docs += result.total_docs
+    result = pipeline.drain()
+    total_docs += result.total_docs
+    pipeline.close()
+
+    assert total_docs == 15
+    assert patched_pipeline["write"].call_count == 5
+    # batches must be written in the order they were submitted
+    written_doc_ids = [
+        call.kwargs["ctx"].updatable_docs[0].id
+        for call in patched_pipeline["write"].call_args_list
+    ]
+    assert written_doc_ids == [f"doc-{batch_num}-0" for batch_num in range(5)]
+
+
+def test_pipelined_indexing_propagates_failures(
+    patched_pipeline: dict[str, Mock]
+) -> None:
+    embedder = Mock()
+    embedder.embed_chunks.side_effect = RuntimeError("model server down")
+    pipeline = _build_pipeline(embedder)
+
+    pipeline.submit([_create_doc("doc-1")], batch_num=1)
+    with pytest.raises(RuntimeError, match="model server down"):
+        pipeline.drain()
+    pipeline.close()
+
+    assert patched_pipeline["write"].call_count == 0
+
+
+def test_pipelined_indexing_finished_batch_count_is_in_order(
+    patched_pipeline: dict[str, Mock]
+) -> None:
+    release_embedding = threading.Event()
+
+    def _embed(chunks: list) -> list:
+        release_embedding.wait()
+        return chunks
+
+    def _chunk(docs: list[Document]) -> list[str]:
+        if docs[0].id == "doc-2":
+            raise RuntimeError("bad document")
+        return [f"chunk-{doc.id}" for doc in docs]
+
+    embedder = Mock()
+    embedder.embed_chunks.side_effect = _embed
+    pipeline = _build_pipeline(embedder)
+    pipeline.chunker.chunk.side_effect = _chunk  # type: ignore[attr-defined]
+
+    with patch("onyx.indexing.pipelined_indexing.handle_indexing_batch_exception"):
+        pipeline.submit([_create_doc("doc-1")], batch_num=1)
+        pipeline.submit([_create_doc("doc-2")], batch_num=2)
+        # the second batch fails while the first one is still being embedded
+        while pipeline.chunker.chunk.call_count < 2:  # type: ignore[attr-defined]
+            time.sleep(0.01)
+        assert pipeline.finished_batch_count() == 0
+
+        release_embedding.set()
+        pipeline.drain()
+    pipeline.close()
+
+    assert pipeline.finished_batch_count() == 2
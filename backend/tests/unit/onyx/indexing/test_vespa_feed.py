@@ -0,0 +1,101 @@
+import asyncio
+from collections import Counter
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from onyx.document_index.vespa.feed import close_vespa_feed_loop
+from onyx.document_index.vespa.feed import feed_vespa_operations
+from onyx.document_index.vespa.feed import VespaFeedOperation
+from onyx.document_index.vespa.feed import VespaFeedResult
+from onyx.document_index.vespa.indexing_utils import _hex_tensor_cells
+
+
+@pytest.fixture(autouse=True)
+def _fresh_feed_loop() -> Iterator[None]:
+    # clients are cached on the process wide loop, each test patches its own transport
+    close_vespa_feed_loop()
+    yield
+    close_vespa_feed_loop()
+
+
+def _run_feed_against(
+    transport: httpx.MockTransport,
+    operations: list[VespaFeedOperation],
+    num_calls: int = 1,
+) -> list[VespaFeedResult]:
+    built_clients: list[httpx.AsyncClient] = []
+
+    def _build_client(*args: object, **kwargs: object) -> httpx.AsyncClient:
+        built_clients.append(httpx.AsyncClient(transport=transport))
+        return built_clients[-1]
+
+    with patch(
+        "onyx.document_index.vespa.feed.get_vespa_async_http_client", _build_client
+    ), patch("onyx.document_index.vespa.feed._INITIAL_BACKOFF_SECONDS", 0):
+        for _ in range(num_calls):
+            results = feed_vespa_operations(operations, max_in_flight=4)
+
+    # a single small pool, reused across calls
+    assert len(built_clients) == 1
+    return results
+
+
+def test_feed_retries_throttled_operations() -> None:
+    attempts: Counter[str] = Counter()
+
+    def _handle(request: httpx.Request) -> httpx.Response:
+        attempts[request.url.path] += 1
+        if request.url.path.endswith("/bad"):
+            return httpx.Response(400, text="invalid document")
+        # every operation is throttled once before it goes through
+        if attempts[request.url.path] == 1:
+            return httpx.Response(429)
+        return httpx.Response(200, json={})
+
+    operations = [
+        VespaFeedOperation.build(
+            method="POST",
+            url=f"http://vespa/document/v1/chunk-{i}",
+            body={"fields": {"chunk_id": i}},
+            operation_id=str(i),
+        )
+        for i in range(10)
+    ] + [VespaFeedOperation.build(method="DELETE", url="http://vespa/bad")]
+
+    results = _run_feed_against(httpx.MockTransport(_handle), operations)
+
+    assert [result.operation for result in results] == operations
+    assert all(result.success for result in results[:-1])
+    assert not results[-1].success
+    assert results[-1].status_code == 400
+    # non-retryable errors are not retried
+    assert attempts["/bad"] == 1
+    assert all(attempts[f"/document/v1/chunk-{i}"] == 2 for i in range(10))
+
+
+def test_feed_reuses_clients_and_runs_inside_event_loop() -> None:
+    requests: list[str] = []
+
+    def _handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return httpx.Response(200, json={})
+
+    operations = [
+        VespaFeedOperation.build(method="DELETE", url=f"http://vespa/chunk-{i}")
+        for i in range(3)
+    ]
+
+    async def _feed_from_coroutine() -> list[VespaFeedResult]:
+        return _run_feed_against(httpx.MockTransport(_handle), operations, num_calls=2)
+
+    results = asyncio.run(_feed_from_coroutine())
+
+    assert all(result.success for result in results)
+    assert len(requests) == 6
+
+
+def test_hex_tensor_cells_are_big_endian_floats() -> None:
+    assert _hex_tensor_cells([1.0, -2.0, 0.5]) == "3f800000c00000003f000000"
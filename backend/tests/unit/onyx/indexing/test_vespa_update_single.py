@@ -0,0 +1,125 @@
+from unittest.mock import Mock
+from unittest.mock import patch
+from uuid import UUID
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from onyx.access.models import DocumentAccess
+from onyx.document_index.interfaces import VespaDocumentFields
+from onyx.document_index.vespa import indexing_utils
+from onyx.document_index.vespa.index import VespaIndex
+from onyx.document_index.vespa.indexing_utils import get_multipass_config_for_index
+from onyx.indexing.models import MultipassConfig
+
+
+def _update_single(http_client: Mock, doc_chunk_ids: list[UUID]) -> int:
+    with patch(
+        "onyx.document_index.vespa.index.get_shared_vespa_http_client",
+        return_value=http_client,
+    ), patch(
+        "onyx.document_index.vespa.index.get_multipass_config_for_index",
+        return_value=MultipassConfig(
+            multipass_indexing=False, enable_large_chunks=False
+        ),
+    ), patch.object(
+        VespaIndex, "enrich_basic_chunk_info"
+    ), patch(
+        "onyx.document_index.vespa.index.get_document_chunk_ids",
+        return_value=doc_chunk_ids,
+    ):
+        return VespaIndex(index_name="idx", secondary_index_name=None).update_single(
+            "doc",
+            chunk_count=len(doc_chunk_ids),
+            tenant_id=None,
+            fields=VespaDocumentFields(
+                access=DocumentAccess.build(
+                    user_emails=["a@test.com"],
+                    user_groups=[],
+                    external_user_emails=[],
+                    external_user_group_ids=[],
+                    is_public=False,
+                ),
+                hidden=True,
+            ),
+        )
+
+
+def test_update_single_updates_all_chunks_with_shared_client() -> None:
+    http_client = Mock()
+    doc_chunk_ids = [uuid4() for _ in range(50)]
+
+    assert _update_single(http_client, doc_chunk_ids) == 50
+
+    assert sorted(
+        call.args[0].split("?")[0].rsplit("/", 1)[-1]
+        for call in http_client.put.call_args_list
+    ) == sorted(str(doc_chunk_id) for doc_chunk_id in doc_chunk_ids)
+    assert all(
+        call.kwargs["json"]["fields"]["hidden"] == {"assign": True}
+        for call in http_client.put.call_args_list
+    )
+
+
+def test_update_single_raises_chunk_failures() -> None:
+    http_client = Mock()
+    http_client.put.return_value.raise_for_status.side_effect = httpx.HTTPStatusError(
+        "bad request", request=Mock(), response=Mock()
+    )
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _update_single(http_client, [uuid4() for _ in range(5)])
+
+
+def test_multipass_config_is_cached_per_index() -> None:
+    search_settings = Mock(
+        index_name="idx", multipass_indexing=True, model_name="nomic-ai/model"
+    )
+    with patch.object(indexing_utils, "_multipass_config_cache", {}), patch(
+        "onyx.document_index.vespa.indexing_utils.get_session_with_tenant"
+    ), patch(
+        "onyx.document_index.vespa.indexing_utils.get_current_search_settings",
+        return_value=search_settings,
+    ) as mock_get_settings:
+        for _ in range(3):
+            config = get_multipass_config_for_index(
+                "idx", primary_index=True, tenant_id=None
+            )
+        assert config.multipass_indexing
+        assert mock_get_settings.call_count == 1
+
+        # not cached when the settings belong to another index (e.g. after a swap)
+        for _ in range(2):
+            get_multipass_config_for_index(
+                "old_idx", primary_index=True, tenant_id=None
+            )
+        assert mock_get_settings.call_count == 3
+
+
+def test_update_documents_by_selection_follows_continuation() -> None:
+    http_client = Mock()
+    http_client.put.return_value.json.side_effect = [
+        {"documentCount": 3, "continuation": "token"},
+        {"documentCount": 2},
+    ]
+
+    with patch(
+        "onyx.document_index.vespa.index.get_shared_vespa_http_client",
+        return_value=http_client,
+    ):
+        chunks_updated = VespaIndex(
+            index_name="idx", secondary_index_name=None
+        )._update_documents_by_selection(
+            ["doc1", "doc\\2"], VespaDocumentFields(hidden=True), tenant_id=None
+        )
+
+    assert chunks_updated == 5
+    first_call, second_call = http_client.put.call_args_list
+    assert (
+        first_call.kwargs["params"]["selection"]
+        == "(idx.document_id=='doc1' or idx.document_id=='doc\\\\2')"
+    )
+    assert "continuation" not in first_call.kwargs["params"]
+    assert second_call.kwargs["params"]["continuation"] == "token"
+    assert first_call.kwargs["json"] == {"fields": {"hidden": {"assign": True}}}
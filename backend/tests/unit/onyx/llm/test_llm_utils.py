@@ -0,0 +1,55 @@
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from onyx.llm import utils
+from onyx.llm.utils import get_llm_max_output_tokens
+from onyx.llm.utils import get_llm_max_tokens
+from onyx.llm.utils import get_model_capabilities
+
+_MODEL_MAP = {
+    "openai/gpt-4o": {
+        "max_tokens": 16_384,
+        "max_input_tokens": 128_000,
+        "max_output_tokens": 16_384,
+    },
+    "llama3.2": {"max_tokens": 8_000},
+}
+
+
+def _reset_model_capabilities() -> None:
+    utils._model_capabilities_map = None
+    get_model_capabilities.cache_clear()
+
+
+@pytest.fixture
+def model_map() -> Iterator[MagicMock]:
+    with patch.object(utils, "get_model_map", return_value=_MODEL_MAP) as mock:
+        _reset_model_capabilities()
+        yield mock
+    _reset_model_capabilities()
+
+
+def test_model_capabilities_lookup(model_map: MagicMock) -> None:
+    gpt_4o = get_model_capabilities("gpt-4o", "openai")
+    assert gpt_4o is not None
+    assert (gpt_4o.max_input_tokens, gpt_4o.max_output_tokens) == (128_000, 16_384)
+    # extra provider prefix from a model proxy
+    assert get_model_capabilities("proxy/gpt-4o", "openai") == gpt_4o
+
+    # ollama tag, no provider specific entry
+    llama = get_model_capabilities("llama3.2:3b", "ollama")
+    assert llama is not None
+    assert (llama.max_input_tokens, llama.max_output_tokens) == (8_000, 800)
+
+    assert get_model_capabilities("unknown", "openai") is None
+
+
+def test_model_map_is_only_read_once(model_map: MagicMock) -> None:
+    for _ in range(3):
+        assert get_llm_max_tokens("gpt-4o", "openai") == 128_000
+        assert get_llm_max_output_tokens("gpt-4o", "openai") == 16_384
+    assert get_llm_max_tokens("llama3.2", "ollama") == 8_000
+    assert model_map.call_count == 1
@@ -0,0 +1,71 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from onyx.natural_language_processing.query_embedding_cache import (
+    QueryEmbeddingCache,
+)
+
+
+def test_query_embedding_cache_hits_and_expiry() -> None:
+    cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=60)
+    calls: list[str] = []
+
+    def _embed(query: str) -> list[float]:
+        calls.append(query)
+        return [float(len(query))]
+
+    assert cache.get_or_embed(("a",), lambda: _embed("a")) == [1.0]
+    assert cache.get_or_embed(("a",), lambda: _embed("a")) == [1.0]
+    assert calls == ["a"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # least recently used entry is evicted
+    cache.get_or_embed(("bb",), lambda: _embed("bb"))
+    cache.get_or_embed(("ccc",), lambda: _embed("ccc"))
+    cache.get_or_embed(("a",), lambda: _embed("a"))
+    assert calls == ["a", "bb", "ccc", "a"]
+
+    expiring_cache = QueryEmbeddingCache(max_entries=2, ttl_seconds=0)
+    expiring_cache.get_or_embed(("a",), lambda: _embed("a"))
+    expiring_cache.get_or_embed(("a",), lambda: _embed("a"))
+    assert expiring_cache.misses == 2
+
+
+def test_query_embedding_cache_coalesces_concurrent_misses() -> None:
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60)
+    release = threading.Event()
+    calls = 0
+
+    def _slow_embed() -> list[float]:
+        nonlocal calls
+        calls += 1
+        release.wait(timeout=5)
+        return [1.0]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(cache.get_or_embed, ("query",), _slow_embed)
+            for _ in range(4)
+        ]
+        # let every caller reach the cache before the model server call returns
+        while cache.misses + cache.coalesced < 4:
+            time.sleep(0.01)
+        release.set()
+        assert [future.result() for future in futures] == [[1.0]] * 4
+
+    assert calls == 1
+    assert (cache.misses, cache.coalesced) == (1, 3)
+
+
+def test_query_embedding_cache_does_not_cache_errors() -> None:
+    cache = QueryEmbeddingCache(max_entries=10, ttl_seconds=60)
+
+    def _fail() -> list[float]:
+        raise RuntimeError("model server down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_embed(("query",), _fail)
+    assert cache.get_or_embed(("query",), lambda: [2.0]) == [2.0]
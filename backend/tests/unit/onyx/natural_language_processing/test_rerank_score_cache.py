@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+from onyx.natural_language_processing import rerank_score_cache
+from onyx.natural_language_processing.rerank_score_cache import rerank_passages
+from onyx.natural_language_processing.rerank_score_cache import RerankScoreCache
+from onyx.natural_language_processing.search_nlp_models import RerankingModel
+
+
+class _FakeRerankingModel(RerankingModel):
+    def __init__(self) -> None:
+        super().__init__(
+            model_name="fake-reranker", provider_type=None, api_key=None, api_url=None
+        )
+        self.scored_passages: list[str] = []
+
+    def predict(self, query: str, passages: list[str]) -> list[float]:
+        self.scored_passages.extend(passages)
+        return [float(len(passage)) for passage in passages]
+
+
+def test_rerank_passages_only_scores_uncached_passages() -> None:
+    model = _FakeRerankingModel()
+    cache = RerankScoreCache(max_entries=10, ttl_seconds=60)
+
+    with patch.object(rerank_score_cache, "_rerank_score_cache", cache):
+        assert rerank_passages(
+            model, query="q", chunk_ids=["a", "b"], passages=["x", "yy"]
+        ) == [1.0, 2.0]
+        # a follow up search with one new chunk and one chunk with new content
+        assert rerank_passages(
+            model, query="q", chunk_ids=["a", "b", "c"], passages=["x", "y", "zzz"]
+        ) == [1.0, 1.0, 3.0]
+        # a different query scores everything again
+        rerank_passages(model, query="q2", chunk_ids=["a"], passages=["x"])
+
+    assert model.scored_passages == ["x", "yy", "y", "zzz", "x"]
+    assert (cache.hits, cache.misses) == (1, 5)
+
+
+def test_rerank_score_cache_eviction_and_expiry() -> None:
+    cache = RerankScoreCache(max_entries=2, ttl_seconds=60)
+    cache.put_many({("a",): 1.0, ("b",): 2.0})
+    assert cache.get_many([("a",)]) == {("a",): 1.0}
+
+    # least recently used entry is evicted
+    cache.put_many({("c",): 3.0})
+    assert cache.get_many([("a",), ("b",), ("c",)]) == {("a",): 1.0, ("c",): 3.0}
+
+    expiring_cache = RerankScoreCache(max_entries=2, ttl_seconds=0)
+    expiring_cache.put_many({("a",): 1.0})
+    assert expiring_cache.get_many([("a",)]) == {}
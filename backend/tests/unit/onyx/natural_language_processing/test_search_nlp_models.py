@@ -0,0 +1,68 @@
+import time
+from unittest.mock import patch
+
+from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import EmbedRequest
+from shared_configs.model_server_models import EmbedResponse
+
+
+def _build_local_model(max_concurrent_batches: int = 1) -> EmbeddingModel:
+    return EmbeddingModel(
+        server_host="localhost",
+        server_port=9000,
+        model_name="test-model",
+        normalize=True,
+        query_prefix=None,
+        passage_prefix=None,
+        api_key=None,
+        api_url=None,
+        provider_type=None,
+        max_concurrent_batches=max_concurrent_batches,
+    )
+
+
+def test_encode_keeps_order_with_concurrent_batches() -> None:
+    model = _build_local_model(max_concurrent_batches=3)
+
+    def _fake_request(embed_request: EmbedRequest) -> EmbedResponse:
+        # later batches finish first
+        time.sleep(0.05 / int(embed_request.texts[0]))
+        return EmbedResponse(embeddings=[[float(text)] for text in embed_request.texts])
+
+    texts = [str(i) for i in range(1, 11)]
+    with patch.object(
+        model, "_make_model_server_request", side_effect=_fake_request
+    ) as mock_request:
+        embeddings = model.encode(
+            texts, text_type=EmbedTextType.PASSAGE, local_embedding_batch_size=2
+        )
+
+    assert embeddings == [[float(text)] for text in texts]
+    assert mock_request.call_count == 5
+
+
+def test_encode_sort_by_length_batches_similar_lengths() -> None:
+    model = _build_local_model()
+
+    def _fake_request(embed_request: EmbedRequest) -> EmbedResponse:
+        return EmbedResponse(
+            embeddings=[[float(len(text.split()))] for text in embed_request.texts]
+        )
+
+    texts = ["word " * length for length in [1, 40, 2, 30, 3, 20]]
+    with patch.object(
+        model, "_make_model_server_request", side_effect=_fake_request
+    ) as mock_request:
+        embeddings = model.encode(
+            texts,
+            text_type=EmbedTextType.PASSAGE,
+            local_embedding_batch_size=2,
+            sort_by_length=True,
+        )
+
+    assert embeddings == [[float(len(text.split()))] for text in texts]
+    assert [
+        [len(text.split()) for text in call.args[0].texts]
+        for call in mock_request.call_args_list
+    ] == [[1, 2], [3, 20], [30, 40]]
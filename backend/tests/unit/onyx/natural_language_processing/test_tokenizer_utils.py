@@ -0,0 +1,38 @@
+from onyx.configs.model_configs import DOCUMENT_ENCODER_MODEL
+from onyx.indexing.chunker import Chunker
+from onyx.natural_language_processing.utils import get_tokenizer
+
+_TEXT = "Onyx indexes Confluence, Slack and Google Drive. Ünïcödé works too!"
+
+
+def test_batch_token_counts_match_single_encodes() -> None:
+    tokenizer = get_tokenizer(model_name=DOCUMENT_ENCODER_MODEL, provider_type=None)
+    texts = [_TEXT, "", "a few more words"]
+
+    assert tokenizer.encode_batch(texts) == [tokenizer.encode(text) for text in texts]
+    assert tokenizer.count_tokens_batch(texts) == [
+        len(tokenizer.encode(text)) for text in texts
+    ]
+    assert tokenizer.count_tokens(_TEXT) == len(tokenizer.tokenize(_TEXT))
+
+
+def test_encode_with_offsets_points_into_the_string() -> None:
+    tokenizer = get_tokenizer(model_name=DOCUMENT_ENCODER_MODEL, provider_type=None)
+
+    tokens, offsets = tokenizer.encode_with_offsets(_TEXT)
+
+    assert tokens == tokenizer.encode(_TEXT)
+    assert len(offsets) == len(tokens)
+    assert offsets == sorted(offsets)
+    assert _TEXT[offsets[1] :].startswith("indexes")
+
+
+def test_oversized_chunks_are_cut_from_the_original_text() -> None:
+    tokenizer = get_tokenizer(model_name=DOCUMENT_ENCODER_MODEL, provider_type=None)
+    chunker = Chunker(tokenizer=tokenizer)
+
+    split_texts = chunker._split_oversized_chunk(_TEXT, content_token_limit=4)
+
+    assert len(split_texts) > 1
+    assert "".join(split_texts) == _TEXT
+    assert all(tokenizer.count_tokens(text) <= 5 for text in split_texts)
@@ -0,0 +1,43 @@
+from unittest.mock import MagicMock
+from unittest.mock import Mock
+from unittest.mock import patch
+
+from onyx.configs.constants import OnyxCeleryTask
+from onyx.redis.redis_document_set import RedisDocumentSet
+
+
+def test_document_set_sync_tasks_are_batched() -> None:
+    docs = [Mock(id=f"doc_{i}") for i in range(5)]
+    db_session = MagicMock()
+    db_session.scalars.return_value.yield_per.return_value = docs
+    celery_app = Mock()
+    redis_client = Mock()
+
+    with patch("onyx.redis.redis_object_helper.get_redis_client"), patch(
+        "onyx.redis.redis_document_set.construct_document_select_by_docset"
+    ), patch("onyx.redis.redis_document_set.VESPA_SYNC_BATCH_SIZE", 2):
+        rds = RedisDocumentSet(tenant_id=None, id=1)
+        result = rds.generate_tasks(
+            max_tasks=10,
+            celery_app=celery_app,
+            db_session=db_session,
+            redis_client=redis_client,
+            lock=Mock(),
+            tenant_id=None,
+        )
+
+    assert result == (3, 3)
+    assert [
+        call.kwargs["kwargs"]["document_ids"]
+        for call in celery_app.send_task.call_args_list
+    ] == [["doc_0", "doc_1"], ["doc_2", "doc_3"], ["doc_4"]]
+    assert all(
+        call.args[0] == OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK
+        for call in celery_app.send_task.call_args_list
+    )
+
+    # every task is tracked in the taskset under the id it was sent with
+    assert [call.args for call in redis_client.sadd.call_args_list] == [
+        (rds.taskset_key, call.kwargs["task_id"])
+        for call in celery_app.send_task.call_args_list
+    ]